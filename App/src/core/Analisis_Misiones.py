@@ -1,7 +1,8 @@
 # Motor/Analisis_Misiones.py
 # -*- coding: utf-8 -*-
 from __future__ import annotations
-from typing import List, Dict, Any
+from bisect import bisect_left, bisect_right
+from typing import List, Dict, Any, Iterable, Optional, Tuple, Union
 from datetime import datetime, date
 
 from src.core.Formatos import (
@@ -9,12 +10,92 @@ from src.core.Formatos import (
     fecha_en_rango,
     dentro_de_anios,
     unir_listas,
-    dparse
+    dparse_registro
 )
 
 
+# =============================================================================
+#  ÍNDICE DE PRESTACIONES (uno por paciente)
+# =============================================================================
+class PrestacionesIndex:
+    """
+    Prestaciones de un paciente indexadas por código normalizado.
+    
+    Cada código guarda sus fechas ordenadas (y la posición original de cada
+    prestación), así que las consultas "antes de la nómina", "en el mes/año" o
+    "en la ventana" son bisect en vez de recorrer todo el historial por regla.
+    """
+
+    def __init__(self, prestaciones: Iterable[Dict[str, Any]] = ()):
+        self.prestaciones: List[Dict[str, Any]] = list(prestaciones or [])
+        self._posiciones: Dict[str, List[int]] = {}
+        entradas: Dict[str, List[Tuple[datetime, int]]] = {}
+        for pos, p in enumerate(self.prestaciones):
+            c = p.get("codigo_limpio") or limpiar_codigo(str(p.get("codigo", "") or ""))
+            if not c:
+                continue
+            self._posiciones.setdefault(c, []).append(pos)
+            dt = dparse_registro(p) if p.get("fecha") else None
+            if dt:
+                entradas.setdefault(c, []).append((dt, pos))
+        self._entradas: Dict[str, List[Tuple[datetime, int]]] = {}
+        self._fechas: Dict[str, List[datetime]] = {}
+        for c, lista in entradas.items():
+            lista.sort()
+            self._entradas[c] = lista
+            self._fechas[c] = [dt for dt, _ in lista]
+
+    def __len__(self) -> int:
+        return len(self.prestaciones)
+
+    def entradas(self, codigo: str, hasta: Optional[datetime] = None) -> List[Tuple[datetime, int]]:
+        """(fecha, posición) del código en orden ascendente; con `hasta`, solo fechas <= hasta."""
+        lista = self._entradas.get(codigo, [])
+        if hasta is None:
+            return lista
+        return lista[:bisect_right(self._fechas[codigo], hasta)] if lista else lista
+
+    def fechas(self, codigo: str, hasta: Optional[datetime] = None) -> List[datetime]:
+        """Fechas del código en orden ascendente (con `hasta`, solo las <= hasta)."""
+        fechas = self._fechas.get(codigo, [])
+        return fechas[:bisect_right(fechas, hasta)] if hasta is not None else fechas
+
+    def contar(self, codigo: str, desde: Optional[datetime] = None, hasta: Optional[datetime] = None) -> int:
+        """Prestaciones fechadas del código con desde <= fecha < hasta."""
+        fechas = self._fechas.get(codigo, [])
+        i = bisect_left(fechas, desde) if desde is not None else 0
+        j = bisect_left(fechas, hasta) if hasta is not None else len(fechas)
+        return max(0, j - i)
+
+    def items(self, codigos: Iterable[str]) -> List[Dict[str, Any]]:
+        """Prestaciones de los códigos dados, en el orden original de la lista."""
+        pos = sorted(p for c in set(codigos) for p in self._posiciones.get(c, ()))
+        return [self.prestaciones[i] for i in pos]
+
+
+def indice_prestaciones(prest: Union[PrestacionesIndex, Iterable[Dict[str, Any]], None]) -> PrestacionesIndex:
+    """El índice ya construido, o uno nuevo para una lista de prestaciones."""
+    return prest if isinstance(prest, PrestacionesIndex) else PrestacionesIndex(prest)
+
+
+def _ventana_frecuencia(freq_type: str, fecha_ref) -> Optional[Tuple[Optional[datetime], Optional[datetime]]]:
+    """[desde, hasta) de la regla de frecuencia; None si el tipo no cuenta nada."""
+    if freq_type == "Mes":
+        # Mismo Mes y Año (Lógica Calendario Estricta)
+        desde = datetime(fecha_ref.year, fecha_ref.month, 1)
+        if fecha_ref.month == 12:
+            return desde, datetime(fecha_ref.year + 1, 1, 1)
+        return desde, datetime(fecha_ref.year, fecha_ref.month + 1, 1)
+    if freq_type == "Año":
+        return datetime(fecha_ref.year, 1, 1), datetime(fecha_ref.year + 1, 1, 1)
+    if freq_type == "Vida":
+        # Histórico completo (Siempre True si existe)
+        return None, None
+    return None
+
+
 def buscar_codigos(
-    items_procesados: List[Dict], # Expects items with 'codigo_limpio'
+    items_procesados: Union[List[Dict], PrestacionesIndex], # Expects items with 'codigo_limpio'
     codigos_objetivo: List[str],
     fecha_nomina,
     ventana_dias,
@@ -31,8 +112,8 @@ def buscar_codigos(
     if not target_set:
         return []
 
-    for item in items_procesados:
-        # Optimization 2: Use pre-cleaned code
+    # Optimization 2: solo las prestaciones de los códigos buscados (índice por código)
+    for item in indice_prestaciones(items_procesados).items(target_set):
         codigo = item.get("codigo_limpio")
         
         if codigo not in target_set:
@@ -65,12 +146,12 @@ class FrequencyValidator:
     """Motor de validación de frecuencias complejas."""
     
     @staticmethod
-    def validar(items_procesados: List[Dict], config: Dict, fecha_ref: date) -> Dict:
+    def validar(items_procesados: Union[List[Dict], PrestacionesIndex], config: Dict, fecha_ref: date) -> Dict:
         """
         Valida una regla de frecuencia.
         
         Args:
-            items_procesados: Lista de prestaciones del paciente (con 'codigo_limpio').
+            items_procesados: Prestaciones del paciente (lista o PrestacionesIndex ya construido).
             config: Dict con {code, freq_type, freq_qty, periodicity}.
             fecha_ref: Fecha de nómina/corte.
             
@@ -101,56 +182,9 @@ class FrequencyValidator:
         if not code_target:
             return {"result_str": "-", "periodicity": periodicity, "ok": False}
 
-        count = 0
-        
-        # Debugging (Solo si hay match potencial)
-        debug_matches = []
-        
-        # Filtro por tipo de ventana
-        for item in items_procesados:
-            # Normalización robusta del código del item (fallback si no tiene pre-calculado)
-            c = item.get("codigo_limpio")
-            if not c:
-                c = limpiar_codigo(str(item.get("codigo", "")))
-            
-            # Comparación exacta de códigos
-            if c != code_target:
-                continue
-            
-            f_item = item.get("fecha")
-            if not f_item: continue 
-             
-            # Lógica temporal
-            # OJO: f_item puede ser str o date. Usamos dparse para robustez.
-            if not isinstance(f_item, (date, datetime)):
-                f_item_parsed = dparse(f_item)
-                if f_item_parsed:
-                    f_item_date = f_item_parsed.date()
-                else:
-                    continue
-            else:
-                 f_item_date = f_item.date() if isinstance(f_item, datetime) else f_item
-                
-            match = False
-            
-            if freq_type == "Mes":
-                # Mismo Mes y Año (Lógica Calendario Estricta)
-                # NO usar diferencia de días. Solo coincidencia de Mes/Año.
-                if f_item_date.year == fecha_ref.year and f_item_date.month == fecha_ref.month:
-                    match = True
-                    
-            elif freq_type == "Año":
-                # Mismo Año
-                if f_item_date.year == fecha_ref.year:
-                    match = True
-                    
-            elif freq_type == "Vida":
-                # Histórico completo (Siempre True si existe)
-                match = True
-            
-            if match:
-                count += 1
-                debug_matches.append(f"{f_item_date.strftime('%d-%m-%Y')}")
+        # Conteo por bisect sobre las fechas del código (índice del paciente)
+        ventana = _ventana_frecuencia(freq_type, fecha_ref)
+        count = indice_prestaciones(items_procesados).contar(code_target, *ventana) if ventana else 0
 
         # Resultado
         ok = count >= target_qty
@@ -353,11 +387,13 @@ def analizar_misiones(
         
         f_raw = c.get("fecha")
         if f_raw:
-            dt_obj = dparse(f_raw)
+            dt_obj = dparse_registro(c)
             if dt_obj:
                 c_new["fecha"] = dt_obj.date()
         
         casos_procesados.append(c_new)
+    # Índice por código: se construye una vez y lo comparten todas las misiones/reglas
+    indice = PrestacionesIndex(casos_procesados)
 
     filas = []
 
@@ -374,7 +410,7 @@ def analizar_misiones(
         # 2026-02-04: Límite global eliminado (revisión 100 años por defecto)
         
         objetivos = buscar_codigos(
-            casos_procesados,
+            indice,
             m["objetivos"],
             fecha_nomina_dt,
             VENTANA_VIGENCIA_DIAS,
@@ -385,7 +421,7 @@ def analizar_misiones(
         )
 
         habilitantes = buscar_codigos(
-            casos_procesados,
+            indice,
             m.get("habilitantes", []),
             fecha_nomina_dt,
             VENTANA_VIGENCIA_DIAS,
@@ -396,7 +432,7 @@ def analizar_misiones(
         )
 
         excluyentes = buscar_codigos(
-            casos_procesados,
+            indice,
             m.get("excluyentes", []),
             fecha_nomina_dt,
             VENTANA_VIGENCIA_DIAS,
@@ -414,7 +450,7 @@ def analizar_misiones(
         # Logic: If key exists, use it. If not, fallback to True IF frequencies key has data?
         # Let's stick to explicit: if m.get("active_frequencies") is truthy.
         if m.get("active_frequencies"):
-            frecuencias = analizar_frecuencias(casos_procesados, m, fecha_nomina_dt)
+            frecuencias = analizar_frecuencias(indice, m, fecha_nomina_dt)
 
         fila = construir_fila(
             rut,
@@ -31,13 +31,22 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
 # Local
-from src.core.Formatos import dparse, _norm
+from src.core.Formatos import dparse, _norm, normalizar_rut
 from src.utils.Direcciones import XPATHS
 from src.core.locators import XPATHS as LOCS
 from src.utils.Errores import SpinnerStuck, pretty_error
-from src.utils.Esperas import ESPERAS, espera, get_wait_timeout
+from src.utils.Esperas import ESPERAS, espera, get_wait_timeout, registrar_condicion, ventana_asentamiento
 from src.utils.Terminal import log_error, log_info, log_ok, log_warn, log_debug
 from src.core.flows import ensure_logged_in as ensure_logged_in_flow
+from src.core.waits import (
+    SENAL_ERROR, SENAL_SIN_ENVIO, SENAL_TIMEOUT, buscar_una_vez, esperar_spinner_js, registrar_spinner,
+)
+from src.core.captura_red import CapturaRed, captura_habilitada, configurar_opciones
+from src.core.cartola_casos import CasosCartola, JS_FILAS_CON_DETALLE, JS_MARCAR_CHECKBOXES
+from src.core.cambio_spa import HuellaSPA, JS_IR_RUTA, ruta_hash
+from src.core.estado_pagina import detectar_estado
+from src.core.selectors import get_locator_registry
+from src.core.vigilante_sesion import VigilanteSesion
 
 
 # =============================================================================
@@ -50,6 +59,8 @@ def iniciar_driver(debug_address: str, driver_path: str):
     """
     opts = webdriver.EdgeOptions()
     opts.debugger_address = debug_address
+    if captura_habilitada():
+        configurar_opciones(opts)
 
     if not os.path.exists(driver_path):
         log_error(f"Driver no encontrado: {driver_path}")
@@ -63,6 +74,8 @@ def iniciar_driver(debug_address: str, driver_path: str):
         
         # Crear wrapper
         sigges = SiggesDriver(driver)
+        if captura_habilitada():
+            sigges.captura = CapturaRed(driver)
         
         # Validar conexión inmediatamente
         is_valid, error_msg = sigges.validar_conexion()
@@ -98,6 +111,21 @@ class SiggesDriver:
     def __init__(self, driver: webdriver.Edge):
         self.driver = driver
         self._last_health_check = 0
+        # Captura de red CDP opcional (src/core/captura_red.py); None = solo DOM
+        self.captura: Optional[CapturaRed] = None
+        # Prestaciones del caso desde la respuesta JSON de su detalle: id(raíz) -> (raíz, filas)
+        self._prestaciones_red: Dict[int, Tuple[Any, List[Dict[str, str]]]] = {}
+        # Filas/checkboxes de la cartola leídos en bloque (src/core/cartola_casos.py)
+        self._casos_cartola: Optional[CasosCartola] = None
+        # True mientras hay VARIOS casos abiertos (SesionCasos): los lectores de
+        # sección buscan solo dentro de su raíz, nunca en toda la página
+        self.lectura_acotada: bool = False
+        # RUT cuya mini-tabla quedó en el DOM tras la última búsqueda confirmada
+        self._rut_resultados: str = ""
+        # Señal con que terminó la última búsqueda (src/core/waits.py, SENAL_*)
+        self.ultima_senal_busqueda: Optional[str] = None
+        # Vigilante de sesión entre pacientes (src/core/vigilante_sesion.py); lo crea Conexiones
+        self.vigilante: Optional[VigilanteSesion] = None
 
     # =========================================================================
     #                    CONNECTION HEALTH & VALIDATION
@@ -160,7 +188,38 @@ class SiggesDriver:
 
     def esperar_spinner(self, appear_timeout: float = 0.6, diff_timeout: float = 60.0, clave_espera: str = None) -> None:
         """
-        Detector Inteligente v2.0:
+        Detector Inteligente v3.0 (MutationObserver):
+        Una sola llamada execute_async_script que bloquea en el navegador hasta que el
+        spinner aparece y se va, o hasta que el DOM queda quieto sin spinner.
+        La latencia se reporta a TimingContext.
+        Si la espera JS no está disponible, usa el sondeo v2.0 (_esperar_spinner_polling).
+        """
+        # [TIMEOUT FIX] Si no hay clave, usar diff_timeout (60s).
+        timeout_val = get_wait_timeout(clave_espera) if clave_espera else diff_timeout
+        ventana, ventana_max = ventana_asentamiento(clave_espera)
+        try:
+            res = esperar_spinner_js(self.driver, appear_timeout=appear_timeout, timeout=timeout_val,
+                                     asentamiento=ventana, asentamiento_max=ventana_max)
+        except TimeoutException:
+            res = {"status": "timeout"}
+        except Exception as e:
+            log_debug(f"[DEBUG] esperar_spinner: espera JS no disponible ({e}), usando sondeo")
+            return self._esperar_spinner_polling(appear_timeout, diff_timeout, clave_espera)
+
+        total_ms = float(res.get("total_ms") or 0.0)
+        registrar_spinner(clave_espera, res)
+        if res.get("status") == "timeout":
+            msg = f"⚠️ Spinner detectado por más de {timeout_val:.1f}s (Posible 'Stuck')"
+            log_error(msg)
+            # [ROBUST] Lanzamos excepción para activar recovery en Conexiones.py
+            raise TimeoutException(msg)
+
+        if total_ms > 3000:
+            log_info(f"⏳ Carga terminada en {total_ms/1000:.1f}s")
+
+    def _esperar_spinner_polling(self, appear_timeout: float = 0.6, diff_timeout: float = 60.0, clave_espera: str = None) -> None:
+        """
+        Detector Inteligente v2.0 (fallback por sondeo):
         1. Fase Detección (0 - 0.6s): Sondea rápidisimo si APARECE.
            - Si no aparece en este tiempo -> Asume que no cargó nada y retorna.
            - Si aparece -> Pasa a Fase 2.
@@ -224,40 +283,25 @@ class SiggesDriver:
     # =========================================================================
 
     def _find(self, locators: Any, mode: str = "clickable", clave_espera: str = "default") -> Optional[Any]:
-        # ... (código existente de _find) ...
-        # Copia local de _find para evitar borrarlo si el replace range lo cubre
-        # (Nota: Asegúrate de que este bloque no reemplace _find si no toca sus lineas internas)
-        # En este caso, el range incluye _find? Si StartLine es 139 y EndLine 300, SÍ.
-        # Mejor usar el contenido original de _find aquí o ajustar range.
-        # AJUSTE: Range cubre 139-300. _find empieza en 224.
-        # Voy a re-escribir _find tal cual
-        
         """
         Método interno para buscar elementos iterando sobre una lista de XPaths.
-        Restaura la funcionalidad de _find perdida.
+        Todos los candidatos se prueban en una pasada JS por sondeo, primero el
+        ganador de la sesión y luego por aciertos (src/core/selectors.py).
         """
         if isinstance(locators, str):
             locs = [locators]
         else:
             locs = list(locators)
 
-        # Mapear modo a Expected Condition
-        cond = {
-            "presence": EC.presence_of_element_located,
-            "visible": EC.visibility_of_element_located,
-            "clickable": EC.element_to_be_clickable
-        }.get(mode, EC.element_to_be_clickable)
-
-        # Timeout configurable vía tabla ESPERAS
+        # Timeout configurable vía tabla ESPERAS (total, no por candidato)
         timeout = get_wait_timeout(clave_espera) or 5.0
 
-        for xp in locs:
-            try:
-                el = WebDriverWait(self.driver, timeout).until(cond((By.XPATH, xp)))
-                return el
-            except Exception:
-                continue
-        return None
+        t0 = time.time()
+        if mode not in ("presence", "visible", "clickable"):
+            mode = "clickable"
+        el = get_locator_registry().localizar(self.driver, locs, mode, timeout)
+        registrar_condicion(clave_espera, time.time() - t0, ok=el is not None)
+        return el
 
     def _click(self, locators: Any, scroll: bool = True, wait_spinner: bool = True, *args) -> bool:
         """
@@ -306,6 +350,22 @@ class SiggesDriver:
         """Wrapper rápido sobre driver.find_elements()."""
         return self._first(self.driver, by, selector)
 
+    def _labels_seccion(self, root, condicion: str) -> List[Any]:
+        """
+        <p> de sección que cumplen la condición XPath, primero dentro del caso.
+        La búsqueda en toda la página solo se permite con un único caso abierto.
+        """
+        if root is not None:
+            try:
+                labels = root.find_elements(By.XPATH, f".//div/label/p[{condicion}]")
+            except Exception:
+                labels = []
+            if labels or self.lectura_acotada:
+                return labels
+        elif self.lectura_acotada:
+            return []
+        return self.driver.find_elements(By.XPATH, f"//div/label/p[{condicion}]")
+
     # =========================================================================
     #                       WRAPPERS PÚBLICOS
     # =========================================================================
@@ -406,18 +466,9 @@ class SiggesDriver:
             
         self.type(input_rut, rut)
         
-        # 4. Click Buscar
-        if not self._click_xpath(XPATHS["BTN_BUSCAR"][0]):
-            # Try fallbacks
-            found = False
-            for alt_xpath in XPATHS["BTN_BUSCAR"][1:]:
-                if self._click_xpath(alt_xpath):
-                    found = True
-                    break
-            if not found:
-                 raise Exception("Botón Buscar no encontrado o no clickeable.")
-        
-        self._wait_smart()
+        # 4. Buscar (un solo envío + señal de resultado)
+        if self.buscar() is None:
+            raise Exception("Botón Buscar no encontrado o no clickeable.")
         
         dt = time.time() - t0
         log_info(f"⏱️ [PERF] Búsqueda de paciente completada en {dt:.2f}s")
@@ -657,6 +708,9 @@ class SiggesDriver:
         """
         Navega a Búsqueda de Paciente usando estrictamente el Menú Lateral.
         """
+        # Los handles de casos de la cartola son del paciente anterior
+        self._casos_cartola = None
+        self._prestaciones_red.clear()
         # 0. Verificar Login antes de nada
         if self.sesion_cerrada():
              log_warn("🔐 Sesión cerrada detectada al intentar navegar. Iniciando Login...")
@@ -684,12 +738,80 @@ class SiggesDriver:
              self.driver.get(XPATHS["BUSQUEDA_URL"])
              self._wait_smart()
 
+    def huella_spa(self) -> Optional[HuellaSPA]:
+        """Ruta, menú, input RUT y texto de la mini-tabla en una sola llamada JS."""
+        return HuellaSPA.leer(self.driver, XPATHS["MINI_TABLA_TBODY"][:2], XPATHS["MENU_CONTENEDOR"],
+                              XPATHS["INPUT_RUT"])
+
+    def ir_a_busqueda_spa(self, timeout: float = 3.0) -> Optional[HuellaSPA]:
+        """
+        Vuelve a Búsqueda de Paciente con el router de la SPA (cambia location.hash,
+        sin driver.get ni recarga de la app).
+        
+        Retorna la huella de la página de búsqueda lista para el siguiente RUT, o
+        None si no se está dentro de la app o la huella no confirma el cambio
+        (el llamador usa entonces la navegación completa).
+        """
+        h = self.huella_spa()
+        if h is None or not h.app:
+            return None
+        # Los handles de casos de la cartola son del paciente anterior
+        self._casos_cartola = None
+        self._prestaciones_red.clear()
+        rutas = [ruta_hash(XPATHS["BUSQUEDA_URL"])] + [ruta_hash(u) for u in XPATHS.get("BUSQUEDA_URL_FALLBACKS", [])]
+        if h.en_ruta(rutas) and h.input:
+            return h
+
+        def _busqueda_lista(_):
+            x = self.huella_spa()
+            return x if x and x.app and x.en_ruta(rutas) and x.input else False
+
+        t0 = time.time()
+        try:
+            self.driver.execute_script(JS_IR_RUTA, rutas[0])
+            h = WebDriverWait(self.driver, timeout, poll_frequency=0.1).until(_busqueda_lista)
+        except Exception as e:
+            log_debug(f"[DEBUG] ir_a_busqueda_spa: huella no confirmó Búsqueda ({type(e).__name__})")
+            return None
+        log_debug(f"⏱️ [PERF] Búsqueda vía router SPA en {time.time() - t0:.2f}s")
+        return h
+
+    def marcar_resultados(self, rut: str) -> None:
+        """Registra que la mini-tabla del DOM corresponde a `rut` (búsqueda confirmada)."""
+        self._rut_resultados = normalizar_rut(rut)
+
+    def resultados_renovados(self, previos: str, rut: str = "", timeout: float = 1.5) -> bool:
+        """
+        Tras buscar sin recargar: True cuando la mini-tabla ya no muestra el texto
+        del paciente anterior (`previos`, de la huella previa a la búsqueda).
+        Sin resultados previos no hay nada que confundir, y si la mini-tabla previa
+        ya era del mismo `rut` (filas consecutivas del mismo paciente) el texto
+        no cambia pero los datos son los buscados.
+        """
+        if not previos:
+            return True
+        if rut and normalizar_rut(rut) == self._rut_resultados:
+            return True
+
+        def _cambiaron(_):
+            x = self.huella_spa()
+            return x is not None and x.resultados != previos
+
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=0.1).until(_cambiaron)
+            return True
+        except Exception:
+            return False
+
     def ir_a_cartola(self) -> bool:
         """Navega a cartola unificada."""
         # Check rápido
         if "cartola-unificada" in self.driver.current_url:
             return True
 
+        if self.captura:
+            self.captura.marcar()
+
         # Asegurar Menú Abierto (Smart Check)
         self.asegurar_menu_abierto()
 
@@ -710,75 +832,163 @@ class SiggesDriver:
     #                     EXPANSIÓN DE CASOS
     # =========================================================================
 
+    def _leer_casos_cartola(self) -> Optional[CasosCartola]:
+        """Casos de la cartola (textos + handles) en una sola llamada JS; queda en caché."""
+        self._casos_cartola = CasosCartola.leer(
+            self.driver, [*(XPATHS.get("TABLA_CASOS_CONTAINER") or []), *(XPATHS.get("CONT_CARTOLA") or [])]
+        )
+        return self._casos_cartola
+
+    def _fila_caso(self, indice: int, refrescar: bool = False) -> Tuple[Optional[Any], Optional[Any]]:
+        """
+        (fila, checkbox) del caso: handles guardados al leer la cartola; si no hay,
+        una lectura JS; y como último recurso el contenedor por XPath (Biblia).
+        """
+        cc = None if refrescar else self._casos_cartola
+        if cc is None:
+            cc = self._leer_casos_cartola()
+        if cc is not None and len(cc):
+            if indice >= len(cc):
+                log_error(f"❌ Índice de caso {indice} fuera de rango (Total: {len(cc)})")
+                return None, None
+            return cc.fila(indice), cc.checkbox(indice)
+
+        # 1. Buscar el contenedor de la tabla de casos
+        # Xpath: .../div[5]/div[1]/div[2]
+        log_debug(f"[DEBUG] expandir_caso: buscando contenedor de casos...")
+        container = self.find(XPATHS["TABLA_CASOS_CONTAINER"][0], wait_seconds=1.0)
+        if not container:
+            log_error("❌ No se encontró contenedor de tabla de casos.")
+            return None, None
+        # 2. Buscar las "filas" (son DIVs directos del contenedor)
+        # El usuario dice: .../div[2]/div[1], .../div[2]/div[2], etc.
+        filas = container.find_elements(By.XPATH, "./div")
+        log_debug(f"[DEBUG] expandir_caso: {len(filas)} filas encontradas")
+        if not filas:
+            log_warn("⚠️ Contenedor de casos vacío.")
+            return None, None
+        if indice >= len(filas):
+            log_error(f"❌ Índice de caso {indice} fuera de rango (Total: {len(filas)})")
+            return None, None
+        fila = filas[indice]
+        # 3. Botón de expansión (Checkbox). User path: .../div[1]/div/label/input
+        return fila, self._first(fila, By.XPATH, ".//input[@type='checkbox']")
+
     def expandir_caso(self, indice: int) -> Optional[Any]:
         """
         Expande un caso por su índice en la CARTOLA (Estructura DIVs).
         Updated 2026-01-29 per User 'Biblia Sigges'.
+        Usa los handles guardados por extraer_tabla_provisoria_completa (sin re-buscar
+        el contenedor); si quedaron obsoletos se relee la cartola una vez.
         """
         try:
             t0 = time.time()
-            log_debug(f"[DEBUG] expandir_caso: buscando contenedor de casos...")
-            # 1. Buscar el contenedor de la tabla de casos
-            # Xpath: .../div[5]/div[1]/div[2]
-            container = self.find(XPATHS["TABLA_CASOS_CONTAINER"][0], wait_seconds=1.0)
-            if not container:
-                log_error("❌ No se encontró contenedor de tabla de casos.")
+            fila, chk = self._fila_caso(indice)
+            if fila is None:
                 return None
-                
-            # 2. Buscar las "filas" (son DIVs directos del contenedor)
-            # El usuario dice: .../div[2]/div[1], .../div[2]/div[2], etc.
-            filas = container.find_elements(By.XPATH, "./div")
-            log_debug(f"[DEBUG] expandir_caso: {len(filas)} filas encontradas")
-            
-            if not filas:
-                log_warn("⚠️ Contenedor de casos vacío.")
-                return None
-                
-            if indice >= len(filas):
-                log_error(f"❌ Índice de caso {indice} fuera de rango (Total: {len(filas)})")
+            if chk is None:
+                log_error(f"❌ No se encontró checkbox en caso {indice}")
                 return None
-                
-            fila = filas[indice]
+            log_debug(f"[DEBUG] expandir_caso: checkbox encontrado, clickeando...")
+            if self.captura:
+                self.captura.marcar()
             
-            # 3. Buscar el botón de expansión (Checkbox)
-            # User path: .../div[1]/div/label/input
-            # Relative path from row (div[i]): ./div/label/input
-            try:
-                chk = self._first(fila, By.XPATH, ".//input[@type='checkbox']")
-                log_debug(f"[DEBUG] expandir_caso: checkbox encontrado, clickeando...")
-                
-                # Solo clickear si no está seleccionado (para expandir)
-                # O si la función es toggle, clickear siempre. 
-                # El usuario dice "activar el caso", asumo que si ya está activo no es necesario.
-                # PERO: cerrar_caso llama a esto mismo.
-                # Asumiremos toggle.
-                
-                # Scroll y Click
-                self.click(chk)
-                self._wait_smart()
-                # Espera adicional solo si estamos EXPANDIENDO (si el input quedó checked)
-                if chk.is_selected():
-                    try:
-                        WebDriverWait(self.driver, 8).until(
-                            lambda d: len(fila.find_elements(By.TAG_NAME, "td")) > 0
-                        )
-                    except Exception:
-                        espera(0.5)
-                
-                log_debug(f"[DEBUG] expandir_caso: caso {indice} expandido OK")
-                
-                dt = time.time() - t0
-                log_info(f"⏱️ [PERF] Caso {indice} expandido en {dt:.2f}s")
-                return fila
-                
-            except Exception as e:
-                log_error(f"❌ No se encontró checkbox en caso {indice}: {e}")
-                return None
+            # Toggle: cerrar_caso llama a esto mismo.
+            # Scroll y Click
+            if not self.click(chk):
+                # Handle obsoleto (la cartola se re-renderizó): releer y reintentar una vez
+                fila, chk = self._fila_caso(indice, refrescar=True)
+                if chk is None or not self.click(chk):
+                    log_error(f"❌ No se pudo clickear checkbox del caso {indice}")
+                    return None
+            self._wait_smart()
+            # Espera adicional solo si estamos EXPANDIENDO (si el input quedó checked)
+            if chk.is_selected():
+                try:
+                    WebDriverWait(self.driver, 8).until(
+                        lambda d: len(fila.find_elements(By.TAG_NAME, "td")) > 0
+                    )
+                except Exception:
+                    espera(0.5)
+                self._prestaciones_desde_red([fila])
+            else:
+                self._prestaciones_red.pop(id(fila), None)
+            
+            log_debug(f"[DEBUG] expandir_caso: caso {indice} expandido OK")
+            
+            dt = time.time() - t0
+            log_info(f"⏱️ [PERF] Caso {indice} expandido en {dt:.2f}s")
+            return fila
                 
         except Exception as e:
             log_error(f"❌ Error crítico expandiendo caso {indice}: {e}")
             return None
 
+    def expandir_casos(self, indices: List[int]) -> Dict[int, Any]:
+        """
+        Expande varios casos en lote: un clic JS sobre todos los checkboxes sin
+        marcar, UNA espera de spinner y una espera de que todas las filas tengan
+        detalle. Los casos ya abiertos no se tocan (no es toggle).
+        Retorna {indice: raíz del caso} de los que quedaron abiertos.
+        """
+        t0 = time.time()
+        filas: Dict[int, Any] = {}
+        chks: List[Any] = []
+        for i in indices:
+            fila, chk = self._fila_caso(i)
+            if fila is not None and chk is not None:
+                filas[i] = fila
+                chks.append(chk)
+        if not filas:
+            return {}
+        if self.captura:
+            self.captura.marcar()
+        try:
+            n = self.driver.execute_script(JS_MARCAR_CHECKBOXES, chks, True)
+        except Exception as e:
+            # Handles obsoletos o JS bloqueado: caso por caso (expandir_caso relee la cartola)
+            log_debug(f"[DEBUG] expandir_casos: clic en lote falló ({e}), expandiendo uno a uno")
+            return {i: r for i, r in ((i, self.expandir_caso(i)) for i in filas) if r is not None}
+        if n:
+            self._wait_smart()
+            try:
+                WebDriverWait(self.driver, 8).until(
+                    lambda d: d.execute_script(JS_FILAS_CON_DETALLE, list(filas.values()))
+                )
+            except Exception:
+                espera(0.5)
+        if n == 1 and len(filas) == 1:
+            self._prestaciones_desde_red(list(filas.values()))
+        log_info(f"⏱️ [PERF] {len(filas)} casos expandidos en lote ({n} clics) en {time.time() - t0:.2f}s")
+        return filas
+
+    def colapsar_casos(self, indices: List[int]) -> None:
+        """Colapsa en lote los casos que sigan abiertos (un clic JS y una espera)."""
+        self._prestaciones_red.clear()
+        try:
+            chks = [c for c in (self._fila_caso(i)[1] for i in indices) if c is not None]
+            if chks and self.driver.execute_script(JS_MARCAR_CHECKBOXES, chks, False):
+                self._wait_smart()
+        except Exception as e:
+            log_debug(f"[DEBUG] colapsar_casos: no se pudieron colapsar ({e})")
+
+    def _prestaciones_desde_red(self, raices: List[Any]) -> None:
+        """
+        Asocia al caso recién expandido las prestaciones de la respuesta JSON de su
+        detalle (captura de red activa). Solo con UN caso abierto en la acción: las
+        respuestas no dicen a qué caso pertenecen, así que con varios (o sin
+        respuesta reconocible) las prestaciones se leen del DOM.
+        """
+        if not self.captura or len(raices) != 1:
+            return
+        prest = self.captura.ultimas_prestaciones()
+        if prest is not None:
+            self._prestaciones_red[id(raices[0])] = (raices[0], prest)
+
+    def _prestaciones_de_red(self, root) -> Optional[List[Dict[str, str]]]:
+        par = self._prestaciones_red.get(id(root))
+        return par[1] if par is not None and par[0] is root else None
+
     def cerrar_caso_por_indice(self, indice: int) -> None:
         """Cierra el caso (colapsa)."""
         # Misma lógica de click para cerrar
@@ -852,7 +1062,11 @@ class SiggesDriver:
           2) XPaths explícitos de la Biblia (PRESTACIONES_TBODY).
           3) Encabezados característicos de PO (cantidad + glosa + prestaci).
           4) Búsqueda global por th con texto "Código de prestación" + "Glosa prestación".
+        Con varios casos abiertos (lectura_acotada) solo vale 3) dentro de root:
+        los XPaths de la Biblia son absolutos y encontrarían la tabla de otro caso.
         """
+        if self.lectura_acotada:
+            return self._find_tbody_by_header(root, ["cantidad", "glosa", "prestaci"]) if root is not None else None
         search_ctx = root if root is not None else self.driver
 
         # 1) Anclado por título exacto de la Biblia
@@ -908,69 +1122,87 @@ class SiggesDriver:
 
     def leer_prestaciones_desde_tbody(self, tbody) -> List[Dict[str, str]]:
         """Lee prestaciones desde el tbody encontrado."""
-        data = []
-        if not tbody: return data
+        if not tbody: return []
         try:
             # Mapear columnas por encabezado si existe
-            code_idx = glosa_idx = fecha_idx = estab_idx = esp_idx = ref_idx = None
+            headers = []
             try:
                 table = self._first(tbody, By.XPATH, "..")
                 thead = self._first(table, By.TAG_NAME, "thead") if table else None
-                headers = [h.text.lower().strip() for h in thead.find_elements(By.TAG_NAME, "th")] if thead else []
-                for i, h in enumerate(headers):
-                    if code_idx is None and "código" in h and "prest" in h:
-                        code_idx = i
-                    if glosa_idx is None and "glosa" in h and "prest" in h:
-                        glosa_idx = i
-                    if fecha_idx is None and ("término" in h or "fecha término" in h or "fecha" in h or "atención" in h or "f. atención" in h):
-                        fecha_idx = i
-                    if ref_idx is None and "referencia" in h:
-                        ref_idx = i
-                    if estab_idx is None and "establecimiento" in h:
-                        estab_idx = i
-                    if esp_idx is None and "especialidad destino" in h:
-                        esp_idx = i
+                headers = [h.text for h in thead.find_elements(By.TAG_NAME, "th")] if thead else []
             except Exception:
                 pass
 
             rows = tbody.find_elements(By.TAG_NAME, "tr")
             if not rows:
                 log_warn("⚠️ Prestaciones: tbody sin filas.")
-            for row in rows:
-                cols = row.find_elements(By.TAG_NAME, "td")
-                if cols:
-                    c_ref = cols[ref_idx].text.strip() if ref_idx is not None and ref_idx < len(cols) else cols[0].text.strip()
-                    
-                    # Fallback Prioridad: 1 (Atención) > 3 (Digitación)
-                    c_fecha = cols[fecha_idx].text.strip() if fecha_idx is not None and fecha_idx < len(cols) else (cols[1].text.strip() if len(cols) > 1 else (cols[3].text.strip() if len(cols) > 3 else ""))
-
-                    # Código: intentar por header; si no, heurística por regex de dígitos (6-8)
-                    c_codigo = ""
-                    if code_idx is not None and code_idx < len(cols):
-                        c_codigo = cols[code_idx].text.strip()
-                    else:
-                        for td in cols:
-                            txt = td.text.strip()
-                            if re.search(r"\d{6,8}", txt):
-                                c_codigo = txt
-                                break
-                        if not c_codigo and len(cols) > 7:
-                            c_codigo = cols[7].text.strip()
-
-                    c_glosa = cols[glosa_idx].text.strip() if glosa_idx is not None and glosa_idx < len(cols) else (cols[8].text.strip() if len(cols) > 8 else "")
-                    c_estab = cols[estab_idx].text.strip() if estab_idx is not None and estab_idx < len(cols) else (cols[5].text.strip() if len(cols) > 5 else "")
-                    c_esp = cols[esp_idx].text.strip() if esp_idx is not None and esp_idx < len(cols) else (cols[6].text.strip() if len(cols) > 6 else "")
-
-                    data.append({
-                        "referencia": c_ref,
-                        "fecha": c_fecha,
-                        "codigo": c_codigo,
-                        "glosa": c_glosa,
-                        "establecimiento": c_estab,
-                        "especialidad": c_esp,
-                    })
+            return self._parse_prestaciones_filas(headers, self._textos_filas(rows))
         except Exception:
-            pass
+            return []
+
+    @staticmethod
+    def _textos_filas(rows) -> List[List[str]]:
+        """Convierte filas <tr> en listas de textos de sus <td> (filas ilegibles se omiten)."""
+        filas = []
+        for r in rows or []:
+            try:
+                filas.append([(td.text or "") for td in r.find_elements(By.TAG_NAME, "td")])
+            except Exception:
+                continue
+        return filas
+
+    @staticmethod
+    def _parse_prestaciones_filas(headers: List[str], filas: List[List[str]]) -> List[Dict[str, str]]:
+        """Mapea filas de Prestaciones Otorgadas a dicts usando los encabezados (o índices Biblia)."""
+        data = []
+        code_idx = glosa_idx = fecha_idx = estab_idx = esp_idx = ref_idx = None
+        for i, h in enumerate(h.lower().strip() for h in (headers or [])):
+            if code_idx is None and "código" in h and "prest" in h:
+                code_idx = i
+            if glosa_idx is None and "glosa" in h and "prest" in h:
+                glosa_idx = i
+            if fecha_idx is None and ("término" in h or "fecha término" in h or "fecha" in h or "atención" in h or "f. atención" in h):
+                fecha_idx = i
+            if ref_idx is None and "referencia" in h:
+                ref_idx = i
+            if estab_idx is None and "establecimiento" in h:
+                estab_idx = i
+            if esp_idx is None and "especialidad destino" in h:
+                esp_idx = i
+
+        for fila in filas or []:
+            cols = [(c or "").strip() for c in fila]
+            if not cols:
+                continue
+            c_ref = cols[ref_idx] if ref_idx is not None and ref_idx < len(cols) else cols[0]
+
+            # Fallback Prioridad: 1 (Atención) > 3 (Digitación)
+            c_fecha = cols[fecha_idx] if fecha_idx is not None and fecha_idx < len(cols) else (cols[1] if len(cols) > 1 else (cols[3] if len(cols) > 3 else ""))
+
+            # Código: intentar por header; si no, heurística por regex de dígitos (6-8)
+            c_codigo = ""
+            if code_idx is not None and code_idx < len(cols):
+                c_codigo = cols[code_idx]
+            else:
+                for txt in cols:
+                    if re.search(r"\d{6,8}", txt):
+                        c_codigo = txt
+                        break
+                if not c_codigo and len(cols) > 7:
+                    c_codigo = cols[7]
+
+            c_glosa = cols[glosa_idx] if glosa_idx is not None and glosa_idx < len(cols) else (cols[8] if len(cols) > 8 else "")
+            c_estab = cols[estab_idx] if estab_idx is not None and estab_idx < len(cols) else (cols[5] if len(cols) > 5 else "")
+            c_esp = cols[esp_idx] if esp_idx is not None and esp_idx < len(cols) else (cols[6] if len(cols) > 6 else "")
+
+            data.append({
+                "referencia": c_ref,
+                "fecha": c_fecha,
+                "codigo": c_codigo,
+                "glosa": c_glosa,
+                "establecimiento": c_estab,
+                "especialidad": c_esp,
+            })
         return data
 
     def leer_ipd_desde_caso(self, root, limit: int = 0) -> Tuple[List[str], List[str], List[str]]:
@@ -991,8 +1223,8 @@ class SiggesDriver:
             # El label contiene "Informes de proceso de diagnóstico (IPD)"
             try:
                 # Buscar todos los <p> que contengan el texto IPD
-                labels = self.driver.find_elements(By.XPATH, 
-                    "//div/label/p[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'informes de proceso de diagn')]"
+                labels = self._labels_seccion(root,
+                    "contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'informes de proceso de diagn')"
                 )
                 for label in labels:
                     log_debug(f"[DEBUG] leer_ipd: label encontrado: {label.text[:50] if label.text else 'vacío'}...")
@@ -1015,8 +1247,8 @@ class SiggesDriver:
             except Exception as e:
                 log_debug(f"[DEBUG] leer_ipd: error buscando por label: {e}")
             
-            # MÉTODO 2: Fallback con XPaths de la Biblia (absolutos)
-            if not tbody:
+            # MÉTODO 2: Fallback con XPaths de la Biblia (absolutos; no con varios casos abiertos)
+            if not tbody and not self.lectura_acotada:
                 log_debug("[DEBUG] leer_ipd: usando fallbacks de XPath absoluto...")
                 for xp in LOCS.get("IPD_TBODY_FALLBACK", []):
                     try:
@@ -1034,26 +1266,10 @@ class SiggesDriver:
             rows = tbody.find_elements(By.TAG_NAME, "tr") or []
             log_debug(f"[DEBUG] leer_ipd: {len(rows)} filas encontradas en tabla IPD")
             
-            parsed = []
-            for r in rows:
-                try:
-                    tds = r.find_elements(By.TAG_NAME, "td")
-                    if len(tds) < 8:
-                        continue
-                    f_txt = (tds[2].text or "").strip().replace("/", "-")          # Fecha IPD (col 3)
-                    e_txt = (tds[6].text or "").strip()          # Confirma/descarta (col 7)
-                    d_txt = (tds[7].text or "").strip()          # Diagnóstico (col 8)
-                    f_dt = dparse(f_txt) or 0
-                    parsed.append((f_dt, f_txt, e_txt, d_txt))
-                except Exception:
-                    continue
-            
-            parsed.sort(key=lambda x: x[0] if x[0] else 0, reverse=True)
-            if limit and limit > 0:
-                parsed = parsed[:limit]
+            parsed = self._parse_ipd_filas(self._textos_filas(rows), limit)
             
-            log_debug(f"[DEBUG] leer_ipd: {len(parsed)} registros parseados")
-            return ([p[1] for p in parsed], [p[2] for p in parsed], [p[3] for p in parsed])
+            log_debug(f"[DEBUG] leer_ipd: {len(parsed[0])} registros parseados")
+            return parsed
             
         except Exception as e:
             log_warn(f"⚠️ Error IPD: {e}")
@@ -1075,11 +1291,11 @@ class SiggesDriver:
             # ACTUALIZACIÓN: Buscar también "Ordenes de" por si el formato cambia ligeramente
             try:
                 # Intento 1: Texto exacto (OA)
-                labels = self.driver.find_elements(By.XPATH, "//div/label/p[contains(text(), '(OA)')]")
+                labels = self._labels_seccion(root, "contains(text(), '(OA)')")
                 
                 # Intento 2: Si no hay (OA), buscar "Ordenes de"
                 if not labels:
-                     labels = self.driver.find_elements(By.XPATH, "//div/label/p[contains(text(), 'Ordenes de')]")
+                     labels = self._labels_seccion(root, "contains(text(), 'Ordenes de')")
                 
                 for label in labels:
                     log_debug(f"[DEBUG] leer_oa: label encontrado: {label.text[:50] if label.text else 'vacío'}...")
@@ -1101,8 +1317,8 @@ class SiggesDriver:
             except Exception as e:
                 log_debug(f"[DEBUG] leer_oa: error buscando por label: {e}")
             
-            # MÉTODO 2: Fallback XPaths absolutos
-            if not tbody:
+            # MÉTODO 2: Fallback XPaths absolutos (no con varios casos abiertos)
+            if not tbody and not self.lectura_acotada:
                 log_debug("[DEBUG] leer_oa: usando fallbacks...")
                 for xp in LOCS.get("OA_TBODY_FALLBACK", []):
                     try:
@@ -1120,45 +1336,10 @@ class SiggesDriver:
             rows = tbody.find_elements(By.TAG_NAME, "tr") or []
             log_debug(f"[DEBUG] leer_oa: {len(rows)} filas encontradas")
             
-            parsed = []
-            for r in rows:
-                try:
-                    tds = r.find_elements(By.TAG_NAME, "td")
-                    if not tds: continue
-                    
-                    # Indices de Biblia:
-                    # Folio=0 (td[1]), Fecha=2 (td[3]), Deriv=8 (td[9]), Cod=9 (td[10]), Diag=12 (td[13])
-                    # Usamos 'get' seguro simulado
-                    def safe_txt(idx):
-                        return (tds[idx].text or "").strip() if idx < len(tds) else ""
-                    
-                    folio = safe_txt(0)
-                    # Fecha suele estar en index 2, pero a veces formato cambia
-                    # Intentamos buscar fecha valida en primeros 5 indices si falla
-                    f_raw = safe_txt(2)
-                    
-                    f_txt = f_raw.split(" ")[0].strip().replace("/", "-")
-                    deriv = safe_txt(8)
-                    cod = safe_txt(9)
-                    diag = safe_txt(12)
-                    
-                    f_dt = dparse(f_txt) or 0
-                    parsed.append((f_dt, f_txt, deriv, diag, cod, folio))
-                except Exception:
-                    continue
-            
-            parsed.sort(key=lambda x: x[0] if x[0] else 0, reverse=True)
-            if limit and limit > 0:
-                parsed = parsed[:limit]
+            parsed = self._parse_oa_filas(self._textos_filas(rows), limit)
             
-            log_debug(f"[DEBUG] leer_oa: {len(parsed)} registros parseados")
-            return (
-                [p[1] for p in parsed],
-                [p[2] for p in parsed],
-                [p[3] for p in parsed],
-                [p[4] for p in parsed],
-                [p[5] for p in parsed],
-            )
+            log_debug(f"[DEBUG] leer_oa: {len(parsed[0])} registros parseados")
+            return parsed
         except Exception as e:
             log_warn(f"⚠️ Error OA: {e}")
             return [], [], [], [], []
@@ -1176,8 +1357,8 @@ class SiggesDriver:
             
             # MÉTODO 1: Buscar por texto del label
             try:
-                labels = self.driver.find_elements(By.XPATH, 
-                    "//div/label/p[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'hoja diaria aps')]"
+                labels = self._labels_seccion(root,
+                    "contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'hoja diaria aps')"
                 )
                 for label in labels:
                     log_debug(f"[DEBUG] leer_aps: label encontrado: {label.text[:50] if label.text else 'vacío'}...")
@@ -1199,8 +1380,8 @@ class SiggesDriver:
             except Exception as e:
                 log_debug(f"[DEBUG] leer_aps: error buscando por label: {e}")
             
-            # MÉTODO 2: Fallback XPaths absolutos
-            if not tbody:
+            # MÉTODO 2: Fallback XPaths absolutos (no con varios casos abiertos)
+            if not tbody and not self.lectura_acotada:
                 log_debug("[DEBUG] leer_aps: usando fallbacks...")
                 for xp in LOCS.get("APS_TBODY_FALLBACK", []):
                     try:
@@ -1218,25 +1399,10 @@ class SiggesDriver:
             rows = tbody.find_elements(By.TAG_NAME, "tr") or []
             log_debug(f"[DEBUG] leer_aps: {len(rows)} filas encontradas")
             
-            parsed = []
-            for tr in rows:
-                try:
-                    tds = tr.find_elements(By.TAG_NAME, "td")
-                    if len(tds) < 3:
-                        continue
-                    fecha_txt = (tds[1].text or "").strip().replace("/", "-")   # Col 2 Fecha atención
-                    estado_txt = (tds[2].text or "").strip()  # Col 3 Estado
-                    fecha_dt = dparse(fecha_txt) or 0
-                    parsed.append((fecha_dt, fecha_txt, estado_txt))
-                except Exception:
-                    continue
+            parsed = self._parse_aps_filas(self._textos_filas(rows), limit)
             
-            parsed.sort(key=lambda x: x[0] if x[0] else 0, reverse=True)
-            if limit and limit > 0:
-                parsed = parsed[:limit]
-            
-            log_debug(f"[DEBUG] leer_aps: {len(parsed)} registros parseados")
-            return ([p[1] for p in parsed], [p[2] for p in parsed])
+            log_debug(f"[DEBUG] leer_aps: {len(parsed[0])} registros parseados")
+            return parsed
         except Exception as e:
             log_warn(f"⚠️ Error APS: {e}")
             return [], []
@@ -1254,8 +1420,8 @@ class SiggesDriver:
             
             # MÉTODO 1: Buscar por texto del label
             try:
-                labels = self.driver.find_elements(By.XPATH, 
-                    "//div/label/p[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'solicitudes de interconsultas')]"
+                labels = self._labels_seccion(root,
+                    "contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'solicitudes de interconsultas')"
                 )
                 for label in labels:
                     log_debug(f"[DEBUG] leer_sic: label encontrado: {label.text[:50] if label.text else 'vacío'}...")
@@ -1277,8 +1443,8 @@ class SiggesDriver:
             except Exception as e:
                 log_debug(f"[DEBUG] leer_sic: error buscando por label: {e}")
             
-            # MÉTODO 2: Fallback XPaths absolutos
-            if not tbody:
+            # MÉTODO 2: Fallback XPaths absolutos (no con varios casos abiertos)
+            if not tbody and not self.lectura_acotada:
                 log_debug("[DEBUG] leer_sic: usando fallbacks...")
                 for xp in LOCS.get("SIC_TBODY_FALLBACK", []):
                     try:
@@ -1296,29 +1462,216 @@ class SiggesDriver:
             rows = tbody.find_elements(By.TAG_NAME, "tr") or []
             log_debug(f"[DEBUG] leer_sic: {len(rows)} filas encontradas")
             
-            parsed = []
-            for tr in rows:
-                try:
-                    tds = tr.find_elements(By.TAG_NAME, "td")
-                    if len(tds) < 9:
-                        continue
-                    fecha_sic = (tds[2].text or "").strip().replace("/", "-")   # Col 3 Fecha SIC
-                    derivado = (tds[8].text or "").strip()    # Col 9 Derivada para
-                    fecha_dt = dparse(fecha_sic) or 0
-                    parsed.append((fecha_dt, fecha_sic, derivado))
-                except Exception:
-                    continue
-            
-            parsed.sort(key=lambda x: x[0] if x[0] else 0, reverse=True)
-            if limit and limit > 0:
-                parsed = parsed[:limit]
+            parsed = self._parse_sic_filas(self._textos_filas(rows), limit)
             
-            log_debug(f"[DEBUG] leer_sic: {len(parsed)} registros parseados")
-            return ([p[1] for p in parsed], [p[2] for p in parsed])
+            log_debug(f"[DEBUG] leer_sic: {len(parsed[0])} registros parseados")
+            return parsed
         except Exception as e:
             log_warn(f"⚠️ Error SIC: {e}")
             return [], []
 
+    # =========================================================================
+    #              PARSERS DE FILAS (COMPARTIDOS DOM / SNAPSHOT JS)
+    # =========================================================================
+
+    @staticmethod
+    def _ordenar_y_limitar(parsed: List[tuple], limit: int) -> List[tuple]:
+        """Ordena por fecha (índice 0) descendente y aplica el límite (0 = todas)."""
+        parsed.sort(key=lambda x: x[0] if x[0] else 0, reverse=True)
+        if limit and limit > 0:
+            parsed = parsed[:limit]
+        return parsed
+
+    @classmethod
+    def _parse_ipd_filas(cls, filas: List[List[str]], limit: int = 0) -> Tuple[List[str], List[str], List[str]]:
+        """IPD: td[3]=Fecha, td[7]=Confirma/Descarta, td[8]=Diagnóstico."""
+        parsed = []
+        for tds in filas or []:
+            if len(tds) < 8:
+                continue
+            f_txt = (tds[2] or "").strip().replace("/", "-")          # Fecha IPD (col 3)
+            e_txt = (tds[6] or "").strip()          # Confirma/descarta (col 7)
+            d_txt = (tds[7] or "").strip()          # Diagnóstico (col 8)
+            parsed.append((dparse(f_txt) or 0, f_txt, e_txt, d_txt))
+        parsed = cls._ordenar_y_limitar(parsed, limit)
+        return ([p[1] for p in parsed], [p[2] for p in parsed], [p[3] for p in parsed])
+
+    @classmethod
+    def _parse_oa_filas(cls, filas: List[List[str]], limit: int = 0) -> Tuple[List[str], List[str], List[str], List[str], List[str]]:
+        """OA: td[1]=Folio, td[3]=Fecha, td[9]=Derivada para, td[10]=Código, td[13]=Diagnóstico."""
+        parsed = []
+        for tds in filas or []:
+            if not tds:
+                continue
+
+            def safe_txt(idx):
+                return (tds[idx] or "").strip() if idx < len(tds) else ""
+
+            folio = safe_txt(0)
+            f_txt = safe_txt(2).split(" ")[0].strip().replace("/", "-")
+            deriv = safe_txt(8)
+            cod = safe_txt(9)
+            diag = safe_txt(12)
+            parsed.append((dparse(f_txt) or 0, f_txt, deriv, diag, cod, folio))
+        parsed = cls._ordenar_y_limitar(parsed, limit)
+        return (
+            [p[1] for p in parsed],
+            [p[2] for p in parsed],
+            [p[3] for p in parsed],
+            [p[4] for p in parsed],
+            [p[5] for p in parsed],
+        )
+
+    @classmethod
+    def _parse_aps_filas(cls, filas: List[List[str]], limit: int = 0) -> Tuple[List[str], List[str]]:
+        """APS: td[2]=Fecha atención, td[3]=Estado."""
+        parsed = []
+        for tds in filas or []:
+            if len(tds) < 3:
+                continue
+            fecha_txt = (tds[1] or "").strip().replace("/", "-")   # Col 2 Fecha atención
+            estado_txt = (tds[2] or "").strip()  # Col 3 Estado
+            parsed.append((dparse(fecha_txt) or 0, fecha_txt, estado_txt))
+        parsed = cls._ordenar_y_limitar(parsed, limit)
+        return ([p[1] for p in parsed], [p[2] for p in parsed])
+
+    @classmethod
+    def _parse_sic_filas(cls, filas: List[List[str]], limit: int = 0) -> Tuple[List[str], List[str]]:
+        """SIC: td[3]=Fecha SIC, td[9]=Derivada para."""
+        parsed = []
+        for tds in filas or []:
+            if len(tds) < 9:
+                continue
+            fecha_sic = (tds[2] or "").strip().replace("/", "-")   # Col 3 Fecha SIC
+            derivado = (tds[8] or "").strip()    # Col 9 Derivada para
+            parsed.append((dparse(fecha_sic) or 0, fecha_sic, derivado))
+        parsed = cls._ordenar_y_limitar(parsed, limit)
+        return ([p[1] for p in parsed], [p[2] for p in parsed])
+
+    # =========================================================================
+    #              SNAPSHOT DE CASO (UNA SOLA IDA Y VUELTA JS)
+    # =========================================================================
+
+    # Recorre el caso expandido UNA vez y devuelve las tablas como arrays de
+    # textos. Una sección devuelve null si su label no existe (=> fallback DOM),
+    # o [] si existe pero la tabla no tiene filas. Con arguments[1] (lectura
+    # acotada) no se busca fuera de root.
+    _JS_SNAPSHOT_CASO = """
+    var root = arguments[0] || document, acotado = !!arguments[1];
+    if (acotado && root === document) return null;
+    function low(t) { return (t || '').toLowerCase(); }
+    function labels(ctx) { return Array.from(ctx.querySelectorAll('div > label > p')); }
+    function tbodyDesdeLabel(p) {
+        // Equivalente a ancestor::div[k]/following-sibling::div[1]//table/tbody
+        var el = p;
+        for (var k = 0; k < 4 && el; k++) {
+            el = el.parentElement;
+            if (!el) break;
+            var sib = el.nextElementSibling;
+            while (sib && sib.tagName !== 'DIV') sib = sib.nextElementSibling;
+            if (sib) {
+                var tb = sib.querySelector('table tbody');
+                if (tb) return tb;
+            }
+        }
+        return null;
+    }
+    function filas(tb) {
+        return Array.from(tb.querySelectorAll('tr')).map(function(tr) {
+            return Array.from(tr.querySelectorAll('td')).map(function(td) {
+                return (td.innerText || td.textContent || '').trim();
+            });
+        });
+    }
+    function seccion(agujas) {
+        var ctxs = (root === document) ? [document] : (acotado ? [root] : [root, document]);
+        for (var c = 0; c < ctxs.length; c++) {
+            var ps = labels(ctxs[c]);
+            for (var a = 0; a < agujas.length; a++) {
+                for (var i = 0; i < ps.length; i++) {
+                    if (low(ps[i].innerText || ps[i].textContent).indexOf(agujas[a]) === -1) continue;
+                    var tb = tbodyDesdeLabel(ps[i]);
+                    if (tb) return filas(tb);
+                }
+            }
+        }
+        return null;
+    }
+    function prestaciones() {
+        var ctxs = (root === document) ? [document] : (acotado ? [root] : [root, document]);
+        for (var c = 0; c < ctxs.length; c++) {
+            var tables = Array.from(ctxs[c].querySelectorAll('table'));
+            for (var i = 0; i < tables.length; i++) {
+                var ths = Array.from(tables[i].querySelectorAll('thead th')).map(function(th) {
+                    return (th.innerText || th.textContent || '').trim();
+                });
+                var h = low(ths.join(' | '));
+                if (h.indexOf('glosa') !== -1 && h.indexOf('prestaci') !== -1 && h.indexOf('código') !== -1) {
+                    var tb = tables[i].querySelector('tbody');
+                    if (tb) return {headers: ths, rows: filas(tb)};
+                }
+            }
+        }
+        return null;
+    }
+    return {
+        ipd: seccion(['informes de proceso de diagn']),
+        oa: seccion(['(oa)', 'ordenes de', 'órdenes de']),
+        aps: seccion(['hoja diaria aps']),
+        sic: seccion(['solicitudes de interconsultas']),
+        prestaciones: prestaciones()
+    };
+    """
+
+    def leer_snapshot_caso(self, root=None) -> Optional[Dict[str, Any]]:
+        """
+        Extrae IPD, OA, APS, SIC y Prestaciones del caso expandido en UNA sola
+        llamada execute_script (mismo patrón que leer_mini_tabla).
+
+        Retorna un dict con las mismas formas que los lectores DOM:
+            ipd -> (fechas, estados, diags)
+            oa  -> (fechas, derivados, diags, codigos, folios)
+            aps -> (fechas, estados)
+            sic -> (fechas, derivados)
+            prestaciones -> List[Dict] (desde la captura de red si la hay)
+        Las secciones no encontradas quedan en None (el llamador usa el lector DOM).
+        Retorna None si el JS falla por completo.
+        """
+        t0 = time.time()
+        try:
+            raw = self.driver.execute_script(self._JS_SNAPSHOT_CASO, root, self.lectura_acotada)
+        except Exception as e:
+            log_debug(f"[DEBUG] snapshot_caso: JS falló, se usarán lectores DOM: {e}")
+            return None
+        if not isinstance(raw, dict):
+            return None
+
+        snap: Dict[str, Any] = {"ipd": None, "oa": None, "aps": None, "sic": None, "prestaciones": None}
+        try:
+            if raw.get("ipd") is not None:
+                snap["ipd"] = self._parse_ipd_filas(raw["ipd"])
+            if raw.get("oa") is not None:
+                snap["oa"] = self._parse_oa_filas(raw["oa"])
+            if raw.get("aps") is not None:
+                snap["aps"] = self._parse_aps_filas(raw["aps"])
+            if raw.get("sic") is not None:
+                snap["sic"] = self._parse_sic_filas(raw["sic"])
+            prest = raw.get("prestaciones")
+            red = self._prestaciones_de_red(root)
+            if red is not None:
+                # Campos con nombre desde la API; el DOM queda como respaldo
+                snap["prestaciones"] = [dict(p) for p in red]
+            elif isinstance(prest, dict):
+                snap["prestaciones"] = self._parse_prestaciones_filas(prest.get("headers") or [], prest.get("rows") or [])
+        except Exception as e:
+            log_debug(f"[DEBUG] snapshot_caso: error parseando snapshot: {e}")
+            return None
+
+        dt = time.time() - t0
+        faltantes = [k for k, v in snap.items() if v is None]
+        log_debug(f"[DEBUG] snapshot_caso: {dt*1000:.0f}ms (sin sección: {faltantes or 'ninguna'})")
+        return snap
+
     # =========================================================================
     #                    COMPATIBILIDAD Y HELPERS UI
     # =========================================================================
@@ -1327,28 +1680,46 @@ class SiggesDriver:
         """Wrapper compatible para encontrar input RUT."""
         return self._find(XPATHS["INPUT_RUT"], "presence", "default")
 
-    def click_buscar(self) -> bool:
-        """
-        Hace click en Buscar con flujos de respaldo (fallback ENTER).
+    def buscar(self) -> Optional[str]:
         """
-        from selenium.webdriver.common.keys import Keys
-        
-        # 1. Intentar Click Normal
-        if self._click(XPATHS["BTN_BUSCAR"], wait_spinner=True):
-            return True
+        Envía la búsqueda UNA sola vez (clic en Buscar o, sin botón, ENTER en el
+        input) y espera la primera señal de resultado: mini-tabla nueva, aviso de
+        "sin resultados" o fin de las peticiones de la búsqueda.
         
-        # 2. Fallback: Enviar ENTER al input
-        log_info("⚠️ Click Buscar falló, intentando ENTER en input...")
+        Retorna la señal (SENAL_* de src/core/waits.py) o None si no había cómo
+        enviar. Nunca reenvía: si la primitiva falla, espera el spinner y
+        reporta SENAL_TIMEOUT para que el llamador decida.
+        """
+        if self.captura:
+            self.captura.marcar()
+        self.esperar_spinner(appear_timeout=0.1)
+        boton = self._find(XPATHS["BTN_BUSCAR"], "presence", "search_click_buscar")
+        inp = None if boton is not None else self.find_input_rut()
+        if boton is None and inp is None:
+            self.ultima_senal_busqueda = None
+            return None
+        t0 = time.time()
         try:
-            inp = self.find_input_rut()
-            if inp:
-                inp.send_keys(Keys.ENTER)
-                self._wait_smart()
-                return True
-        except Exception:
-            pass
-            
-        return False
+            res = buscar_una_vez(self.driver, boton, inp, XPATHS["MINI_TABLA_TBODY"][:2],
+                                 timeout=get_wait_timeout("search_wait_results") or 8.0)
+            senal = res.get("senal") or SENAL_TIMEOUT
+        except Exception as e:
+            log_debug(f"[DEBUG] buscar: primitiva falló ({type(e).__name__}), esperando spinner")
+            self._wait_smart()
+            senal = SENAL_TIMEOUT
+            res = {}
+        if senal in (SENAL_SIN_ENVIO, SENAL_ERROR):
+            log_debug(f"[DEBUG] buscar: no se pudo enviar ({res.get('detalle', '')})")
+            self.ultima_senal_busqueda = None
+            return None
+        registrar_condicion("search_wait_results", time.time() - t0, ok=senal != SENAL_TIMEOUT)
+        log_debug(f"⏱️ [PERF] Búsqueda: señal '{senal}' en {time.time() - t0:.2f}s ({res.get('xhr', 0)} XHR)")
+        self.ultima_senal_busqueda = senal
+        return senal
+
+    def click_buscar(self) -> bool:
+        """Envía la búsqueda una vez (ver buscar). False si no hubo botón ni input."""
+        return self.buscar() is not None
 
     def asegurar_submenu_ingreso_consulta_abierto(self, force: bool = False) -> None:
         """
@@ -1382,7 +1753,9 @@ class SiggesDriver:
     def asegurar_menu_desplegado(self): 
         # No-op for legacy compatibility
         pass
-    def detectar_estado_actual(self): return "UNKNOWN"
+    def detectar_estado_actual(self) -> str:
+        """Estado de la página con una sola sonda JS (src/core/estado_pagina.py)."""
+        return detectar_estado(self.driver)[0]
     def asegurar_estado(self, estado): 
         if estado == "BUSQUEDA": self.asegurar_en_busqueda()
         return True 
@@ -1436,86 +1809,112 @@ class SiggesDriver:
         except Exception:
             pass
 
+    @staticmethod
+    def _parse_caso_cartola(nombre_raw: str, fecha_raw: str, estado_raw: str, raw_text: str):
+        """Normaliza caso/estado/apertura desde el texto crudo."""
+        nombre_clean = nombre_raw.split("{")[0].replace(".", "").strip() if nombre_raw else ""
+        fecha_clean = ""
+        estado_clean = (estado_raw or "").strip()
+
+        # Fecha: preferir la que viene; si no, buscar en el texto (dd/mm/aaaa o dd-mm-aaaa)
+        if not fecha_raw:
+            m = re.search(r"(\d{2}[/-]\d{2}[/-]\d{4})", raw_text or "")
+            fecha_raw = m.group(1) if m else ""
+        if fecha_raw:
+            fecha_clean = fecha_raw.split()[0].strip().replace("-", "/")
+
+        # Estado: si no vino, intentar derivar del texto
+        if not estado_clean and raw_text:
+            # Si tenemos fecha, usarla como ancla
+            anchor = fecha_clean or fecha_raw
+            if anchor and anchor in raw_text:
+                parts = raw_text.split(anchor)
+                if len(parts) > 1:
+                    rest = re.sub(r"\\d{2}:\\d{2}:\\d{2}", "", parts[1])
+                    # Tomar segmento después de la última coma
+                    if "," in rest:
+                        rest = rest.split(",")[-1]
+                    estado_clean = rest.strip()
+            # Si sigue vacío, tomar lo que haya después de la última coma del texto
+            if not estado_clean and "," in raw_text:
+                estado_clean = raw_text.split(",")[-1].strip()
+
+        # Limpieza final
+        cierre = "SI" if "cerrado" in estado_clean.lower() or "cierre" in estado_clean.lower() else "NO"
+        try:
+            f_dt = dparse(fecha_clean) or 0
+        except Exception:
+            f_dt = 0
+        return nombre_clean, estado_clean, fecha_clean, cierre, f_dt
+
+    def _casos_cartola_desde_red(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Casos de la cartola desde la respuesta JSON capturada (si la captura está activa).
+        Solo se aceptan si la cantidad coincide con las filas del DOM (los índices
+        se usan luego en expandir_caso); si no, None => lectura DOM.
+        """
+        casos = self.captura.ultima_lista_casos() if self.captura else None
+        if not casos:
+            return None
+        try:
+            n_dom = self.driver.execute_script(
+                "return document.querySelectorAll(\"div.contRow.contRowBox.scrollH div.contRow input[type='checkbox']\").length;"
+            )
+        except Exception:
+            return None
+        if int(n_dom or 0) != len(casos):
+            log_debug(f"[DEBUG] captura_red: {len(casos)} casos JSON vs {n_dom} en DOM -> fallback DOM")
+            return None
+        datos_casos = []
+        for i, c in enumerate(casos):
+            raw_text = ", ".join(x for x in (c["caso"], c["fecha_inicio"], c["estado"]) if x)
+            nombre, estado, fecha_clean, cierre, f_dt = self._parse_caso_cartola(
+                c["caso"], c["fecha_inicio"], c["estado"], raw_text
+            )
+            datos_casos.append({
+                "caso": nombre,
+                "estado": estado,
+                "apertura": fecha_clean,
+                "fecha_apertura": fecha_clean,
+                "cierre": cierre,
+                "fecha_dt": f_dt,
+                "indice": i,
+                "raw_texto": raw_text
+            })
+        return datos_casos
+
     def extraer_tabla_provisoria_completa(self) -> List[Dict[str, Any]]:
         """
         Lee la lista de casos de la cartola (DIV o tabla) y normaliza
         Caso / Estado / Apertura (fecha sin hora, sin decreto).
         """
-        def _parse_case(nombre_raw: str, fecha_raw: str, estado_raw: str, raw_text: str):
-            """Normaliza caso/estado/apertura desde el texto crudo."""
-            nombre_clean = nombre_raw.split("{")[0].replace(".", "").strip() if nombre_raw else ""
-            fecha_clean = ""
-            estado_clean = (estado_raw or "").strip()
-
-            # Fecha: preferir la que viene; si no, buscar en el texto (dd/mm/aaaa o dd-mm-aaaa)
-            if not fecha_raw:
-                m = re.search(r"(\d{2}[/-]\d{2}[/-]\d{4})", raw_text or "")
-                fecha_raw = m.group(1) if m else ""
-            if fecha_raw:
-                fecha_clean = fecha_raw.split()[0].strip().replace("-", "/")
-
-            # Estado: si no vino, intentar derivar del texto
-            if not estado_clean and raw_text:
-                # Si tenemos fecha, usarla como ancla
-                anchor = fecha_clean or fecha_raw
-                if anchor and anchor in raw_text:
-                    parts = raw_text.split(anchor)
-                    if len(parts) > 1:
-                        rest = re.sub(r"\\d{2}:\\d{2}:\\d{2}", "", parts[1])
-                        # Tomar segmento después de la última coma
-                        if "," in rest:
-                            rest = rest.split(",")[-1]
-                        estado_clean = rest.strip()
-                # Si sigue vacío, tomar lo que haya después de la última coma del texto
-                if not estado_clean and "," in raw_text:
-                    estado_clean = raw_text.split(",")[-1].strip()
-
-            # Limpieza final
-            cierre = "SI" if "cerrado" in estado_clean.lower() or "cierre" in estado_clean.lower() else "NO"
-            try:
-                f_dt = dparse(fecha_clean) or 0
-            except Exception:
-                f_dt = 0
-            return nombre_clean, estado_clean, fecha_clean, cierre, f_dt
+        # ==== Estrategia 0: Respuesta JSON capturada por CDP (opcional) ====
+        datos_red = self._casos_cartola_desde_red()
+        if datos_red:
+            return datos_red
 
         datos_casos = []
         try:
-            # ==== Estrategia 1: DIVs ====
-            cont_xps = [
-                "//div[contains(@class,'contRow') and contains(@class,'contRowBox') and contains(@class,'scrollH')]",
-                "//div[@class='contRow contRowBox scrollH']",
-                *(XPATHS.get("CONT_CARTOLA") or [])
-            ]
-            root = None
-            for xp in cont_xps:
-                try:
-                    root = self._driver_first(By.XPATH, xp)
-                    if root: break
-                except Exception:
-                    continue
-            if root:
-                casos_divs = root.find_elements(By.XPATH, ".//div[@class='contRow'][.//input[@type='checkbox']]")
-                for i, div in enumerate(casos_divs):
-                    try:
-                        p = self._first(div, By.XPATH, ".//label/p")
-                        raw_text = (p.text or "").strip()
-                        if not raw_text:
-                            continue
-                        nombre, estado, fecha_clean, cierre, f_dt = _parse_case(
-                            raw_text, "", "", raw_text
-                        )
-                        datos_casos.append({
-                            "caso": nombre,
-                            "estado": estado,
-                            "apertura": fecha_clean,
-                            "fecha_apertura": fecha_clean,
-                            "cierre": cierre,
-                            "fecha_dt": f_dt,
-                            "indice": i,
-                            "raw_texto": raw_text
-                        })
-                    except Exception:
+            # ==== Estrategia 1: DIVs (una sola llamada JS para todos los casos) ====
+            cc = self._leer_casos_cartola()
+            if cc is not None:
+                for caso in cc.casos:
+                    raw_text = (caso.get("texto") or "").strip()
+                    if not raw_text:
                         continue
+                    nombre, estado, fecha_clean, cierre, f_dt = self._parse_caso_cartola(
+                        raw_text, "", "", raw_text
+                    )
+                    datos_casos.append({
+                        "caso": nombre,
+                        "estado": estado,
+                        "apertura": fecha_clean,
+                        "fecha_apertura": fecha_clean,
+                        "cierre": cierre,
+                        "fecha_dt": f_dt,
+                        "indice": int(caso.get("indice", 0)),
+                        "raw_texto": raw_text
+                    })
                 if datos_casos:
                     return datos_casos
 
@@ -1536,7 +1935,7 @@ class SiggesDriver:
                         fecha_raw = tds[0].text if len(tds) > 0 else ""
                         estado_raw = tds[3].text if len(tds) > 3 else (tds[2].text if len(tds) > 2 else "")
                         raw_text = row.text
-                        nombre, estado, fecha_clean, cierre, f_dt = _parse_case(
+                        nombre, estado, fecha_clean, cierre, f_dt = self._parse_caso_cartola(
                             nombre_raw, fecha_raw, estado_raw, raw_text
                         )
                         datos_casos.append({
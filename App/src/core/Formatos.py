@@ -11,7 +11,7 @@ Incluye:
 - Formateo de fechas (dd/mm/YYYY)
 - Normalización de RUT
 - Limpieza de códigos
-- Utilidades de comparación
+- Utilidades de comparación (matcher de keywords compilado por misión)
 
 Autor: Sistema Nozhgess
 ==============================================================================
@@ -20,7 +20,8 @@ from __future__ import annotations
 import re
 import unicodedata
 from datetime import datetime, date, timedelta
-from typing import Any, Optional, List
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, List, Tuple
 
 
 # =============================================================================
@@ -53,6 +54,72 @@ def normalizar_texto(s: str) -> str:
     return _norm(s)
 
 
+@lru_cache(maxsize=8192)
+def _norm_lru(s: str) -> str:
+    return _norm(s)
+
+
+def _norm_memo(s: Any) -> str:
+    """_norm con caché LRU: los nombres de caso se repiten paciente tras paciente."""
+    if not s:
+        return ""
+    return _norm_lru(str(s))
+
+
+class MatcherKeywords:
+    """
+    Lista de keywords pre-normalizada y compilada en una sola alternancia regex.
+    
+    Mismo criterio que has_keyword: keyword normalizada contenida en el texto
+    normalizado. `patrones` conserva el orden original (la primera keyword manda).
+    """
+
+    def __init__(self, kws: Iterable[str] = ()):
+        self.originales: Tuple[str, ...] = tuple(kws or ())
+        patrones: List[str] = []
+        for k in self.originales:
+            if k and _norm_memo(k) not in patrones:
+                patrones.append(_norm_memo(k))
+        self.patrones: Tuple[str, ...] = tuple(patrones)
+        # Más largas primero: la alternancia se detiene en la primera que calza
+        alternancia = "|".join(re.escape(p) for p in sorted(patrones, key=len, reverse=True))
+        self._regex = re.compile(alternancia) if patrones else None
+
+    def __bool__(self) -> bool:
+        return bool(self.originales)
+
+    def coincide(self, texto: str) -> bool:
+        """True si alguna keyword está en el texto."""
+        return self._regex is not None and self._regex.search(_norm_memo(texto)) is not None
+
+
+class MatcherMision:
+    """Matchers de `keywords` y `keywords_contra` de una misión, construidos una vez."""
+
+    def __init__(self, keywords: Iterable[str] = (), keywords_contra: Iterable[str] = ()):
+        self.keywords = matcher_keywords(keywords)
+        self.contra = matcher_keywords(keywords_contra)
+
+
+@lru_cache(maxsize=256)
+def _matcher_lru(kws: Tuple[str, ...]) -> MatcherKeywords:
+    return MatcherKeywords(kws)
+
+
+def matcher_keywords(kws: Iterable[str]) -> MatcherKeywords:
+    """MatcherKeywords compartido para una lista de keywords (se compila una sola vez)."""
+    if isinstance(kws, MatcherKeywords):
+        return kws
+    if isinstance(kws, str):
+        kws = [kws]
+    return _matcher_lru(tuple(str(k) if k else "" for k in (kws or ())))
+
+
+def matcher_mision(m: Dict[str, Any]) -> MatcherMision:
+    """MatcherMision de la misión (cacheado por su lista de keywords, no por el dict)."""
+    return MatcherMision(m.get("keywords") or (), m.get("keywords_contra") or ())
+
+
 def has_keyword(texto: str, kws: List[str]) -> bool:
     """
     Verifica si alguna keyword está en el texto.
@@ -61,13 +128,12 @@ def has_keyword(texto: str, kws: List[str]) -> bool:
     
     Args:
         texto: Texto donde buscar
-        kws: Lista de keywords a buscar
+        kws: Lista de keywords a buscar (o un MatcherKeywords ya compilado)
         
     Returns:
         True si alguna keyword está presente
     """
-    t = _norm(texto)
-    return any(_norm(k) in t for k in (kws or []) if k)
+    return matcher_keywords(kws).coincide(texto)
 
 
 # =============================================================================
@@ -148,23 +214,13 @@ def en_vigencia(fecha_obj: Optional[datetime], dt: Optional[datetime],
     return 0 <= (fecha_obj - dt).days <= ventana_dias
 
 
-def dparse(x: Any) -> Optional[datetime]:
-    """
-    Parsea una fecha a objeto datetime.
-    Soporta: String (DD-MM-YYYY, YYYY-MM-DD), datetime, Excel serial.
-    Returns: datetime object or None
-    """
-    if x is None:
-        return None
-    if isinstance(x, datetime):
-        return x
-    if isinstance(x, date):
-        return datetime(x.year, x.month, x.day)
-    
-    s = str(x).strip()
-    if not s:
-        return None
-        
+# Memo string -> datetime acotado: las mismas fechas se repiten en nómina, IPD, OA y prestaciones
+_DPARSE_MAX = 20000
+_dparse_memo: Dict[str, Optional[datetime]] = {}
+
+
+def _dparse_texto(s: str) -> Optional[datetime]:
+    """Parseo de un texto ya recortado (sin memo)."""
     # Excel serial check
     if re.match(r"^\d+(\.\d+)?$", s):
         try:
@@ -176,6 +232,17 @@ def dparse(x: Any) -> Optional[datetime]:
 
     # Clean and parse
     s = s.split(" ")[0].replace("/", "-")
+    # Camino rápido: dd-mm-yyyy / yyyy-mm-dd a mano, sin strptime
+    partes = s.split("-")
+    if len(partes) == 3 and all(p.isascii() and p.isdigit() for p in partes):
+        a, b, c = partes
+        try:
+            if len(c) == 4 and len(a) <= 2 and len(b) <= 2:
+                return datetime(int(c), int(b), int(a))
+            if len(a) == 4 and len(b) <= 2 and len(c) <= 2:
+                return datetime(int(a), int(b), int(c))
+        except ValueError:
+            pass
     for fmt in ("%d-%m-%Y", "%Y-%m-%d"):
         try:
             return datetime.strptime(s, fmt)
@@ -185,6 +252,72 @@ def dparse(x: Any) -> Optional[datetime]:
     return None
 
 
+def dparse(x: Any) -> Optional[datetime]:
+    """
+    Parsea una fecha a objeto datetime.
+    Soporta: String (DD-MM-YYYY, YYYY-MM-DD), datetime, Excel serial.
+    Los textos se memorizan (caché acotada): cada fecha distinta se parsea una vez.
+    Returns: datetime object or None
+    """
+    if x is None:
+        return None
+    if isinstance(x, datetime):
+        return x
+    if isinstance(x, date):
+        return datetime(x.year, x.month, x.day)
+    
+    s = str(x).strip()
+    if not s:
+        return None
+    try:
+        return _dparse_memo[s]
+    except KeyError:
+        pass
+    dt = _dparse_texto(s)
+    if len(_dparse_memo) >= _DPARSE_MAX:
+        _dparse_memo.clear()
+    _dparse_memo[s] = dt
+    return dt
+
+
+def dparse_registro(registro: Dict[str, Any], campo: str = "fecha") -> Optional[datetime]:
+    """
+    dparse de registro[campo] guardado en registro[campo + "_dt"] (prestaciones,
+    casos): la fecha de cada registro se parsea una sola vez.
+    """
+    clave = f"{campo}_dt"
+    if clave in registro:
+        return registro[clave]
+    dt = dparse(registro.get(campo))
+    registro[clave] = dt
+    return dt
+
+
+def dparse_serie(col):
+    """
+    Versión en bloque de dparse para una columna (pandas.Series), p.ej. al cargar la
+    nómina. El formato dd-mm-yyyy se resuelve vectorizado; el resto pasa por dparse
+    una vez por valor distinto. Deja los textos en el memo para los dparse posteriores.
+    
+    Returns:
+        Serie datetime64 (NaT si la fecha no es válida) con el mismo índice.
+    """
+    import pandas as pd
+    texto = col.astype(str).str.strip()
+    limpio = texto.str.split(" ").str[0].str.replace("/", "-", regex=False)
+    out = pd.to_datetime(limpio.where(limpio.str.fullmatch(r"\d{1,2}-\d{1,2}-\d{4}")),
+                         format="%d-%m-%Y", errors="coerce")
+    faltan = out.isna() & col.notna()
+    if faltan.any():
+        out[faltan] = pd.to_datetime(col[faltan].map(dparse), errors="coerce")
+    if len(_dparse_memo) + len(texto) >= _DPARSE_MAX:
+        _dparse_memo.clear()
+    for s, ts in zip(texto[~faltan], out[~faltan]):
+        if s and s not in _dparse_memo:
+            _dparse_memo[s] = None if pd.isna(ts) else ts.to_pydatetime()
+    return out
+
+
 
 # =============================================================================
 #                      NORMALIZACIÓN DE RUT
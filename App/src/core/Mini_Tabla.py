@@ -12,7 +12,7 @@ from selenium.webdriver.support import expected_conditions as EC
 from src.utils.Terminal import log_info, log_debug 
 from src.utils.Direcciones import XPATHS
 from src.utils.Esperas import ESPERAS
-from src.core.Formatos import _norm
+from src.core.Formatos import MatcherKeywords, _norm, _norm_memo, matcher_keywords
 
 
 # _norm removido, ahora se importa desde src.core.Formatos
@@ -93,6 +93,24 @@ def leer_mini_tabla(sigges) -> List[Dict[str, Any]]:
     """
     driver = sigges.driver
     
+    # ==========================================================================
+    # FASE 0: Respuesta JSON capturada por CDP (opcional, src/core/captura_red.py)
+    # ==========================================================================
+    captura = getattr(sigges, "captura", None)
+    if captura:
+        casos_red = captura.ultima_lista_casos()
+        if casos_red:
+            return [
+                {
+                    "problema": c["caso"],
+                    "estado": c["estado"],
+                    "motivo": c["motivo"],
+                    "fecha_inicio": _parse_fecha(c["fecha_inicio"]),
+                    "fecha_cierre": _parse_fecha(c["fecha_cierre"]),
+                }
+                for c in casos_red
+            ]
+
     # Configuración de timeouts
     timeout_tbody = float(ESPERAS.get("mini_tabla_read", {"wait": 3}).get("wait", 3))
     
@@ -510,20 +528,38 @@ def resolver_casos_duplicados(casos: List[Dict[str, Any]], nombre_buscado: str)
     if not casos:
         return None, "No hay casos en mini-tabla"
     
-    # Normalizar nombre buscado
-    nombre_norm = _norm(nombre_buscado)
-    
-    # Filtrar casos que matchean el nombre
-    matches = []
-    for caso in casos:
-        problema_norm = _norm(caso.get("problema", ""))
-        # Match si el nombre buscado está contenido en el problema
-        if nombre_norm in problema_norm or problema_norm in nombre_norm:
-            matches.append(caso)
-    
+    matches = _casos_que_calzan(casos, [_norm_memo(c.get("problema", "")) for c in casos],
+                                _norm_memo(nombre_buscado))
     if not matches:
         return None, f"No se encontró caso que matchee '{nombre_buscado}'"
-    
+    return _priorizar_duplicados(matches)
+
+
+def resolver_casos_keywords(casos: List[Dict[str, Any]],
+                            kws: "MatcherKeywords | List[str]") -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    resolver_casos_duplicados para una lista de keywords: la primera keyword (en orden)
+    que calce con algún caso decide, igual que llamarla keyword por keyword, pero
+    normalizando cada nombre de caso una sola vez.
+    """
+    if not casos:
+        return None, "No hay casos en mini-tabla"
+    matcher = matcher_keywords(kws)
+    nombres = [_norm_memo(c.get("problema", "")) for c in casos]
+    for patron in matcher.patrones:
+        matches = _casos_que_calzan(casos, nombres, patron)
+        if matches:
+            return _priorizar_duplicados(matches)
+    return None, "No se encontró caso que matchee las keywords"
+
+
+def _casos_que_calzan(casos: List[Dict[str, Any]], nombres_norm: List[str], buscado_norm: str) -> List[Dict[str, Any]]:
+    """Casos cuyo problema contiene al nombre buscado (o viceversa), ya normalizados."""
+    return [c for c, n in zip(casos, nombres_norm) if buscado_norm in n or n in buscado_norm]
+
+
+def _priorizar_duplicados(matches: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], str]:
+    """Entre los casos que calzan, elige según las reglas de resolver_casos_duplicados."""
     # Si solo hay un match, devolver ese
     if len(matches) == 1:
         return matches[0], f"Único caso encontrado: {matches[0]['problema']}"
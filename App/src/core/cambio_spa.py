@@ -0,0 +1,79 @@
+# src/core/cambio_spa.py
+# -*- coding: utf-8 -*-
+"""
+Cambio de paciente dentro de la SPA de SIGGES, sin recargar la página.
+
+SIGGES usa rutas con hash (#/busqueda-de-paciente, #/cartola-...): cambiar
+location.hash navega con el router de la app, sin volver a cargarla. Cada paso
+se confirma con una huella del DOM (ruta, input RUT y texto de la mini-tabla)
+leída en UNA llamada execute_script. Si la huella no confirma el cambio, el
+llamador usa la navegación completa de siempre.
+"""
+from __future__ import annotations
+from typing import Optional, Sequence
+
+from src.core.selectors import es_xpath
+from src.utils.Terminal import log_debug
+
+
+# Locators (XPath de XPATHS): arguments[0] mini-tabla, [1] menú lateral, [2] input RUT.
+# app = menú lateral montado (sesión dentro de la SPA, no login ni página en blanco)
+JS_HUELLA_SPA = """
+function primero(xps) {
+    for (var k = 0; xps && k < xps.length; k++) {
+        try {
+            var el = document.evaluate(xps[k], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+            if (el) return el;
+        } catch (e) {}
+    }
+    return null;
+}
+var tb = primero(arguments[0]);
+return {
+    app: !!primero(arguments[1]),
+    ruta: location.hash || '',
+    input: !!primero(arguments[2]),
+    resultados: tb ? (tb.innerText || tb.textContent || '').replace(/\\s+/g, ' ').trim() : ''
+};
+"""
+
+JS_IR_RUTA = "location.hash = arguments[0]; return location.hash;"
+
+
+def ruta_hash(url: str) -> str:
+    """'https://www.sigges.cl/#/34' -> '#/34' ('' si la URL no tiene hash)."""
+    i = (url or "").find("#")
+    return url[i:] if i >= 0 else ""
+
+
+class HuellaSPA:
+    """Estado mínimo del DOM para confirmar un cambio de paciente."""
+
+    __slots__ = ("app", "ruta", "input", "resultados")
+
+    def __init__(self, app: bool, ruta: str, input: bool, resultados: str):
+        self.app = bool(app)
+        self.ruta = ruta or ""
+        self.input = bool(input)
+        self.resultados = resultados or ""
+
+    def en_ruta(self, rutas: Sequence[str]) -> bool:
+        return self.ruta in rutas
+
+    def __repr__(self) -> str:
+        return f"HuellaSPA(app={self.app}, ruta={self.ruta!r}, input={self.input}, resultados={len(self.resultados)}c)"
+
+    @classmethod
+    def leer(cls, driver, xpaths_resultados: Sequence[str] = (), xpaths_menu: Sequence[str] = (),
+             xpaths_input: Sequence[str] = ()) -> Optional["HuellaSPA"]:
+        """Una ida y vuelta al navegador; None si el JS falla. Solo se usan los XPath de cada lista."""
+        solo_xpath = lambda xps: [xp for xp in xps or () if es_xpath(xp)]
+        try:
+            raw = driver.execute_script(JS_HUELLA_SPA, solo_xpath(xpaths_resultados), solo_xpath(xpaths_menu),
+                                        solo_xpath(xpaths_input))
+        except Exception as e:
+            log_debug(f"[DEBUG] huella_spa: JS falló ({e})")
+            return None
+        if not isinstance(raw, dict):
+            return None
+        return cls(raw.get("app"), raw.get("ruta"), raw.get("input"), raw.get("resultados"))
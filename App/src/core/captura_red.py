@@ -0,0 +1,244 @@
+# src/core/captura_red.py
+# -*- coding: utf-8 -*-
+"""
+Captura opcional de respuestas XHR/JSON de SIGGES vía Chrome DevTools Protocol.
+
+El driver ya está conectado por CDP (debuggerAddress). Con la captura activa
+(NOZHGESS_CAPTURA_RED=1) se leen los eventos Network.responseReceived /
+Network.loadingFinished del log de performance y se piden los cuerpos con
+Network.getResponseBody. Las listas de casos se extraen como campos crudos
+(nombre, estado, fechas); la normalización final la hace el mismo código que
+procesa el DOM. Las prestaciones otorgadas del detalle de un caso salen por
+nombre de campo (no por posición de columna) con la misma forma que
+leer_prestaciones_desde_tbody. Si la forma no calza, el llamador sigue con el DOM.
+"""
+from __future__ import annotations
+import base64
+import json
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from src.core.Formatos import _norm
+from src.utils.Terminal import log_debug, log_info, log_warn
+
+# Alias de campos (normalizados con _norm, sin espacios/guiones) por dato
+_ALIAS = {
+    "caso": ("problema", "problemasalud", "nombreproblema", "caso", "nombrecaso", "patologia", "glosaproblema"),
+    "estado": ("estado", "estadocaso", "glosaestado"),
+    "motivo": ("motivo", "motivocierre", "causal", "glosamotivo"),
+    "fecha_inicio": ("fechainicio", "fechaapertura", "apertura", "fechacreacion", "fechaingreso"),
+    "fecha_cierre": ("fechacierre", "cierre", "fechatermino"),
+}
+
+
+# Prestaciones otorgadas: código y glosa deben venir como campos "de prestación",
+# igual que el DOM exige "Código de prestación" / "Glosa prestación" en el thead
+# (así una lista de OA, que también trae código, no se confunde con prestaciones).
+_ALIAS_PRESTACION = {
+    "referencia": ("referencia", "folioreferencia", "nroreferencia", "numeroreferencia", "folio"),
+    "fecha": ("fechaatencion", "fechaprestacion", "fechaotorgamiento", "fecha", "fechatermino"),
+    "codigo": ("codigoprestacion", "codprestacion", "prestacioncodigo"),
+    "glosa": ("glosaprestacion", "prestacionglosa", "nombreprestacion", "descripcionprestacion"),
+    "establecimiento": ("establecimiento", "nombreestablecimiento", "establecimientootorga"),
+    "especialidad": ("especialidaddestino", "especialidad"),
+}
+
+
+def captura_habilitada() -> bool:
+    """La captura es opt-in (igual que la telemetría) para no alterar sesiones existentes."""
+    return os.getenv("NOZHGESS_CAPTURA_RED", "0") == "1"
+
+
+def _clave(k: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", _norm(str(k)))
+
+
+def _texto(v: Any) -> str:
+    if v is None:
+        return ""
+    if isinstance(v, dict):
+        # Objetos tipo {"codigo": .., "descripcion": ..}
+        for k in ("descripcion", "glosa", "nombre", "valor", "text"):
+            if k in v:
+                return _texto(v[k])
+        return ""
+    return str(v).strip()
+
+
+def _fecha_dom(v: str) -> str:
+    """Lleva fechas de API (ISO yyyy-mm-dd[T..], dd-mm-yyyy) al formato del DOM dd/mm/yyyy."""
+    m = re.match(r"^(\d{4})-(\d{2})-(\d{2})", v)
+    if m:
+        return f"{m.group(3)}/{m.group(2)}/{m.group(1)}"
+    m = re.match(r"^(\d{2})[-/](\d{2})[-/](\d{4})", v)
+    if m:
+        return f"{m.group(1)}/{m.group(2)}/{m.group(3)}"
+    return v
+
+
+def _mapear_item(item: Dict[str, Any], alias_campos: Dict[str, tuple] = _ALIAS) -> Dict[str, str]:
+    """Mapea un dict de la API a los campos pedidos (por defecto, los de caso) usando alias."""
+    claves = {_clave(k): k for k in item.keys()}
+    out = {}
+    for campo, alias in alias_campos.items():
+        for a in alias:
+            if a in claves:
+                out[campo] = _texto(item[claves[a]])
+                break
+        else:
+            out[campo] = ""
+        if campo.startswith("fecha") and out[campo]:
+            out[campo] = _fecha_dom(out[campo])
+    return out
+
+
+def _listas_de_dicts(obj: Any, prof: int = 0):
+    """Recorre el JSON y entrega cada lista no vacía de dicts (más externas primero)."""
+    if prof > 6:
+        return
+    if isinstance(obj, list):
+        if obj and all(isinstance(x, dict) for x in obj):
+            yield obj
+        for x in obj:
+            yield from _listas_de_dicts(x, prof + 1)
+    elif isinstance(obj, dict):
+        for v in obj.values():
+            yield from _listas_de_dicts(v, prof + 1)
+
+
+def extraer_casos(obj: Any) -> Optional[List[Dict[str, str]]]:
+    """
+    Busca en el JSON una lista de casos (todos con nombre de problema y estado).
+    Retorna dicts con caso/estado/motivo/fecha_inicio/fecha_cierre (crudos) o None.
+    """
+    for lista in _listas_de_dicts(obj):
+        mapeados = [_mapear_item(x) for x in lista]
+        if all(m["caso"] and m["estado"] for m in mapeados):
+            return mapeados
+    return None
+
+
+def extraer_prestaciones(obj: Any) -> Optional[List[Dict[str, str]]]:
+    """
+    Busca en el JSON la lista de prestaciones otorgadas (todas con código y glosa
+    de prestación y fecha). Retorna dicts referencia/fecha/codigo/glosa/
+    establecimiento/especialidad, como leer_prestaciones_desde_tbody, o None.
+    """
+    for lista in _listas_de_dicts(obj):
+        mapeados = [_mapear_item(x, _ALIAS_PRESTACION) for x in lista]
+        if all(m["codigo"] and m["glosa"] and m["fecha"] for m in mapeados):
+            return mapeados
+    return None
+
+
+class CapturaRed:
+    """
+    Recolector de respuestas JSON sobre el log de performance del driver.
+
+    Uso:
+        cap.marcar()              # antes de la acción (búsqueda, cartola)
+        ... acción + spinner ...
+        casos = cap.ultima_lista_casos()   # None => usar DOM
+    """
+
+    MAX_BODIES = 40
+
+    def __init__(self, driver, url_filtro: Optional[str] = None):
+        self.driver = driver
+        patron = url_filtro if url_filtro is not None else os.getenv("NOZHGESS_CAPTURA_URL", "")
+        self.url_filtro = re.compile(patron, re.I) if patron else None
+        self._pendientes: Dict[str, str] = {}   # requestId -> url
+        self._respuestas: List[Dict[str, Any]] = []
+        self.activa = True
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+        except Exception as e:
+            log_warn(f"⚠️ Captura de red no disponible ({e}); se usará solo DOM")
+            self.activa = False
+
+    def marcar(self) -> None:
+        """Descarta todo lo recibido hasta ahora (evita reusar respuestas del paciente anterior)."""
+        if not self.activa:
+            return
+        self._drenar(guardar=False)
+        self._pendientes.clear()
+        self._respuestas.clear()
+
+    def _drenar(self, guardar: bool = True) -> None:
+        try:
+            entradas = self.driver.get_log("performance")
+        except Exception as e:
+            log_warn(f"⚠️ Log de performance no disponible ({e}); captura desactivada")
+            self.activa = False
+            return
+        for entrada in entradas:
+            try:
+                msg = json.loads(entrada["message"])["message"]
+            except Exception:
+                continue
+            metodo = msg.get("method")
+            params = msg.get("params", {})
+            if metodo == "Network.responseReceived":
+                resp = params.get("response", {})
+                url = resp.get("url", "")
+                if "json" not in (resp.get("mimeType") or "").lower():
+                    continue
+                if self.url_filtro and not self.url_filtro.search(url):
+                    continue
+                self._pendientes[params.get("requestId")] = url
+            elif metodo == "Network.loadingFinished" and guardar:
+                rid = params.get("requestId")
+                url = self._pendientes.pop(rid, None)
+                if url is None:
+                    continue
+                cuerpo = self._cuerpo(rid)
+                if cuerpo is not None:
+                    self._respuestas.append({"url": url, "ts": time.time(), "json": cuerpo})
+                    del self._respuestas[:-self.MAX_BODIES]
+
+    def _cuerpo(self, request_id: str) -> Optional[Any]:
+        try:
+            r = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+            body = r.get("body", "")
+            if r.get("base64Encoded"):
+                body = base64.b64decode(body).decode("utf-8", "replace")
+            return json.loads(body)
+        except Exception:
+            return None
+
+    def ultimas_prestaciones(self) -> Optional[List[Dict[str, str]]]:
+        """Prestaciones de la respuesta JSON más reciente desde la última marca, o None."""
+        if not self.activa:
+            return None
+        self._drenar()
+        for resp in reversed(self._respuestas):
+            prest = extraer_prestaciones(resp["json"])
+            if prest is not None:
+                log_debug(f"[DEBUG] captura_red: {len(prest)} prestaciones desde {resp['url'][:80]}")
+                return prest
+        return None
+
+    def ultima_lista_casos(self) -> Optional[List[Dict[str, str]]]:
+        """Lista de casos de la respuesta JSON más reciente desde la última marca, o None."""
+        if not self.activa:
+            return None
+        self._drenar()
+        for resp in reversed(self._respuestas):
+            casos = extraer_casos(resp["json"])
+            if casos:
+                log_debug(f"[DEBUG] captura_red: {len(casos)} casos desde {resp['url'][:80]}")
+                return casos
+        return None
+
+
+def configurar_opciones(opts) -> None:
+    """Pide el log de performance al crear la sesión (requisito para leer eventos Network)."""
+    prefs = {"performance": "ALL"}
+    for cap in ("ms:loggingPrefs", "goog:loggingPrefs"):
+        try:
+            opts.set_capability(cap, prefs)
+        except Exception:
+            pass
+    log_info("📡 Captura de red CDP habilitada (NOZHGESS_CAPTURA_RED=1)")
@@ -0,0 +1,140 @@
+# src/core/cartola_casos.py
+# -*- coding: utf-8 -*-
+"""
+Lista de casos de la cartola en UNA llamada execute_script.
+
+Devuelve el texto de cada caso, el estado de su checkbox y los WebElement de
+la fila y del checkbox, que se guardan para expandir/colapsar después sin
+volver a buscar el contenedor caso por caso.
+
+SesionCasos mantiene abiertos los casos del paciente actual: los expande en
+lote (una espera de spinner) y los colapsa todos juntos al dejar el paciente.
+Mientras haya más de uno abierto marca el driver con lectura_acotada, para que
+los lectores de sección no tomen datos de otro caso abierto.
+"""
+from __future__ import annotations
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from src.utils.Terminal import log_debug
+
+
+# Filas = hijos DIV directos del contenedor que tienen checkbox (mismo índice que
+# usan expandir_caso / cerrar_caso_por_indice). null si no hay contenedor.
+JS_CASOS_CARTOLA = """
+var xps = arguments[0] || [];
+var cont = document.querySelector('div.contRow.contRowBox.scrollH');
+for (var k = 0; !cont && k < xps.length; k++) {
+    try {
+        cont = document.evaluate(xps[k], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    } catch (e) {}
+}
+if (!cont) return null;
+var filas = [], checks = [], casos = [];
+var hijos = cont.children;
+for (var i = 0; i < hijos.length; i++) {
+    var fila = hijos[i];
+    if (fila.tagName !== 'DIV') continue;
+    var chk = fila.querySelector("input[type='checkbox']");
+    if (!chk) continue;
+    var p = fila.querySelector('label > p') || fila.querySelector('label p');
+    casos.push({
+        indice: filas.length,
+        texto: p ? (p.innerText || p.textContent || '').trim() : '',
+        marcado: !!chk.checked
+    });
+    filas.push(fila);
+    checks.push(chk);
+}
+return {filas: filas, checks: checks, casos: casos};
+"""
+
+
+class CasosCartola:
+    """Resultado de JS_CASOS_CARTOLA: textos + handles estables por índice."""
+
+    def __init__(self, filas: Sequence[Any], checks: Sequence[Any], casos: Sequence[Dict[str, Any]]):
+        self.filas: List[Any] = list(filas or [])
+        self.checks: List[Any] = list(checks or [])
+        self.casos: List[Dict[str, Any]] = list(casos or [])
+
+    def __len__(self) -> int:
+        return len(self.filas)
+
+    def fila(self, indice: int) -> Optional[Any]:
+        return self.filas[indice] if 0 <= indice < len(self.filas) else None
+
+    def checkbox(self, indice: int) -> Optional[Any]:
+        return self.checks[indice] if 0 <= indice < len(self.checks) else None
+
+    @classmethod
+    def leer(cls, driver, xpaths_contenedor: Sequence[str] = ()) -> Optional["CasosCartola"]:
+        """Una ida y vuelta al navegador; None si no hay contenedor o el JS falla."""
+        try:
+            raw = driver.execute_script(JS_CASOS_CARTOLA, list(xpaths_contenedor or []))
+        except Exception as e:
+            log_debug(f"[DEBUG] casos_cartola: JS falló ({e})")
+            return None
+        if not isinstance(raw, dict):
+            return None
+        return cls(raw.get("filas"), raw.get("checks"), raw.get("casos"))
+
+
+# Clic directo (JS) en los checkboxes que no estén en el estado pedido; devuelve cuántos cambió
+JS_MARCAR_CHECKBOXES = """
+var chks = arguments[0] || [], marcar = arguments[1], n = 0;
+for (var i = 0; i < chks.length; i++) {
+    if (chks[i] && !!chks[i].checked !== marcar) { chks[i].click(); n++; }
+}
+return n;
+"""
+
+# true cuando todas las filas expandidas ya tienen celdas (<td>)
+JS_FILAS_CON_DETALLE = """
+var filas = arguments[0] || [];
+for (var i = 0; i < filas.length; i++) {
+    if (!filas[i] || !filas[i].querySelector('td')) return false;
+}
+return true;
+"""
+
+
+class SesionCasos:
+    """
+    Casos expandidos del paciente actual sobre un SiggesDriver vivo.
+    
+    - expandir_lote: todos los casos que piden las misiones en un solo clic JS y
+      una sola espera de spinner.
+    - expandir_caso: si el caso ya está abierto devuelve su raíz sin clic.
+    - cerrar_caso_por_indice: no hace nada; el colapso es en cerrar_todo, al salir
+      del paciente.
+    - lectura_acotada del driver queda en True con 2+ casos abiertos.
+    El resto de métodos se delegan al driver.
+    """
+
+    def __init__(self, sigges):
+        self._sigges = sigges
+        self._abiertos: Dict[int, Any] = {}
+
+    def __getattr__(self, nombre: str):
+        return getattr(self._sigges, nombre)
+
+    def expandir_lote(self, indices: Iterable[int]) -> Dict[int, Any]:
+        indices = list(indices)
+        faltan = [i for i in dict.fromkeys(indices) if i not in self._abiertos]
+        if faltan:
+            self._abiertos.update(self._sigges.expandir_casos(faltan))
+            self._sigges.lectura_acotada = len(self._abiertos) > 1
+        return {i: self._abiertos[i] for i in indices if i in self._abiertos}
+
+    def expandir_caso(self, indice: int) -> Optional[Any]:
+        return self.expandir_lote([indice]).get(indice)
+
+    def cerrar_caso_por_indice(self, indice: int) -> None:
+        return None
+
+    def cerrar_todo(self) -> None:
+        self._sigges.lectura_acotada = False
+        if self._abiertos:
+            indices = list(self._abiertos)
+            self._abiertos.clear()
+            self._sigges.colapsar_casos(indices)
@@ -0,0 +1,122 @@
+# src/core/estado_pagina.py
+# -*- coding: utf-8 -*-
+"""
+Detector de estado de navegación con UNA sonda JS.
+
+sondear_estado() lee en una sola llamada execute_script el hash de la URL,
+la presencia de cada hito (XPaths de locators.py) y si el spinner está visible.
+clasificar_estado() decide el estado sin tocar el navegador, así que se puede
+medir aparte (Scripts/benchmark_estado.py).
+
+Estados: LOGIN, SELECT_UNIT, HOME, BUSQUEDA, CARTOLA, UNKNOWN.
+"""
+from __future__ import annotations
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.core.cambio_spa import ruta_hash
+from src.core.locators import XPATHS
+from src.utils.Terminal import log_debug
+
+
+def _rutas(clave: str) -> Tuple[str, ...]:
+    """Rutas hash de una URL de locators.py y sus fallbacks ('#/busqueda-de-paciente', '#/34')."""
+    urls = [XPATHS[clave]] + list(XPATHS.get(f"{clave}_FALLBACKS", []))
+    return tuple(r.lower() for r in (ruta_hash(u) for u in urls) if r)
+
+
+RUTAS_LOGIN = _rutas("LOGIN_URL")
+RUTAS_HOME = _rutas("LOGIN_SUCCESS_URL")
+RUTAS_BUSQUEDA = _rutas("BUSQUEDA_URL")
+RUTAS_CARTOLA = _rutas("CARTOLA_URL")
+
+# Hitos que distinguen cada pantalla (solo XPaths; los selectores CSS de respaldo se omiten)
+HITOS: Dict[str, List[str]] = {
+    clave: [xp for xp in XPATHS[clave] if xp.startswith(("/", "("))]
+    for clave in ("LOGIN_BTN_INGRESAR", "LOGIN_SEL_UNIDAD_HEADER", "MENU_CONTENEDOR", "INPUT_RUT")
+}
+
+# Resultado: {hash, hitos: {clave: bool}, spinner: bool, ms}
+JS_SONDA_ESTADO = """
+var hitos = arguments[0] || {}, t0 = performance.now(), res = {};
+for (var clave in hitos) {
+    res[clave] = false;
+    var xps = hitos[clave];
+    for (var k = 0; k < xps.length && !res[clave]; k++) {
+        try {
+            res[clave] = !!document.evaluate(xps[k], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        } catch (e) {}
+    }
+}
+function visible(el) { return !!(el && (el.offsetParent !== null || el.getBoundingClientRect().width > 0)); }
+return {
+    hash: (location.hash || '').toLowerCase(),
+    hitos: res,
+    spinner: visible(document.querySelector("dialog.loading[open]")) || visible(document.querySelector("div.circulo")),
+    ms: performance.now() - t0
+};
+"""
+
+
+def _en(hash_: str, rutas: Sequence[str]) -> bool:
+    return any(hash_ == r or hash_.startswith(r + "/") or hash_.startswith(r + "?") for r in rutas)
+
+
+def clasificar_estado(sonda: Dict[str, Any]) -> str:
+    """Estado a partir de una sonda (dict de JS_SONDA_ESTADO). Función pura."""
+    h = (sonda.get("hash") or "").lower()
+    hitos = sonda.get("hitos") or {}
+    if _en(h, RUTAS_LOGIN):
+        if hitos.get("LOGIN_BTN_INGRESAR"):
+            return "LOGIN"
+        if hitos.get("LOGIN_SEL_UNIDAD_HEADER"):
+            return "SELECT_UNIT"
+        if hitos.get("MENU_CONTENEDOR"):
+            return "HOME"
+        return "LOGIN"
+    if _en(h, RUTAS_HOME):
+        return "HOME"
+    if _en(h, RUTAS_BUSQUEDA):
+        return "BUSQUEDA"
+    if _en(h, RUTAS_CARTOLA):
+        return "CARTOLA"
+    if hitos.get("MENU_CONTENEDOR"):
+        return "HOME"
+    return "UNKNOWN"
+
+
+def estado_confirmado(estado: str, sonda: Dict[str, Any]) -> bool:
+    """
+    False si la página está en transición (spinner visible o Búsqueda sin input):
+    el estado vale para esta llamada pero no se guarda en caché.
+    """
+    if sonda.get("spinner"):
+        return False
+    if estado == "BUSQUEDA":
+        return bool((sonda.get("hitos") or {}).get("INPUT_RUT"))
+    return True
+
+
+def sondear_estado(driver) -> Optional[Dict[str, Any]]:
+    """Una ida y vuelta al navegador; None si el JS falla."""
+    try:
+        sonda = driver.execute_script(JS_SONDA_ESTADO, HITOS)
+    except Exception as e:
+        log_debug(f"[DEBUG] sonda_estado: JS falló ({e})")
+        return None
+    return sonda if isinstance(sonda, dict) else None
+
+
+def detectar_estado(driver) -> Tuple[str, bool, float]:
+    """
+    Sondea y clasifica. Retorna (estado, confirmado, ms de ida y vuelta).
+    Sin sonda: ("UNKNOWN", False, ms).
+    """
+    t0 = time.perf_counter()
+    sonda = sondear_estado(driver)
+    ms = (time.perf_counter() - t0) * 1000
+    if sonda is None:
+        return "UNKNOWN", False, ms
+    estado = clasificar_estado(sonda)
+    log_debug(f"⏱️ [PERF] Estado {estado} en {ms:.0f}ms (JS {float(sonda.get('ms') or 0):.1f}ms)")
+    return estado, estado_confirmado(estado, sonda), ms
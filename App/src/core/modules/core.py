@@ -12,7 +12,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 # Local Imports
 from src.utils.Direcciones import XPATHS
 from src.utils.Errores import SpinnerStuck
-from src.utils.Esperas import ESPERAS, espera
+from src.utils.Esperas import ESPERAS, espera, registrar_condicion
 from src.utils.Terminal import log_error, log_info, log_warn
 from src.utils.Reintentos import retry, selenium_circuit, ErrorCategory
 
@@ -97,7 +97,10 @@ class CoreMixin:
         if os.getenv("NOZHGESS_FORENSIC_SLEEP", "0") == "1":
             time.sleep(1.0)
 
-        return self.selectors.find_with_fallbacks(locators, condition, timeout)
+        t0 = time.time()
+        el = self.selectors.find_with_fallbacks(locators, condition, timeout)
+        registrar_condicion(clave_espera, time.time() - t0, ok=el is not None)
+        return el
 
     @retry(max_attempts=3, circuit_breaker=selenium_circuit)
     def _click(self, locators: list[str], scroll: bool = True, wait_spinner: bool = True,
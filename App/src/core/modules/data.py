@@ -6,11 +6,14 @@ import re
 import time
 import traceback
 from datetime import datetime
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
 from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
 
 from src.utils.Direcciones import XPATHS
 from src.utils.Terminal import log_error, log_info, log_warn
 from src.core.Formatos import dparse, _norm
+from src.core.cartola_casos import CasosCartola
 
 if TYPE_CHECKING:
     from src.core.state import DriverState
@@ -27,6 +30,8 @@ class DataParsingMixin:
     log: LoggerPro
     waits: SmartWait
     selectors: SelectorEngine
+    # Filas/checkboxes de la cartola leídos en bloque (src/core/cartola_casos.py)
+    _casos_cartola: Optional[CasosCartola] = None
 
     def activar_hitos_ges(self) -> None:
         """Activa el checkbox de 'Mostrar solo hitos GES'."""
@@ -77,71 +82,30 @@ class DataParsingMixin:
             pass
         return None
 
+    def _leer_casos_cartola(self) -> Optional[CasosCartola]:
+        """Casos de la cartola (textos + handles de fila/checkbox) en una sola llamada JS."""
+        self._casos_cartola = CasosCartola.leer(self.driver, XPATHS.get("TABLA_CASOS_CONTAINER") or [])
+        return self._casos_cartola
+
     def lista_de_casos_cartola(self) -> List[str]:
         """Obtiene lista de nombres de casos de la cartola desde DIVs."""
-        contenedor_xpaths = [
-            "//div[contains(@class,'contRow') and contains(@class,'contRowBox') and contains(@class,'scrollH')]",
-            "//div[@class='contRow contRowBox scrollH']",
-            XPATHS["CONT_CARTOLA"],
-        ]
-        
-        root = None
-        for xpath in contenedor_xpaths:
-            root = self._find([xpath] if isinstance(xpath, str) else xpath, "presence", "case_list_read")
-            if root:
-                break
-        
-        if not root:
-            return []
-        
-        try:
-            casos_divs = root.find_elements(By.XPATH, ".//div[@class='contRow'][.//input[@type='checkbox']]")
-            casos_texto = []
-            for div in casos_divs:
-                try:
-                    p_element = self._find([".//label/p"], "visible", "case_list_read")
-                    if not p_element:
-                        continue
-                    texto = (p_element.text or "").strip()
-                    if texto:
-                        casos_texto.append(texto)
-                except Exception:
-                    continue
-            return casos_texto
-        except Exception:
+        cc = self._leer_casos_cartola()
+        if not cc:
             return []
+        return [c["texto"] for c in cc.casos if c.get("texto")]
 
     def _parsear_cartola_divs(self) -> List[Dict[str, Any]]:
-        """Estrategia 1: Leer DIVs (Estructura Actual)"""
+        """Estrategia 1: Leer DIVs (Estructura Actual) en una sola llamada JS"""
         datos_casos = []
         try:
-            xpaths_cont = [
-                "//div[contains(@class,'contRow') and contains(@class,'contRowBox') and contains(@class,'scrollH')]",
-                "//div[@class='contRow contRowBox scrollH']",
-                XPATHS["CONT_CARTOLA"]
-            ]
-            flat_xpaths = []
-            for xp in xpaths_cont:
-                if isinstance(xp, list): flat_xpaths.extend(xp)
-                else: flat_xpaths.append(xp)
-            
-            root = None
-            for xp in flat_xpaths:
-                root = self._find([xp] if isinstance(xp, str) else xp, "presence", "case_list_read")
-                if root:
-                    break
-            
-            if not root:
+            cc = self._leer_casos_cartola()
+            if not cc:
                 return []
-                
-            casos_divs = root.find_elements(By.XPATH, ".//div[@class='contRow'][.//input[@type='checkbox']]")
             
-            for i, div in enumerate(casos_divs):
+            for caso in cc.casos:
                 try:
-                    p = self._find([".//label/p"], "visible", "case_list_read")
-                    if not p:
-                        continue
-                    raw_text = (p.text or "").strip()
+                    i = int(caso.get("indice", 0))
+                    raw_text = (caso.get("texto") or "").strip()
                     if not raw_text: continue
                     
                     fecha_match = re.search(r'(\d{2}[/-]\d{2}[/-]\d{4})', raw_text)
@@ -256,72 +220,52 @@ class DataParsingMixin:
     # =========================================================================
 
     def _case_root(self, i: int) -> Optional[Any]:
-        """Obtiene el div raíz de un caso por índice en la cartola."""
-        try:
-            contenedor_xpaths = [
-                "//div[contains(@class,'contRow') and contains(@class,'contRowBox') and contains(@class,'scrollH')]",
-                "//div[@class='contRow contRowBox scrollH']",
-            ]
-            contenedor = None
-            for xpath in contenedor_xpaths:
-                contenedor = self._find([xpath], "presence", "case_list_read")
-                if contenedor:
-                    break
-            
-            if not contenedor: return None
-            
-            casos_divs = contenedor.find_elements(By.XPATH, ".//div[@class='contRow'][.//input[@type='checkbox']]")
-            if 0 <= i < len(casos_divs):
-                return casos_divs[i]
-            return None
-        except Exception:
-            return None
-
-    def expandir_caso(self, i: int) -> Optional[Any]:
-        """Expande un caso haciendo click en su checkbox."""
-        root = self._case_root(i)
-        if not root: return None
-        
-        try:
-            checkbox = self._find([".//input[@type='checkbox']"], "clickable", "case_click_checkbox")
+        """Obtiene el div raíz de un caso por índice (handles guardados al leer la cartola)."""
+        cc = getattr(self, "_casos_cartola", None) or self._leer_casos_cartola()
+        return cc.fila(i) if cc else None
+
+    def _case_checkbox(self, i: int, refrescar: bool = False) -> Optional[Any]:
+        """Checkbox del caso i; con `refrescar` relee la cartola (handles obsoletos)."""
+        cc = None if refrescar else getattr(self, "_casos_cartola", None)
+        cc = cc or self._leer_casos_cartola()
+        return cc.checkbox(i) if cc else None
+
+    def _toggle_caso(self, i: int, expandir: bool) -> bool:
+        """Deja el checkbox del caso en el estado pedido; True si hubo click."""
+        for refrescar in (False, True):
+            checkbox = self._case_checkbox(i, refrescar)
             if not checkbox:
-                return None
-            if not checkbox.is_selected():
+                return False
+            try:
+                if checkbox.is_selected() == expandir:
+                    return False
                 try:
                     checkbox.click()
                 except Exception:
                     self.driver.execute_script("arguments[0].click();", checkbox)
-                
-                # Esperar a que el estado cambie visualmente
-                try:
-                    WebDriverWait(self.driver, 1.0).until(lambda d: checkbox.is_selected())
-                except TimeoutException:
-                    pass
-                
+            except StaleElementReferenceException:
+                continue
+            # Esperar a que el estado cambie visualmente
+            try:
+                WebDriverWait(self.driver, 1.0).until(lambda d: checkbox.is_selected() == expandir)
+            except TimeoutException:
+                pass
+            return True
+        return False
+
+    def expandir_caso(self, i: int) -> Optional[Any]:
+        """Expande un caso haciendo click en su checkbox."""
+        try:
+            if self._toggle_caso(i, expandir=True):
                 self._wait_smart("spinner")
-            return root
+            return self._case_root(i)
         except Exception:
             return None
 
     def cerrar_caso_por_indice(self, i: int) -> None:
         """Cierra un caso expandido haciendo click en su checkbox."""
         try:
-            root = self._case_root(i)
-            if root:
-                checkbox = self._find([".//input[@type='checkbox']"], "clickable", "case_click_checkbox")
-                if not checkbox:
-                    return
-                if checkbox.is_selected():
-                    try:
-                        checkbox.click()
-                    except Exception:
-                        self.driver.execute_script("arguments[0].click();", checkbox)
-                    
-                    # Esperar a que se desmarque
-                    try:
-                        WebDriverWait(self.driver, 1.0).until(lambda d: not checkbox.is_selected())
-                    except TimeoutException:
-                        pass
+            self._toggle_caso(i, expandir=False)
         except Exception:
             pass
 
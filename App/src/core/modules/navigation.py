@@ -11,6 +11,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 
 from src.utils.Direcciones import XPATHS
 from src.utils.Terminal import log_error, log_info, log_ok, log_warn
+from src.core.estado_pagina import detectar_estado
 from src.core.NavegacionRapida import navegar_a_busqueda_rapido, ya_en_busqueda
 from src.utils.Reintentos import retry, selenium_circuit
 
@@ -30,7 +31,7 @@ class NavigationMixin:
     selectors: SelectorEngine
 
     def detectar_estado_actual(self) -> str:
-        """Detecta el estado actual basándose en URL y elementos."""
+        """Detecta el estado actual basándose en URL y elementos (ver estado_pagina)."""
         # ⚡ Cache: Válido SOLO si: existe, es reciente, Y no fue invalidado
         
         # Access state safely
@@ -42,88 +43,11 @@ class NavigationMixin:
         if self.state.cached_state and cache_reciente and self.state.state_cache_valid:
             return self.state.cached_state
         
-        # Mark valid for this cycle (will be invalidated by actions)
-        self.state.state_cache_valid = True
-        
-        try:
-            # Requires CoreMixin._get_stable_url or direct access
-            url = self._get_stable_url() if hasattr(self, '_get_stable_url') else self.driver.current_url.lower()
-            
-            # LOGIN
-            if "#/login" in url:
-                try:
-                    btn = WebDriverWait(self.driver, 3).until(
-                        EC.presence_of_element_located((By.XPATH, XPATHS["LOGIN_BTN_INGRESAR"][0]))
-                    )
-                    if btn:
-                        self.state.update_cache("LOGIN")
-                        return "LOGIN"
-                except Exception:
-                    pass
-                
-                try:
-                    selector = WebDriverWait(self.driver, 2).until(
-                        EC.presence_of_element_located((By.XPATH, XPATHS["LOGIN_SEL_UNIDAD_HEADER"][0]))
-                    )
-                    if selector:
-                        self.state.update_cache("SELECT_UNIT")
-                        return "SELECT_UNIT"
-                except Exception:
-                    pass
-                
-                try:
-                    menu = WebDriverWait(self.driver, 2).until(
-                        EC.presence_of_element_located((By.XPATH, XPATHS["MENU_CONTENEDOR"][0]))
-                    )
-                    if menu:
-                        self.state.update_cache("HOME")
-                        return "HOME"
-                except Exception:
-                    pass
-                
-                self.state.update_cache("LOGIN")
-                return "LOGIN"
-            
-            # HOME (Post-login)
-            if "#/actualizaciones" in url or "actualizaciones" in url:
-                self.state.update_cache("HOME")
-                return "HOME"
-            
-            # BUSQUEDA
-            if "#/busqueda" in url or "busqueda-de-paciente" in url:
-                try:
-                    input_rut = WebDriverWait(self.driver, 1.5).until(
-                        EC.presence_of_element_located((By.XPATH, XPATHS["INPUT_RUT"][0]))
-                    )
-                    if input_rut:
-                        self.state.update_cache("BUSQUEDA")
-                        return "BUSQUEDA"
-                except TimeoutException:
-                    return "BUSQUEDA"
-            
-            # CARTOLA
-            if "#/cartola" in url or "cartola-unificada" in url:
-                self.state.update_cache("CARTOLA")
-                return "CARTOLA"
-            
-            # FALLBACK
-            try:
-                menu = WebDriverWait(self.driver, 3).until(
-                    EC.presence_of_element_located((By.XPATH, XPATHS["MENU_CONTENEDOR"][0]))
-                )
-                if menu:
-                    detected_state = "HOME"
-                    self.state.update_cache(detected_state)
-                    return detected_state
-            except Exception:
-                pass
-            
-            detected_state = "UNKNOWN"
-            self.state.update_cache(detected_state)
-            return detected_state
-            
-        except Exception:
-            return "UNKNOWN"
+        # Una sola sonda JS (hash + hitos + spinner), sin WebDriverWait encadenados
+        estado, confirmado, _ms = detectar_estado(self.driver)
+        if confirmado:
+            self.state.update_cache(estado)
+        return estado
 
     @retry(max_attempts=3, circuit_breaker=selenium_circuit)
     def asegurar_estado(self, estado_deseado: str) -> bool:
@@ -1,16 +1,19 @@
 # src/core/selectors.py
 # -*- coding: utf-8 -*-
 from __future__ import annotations
+import threading
 import time
-from typing import List, Optional, Any, TYPE_CHECKING
+from typing import Dict, List, Optional, Any, TYPE_CHECKING
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 
+import atexit
 import json
 import os
 import shutil
+from contextlib import contextmanager
 from collections import defaultdict, Counter
 from src.utils.Terminal import log_info, log_warn, log_error
 from src.utils import logger_manager as logmgr
@@ -18,12 +21,46 @@ from src.utils import logger_manager as logmgr
 if TYPE_CHECKING:
     from src.core.waits import SmartWait
 
+# Cortes (ms) del histograma de latencia por locator: "<=5", "<=10", ..., ">5000"
+CORTES_LATENCIA_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def _tramo_latencia(ms: float) -> str:
+    for corte in CORTES_LATENCIA_MS:
+        if ms <= corte:
+            return f"<={corte}"
+    return f">{CORTES_LATENCIA_MS[-1]}"
+
+
+def _sumar_stats(base: dict, delta: dict) -> None:
+    """Suma (in place) contadores de `delta` sobre `base`: hits, fallos y latencias."""
+    for key, d in delta.items():
+        b = base.setdefault(key, {"hits": [0] * 5})
+        hits = b.setdefault("hits", [])
+        for i, n in enumerate(d.get("hits", [])):
+            if i >= len(hits):
+                hits.extend([0] * (i + 1 - len(hits)))
+            hits[i] += n
+        if d.get("fallos"):
+            b["fallos"] = b.get("fallos", 0) + d["fallos"]
+        for indice, tramos in d.get("latencia_ms", {}).items():
+            destino = b.setdefault("latencia_ms", {}).setdefault(indice, {})
+            for tramo, n in tramos.items():
+                destino[tramo] = destino.get(tramo, 0) + n
+
+
 class SelectorDriftTracker:
     """
     Rastrea el uso de selectores fallback para detectar degradación silenciosa (drift).
     Persiste las estadísticas en disco para análisis offline.
+    
+    record() solo acumula en memoria (aciertos por índice e histograma de
+    latencia por locator). Un hilo escritor vuelca cada `intervalo` segundos, y
+    también al salir, sumando lo pendiente a lo que haya en disco. Así varias
+    corridas o pestañas pueden compartir el mismo archivo sin pisarse.
+    Con intervalo <= 0 no hay hilo ni volcado al salir: se llama flush() a mano.
     """
-    def __init__(self, persistence_file: str = None):
+    def __init__(self, persistence_file: str = None, intervalo: float = 30.0):
         # Ubicación estándar en Logs/System
         if not persistence_file:
             log_root = logmgr.get_log_root()
@@ -45,41 +82,266 @@ class SelectorDriftTracker:
                         break
 
         self.persistence_file = persistence_file
+        self.intervalo = intervalo
         self.stats = self._load()
+        self._pendiente: dict = {}          # Contadores aún no volcados a disco
+        self._avisados: set = set()         # Claves con drift ya advertido en esta sesión
+        self._lock = threading.RLock()
+        self._escritor: Optional[threading.Thread] = None
+        self._detener = threading.Event()
 
     def _load(self) -> dict:
         if os.path.exists(self.persistence_file):
             try:
                 with open(self.persistence_file, "r", encoding="utf-8") as f:
-                    return json.load(f)
+                    data = json.load(f)
+                return data if isinstance(data, dict) else {}
             except Exception:
                 pass
         return {}
 
-    def record(self, key: str, index: int):
-        """Registra qué índice de locator fue exitoso."""
-        if key not in self.stats:
-            self.stats[key] = {"hits": [0] * 5} # Max 5 fallbacks
-        
-        # Incrementar hit
-        if index < len(self.stats[key]["hits"]):
-            self.stats[key]["hits"][index] += 1
-            
+    def record(self, key: str, index: int, segundos: Optional[float] = None):
+        """Registra qué índice de locator fue exitoso (y cuánto tardó, si se conoce)."""
+        delta = {"hits": [0] * (index + 1)}
+        delta["hits"][index] = 1
+        if segundos is not None:
+            delta["latencia_ms"] = {str(index): {_tramo_latencia(segundos * 1000): 1}}
+        with self._lock:
+            _sumar_stats(self.stats, {key: delta})
+            _sumar_stats(self._pendiente, {key: delta})
+            hits = self.stats[key]["hits"]
+            drift = index > 0 and hits[index] > hits[0] and key not in self._avisados
+            if drift:
+                self._avisados.add(key)
+            self._iniciar_escritor()
+
         # Warning si el fallback se usa mucho (más que el primario)
-        primary = self.stats[key]["hits"][0]
-        if index > 0 and self.stats[key]["hits"][index] > primary:
+        if drift:
             log_warn(f"🚨 SELECTOR DRIFT CRÍTICO: El fallback {index} para '{key}' se usa más que el primario.")
 
-        self._save()
+    def record_miss(self, key: str, segundos: Optional[float] = None):
+        """Registra una búsqueda en la que ningún locator de la clave coincidió."""
+        delta = {"hits": [], "fallos": 1}
+        if segundos is not None:
+            delta["latencia_ms"] = {"fallo": {_tramo_latencia(segundos * 1000): 1}}
+        with self._lock:
+            _sumar_stats(self.stats, {key: delta})
+            _sumar_stats(self._pendiente, {key: delta})
+            self._iniciar_escritor()
+
+    def _iniciar_escritor(self):
+        if self._escritor is None and self.intervalo > 0:
+            self._escritor = threading.Thread(target=self._bucle_escritor, name="DriftReportWriter", daemon=True)
+            self._escritor.start()
+            atexit.register(self.close)
 
-    def _save(self):
+    def _bucle_escritor(self):
+        while not self._detener.wait(self.intervalo):
+            self.flush()
+
+    def flush(self) -> bool:
+        """Suma lo pendiente a lo que hay en disco y reescribe el archivo. True si escribió."""
+        with self._lock:
+            if not self._pendiente:
+                return False
+            pendiente, self._pendiente = self._pendiente, {}
         try:
-            os.makedirs(os.path.dirname(self.persistence_file), exist_ok=True)
-            with open(self.persistence_file, "w", encoding="utf-8") as f:
-                json.dump(self.stats, f, indent=2)
+            os.makedirs(os.path.dirname(self.persistence_file) or ".", exist_ok=True)
+            with _bloqueo_archivo(self.persistence_file + ".lock"):
+                en_disco = self._load()
+                _sumar_stats(en_disco, pendiente)
+                self._save(en_disco)
         except Exception:
+            # Se reintenta en el próximo volcado
+            with self._lock:
+                _sumar_stats(self._pendiente, pendiente)
+            return False
+        with self._lock:
+            # La vista en memoria pasa a ser disco + lo que llegó durante el volcado
+            _sumar_stats(en_disco, self._pendiente)
+            self.stats = en_disco
+        return True
+
+    def close(self):
+        """Detiene el escritor y vuelca lo pendiente."""
+        self._detener.set()
+        self.flush()
+
+    def _save(self, stats: dict):
+        tmp = self.persistence_file + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(stats, f, indent=2)
+        os.replace(tmp, self.persistence_file)
+
+
+@contextmanager
+def _bloqueo_archivo(ruta: str, espera: float = 2.0, vencido: float = 10.0):
+    """Candado entre procesos con un archivo creado en exclusiva (O_EXCL)."""
+    t0 = time.time()
+    while True:
+        try:
+            fd = os.open(ruta, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(ruta) > vencido:
+                    os.remove(ruta)   # Candado abandonado por un proceso muerto
+                    continue
+            except OSError:
+                continue
+            if time.time() - t0 > espera:
+                raise TimeoutError(f"Candado ocupado: {ruta}")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        try:
+            os.remove(ruta)
+        except OSError:
             pass
 
+
+# =============================================================================
+#         REGISTRO DE LOCATORS (orden por aciertos + una pasada JS)
+# =============================================================================
+
+def es_xpath(locator: str) -> bool:
+    """XPath absoluto, entre paréntesis o relativo ('./', '..'); lo demás es CSS."""
+    return locator.startswith(("/", "(", "./", ".."))
+
+
+# Prueba TODOS los candidatos (XPath o CSS, según arguments[2] de es_xpath) en una
+# sola pasada, en el orden dado, y devuelve el primero que cumple la condición:
+# {i, el} o null. Un XPath relativo se evalúa desde el documento, como By.XPATH.
+JS_LOCALIZAR = """
+var sels = arguments[0] || [], cond = arguments[1] || 'presence', xps = arguments[2] || [];
+function visible(el) {
+    if (!(el.offsetParent !== null || el.getClientRects().length)) return false;
+    var st = window.getComputedStyle(el);
+    return st.visibility !== 'hidden' && st.display !== 'none';
+}
+for (var i = 0; i < sels.length; i++) {
+    var el = null, s = sels[i];
+    try {
+        if (xps[i]) {
+            el = document.evaluate(s, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        } else {
+            el = document.querySelector(s);
+        }
+    } catch (e) { el = null; }
+    if (!el) continue;
+    if (cond === 'visible' && !visible(el)) continue;
+    if (cond === 'clickable' && (!visible(el) || el.disabled)) continue;
+    return {i: i, el: el};
+}
+return null;
+"""
+
+
+class LocatorRegistry:
+    """
+    Orden de candidatos por clave de locator, compartido por toda la sesión.
+    
+    - El ganador de la última búsqueda exitosa va primero (caché de sesión).
+    - El resto se ordena por aciertos históricos de SelectorDriftTracker.
+    - localizar() prueba todos los candidatos en una pasada JS por sondeo, así
+      que un primario roto no cuesta un timeout antes del fallback.
+    """
+
+    def __init__(self, tracker: Optional[SelectorDriftTracker] = None):
+        self.tracker = tracker or SelectorDriftTracker()
+        self._ganador: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def clave(locators: List[str], key: Optional[str] = None) -> str:
+        return key or locators[0][:50]
+
+    def orden(self, key: str, n: int) -> List[int]:
+        """Índices originales 0..n-1 en el orden en que conviene probarlos."""
+        with self._lock:
+            hits = list(self.tracker.stats.get(key, {}).get("hits", []))
+            ganador = self._ganador.get(key)
+        hits += [0] * (n - len(hits))
+        return sorted(range(n), key=lambda i: (i != ganador, -hits[i], i))
+
+    def registrar(self, key: str, indice: int, segundos: Optional[float] = None) -> None:
+        with self._lock:
+            anterior = self._ganador.get(key)
+            self._ganador[key] = indice
+        self.tracker.record(key, indice, segundos)
+        if indice > 0 and anterior != indice:
+            log_warn(f"🛡️ Resiliencia Activa: Fallback {indice} exitoso para {key}")
+
+    def olvidar(self, key: str, segundos: Optional[float] = None) -> None:
+        """Ningún candidato coincidió: se descarta el ganador y se cuenta el fallo."""
+        with self._lock:
+            self._ganador.pop(key, None)
+        self.tracker.record_miss(key, segundos)
+
+    def localizar(self, driver, locators: List[str], condition: str = "presence",
+                  timeout: float = 10.0, key: Optional[str] = None) -> Optional[Any]:
+        """
+        Espera hasta `timeout` a que ALGÚN candidato cumpla la condición
+        (presence | visible | clickable). Retorna el WebElement o None.
+        Si el navegador no admite la pasada JS, prueba uno a uno como antes.
+        """
+        if not locators:
+            return None
+        key = self.clave(locators, key)
+        orden = self.orden(key, len(locators))
+        candidatos = [locators[i] for i in orden]
+        tipos = [es_xpath(c) for c in candidatos]
+        t0 = time.perf_counter()
+
+        def _pasada(d):
+            r = d.execute_script(JS_LOCALIZAR, candidatos, condition, tipos)
+            return r if isinstance(r, dict) and r.get("el") is not None else False
+
+        try:
+            r = WebDriverWait(driver, timeout, poll_frequency=0.1).until(_pasada)
+        except TimeoutException:
+            self.olvidar(key, time.perf_counter() - t0)
+            return None
+        except WebDriverException as e:
+            log_warn(f"⚠️ Pasada JS de locators no disponible ({str(e)[:50]}), probando uno a uno")
+            return self._secuencial(driver, locators, orden, condition, timeout, key)
+        self.registrar(key, orden[int(r["i"])], time.perf_counter() - t0)
+        return r["el"]
+
+    def _secuencial(self, driver, locators: List[str], orden: List[int], condition: str,
+                    timeout: float, key: str) -> Optional[Any]:
+        cond = {
+            "visible": EC.visibility_of_element_located,
+            "clickable": EC.element_to_be_clickable,
+        }.get(condition, EC.presence_of_element_located)
+        t0 = time.perf_counter()
+        for i in orden:
+            xp = locators[i]
+            by = By.XPATH if es_xpath(xp) else By.CSS_SELECTOR
+            try:
+                el = WebDriverWait(driver, timeout if i == orden[0] else min(timeout, 6.0)).until(cond((by, xp)))
+            except Exception:
+                continue
+            self.registrar(key, i, time.perf_counter() - t0)
+            return el
+        self.olvidar(key, time.perf_counter() - t0)
+        return None
+
+
+_locator_registry: Optional[LocatorRegistry] = None
+_locator_registry_lock = threading.Lock()
+
+def get_locator_registry() -> LocatorRegistry:
+    """Registro de locators global de la sesión (compartido por todas las pestañas)."""
+    global _locator_registry
+    with _locator_registry_lock:
+        if _locator_registry is None:
+            _locator_registry = LocatorRegistry()
+        return _locator_registry
+
+
 class SelectorEngine:
     """
     Motor de búsqueda de elementos resiliente.
@@ -88,44 +350,19 @@ class SelectorEngine:
     
     def __init__(self, driver: Any):
         self.driver = driver
-        self.tracker = SelectorDriftTracker()
+        self.registry = get_locator_registry()
+        self.tracker = self.registry.tracker
 
     def find_with_fallbacks(self, locators: List[str], condition: str = "presence", timeout: float = 10.0, key: Optional[str] = None) -> Optional[Any]:
         """
         Intenta encontrar un elemento usando una lista de xpaths.
+        Todos los candidatos se prueban juntos, en el orden del registro (ver LocatorRegistry).
         """
-        tracking_key = key or locators[0][:50] # Usar el primer xpath como key si no dan uno
-        
-        for i, xpath in enumerate(locators):
-            try:
-                wait_time = timeout if i == 0 else min(timeout, 6.0)
-                wait = WebDriverWait(self.driver, wait_time) 
-                
-                cond = EC.presence_of_element_located((By.XPATH, xpath))
-                if condition == "visible":
-                    cond = EC.visibility_of_element_located((By.XPATH, xpath))
-                elif condition == "clickable":
-                    cond = EC.element_to_be_clickable((By.XPATH, xpath))
-                
-                element = wait.until(cond)
-                
-                # Registrar telemetría
-                self.tracker.record(tracking_key, i)
-                
-                if i > 0:
-                    log_warn(f"🛡️ Resiliencia Activa: Fallback {i} exitoso para {tracking_key}")
-                
-                return element
-                
-            except TimeoutException:
-                if i == 0:
-                    log_info(f"🔍 Selector principal para '{tracking_key}' falló, probando alternativos...")
-                continue
-            except Exception as e:
-                log_error(f"❌ Error inesperado en selector {xpath}: {str(e)[:50]}")
-                continue
-                
-        return None
+        try:
+            return self.registry.localizar(self.driver, locators, condition, timeout, key)
+        except Exception as e:
+            log_error(f"❌ Error inesperado en selectores de {LocatorRegistry.clave(locators, key)}: {str(e)[:50]}")
+            return None
 
     def check_drift(self, primary_xpath: str, secondary_xpaths: List[str]) -> bool:
         """
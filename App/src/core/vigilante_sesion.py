@@ -0,0 +1,181 @@
+# src/core/vigilante_sesion.py
+# -*- coding: utf-8 -*-
+"""
+Vigilante de sesión SIGGES: keep-alive y re-login ENTRE pacientes.
+
+Antes, una sesión vencida se notaba recién cuando fallaba un paciente y
+costaba su escalera de reintentos. El vigilante:
+- Lleva la inactividad desde la última interacción confirmada y estima cuánto
+  dura la sesión sin uso (parte de `ttl_s` y aprende de cada caída observada).
+- Entre pacientes, solo toca el navegador si toca chequear (`intervalo_s`) o si
+  la sesión está por vencer: una sonda JS (estado_pagina) y, si sigue viva y está
+  cerca del vencimiento, un ping a un endpoint de la API con las cookies de la
+  sesión (`url_ping`, o la última llamada XHR/fetch que hizo la propia app).
+  El index estático de la SPA no sirve: responde 200 aunque la sesión haya vencido.
+- El ping no cuenta como actividad: la inactividad y la duración aprendida de la
+  sesión salen solo de interacciones reales. Un 401/403 se trata como caída.
+- Si la sesión cayó, re-autentica ahí mismo, fuera del presupuesto de
+  reintentos del paciente.
+
+Se ejecuta en el hilo del navegador: la sesión WebDriver no admite comandos
+concurrentes, así que "en segundo plano" significa entre pacientes.
+"""
+from __future__ import annotations
+import time
+from typing import Any, Dict, Optional
+
+from src.core.estado_pagina import clasificar_estado, sondear_estado
+from src.utils.Terminal import log_debug, log_info, log_ok, log_warn
+
+
+# Rutas en que SIGGES deja la sesión cerrada o a medio abrir
+RUTAS_SESION_CERRADA = ("#/login", "#/02", "#/perfil")
+ESTADOS_SESION_CERRADA = ("LOGIN", "SELECT_UNIT")
+
+# Ping autenticado: GET con las cookies de la sesión a arguments[0] o, si viene
+# vacío, a la última llamada XHR/fetch del mismo origen que hizo la app (un
+# endpoint de la API, no el index estático). Devuelve el status HTTP, 0 si no hay
+# endpoint al que llamar y -1 si la petición falla.
+JS_PING_SESION = """
+var url = arguments[0], done = arguments[arguments.length - 1];
+if (!url && window.performance && performance.getEntriesByType) {
+    var rs = performance.getEntriesByType('resource');
+    for (var i = rs.length - 1; i >= 0 && !url; i--) {
+        var r = rs[i];
+        if ((r.initiatorType === 'xmlhttprequest' || r.initiatorType === 'fetch')
+                && r.name.indexOf(location.origin + '/') === 0) url = r.name;
+    }
+}
+if (!url) { done(0); return; }
+fetch(url, {method: 'GET', credentials: 'include', cache: 'no-store'})
+    .then(function(r) { done(r.status); })
+    .catch(function() { done(-1); });
+"""
+STATUS_SIN_SESION = (401, 403)
+
+# Inactividad mínima para que una caída enseñe algo sobre la duración de la sesión
+MIN_INACTIVIDAD_APRENDIZAJE_S = 60.0
+
+
+class VigilanteSesion:
+    """Chequeo de sesión entre pacientes sobre un SiggesDriver (o driver con LoginMixin)."""
+
+    def __init__(self, sigges, ttl_s: float = 20 * 60, intervalo_s: float = 120.0,
+                 margen_s: float = 90.0, max_relogin: int = 2, url_ping: str = ""):
+        self.sigges = sigges
+        self.url_ping = url_ping or ""
+        self.ttl_s = float(ttl_s)
+        self.intervalo_s = float(intervalo_s)
+        self.margen_s = float(margen_s)
+        self.max_relogin = int(max_relogin)
+        ahora = time.time()
+        self._ultima_actividad = ahora
+        self._ultimo_chequeo = ahora
+        self._ultimo_ping = 0.0
+        self.relogins = 0
+        self.pings = 0
+
+    # ------------------------------------------------------------------ tiempo
+    def actividad(self) -> None:
+        """Marca una interacción exitosa con SIGGES (reinicia la inactividad)."""
+        self._ultima_actividad = time.time()
+
+    def inactividad(self) -> float:
+        return time.time() - self._ultima_actividad
+
+    def por_vencer(self) -> bool:
+        return self.inactividad() >= self.ttl_s - self.margen_s
+
+    # ------------------------------------------------------------------ navegador
+    def sonda(self) -> Optional[Dict[str, Any]]:
+        """{estado, hash, cerrada} con una llamada JS; None si el navegador no respondió."""
+        s = sondear_estado(self.sigges.driver)
+        if s is None:
+            return None
+        estado = clasificar_estado(s)
+        h = (s.get("hash") or "").lower()
+        cerrada = estado in ESTADOS_SESION_CERRADA or any(h.startswith(r) for r in RUTAS_SESION_CERRADA)
+        return {"estado": estado, "hash": h, "cerrada": cerrada}
+
+    def ping(self) -> Optional[int]:
+        """
+        GET autenticado a la API para que la sesión no venza por inactividad.
+        Retorna el status HTTP, o None si no hubo endpoint o el navegador no respondió.
+        """
+        try:
+            status = self.sigges.driver.execute_async_script(JS_PING_SESION, self.url_ping)
+        except Exception as e:
+            log_debug(f"[DEBUG] vigilante: ping falló ({type(e).__name__})")
+            return None
+        if not isinstance(status, int) or status == 0:
+            log_debug("[DEBUG] vigilante: sin endpoint de API para el ping")
+            return None
+        self.pings += 1
+        self._ultimo_ping = time.time()
+        return status
+
+    def _relogin(self) -> bool:
+        sg = self.sigges
+        for n in range(1, self.max_relogin + 1):
+            try:
+                # sesion_cerrada() también pulsa "Presione para reconectar" en #/02
+                if not sg.sesion_cerrada():
+                    return True
+                login = getattr(sg, "login_obligatorio", None) or getattr(sg, "intentar_login")
+                if login():
+                    return True
+            except Exception as e:
+                log_warn(f"⚠️ Re-login {n}/{self.max_relogin} falló: {str(e)[:80]}")
+        return False
+
+    def _caida(self) -> bool:
+        """Sesión caída: aprende su duración y re-autentica. True si quedó activa."""
+        inactiva = self.inactividad()
+        # Con un ping de por medio la inactividad ya no mide cuánto dura la sesión sin uso
+        hubo_ping = self._ultimo_ping > self._ultima_actividad
+        if not hubo_ping and MIN_INACTIVIDAD_APRENDIZAJE_S <= inactiva < self.ttl_s:
+            self.ttl_s = inactiva
+            log_info(f"🔐 Sesión vencida tras {inactiva / 60:.1f} min sin uso; se anticipará desde ahora")
+        log_warn("🔐 Sesión SIGGES cerrada. Re-autenticando antes de seguir...")
+        if not self._relogin():
+            log_warn("⚠️ No se pudo re-autenticar; el paciente seguirá con su recuperación normal")
+            return False
+        self.relogins += 1
+        self.actividad()
+        log_ok("✅ Sesión recuperada sin gastar reintentos del paciente")
+        return True
+
+    # ------------------------------------------------------------------ API
+    def entre_pacientes(self) -> bool:
+        """
+        Punto de control antes de cada paciente. Sin chequeo pendiente ni
+        vencimiento cercano no toca el navegador. Retorna False solo si la sesión
+        está caída y no se pudo recuperar.
+        """
+        ahora = time.time()
+        # Cerca del vencimiento se hace ping, pero a lo más uno por intervalo
+        vence = self.por_vencer() and ahora - self._ultimo_ping >= self.intervalo_s
+        if not vence and ahora - self._ultimo_chequeo < self.intervalo_s:
+            return True
+        self._ultimo_chequeo = ahora
+        s = self.sonda()
+        if s is None:
+            return True   # El navegador no respondió: lo resuelve validar_conexion del paciente
+        if s["cerrada"]:
+            return self._caida()
+        # La sonda es solo DOM; el ping sí llega al servidor (y no cuenta como actividad)
+        if vence:
+            status = self.ping()
+            if status in STATUS_SIN_SESION and self.sigges.sesion_cerrada():
+                return self._caida()
+            if status is not None:
+                log_debug(f"[DEBUG] vigilante: keep-alive {status} tras {self.inactividad():.0f}s sin uso")
+        return True
+
+    def recuperar_si_caida(self) -> bool:
+        """
+        Tras un intento fallido: True si la causa era la sesión y se recuperó
+        (ese intento no debe contarse contra el paciente).
+        """
+        s = self.sonda()
+        return bool(s and s["cerrada"] and self._caida())
@@ -3,17 +3,256 @@
 from __future__ import annotations
 import hashlib
 import time
-from typing import Callable, Optional, TYPE_CHECKING
+from typing import Any, Callable, Dict, Optional, TYPE_CHECKING
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 
-from src.utils.Esperas import ESPERAS
+from src.utils.Esperas import (
+    ESPERAS, registrar_asentamiento, registrar_condicion, registrar_uso_sleep, ventana_asentamiento,
+)
 from src.utils.Terminal import log_info, log_warn
+from src.utils.Timing import TimingContext
 
 if TYPE_CHECKING:
     from src.core.state import DriverState
 
+
+# =============================================================================
+#              PRIMITIVA DE SPINNER (MutationObserver, 1 round trip)
+# =============================================================================
+
+# Bloquea dentro del navegador hasta que el spinner (dialog.loading[open] /
+# div.circulo) aparece y desaparece, o hasta que el DOM queda quieto sin que
+# aparezca. Resultado: {status, appeared, appear_ms, total_ms[, settle_ms]}
+#   status: "gone" (apareció y se fue) | "none" (no apareció) |
+#           "quiet" (DOM quieto sin spinner) | "timeout" (sigue visible)
+# Con settleMs > 0 (solo al calibrar), tras "gone" sigue observando hasta que el
+# DOM pasa settleMs sin mutar (o settleMax) y reporta settle_ms: cuánto siguió
+# mutando la página después de irse el spinner. total_ms sigue siendo hasta "gone".
+JS_ESPERAR_SPINNER = """
+var appearMs = arguments[0], timeoutMs = arguments[1], quietMs = arguments[2];
+var settleMs = arguments[3] || 0, settleMax = arguments[4] || 0;
+var done = arguments[arguments.length - 1];
+var t0 = performance.now(), lastMut = t0;
+var tAppear = null, tGone = null, finished = false, obs = null, timers = [];
+function visible() {
+    var d = document.querySelector("dialog.loading[open]");
+    if (d && (d.offsetParent !== null || d.getBoundingClientRect().width > 0)) return true;
+    var c = document.querySelector("div.circulo");
+    if (c && (c.offsetParent !== null || c.getBoundingClientRect().width > 0)) return true;
+    return false;
+}
+function finish(status) {
+    if (finished) return;
+    finished = true;
+    if (obs) obs.disconnect();
+    timers.forEach(function(t) { clearTimeout(t); clearInterval(t); });
+    var res = {status: status, appeared: tAppear !== null, appear_ms: tAppear,
+               total_ms: (tGone !== null ? tGone : performance.now()) - t0};
+    if (tGone !== null) res.settle_ms = Math.min(Math.max(0, lastMut - tGone), settleMax);
+    done(res);
+}
+function gone() {
+    if (settleMs <= 0) { finish("gone"); return; }
+    if (tGone !== null) return;
+    tGone = performance.now();
+    lastMut = tGone;
+    timers.push(setInterval(function() {
+        var now = performance.now();
+        if (now - lastMut >= settleMs || now - tGone >= settleMax) finish("gone");
+    }, 20));
+}
+function check() {
+    var v = visible();
+    if (v && tAppear === null) {
+        tAppear = performance.now() - t0;
+        timers.push(setTimeout(function() {
+            if (tGone !== null) return;
+            if (visible()) finish("timeout"); else gone();
+        }, timeoutMs));
+    }
+    if (!v && tAppear !== null) gone();
+}
+check();
+if (finished) return;
+if (tAppear === null && appearMs <= 0) { finish("none"); return; }
+obs = new MutationObserver(function() { lastMut = performance.now(); check(); });
+obs.observe(document.documentElement, {subtree: true, childList: true, attributes: true,
+                                       attributeFilter: ["open", "class", "style", "hidden"]});
+// Red de seguridad: cambios de visibilidad que no generan mutación (CSS)
+timers.push(setInterval(function() {
+    check();
+    var now = performance.now();
+    if (tAppear === null && quietMs > 0 && now - lastMut >= quietMs && now - t0 >= quietMs) finish("quiet");
+}, 50));
+timers.push(setTimeout(function() { if (tAppear === null) finish("none"); }, appearMs));
+"""
+
+
+def esperar_spinner_js(driver, appear_timeout: float = 0.6, timeout: float = 60.0,
+                       quiet: float = 0.25, asentamiento: float = 0.0,
+                       asentamiento_max: float = 0.0) -> Dict[str, Any]:
+    """
+    Espera de spinner orientada a eventos en UNA llamada execute_async_script.
+
+    Args:
+        appear_timeout: ventana máxima para que aparezca (0 = solo esperar si ya está).
+        timeout: máximo que puede seguir visible una vez detectado.
+        quiet: si el DOM no muta durante este lapso y no hubo spinner, se da por terminado.
+        asentamiento / asentamiento_max: si > 0, tras irse el spinner mide cuánto sigue
+            mutando el DOM (settle_ms) hasta quedar quieto ese lapso, como máximo asentamiento_max.
+
+    La latencia medida se reporta a TimingContext (paso activo + total).
+    Propaga excepciones de Selenium para que el llamador use su fallback.
+    """
+    necesario = appear_timeout + timeout + asentamiento_max + 5.0
+    if getattr(driver, "_nz_script_timeout", 0) < necesario:
+        driver.set_script_timeout(necesario)
+        driver._nz_script_timeout = necesario
+    res = driver.execute_async_script(
+        JS_ESPERAR_SPINNER, int(appear_timeout * 1000), int(timeout * 1000), int(quiet * 1000),
+        int(asentamiento * 1000), int(asentamiento_max * 1000)
+    ) or {}
+    TimingContext.registrar_spinner(float(res.get("total_ms") or 0.0))
+    return res
+
+
+def registrar_spinner(clave: Optional[str], res: Dict[str, Any]) -> None:
+    """
+    Registra en la calibración una espera de spinner de esperar_spinner_js.
+    Solo "gone" y "timeout" son eventos medidos; "none"/"quiet" (el spinner nunca
+    apareció) no dicen cuánto tarda la condición y no se registran.
+    """
+    status = res.get("status")
+    if status not in ("gone", "timeout"):
+        return
+    registrar_condicion(clave, float(res.get("total_ms") or 0.0) / 1000.0, status != "timeout")
+    if res.get("settle_ms") is not None:
+        registrar_asentamiento(clave, float(res["settle_ms"]) / 1000.0)
+
+# =============================================================================
+#          PRIMITIVA DE BÚSQUEDA (un solo envío + señal de resultado)
+# =============================================================================
+
+SENAL_TABLA = "tabla"                     # La mini-tabla cambió respecto de antes del envío
+SENAL_SIN_RESULTADOS = "sin_resultados"   # Apareció un aviso de "no se encontró"
+SENAL_XHR = "xhr"                         # Terminaron las peticiones lanzadas por el envío
+SENAL_TIMEOUT = "timeout"                 # Nada de lo anterior dentro del plazo
+SENAL_SIN_ENVIO = "sin_envio"             # No había botón ni input: no se envió nada
+SENAL_ERROR = "error"                     # El clic/ENTER falló: no se envió nada
+SENALES_DEFINITIVAS = (SENAL_TABLA, SENAL_SIN_RESULTADOS, SENAL_XHR)
+
+# Instala ganchos en XHR/fetch, envía la búsqueda UNA vez (clic JS en el botón o
+# ENTER sintético en el input si no hay botón) y bloquea hasta la primera señal.
+# Resultado: {senal, detalle, ms, xhr}
+JS_BUSCAR_UNA_VEZ = """
+var boton = arguments[0], input = arguments[1], xps = arguments[2] || [], timeoutMs = arguments[3];
+var done = arguments[arguments.length - 1];
+var RX_VACIO = /no se (encontr|registr)\\w*|no existe\\w*|sin resultados|no hay (casos|resultados|registros)/i;
+var t0 = performance.now(), finished = false, obs = null, timers = [];
+var lanzadas = 0, pendientes = 0, tFinXhr = null;
+function tabla() {
+    for (var k = 0; k < xps.length; k++) {
+        try {
+            var n = document.evaluate(xps[k], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+            if (n) return n;
+        } catch (e) {}
+    }
+    return null;
+}
+function textoTabla() {
+    var tb = tabla();
+    return tb ? (tb.innerText || tb.textContent || '').replace(/\\s+/g, ' ').trim() : '';
+}
+function avisoVacio() {
+    var c = document.querySelector('div.contBody') || document.body;
+    var m = (c.innerText || '').match(RX_VACIO);
+    return m ? m[0] : '';
+}
+function spinner() {
+    var d = document.querySelector("dialog.loading[open]");
+    if (d && (d.offsetParent !== null || d.getBoundingClientRect().width > 0)) return true;
+    var c = document.querySelector("div.circulo");
+    return !!(c && (c.offsetParent !== null || c.getBoundingClientRect().width > 0));
+}
+var tablaAntes = textoTabla(), vacioAntes = avisoVacio();
+var origSend = XMLHttpRequest.prototype.send, origFetch = window.fetch;
+function finish(senal, detalle) {
+    if (finished) return;
+    finished = true;
+    if (obs) obs.disconnect();
+    timers.forEach(function(t) { clearTimeout(t); clearInterval(t); });
+    XMLHttpRequest.prototype.send = origSend;
+    if (origFetch) window.fetch = origFetch;
+    done({senal: senal, detalle: detalle || '', ms: performance.now() - t0, xhr: lanzadas});
+}
+function check() {
+    if (finished || spinner()) return;
+    var t = textoTabla();
+    if (t && t !== tablaAntes) { finish('tabla'); return; }
+    var v = avisoVacio();
+    if (v && !t && v !== vacioAntes) { finish('sin_resultados', v); return; }
+    // Respuesta idéntica a la anterior: el DOM no cambia, basta con que terminen las peticiones
+    // (margen breve para que la app pinte la respuesta antes de reportar)
+    if (tFinXhr !== null && pendientes <= 0 && performance.now() - tFinXhr >= 120) finish('xhr');
+}
+function terminada() {
+    pendientes--;
+    if (pendientes <= 0) {
+        tFinXhr = performance.now();
+        timers.push(setTimeout(check, 130));
+    }
+}
+XMLHttpRequest.prototype.send = function() {
+    lanzadas++; pendientes++;
+    this.addEventListener('loadend', terminada);
+    return origSend.apply(this, arguments);
+};
+if (origFetch) window.fetch = function() {
+    lanzadas++; pendientes++;
+    var p = origFetch.apply(this, arguments);
+    p.then(terminada, terminada);
+    return p;
+};
+obs = new MutationObserver(check);
+obs.observe(document.documentElement, {subtree: true, childList: true, characterData: true,
+                                       attributes: true, attributeFilter: ["open", "class", "style", "hidden"]});
+timers.push(setInterval(check, 100));
+timers.push(setTimeout(function() { finish('timeout'); }, timeoutMs));
+try {
+    if (boton) {
+        boton.click();
+    } else if (input) {
+        ['keydown', 'keypress', 'keyup'].forEach(function(tipo) {
+            input.dispatchEvent(new KeyboardEvent(tipo, {key: 'Enter', code: 'Enter', keyCode: 13, which: 13, bubbles: true}));
+        });
+    } else {
+        finish('sin_envio');
+    }
+} catch (e) {
+    finish('error', String(e));
+}
+"""
+
+
+def buscar_una_vez(driver, boton, input_rut, xpaths_tabla, timeout: float = 8.0) -> Dict[str, Any]:
+    """
+    Envía la búsqueda de paciente UNA vez y espera la primera señal de resultado
+    (ver SENAL_*), todo en una llamada execute_async_script.
+
+    Con `boton` hace clic en él; sin botón envía ENTER al `input_rut`.
+    Propaga excepciones de Selenium para que el llamador decida el fallback.
+    """
+    necesario = timeout + 5.0
+    if getattr(driver, "_nz_script_timeout", 0) < necesario:
+        driver.set_script_timeout(necesario)
+        driver._nz_script_timeout = necesario
+    return driver.execute_async_script(
+        JS_BUSCAR_UNA_VEZ, boton, input_rut, list(xpaths_tabla or []), int(timeout * 1000)
+    ) or {}
+
+
 class SmartWait:
     """
     API unificada para esperas inteligentes.
@@ -37,30 +276,38 @@ class SmartWait:
         try:
             # DEBUG INTENSIVO
             log_info(f"[DEBUG] ⏳ Spinner Wait: key={key}, appear={appear_timeout}s, wait={wait_time}s")
-            
-            # FASE 0: Esperar a que APAREZCA (si se solicita)
-            if appear_timeout > 0:
-                try:
-                    WebDriverWait(self.driver, appear_timeout).until(
-                        EC.presence_of_element_located((By.XPATH, xpath))
-                    )
-                    log_info(f"[DEBUG] ✅ Spinner APARECIÓ (dentro de {appear_timeout}s)")
-                except Exception:
-                    log_info(f"[DEBUG] ⚠️ Spinner NO APARECIÓ (tras {appear_timeout}s) - Continuando...")
-                    pass
-
-            # FASE 1: Esperar a que DESAPAREZCA
-            WebDriverWait(self.driver, wait_time).until(
-                EC.invisibility_of_element_located((By.XPATH, xpath))
-            )
-            log_info(f"[DEBUG] ✅ Spinner DESAPARECIÓ (o ya no estaba)")
-        except Exception as e:
-            log_info(f"[DEBUG] ❌ Error esperando spinner: {e}")
-            pass
+            ventana, ventana_max = ventana_asentamiento(key)
+            res = esperar_spinner_js(self.driver, appear_timeout=appear_timeout, timeout=wait_time,
+                                     asentamiento=ventana, asentamiento_max=ventana_max)
+            registrar_spinner(key, res)
+            if res.get("status") == "timeout":
+                log_warn(f"⌛ Spinner sigue visible tras {wait_time}s ({key})")
+            else:
+                log_info(f"[DEBUG] ✅ Spinner {res.get('status')} en {float(res.get('total_ms') or 0):.0f}ms")
+        except Exception as e_js:
+            # Fallback legacy: WebDriverWait sobre el xpath configurado
+            log_info(f"[DEBUG] ⚠️ Espera JS no disponible ({e_js}); usando WebDriverWait")
+            try:
+                # FASE 0: Esperar a que APAREZCA (si se solicita)
+                if appear_timeout > 0:
+                    try:
+                        WebDriverWait(self.driver, appear_timeout).until(
+                            EC.presence_of_element_located((By.XPATH, xpath))
+                        )
+                    except Exception:
+                        pass
+
+                # FASE 1: Esperar a que DESAPAREZCA
+                WebDriverWait(self.driver, wait_time).until(
+                    EC.invisibility_of_element_located((By.XPATH, xpath))
+                )
+            except Exception as e:
+                log_info(f"[DEBUG] ❌ Error esperando spinner: {e}")
 
         # Aplicar sleep configurado (Restauración de comportamiento legacy robusto)
         if sleep_time > 0:
             # self.sleep(sleep_time, f"seguridad ({key})") # Verbose
+            registrar_uso_sleep(key)
             time.sleep(sleep_time) # Silent sleep para no spammear logs
 
     def wait_for_state_change(self, old_state: str, timeout: float = 5.0):
@@ -28,6 +28,16 @@ class MisionController:
         "INDICE_COLUMNA_NOMBRE": "Índice (0-based) de la columna Nombre. 2 = Columna C.",
         "VENTANA_VIGENCIA_DIAS": "Días hacia atrás para considerar vigente un habilitante.",
         "MAX_REINTENTOS_POR_PACIENTE": "Intentos máximos si falla la búsqueda de un paciente.",
+        "MAX_PESTANAS_PARALELAS": "Tope global de pestañas de Edge trabajando en paralelo (protege a SIGGES de sobrecarga).",
+        "PASADA_UNICA_MULTIMISION": "Con varias misiones en cola, busca cada paciente una sola vez y lo analiza para todas sus misiones. Es secuencial: si alguna misión usa pestañas paralelas, las misiones se procesan una por una.",
+        "EVALUADORES_PARALELOS": "Hilos que analizan reglas mientras Edge ya busca al siguiente paciente. 0 = todo secuencial.",
+        "CAMBIO_PACIENTE_SPA": "Pasa al siguiente paciente dentro de SIGGES sin recargar la página. Si no se confirma, navega como siempre.",
+        "VIGILANTE_SESION": "Revisa la sesión de SIGGES entre pacientes y vuelve a iniciar sesión sin gastar los reintentos del paciente.",
+        "SESION_INACTIVIDAD_MIN": "Minutos sin uso que aguanta la sesión de SIGGES (se ajusta solo si vence antes).",
+        "SESION_PING_URL": "Dirección de la API de SIGGES que se consulta para mantener viva la sesión. Vacío = la última consulta que hizo SIGGES.",
+        "CACHE_PACIENTES": "Opcional (apagado por defecto). Guarda en disco, sin cifrar, lo leído de cada paciente y lo reutiliza en vez de volver a SIGGES (ver 'Forzar refresco'). Las filas que salen de la caché quedan anotadas en 'Observación'.",
+        "CACHE_PACIENTES_TTL_HORAS": "Horas que una captura de paciente se considera vigente.",
+        "CACHE_PACIENTES_MAX": "Máximo de pacientes en la caché (se expulsan los menos usados).",
         "REVISAR_IPD": "Activar revisión de Informes de Proceso de Diagnóstico.",
         "REVISAR_OA": "Activar revisión de Órdenes de Atención.",
         "REVISAR_APS": "Activar revisión de Hoja Diaria APS.",
@@ -57,7 +67,8 @@ class MisionController:
         "max_ipd": "Máximo de filas IPD a leer y exportar por paciente para esta misión.",
         "max_oa": "Máximo de filas OA a leer y exportar por paciente para esta misión.",
         "max_aps": "Máximo de filas APS a leer y exportar por paciente para esta misión.",
-        "max_sic": "Máximo de filas SIC a leer y exportar por paciente para esta misión."
+        "max_sic": "Máximo de filas SIC a leer y exportar por paciente para esta misión.",
+        "pestanas_paralelas": "Pestañas de Edge que procesan pacientes en paralelo para esta misión (1 = secuencial; limitado por MAX_PESTANAS_PARALELAS)."
     }
 
     def __init__(self, project_root: str):
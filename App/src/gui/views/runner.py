@@ -216,6 +216,16 @@ class RunnerView(ctk.CTkFrame):
         )
         self.snapshot_btn.pack(side="left", padx=(10, 0))
 
+        # Switch Forzar Refresco (ignora la caché de pacientes en la próxima ejecución)
+        self.force_refresh_switch = ctk.CTkSwitch(
+            exec_buttons,
+            text="🔄 Forzar refresco",
+            font=ctk.CTkFont(size=12),
+            progress_color=self.colors["accent"],
+            width=42
+        )
+        self.force_refresh_switch.pack(side="left", padx=(10, 0))
+
         # --- SECTOR DE BÚSQUEDA (DERECHA) ---
         search_frame = ctk.CTkFrame(exec_buttons, fg_color="transparent")
         search_frame.pack(side="right", padx=(20, 0))
@@ -613,8 +623,9 @@ class RunnerView(ctk.CTkFrame):
             return
         
         # Resetear control de ejecución
-        from src.utils.ExecutionControl import reset_execution_control
+        from src.utils.ExecutionControl import get_execution_control, reset_execution_control
         reset_execution_control()
+        get_execution_control().set_force_refresh(bool(self.force_refresh_switch.get()))
         
         self.start_time = time.time()
         self._transition_to(RunState.RUNNING)
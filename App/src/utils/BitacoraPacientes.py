@@ -0,0 +1,128 @@
+# Bitácora de Pacientes - Reanudación tras caídas
+# -*- coding: utf-8 -*-
+"""
+Bitácora append-only (JSONL) de resultados por paciente.
+
+Cada línea guarda el resultado de un procesar_paciente, identificado por
+misión (nombre + huella de su configuración), hash del archivo de entrada
+e índice de fila. Si la ejecución se cae, la siguiente corrida de la misma
+misión sobre el mismo archivo salta las filas ya hechas y reconstruye el
+Excel final desde la bitácora.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.utils import logger_manager as logmgr
+
+
+def hash_archivo(ruta: str, bloque: int = 1 << 20) -> str:
+    """SHA-256 del contenido del archivo de entrada (vacío si no se puede leer)."""
+    h = hashlib.sha256()
+    try:
+        with open(ruta, "rb") as f:
+            for chunk in iter(lambda: f.read(bloque), b""):
+                h.update(chunk)
+    except OSError:
+        return ""
+    return h.hexdigest()
+
+
+def huella_mision(m: Dict[str, Any]) -> str:
+    """Huella estable de la configuración de la misión (cambia si cambia la config)."""
+    try:
+        raw = json.dumps(m, sort_keys=True, ensure_ascii=False, default=str)
+    except Exception:
+        raw = str(m)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class BitacoraPacientes:
+    """
+    Bitácora thread-safe (varias pestañas pueden registrar en paralelo).
+
+    Uso:
+        bit = BitacoraPacientes(m, ruta_in)
+        hechos = bit.cargar()              # {idx: (filas, ok)}
+        bit.registrar(idx, filas, ok)      # tras cada paciente
+        bit.cerrar(completada=True)        # al generar el Excel final
+    """
+
+    SUBDIR = "Bitacoras"
+
+    def __init__(self, m: Dict[str, Any], ruta_entrada: str, directorio: Optional[str] = None):
+        self.mision = str(m.get("nombre", "Sin Nombre"))
+        self.archivo_hash = hash_archivo(ruta_entrada)
+        clave = hashlib.sha256(f"{huella_mision(m)}|{self.archivo_hash}".encode("utf-8")).hexdigest()[:16]
+        slug = re.sub(r"[^A-Za-z0-9_-]+", "_", self.mision).strip("_")[:40] or "Mision"
+
+        self.directorio = directorio or os.path.join(logmgr.get_log_root(), self.SUBDIR)
+        os.makedirs(self.directorio, exist_ok=True)
+        self.ruta = os.path.join(self.directorio, f"Bitacora_{slug}_{clave}.jsonl")
+        self._lock = threading.Lock()
+        self._fh = None
+
+    def cargar(self) -> Dict[int, Tuple[List[Dict[str, Any]], bool]]:
+        """Lee las filas ya procesadas. Tolera una última línea truncada por la caída."""
+        hechos: Dict[int, Tuple[List[Dict[str, Any]], bool]] = {}
+        if not os.path.exists(self.ruta):
+            return hechos
+        with open(self.ruta, "r", encoding="utf-8") as f:
+            for linea in f:
+                try:
+                    reg = json.loads(linea)
+                except ValueError:
+                    continue
+                if reg.get("mision") != self.mision or reg.get("archivo_hash") != self.archivo_hash:
+                    continue
+                try:
+                    hechos[int(reg["idx"])] = (reg.get("filas") or [], bool(reg.get("ok")))
+                except (KeyError, TypeError, ValueError):
+                    continue
+        return hechos
+
+    def registrar(self, idx: int, filas: List[Dict[str, Any]], ok: bool) -> None:
+        """Agrega (y fuerza a disco) el resultado de una fila."""
+        linea = json.dumps({
+            "mision": self.mision,
+            "archivo_hash": self.archivo_hash,
+            "idx": int(idx),
+            "ok": bool(ok),
+            "filas": filas,
+            "ts": datetime.now().isoformat(timespec="seconds"),
+        }, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._fh is None:
+                self._fh = open(self.ruta, "a", encoding="utf-8")
+            self._fh.write(linea + "\n")
+            self._fh.flush()
+            try:
+                os.fsync(self._fh.fileno())
+            except OSError:
+                pass
+
+    def cerrar(self, completada: bool = False) -> None:
+        """
+        Cierra el archivo. Si la misión se completó (Excel generado), la bitácora
+        se archiva para que la próxima corrida empiece de cero.
+        """
+        with self._lock:
+            if self._fh is not None:
+                try:
+                    self._fh.close()
+                except Exception:
+                    pass
+                self._fh = None
+            if completada and os.path.exists(self.ruta):
+                destino = os.path.join(
+                    self.directorio, f"Completa_{logmgr.now_stamp()}_{os.path.basename(self.ruta)}"
+                )
+                try:
+                    os.replace(self.ruta, destino)
+                    logmgr.prune_logs(self.directorio, prefix="Completa", keep=5)
+                except OSError:
+                    pass
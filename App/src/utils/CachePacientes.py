@@ -0,0 +1,343 @@
+# Caché de Pacientes - Capturas de SIGGES reutilizables entre corridas
+# -*- coding: utf-8 -*-
+"""
+Caché en disco de lo que se lee de SIGGES por paciente (clave: RUT).
+
+Una captura guarda la mini-tabla, edad, fallecimiento, la lista de casos de la
+cartola y, por cada caso expandido, sus secciones IPD/OA/APS/SIC/prestaciones
+completas (sin recortar). Con eso analizar_mision puede re-ejecutarse sin
+navegador cuando solo cambió la configuración de la misión.
+
+- SiggesGrabador: envuelve el driver vivo y registra cada caso que se expande.
+- SiggesReplay: misma interfaz de lectura, pero sobre una captura (sin driver).
+- CachePacientes: un JSON por paciente, con TTL y expulsión LRU por cantidad.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from src.utils import logger_manager as logmgr
+
+SECCIONES = ("ipd", "oa", "aps", "sic")
+
+
+class CapturaIncompleta(Exception):
+    """La captura no tiene lo que pide el análisis (ej: un caso que nunca se expandió)."""
+
+
+# =============================================================================
+#                         SERIALIZACIÓN (datetime <-> JSON)
+# =============================================================================
+def _a_json(x: Any) -> Any:
+    if isinstance(x, datetime):
+        return {"__dt__": x.isoformat()}
+    if isinstance(x, dict):
+        return {str(k): _a_json(v) for k, v in x.items()}
+    if isinstance(x, (list, tuple)):
+        return [_a_json(v) for v in x]
+    return x
+
+
+def _desde_json(x: Any) -> Any:
+    if isinstance(x, dict):
+        if len(x) == 1 and "__dt__" in x:
+            try:
+                return datetime.fromisoformat(x["__dt__"])
+            except (TypeError, ValueError):
+                return None
+        return {k: _desde_json(v) for k, v in x.items()}
+    if isinstance(x, list):
+        return [_desde_json(v) for v in x]
+    return x
+
+
+def _recortar(seccion: Any, limit: int) -> Any:
+    """Mismo contrato que los lectores DOM: limit <= 0 = todas las filas."""
+    if seccion is None:
+        return None
+    listas = tuple(list(s) for s in seccion)
+    if limit and limit > 0:
+        listas = tuple(s[:limit] for s in listas)
+    return listas
+
+
+class CapturaPaciente:
+    """Todo lo leído de SIGGES para un RUT."""
+
+    def __init__(self, rut: str):
+        self.rut = rut
+        self.ts = time.time()
+        self.mini: Optional[List[Dict[str, Any]]] = None
+        self.edad: Optional[int] = None
+        self.fallecido: Optional[datetime] = None
+        self.casos: Optional[List[Dict[str, Any]]] = None     # None = no se llegó a la cartola
+        self.detalle: Dict[int, Dict[str, Any]] = {}          # indice caso -> texto + secciones
+        self.desde_cache = False                              # True si se cargó de disco (no se serializa)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return _a_json({
+            "rut": self.rut, "ts": self.ts, "mini": self.mini, "edad": self.edad,
+            "fallecido": self.fallecido, "casos": self.casos,
+            "detalle": {str(k): v for k, v in self.detalle.items()},
+        })
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "CapturaPaciente":
+        d = _desde_json(d)
+        c = cls(d.get("rut", ""))
+        c.ts = float(d.get("ts") or 0)
+        c.mini = d.get("mini")
+        c.edad = d.get("edad")
+        c.fallecido = d.get("fallecido")
+        c.casos = d.get("casos")
+        c.detalle = {int(k): v for k, v in (d.get("detalle") or {}).items()}
+        return c
+
+
+# =============================================================================
+#                         DRIVERS DE LECTURA (REPLAY / GRABADOR)
+# =============================================================================
+class _RaizCapturada:
+    """Reemplazo del WebElement del caso: solo expone .text."""
+
+    def __init__(self, indice: int, texto: str):
+        self.indice = indice
+        self.text = texto
+
+
+class SiggesReplay:
+    """
+    Lectores de caso de SiggesDriver respondidos desde una captura.
+
+    Cualquier otra llamada (o un caso no capturado) lanza CapturaIncompleta,
+    para que el llamador vuelva al navegador.
+    """
+
+    def __init__(self, captura: CapturaPaciente):
+        self.captura = captura
+
+    def __getattr__(self, nombre: str):
+        raise CapturaIncompleta(f"SiggesReplay no soporta '{nombre}'")
+
+    def _detalle(self, root) -> Optional[Dict[str, Any]]:
+        if isinstance(root, _RaizCapturada):
+            return self.captura.detalle.get(root.indice)
+        return None
+
+    def expandir_caso(self, indice: int):
+        det = self.captura.detalle.get(indice)
+        if det is None:
+            raise CapturaIncompleta(f"Caso {indice} no capturado para {self.captura.rut}")
+        return _RaizCapturada(indice, det.get("texto", ""))
+
+    def cerrar_caso_por_indice(self, indice: int) -> None:
+        return None
+
+    def leer_snapshot_caso(self, root=None) -> Optional[Dict[str, Any]]:
+        det = self._detalle(root)
+        if det is None:
+            return None
+        snap = {k: _recortar(det.get(k), 0) for k in SECCIONES}
+        prest = det.get("prestaciones")
+        snap["prestaciones"] = [dict(p) for p in prest] if prest is not None else None
+        return snap
+
+    def _seccion(self, clave: str, root, limit: int):
+        det = self._detalle(root)
+        if det is None or det.get(clave) is None:
+            raise CapturaIncompleta(f"Sección {clave} fuera de la captura")
+        return _recortar(det[clave], limit)
+
+    def leer_ipd_desde_caso(self, root, limit: int = 0):
+        return self._seccion("ipd", root, limit)
+
+    def leer_oa_desde_caso(self, root, limit: int = 0):
+        return self._seccion("oa", root, limit)
+
+    def leer_aps_desde_caso(self, root, limit: int = 0):
+        return self._seccion("aps", root, limit)
+
+    def leer_sic_desde_caso(self, root, limit: int = 0):
+        return self._seccion("sic", root, limit)
+
+    def _prestaciones_tbody(self, root=None):
+        det = self._detalle(root)
+        if det is None or det.get("prestaciones") is None:
+            raise CapturaIncompleta("Prestaciones fuera de la captura")
+        return root
+
+    def leer_prestaciones_desde_tbody(self, tbody) -> List[Dict[str, str]]:
+        det = self._detalle(tbody)
+        return [dict(p) for p in det.get("prestaciones") or []] if det else []
+
+
+class SiggesGrabador(SiggesReplay):
+    """
+    Envuelve el SiggesDriver vivo: al expandir un caso lo lee completo UNA vez
+    (snapshot JS + lectores DOM para lo que falte) y lo guarda en la captura.
+    Las lecturas siguientes del mismo caso salen de la captura.
+    """
+
+    def __init__(self, sigges, captura: CapturaPaciente):
+        super().__init__(captura)
+        self._sigges = sigges
+        self._raices: Dict[int, Any] = {}   # id(WebElement) -> (WebElement, indice caso)
+
+    def __getattr__(self, nombre: str):
+        return getattr(self._sigges, nombre)
+
+    def _detalle(self, root) -> Optional[Dict[str, Any]]:
+        par = self._raices.get(id(root))
+        return self.captura.detalle.get(par[1]) if par is not None and par[0] is root else None
+
+    def expandir_caso(self, indice: int):
+        root = self._sigges.expandir_caso(indice)
+        if not root:
+            return root
+        self._raices[id(root)] = (root, indice)
+        if indice not in self.captura.detalle:
+            self.captura.detalle[indice] = self._leer_caso(root)
+        return root
+
+    def cerrar_caso_por_indice(self, indice: int) -> None:
+        return self._sigges.cerrar_caso_por_indice(indice)
+
+    def _leer_caso(self, root) -> Dict[str, Any]:
+        sg = self._sigges
+        snap = sg.leer_snapshot_caso(root) or {}
+        lectores = {
+            "ipd": sg.leer_ipd_desde_caso, "oa": sg.leer_oa_desde_caso,
+            "aps": sg.leer_aps_desde_caso, "sic": sg.leer_sic_desde_caso,
+        }
+        det: Dict[str, Any] = {"texto": root.text or ""}
+        for clave, lector in lectores.items():
+            seccion = snap.get(clave)
+            try:
+                det[clave] = _recortar(seccion if seccion is not None else lector(root, 0), 0)
+            except Exception:
+                det[clave] = None   # sin capturar: se lee en vivo y el replay vuelve a SIGGES
+        prest = snap.get("prestaciones")
+        if prest is None:
+            try:
+                tb = sg._prestaciones_tbody(root)
+                prest = sg.leer_prestaciones_desde_tbody(tb) if tb else []
+            except Exception:
+                prest = None
+        det["prestaciones"] = prest
+        return det
+
+    def leer_snapshot_caso(self, root=None) -> Optional[Dict[str, Any]]:
+        if self._detalle(root) is None:
+            return self._sigges.leer_snapshot_caso(root)
+        return super().leer_snapshot_caso(root)
+
+    def _seccion(self, clave: str, root, limit: int):
+        det = self._detalle(root)
+        if det is None or det.get(clave) is None:
+            return getattr(self._sigges, f"leer_{clave}_desde_caso")(root, limit)
+        return super()._seccion(clave, root, limit)
+
+    def _prestaciones_tbody(self, root=None):
+        det = self._detalle(root)
+        if det is None or det.get("prestaciones") is None:
+            return self._sigges._prestaciones_tbody(root)
+        return root
+
+    def leer_prestaciones_desde_tbody(self, tbody) -> List[Dict[str, str]]:
+        if self._detalle(tbody) is None:
+            return self._sigges.leer_prestaciones_desde_tbody(tbody)
+        return super().leer_prestaciones_desde_tbody(tbody)
+
+
+# =============================================================================
+#                         CACHÉ EN DISCO (TTL + LRU)
+# =============================================================================
+class CachePacientes:
+    """
+    Un archivo JSON por RUT (nombre = hash, sin datos personales en la ruta).
+
+    - TTL: capturas más viejas que ttl_horas no se usan y se borran.
+    - LRU: sobre max_pacientes se expulsan las menos usadas (mtime = último uso).
+    - Thread-safe: las pestañas paralelas comparten la instancia.
+    """
+
+    SUBDIR = os.path.join("Cache", "Pacientes")
+
+    def __init__(self, directorio: Optional[str] = None, ttl_horas: float = 12.0, max_pacientes: int = 5000):
+        self.directorio = directorio or os.path.join(os.path.dirname(logmgr.get_log_root()), self.SUBDIR)
+        self.ttl_s = max(0.0, float(ttl_horas)) * 3600
+        self.max_pacientes = max(1, int(max_pacientes))
+        self._lock = threading.Lock()
+        self._lru: "OrderedDict[str, float]" = OrderedDict()
+        os.makedirs(self.directorio, exist_ok=True)
+        entradas = []
+        for nombre in os.listdir(self.directorio):
+            if nombre.endswith(".json"):
+                try:
+                    entradas.append((os.path.getmtime(os.path.join(self.directorio, nombre)), nombre))
+                except OSError:
+                    continue
+        for mtime, nombre in sorted(entradas):
+            self._lru[nombre] = mtime
+
+    @staticmethod
+    def _archivo(rut: str) -> str:
+        return hashlib.sha256(rut.strip().upper().encode("utf-8")).hexdigest()[:32] + ".json"
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def obtener(self, rut: str) -> Optional[CapturaPaciente]:
+        """Captura vigente del RUT o None (miss, vencida o ilegible)."""
+        nombre = self._archivo(rut)
+        ruta = os.path.join(self.directorio, nombre)
+        with self._lock:
+            if nombre not in self._lru:
+                return None
+            try:
+                with open(ruta, "r", encoding="utf-8") as f:
+                    captura = CapturaPaciente.from_dict(json.load(f))
+            except (OSError, ValueError):
+                self._borrar(nombre)
+                return None
+            if self.ttl_s and time.time() - captura.ts > self.ttl_s:
+                self._borrar(nombre)
+                return None
+            try:
+                os.utime(ruta, None)
+            except OSError:
+                pass
+            self._lru.move_to_end(nombre)
+            self._lru[nombre] = time.time()
+            captura.desde_cache = True
+            return captura
+
+    def guardar(self, captura: CapturaPaciente) -> None:
+        nombre = self._archivo(captura.rut)
+        ruta = os.path.join(self.directorio, nombre)
+        datos = json.dumps(captura.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            tmp = ruta + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(datos)
+            os.replace(tmp, ruta)
+            self._lru[nombre] = time.time()
+            self._lru.move_to_end(nombre)
+            while len(self._lru) > self.max_pacientes:
+                self._borrar(next(iter(self._lru)))
+
+    def invalidar(self, rut: str) -> None:
+        with self._lock:
+            self._borrar(self._archivo(rut))
+
+    def _borrar(self, nombre: str) -> None:
+        self._lru.pop(nombre, None)
+        try:
+            os.remove(os.path.join(self.directorio, nombre))
+        except OSError:
+            pass
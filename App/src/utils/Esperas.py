@@ -18,8 +18,15 @@ Autor: Sistema Nozhgess
 """
 from __future__ import annotations
 from time import sleep, time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime
+from pathlib import Path
+import atexit
+import copy
+import json
 import logging
+import os
+import threading
 
 # =============================================================================
 #                      TABLA DE ESPERAS GRANULARES
@@ -557,6 +564,271 @@ ESPERAS: Dict[str, Dict[str, Any]] = {
 }
 
 
+# Valores escritos a mano (antes de aplicar el perfil calibrado)
+ESPERAS_BASE: Dict[str, Dict[str, Any]] = copy.deepcopy(ESPERAS)
+
+
+# =============================================================================
+#                 CALIBRACIÓN DEL PERFIL DE ESPERAS
+# =============================================================================
+# Con NOZHGESS_CALIBRAR_ESPERAS=1 se registra cuánto tardó realmente cada
+# condición con clave (spinner, búsqueda de elementos) y, en las esperas de
+# spinner, cuánto tardó el DOM en quedar quieto después (asentamiento). Al final
+# de la corrida se guardan percentiles por clave en config/esperas_calibradas.json
+# junto a un perfil derivado: wait = p95 * factor + margen y sleep = p95 del
+# asentamiento * factor + margen (sin asentamiento medido el sleep no se toca).
+# Un spinner que nunca apareció ("none"/"quiet") no es un evento y no se registra.
+# El perfil se aplica sobre ESPERAS al importar este módulo
+# (NOZHGESS_PERFIL_ESPERAS=0 lo desactiva).
+
+RUTA_PERFIL = Path(__file__).resolve().parents[2] / "config" / "esperas_calibradas.json"
+
+FACTOR_P95 = 1.5          # wait calibrado = p95 * FACTOR_P95 + MARGEN_WAIT
+MARGEN_WAIT = 0.5         # segundos
+WAIT_MINIMO = 0.5         # nunca bajar de esto
+VENTANA_ASENTAMIENTO = 0.1  # DOM sin mutaciones este lapso = página asentada
+MARGEN_SLEEP = 0.05       # sleep calibrado = p95 asentamiento * FACTOR_P95 + MARGEN_SLEEP
+MIN_MUESTRAS = 20         # muestras mínimas por clave para calibrarla
+MAX_TASA_TIMEOUT = 0.02   # con más timeouts que esto la clave no se acorta
+MAX_MUESTRAS_GUARDADAS = 500
+
+_lock_calibracion = threading.Lock()
+_muestras: Dict[str, List[float]] = {}
+_timeouts: Dict[str, int] = {}
+_usos_sleep: Dict[str, int] = {}
+_asentamientos: Dict[str, List[float]] = {}
+
+
+def calibracion_activa() -> bool:
+    """La calibración es opt-in para no escribir archivos en corridas normales."""
+    return os.getenv("NOZHGESS_CALIBRAR_ESPERAS", "0") == "1"
+
+
+def registrar_condicion(clave: Optional[str], segundos: float, ok: bool = True) -> None:
+    """
+    Registra el tiempo que tardó una condición con clave en cumplirse.
+    ok=False marca un timeout (la condición no se cumplió dentro del wait).
+    """
+    if not clave or not calibracion_activa():
+        return
+    with _lock_calibracion:
+        _muestras.setdefault(clave, []).append(max(0.0, float(segundos)))
+        if not ok:
+            _timeouts[clave] = _timeouts.get(clave, 0) + 1
+
+
+def registrar_asentamiento(clave: Optional[str], segundos: float) -> None:
+    """Registra cuánto siguió mutando el DOM tras cumplirse la condición de la clave."""
+    if not clave or not calibracion_activa():
+        return
+    with _lock_calibracion:
+        _asentamientos.setdefault(clave, []).append(max(0.0, float(segundos)))
+
+
+def ventana_asentamiento(clave: Optional[str]) -> Tuple[float, float]:
+    """
+    (ventana de quietud, máximo) para medir el asentamiento de la clave, o (0, 0)
+    si no se mide: sin calibración activa o sin sleep base que calibrar. El máximo
+    es el sleep base: si el DOM sigue mutando más que eso, el sleep no se acorta.
+    """
+    if not clave or not calibracion_activa():
+        return 0.0, 0.0
+    sleep_base = float(ESPERAS_BASE.get(clave, {}).get("sleep", 0.0))
+    return (VENTANA_ASENTAMIENTO, sleep_base) if sleep_base > 0 else (0.0, 0.0)
+
+
+def registrar_uso_sleep(clave: Optional[str]) -> None:
+    """Cuenta cada sleep fijo aplicado por clave (para el reporte de ahorro)."""
+    if not clave or not calibracion_activa():
+        return
+    with _lock_calibracion:
+        _usos_sleep[clave] = _usos_sleep.get(clave, 0) + 1
+
+
+def _percentil(valores: List[float], p: float) -> float:
+    ordenados = sorted(valores)
+    pos = min(len(ordenados) - 1, int(round(p * (len(ordenados) - 1))))
+    return ordenados[pos]
+
+
+def _estadisticas(muestras: List[float], timeouts: int, usos: int,
+                  asentamientos: Optional[List[float]] = None) -> Dict[str, Any]:
+    st = {
+        "n": len(muestras),
+        "timeouts": timeouts,
+        "usos_sleep": usos,
+        "p50": round(_percentil(muestras, 0.50), 3),
+        "p90": round(_percentil(muestras, 0.90), 3),
+        "p95": round(_percentil(muestras, 0.95), 3),
+        "max": round(max(muestras), 3),
+        "muestras": [round(x, 3) for x in muestras[-MAX_MUESTRAS_GUARDADAS:]],
+    }
+    if asentamientos:
+        st["asentamiento"] = {
+            "n": len(asentamientos),
+            "p50": round(_percentil(asentamientos, 0.50), 3),
+            "p95": round(_percentil(asentamientos, 0.95), 3),
+            "muestras": [round(x, 3) for x in asentamientos[-MAX_MUESTRAS_GUARDADAS:]],
+        }
+    return st
+
+
+def derivar_perfil(estadisticas: Dict[str, Dict[str, Any]],
+                   base: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Deriva {clave: {"wait", "sleep"}} desde los percentiles.
+    Solo acorta (nunca alarga) y omite claves con pocas muestras o con timeouts.
+    El sleep sale solo del asentamiento medido; sin suficientes muestras queda el base.
+    """
+    base = base if base is not None else ESPERAS_BASE
+    perfil: Dict[str, Dict[str, float]] = {}
+    for clave, st in estadisticas.items():
+        cfg = base.get(clave)
+        n = int(st.get("n", 0))
+        if not cfg or n < MIN_MUESTRAS:
+            continue
+        if st.get("timeouts", 0) / n > MAX_TASA_TIMEOUT:
+            continue
+        wait_base = float(cfg.get("wait", 2.0))
+        sleep_base = float(cfg.get("sleep", 0.0))
+        wait = max(WAIT_MINIMO, float(st["p95"]) * FACTOR_P95 + MARGEN_WAIT)
+        sleep_cal = sleep_base
+        asent = st.get("asentamiento") or {}
+        if int(asent.get("n", 0)) >= MIN_MUESTRAS:
+            sleep_cal = min(sleep_base, float(asent["p95"]) * FACTOR_P95 + MARGEN_SLEEP)
+        perfil[clave] = {
+            "wait": round(min(wait_base, wait), 2),
+            "sleep": round(sleep_cal, 2),
+        }
+    return perfil
+
+
+def reporte_perfil(estadisticas: Dict[str, Dict[str, Any]],
+                   perfil: Dict[str, Dict[str, float]],
+                   base: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Cuánto sleep fijo elimina el perfil (por uso y en la corrida observada)."""
+    base = base if base is not None else ESPERAS_BASE
+    detalle = {}
+    total = 0.0
+    for clave, cal in perfil.items():
+        sleep_base = float(base.get(clave, {}).get("sleep", 0.0))
+        ahorro_uso = max(0.0, sleep_base - cal["sleep"])
+        st = estadisticas.get(clave, {})
+        usos = max(int(st.get("usos_sleep", 0)), int(st.get("n", 0)))
+        detalle[clave] = {
+            "wait": (float(base.get(clave, {}).get("wait", 2.0)), cal["wait"]),
+            "sleep": (sleep_base, cal["sleep"]),
+            "ahorro_por_uso": round(ahorro_uso, 3),
+            "ahorro_corrida": round(ahorro_uso * usos, 1),
+        }
+        total += ahorro_uso * usos
+    return {"claves": detalle, "sleep_eliminado_s": round(total, 1)}
+
+
+def _leer_perfil_guardado(ruta: Path) -> Dict[str, Any]:
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def guardar_calibracion(ruta: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """
+    Combina las muestras de esta corrida con las ya guardadas, recalcula
+    percentiles y perfil, y escribe el archivo. Retorna el reporte o None.
+    """
+    ruta = Path(ruta) if ruta else RUTA_PERFIL
+    with _lock_calibracion:
+        if not _muestras:
+            return None
+        nuevas = {k: list(v) for k, v in _muestras.items()}
+        timeouts = dict(_timeouts)
+        usos = dict(_usos_sleep)
+        asent = {k: list(v) for k, v in _asentamientos.items()}
+        _muestras.clear()
+        _timeouts.clear()
+        _usos_sleep.clear()
+        _asentamientos.clear()
+
+    previas = _leer_perfil_guardado(ruta).get("claves", {})
+    estadisticas = {}
+    for clave in set(previas) | set(nuevas):
+        prev = previas.get(clave, {})
+        muestras = list(prev.get("muestras", [])) + nuevas.get(clave, [])
+        if not muestras:
+            continue
+        estadisticas[clave] = _estadisticas(
+            muestras,
+            int(prev.get("timeouts", 0)) + timeouts.get(clave, 0),
+            usos.get(clave, 0),
+            list((prev.get("asentamiento") or {}).get("muestras", [])) + asent.get(clave, []),
+        )
+
+    perfil = derivar_perfil(estadisticas)
+    reporte = reporte_perfil(estadisticas, perfil)
+    datos = {
+        "actualizado": datetime.now().isoformat(timespec="seconds"),
+        "claves": estadisticas,
+        "perfil": perfil,
+        "sleep_eliminado_s": reporte["sleep_eliminado_s"],
+    }
+    try:
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        tmp = ruta.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, ruta)
+    except OSError as e:
+        logging.warning(f"No se pudo guardar la calibración de esperas: {e}")
+        return None
+    return reporte
+
+
+def cargar_perfil_calibrado(ruta: Optional[Path] = None) -> int:
+    """
+    Aplica el perfil calibrado sobre ESPERAS (solo claves conocidas).
+    Retorna la cantidad de claves ajustadas.
+    """
+    if os.getenv("NOZHGESS_PERFIL_ESPERAS", "1") == "0":
+        return 0
+    perfil = _leer_perfil_guardado(Path(ruta) if ruta else RUTA_PERFIL).get("perfil", {})
+    aplicadas = 0
+    for clave, cal in perfil.items():
+        if clave not in ESPERAS or not isinstance(cal, dict):
+            continue
+        for campo in ("wait", "sleep"):
+            if isinstance(cal.get(campo), (int, float)):
+                ESPERAS[clave][campo] = float(cal[campo])
+        aplicadas += 1
+    return aplicadas
+
+
+def finalizar_calibracion() -> Optional[Dict[str, Any]]:
+    """Guarda la calibración (si está activa) y registra el ahorro en el log."""
+    if not calibracion_activa():
+        return None
+    reporte = guardar_calibracion()
+    if reporte:
+        logging.info(
+            f"⏱️ Perfil de esperas calibrado: {len(reporte['claves'])} claves, "
+            f"{reporte['sleep_eliminado_s']:.1f}s de sleep fijo eliminado"
+        )
+        for clave, d in sorted(reporte["claves"].items(), key=lambda kv: -kv[1]["ahorro_corrida"]):
+            logging.info(
+                f"   {clave}: wait {d['wait'][0]}→{d['wait'][1]}s, "
+                f"sleep {d['sleep'][0]}→{d['sleep'][1]}s ({d['ahorro_corrida']}s)"
+            )
+    return reporte
+
+
+if calibracion_activa():
+    atexit.register(guardar_calibracion)
+
+cargar_perfil_calibrado()
+
+
 # =============================================================================
 #                      FUNCIÓN DE ESPERA MEJORADA
 # =============================================================================
@@ -582,6 +854,7 @@ def espera(clave: str, log_timing: bool = False) -> float:
     sleep_time = config.get("sleep", 0.0)
     
     if sleep_time > 0:
+        registrar_uso_sleep(clave)
         sleep(sleep_time)
     
     elapsed = time() - start
@@ -16,23 +16,30 @@ Autor: Sistema Nozhgess
 ==============================================================================
 """
 from __future__ import annotations
+import csv
 import os
+import queue
 import re
-from datetime import datetime
+import threading
+from copy import copy
+from datetime import date, datetime
 from typing import Dict, List, Any, Optional
 
 import pandas as pd
 
-from src.utils.Terminal import log_info, log_ok, log_error
+from src.utils.Terminal import log_info, log_ok, log_error, log_warn
 
 # =============================================================================
 #                      IMPORTAR ESTILOS DE OPENPYXL
 # =============================================================================
 try:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
     from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
     from openpyxl.utils import get_column_letter
     STYLES_AVAILABLE = True
 except ImportError:
+    Workbook = WriteOnlyCell = None
     PatternFill = Font = Alignment = Border = Side = None
     get_column_letter = None
     STYLES_AVAILABLE = False
@@ -124,13 +131,16 @@ def _get_header_style(column_name: str) -> dict:
     # Default: usar grupo azul oscuro
     return COLORS["grupo_azul_oscuro"]
 
-def _apply_header_filter(ws) -> None:
-    """Aplica filtro solo al rango utilizado (encabezados visibles)."""
+def _apply_header_filter(ws, max_row: Optional[int] = None, max_col: Optional[int] = None) -> None:
+    """
+    Aplica filtro solo al rango utilizado (encabezados visibles).
+    En hojas write-only el rango se pasa explícito (se fija antes de escribir filas).
+    """
     try:
         if not get_column_letter:
             return
-        max_row = ws.max_row or 1
-        max_col = ws.max_column or 1
+        max_row = max_row or ws.max_row or 1
+        max_col = max_col or ws.max_column or 1
         if max_row < 1 or max_col < 1:
             return
         last_col = get_column_letter(max_col)
@@ -140,223 +150,230 @@ def _apply_header_filter(ws) -> None:
         pass
 
 
-def _aplicar_estilos(ws, rows_metadata: List[Dict] = None) -> None:
+def _borde(color: str):
+    lado = Side(style='thin', color=color)
+    return Border(left=lado, right=lado, top=lado, bottom=lado)
+
+
+class _FabricaCeldas:
+    """
+    Crea WriteOnlyCell ya estilizadas para una hoja en modo write-only.
+
+    Cada combinación (fill, font, alignment, border, formato) se registra una
+    sola vez en el libro; las celdas siguientes copian el StyleArray resultante
+    en vez de volver a resolver cada objeto de estilo.
+    """
+
+    def __init__(self, ws):
+        self.ws = ws
+        self._estilos = {}
+
+    def __call__(self, valor, fill=None, font=None, alignment=None, border=None, number_format=None):
+        cell = WriteOnlyCell(self.ws, value=valor)
+        clave = (id(fill), id(font), id(alignment), id(border), number_format)
+        estilo = self._estilos.get(clave)
+        if estilo is not None:
+            cell._style = copy(estilo)
+            return cell
+        if fill is not None:
+            cell.fill = fill
+        if font is not None:
+            cell.font = font
+        if alignment is not None:
+            cell.alignment = alignment
+        if border is not None:
+            cell.border = border
+        if number_format:
+            cell.number_format = number_format
+        self._estilos[clave] = copy(cell._style)
+        return cell
+
+
+def _valor_excel(val):
+    """
+    Convierte un valor de resultado al tipo que se escribe en la celda
+    (mismas reglas que usaba DataFrame.to_excel). Retorna (valor, formato).
+    """
+    if val is None:
+        return None, None
+    if isinstance(val, (list, tuple, dict, set)):
+        return str(val), None
+    if isinstance(val, float) and val != val:  # NaN
+        return None, None
+    if isinstance(val, (bool, int, float, str)):
+        return val, None
+    if isinstance(val, datetime):
+        return val, "YYYY-MM-DD HH:MM:SS"
+    if isinstance(val, date):
+        return val, "YYYY-MM-DD"
+    if hasattr(val, "item"):  # Escalares numpy
+        try:
+            return _valor_excel(val.item())
+        except Exception:
+            pass
+    try:
+        if pd.isna(val):
+            return None, None
+    except (TypeError, ValueError):
+        pass
+    return str(val), None
+
+
+def _crear_estilos() -> Dict[str, Any]:
+    """Objetos de estilo compartidos por todas las celdas (se crean una vez por libro)."""
+    estilos = {
+        # Borde sutil
+        "border": _borde('D0D0D0'),
+        # Semáforo de edad (Pastel standard para legibilidad)
+        "age_green": (PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid"),
+                      Font(color="006100", bold=True, size=9)),
+        "age_yellow": (PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid"),
+                       Font(color="9C5700", bold=True, size=9)),
+        "age_red": (PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid"),
+                    Font(color="9C0006", bold=True, size=9)),
+        # Futuros (Explicit Black)
+        "future": (PatternFill(start_color="FFD966", end_color="FFD966", fill_type="solid"),
+                   Font(color="000000", size=9)),
+        # Default Font (Explicit Black)
+        "default_font": Font(color="000000", size=9),
+        # Alineaciones reutilizables
+        "align_header": Alignment(horizontal='center', vertical='center', wrap_text=True),
+        "align_center": Alignment(horizontal='center', vertical='center'),
+        "headers": {},
+    }
+    props = COLORS["grupo_rojo"]
+    estilos["rojo"] = (PatternFill(start_color=props["fill"], end_color=props["fill"], fill_type="solid"),
+                       Font(color=props["font"], bold=props.get("bold", True), size=9))
+    return estilos
+
+
+def _estilo_header(estilos: Dict[str, Any], col_name: str):
+    """(fill, font) del header según su grupo; cacheado por color."""
+    style_props = COLORS["grupo_cyan"] if es_carga_masiva else _get_header_style(col_name)
+    clave = (style_props["fill"], style_props["font"], style_props.get("bold", True))
+    if clave not in estilos["headers"]:
+        estilos["headers"][clave] = (
+            PatternFill(start_color=style_props["fill"], end_color=style_props["fill"], fill_type="solid"),
+            Font(color=style_props["font"], bold=style_props.get("bold", True), size=10),
+        )
+    return estilos["headers"][clave]
+
+
+def _estilo_dato(estilos: Dict[str, Any], col_name: str, val: Any, meta: Dict[str, Any]):
     """
-    Aplica estilos profesionales a una hoja de Excel.
+    Estilo condicional de una celda de datos. Retorna (valor, fill, font).
+    Celdas de datos SIN color (transparente), salvo excepciones.
     """
+    fill, font = None, estilos["default_font"]
+
+    # 1. Alerta de Edad (Prioridad Alta)
+    if col_name == "edad":
+        age_status = meta.get("_age_validation_status")
+        if age_status == "green":
+            fill, font = estilos["age_green"]
+        elif age_status == "yellow":
+            fill, font = estilos["age_yellow"]
+        elif age_status == "red" or meta.get("_age_alert", False):
+            fill, font = estilos["age_red"]
+        elif val is not None and val != "":
+            # Si no es alerta y es la columna edad -> VERDE (Cumple)
+            fill, font = estilos["age_green"]
+
+    # 2. Detección de Prestaciones Futuras (! ) -> se quita el marcador
+    elif isinstance(val, str) and val.startswith("! "):
+        val = val[2:]
+        fill, font = estilos["future"]
+
+    # 5. Estilizado de CodxAño (Prioridad IPD/APS)
+    elif "codxaño" in col_name and meta.get("_codxanio_source"):
+        if meta["_codxanio_source"] == "ipd":
+            fill, font = estilos["age_green"]
+        elif meta["_codxanio_source"] == "aps":
+            fill, font = estilos["future"]
+
+    # 3. Folios VIH Usados (Sombreado Verde)
+    elif "folio oa" in col_name:
+        folios_usados = meta.get("_folios_usados_norm")
+        val_clean = str(val).strip().lower().replace("oa", "").strip()
+        if val_clean and folios_usados and val_clean in folios_usados:
+            fill, font = estilos["age_green"]
+
+    # 4. Celda ROJA crítica (Sin Mini-Tabla)
+    elif meta.get("_status_red") and "observ" in col_name:
+        fill, font = estilos["rojo"]
+
+    return val, fill, font
+
+
+def _columnas_mision(items: List[Dict[str, Any]]) -> List[str]:
+    """
+    Orden de columnas de la hoja: _cols_order de la primera fila que lo trae,
+    luego columnas extra en orden de aparición (sin "Nombre"), sin duplicados.
+    Sin _cols_order: todas las columnas en orden de aparición.
+    """
+    cols_order = None
+    vistas: List[str] = []
+    vistas_set = set()
+    for it in items:
+        if cols_order is None and "_cols_order" in it:
+            cols_order = it["_cols_order"]
+        for k in it:
+            if not k.startswith("_") and k not in vistas_set:
+                vistas_set.add(k)
+                vistas.append(k)
+    if cols_order:
+        columnas = list(cols_order) + [c for c in vistas if c not in cols_order and c != "Nombre"]
+    else:
+        columnas = vistas
+    # Eliminar columnas duplicadas (mantener la primera aparición)
+    return list(dict.fromkeys(columnas))
+
+
+def _escribir_hoja_mision(wb, safe_name: str, items: List[Dict[str, Any]], estilos: Dict[str, Any]) -> List[str]:
+    """Escribe una hoja de misión en streaming: cada fila sale ya estilizada."""
+    columnas = _columnas_mision(items)
+    ws = wb.create_sheet(title=safe_name)
+    # Filtro en encabezados (rango conocido de antemano)
+    _apply_header_filter(ws, len(items) + 1, len(columnas))
     if not STYLES_AVAILABLE:
-        return
-    
-    # Fix: Define es_carga_masiva default
-    es_carga_masiva = False
-    
-    # Borde sutil
-    thin_border = Border(
-        left=Side(style='thin', color='D0D0D0'),
-        right=Side(style='thin', color='D0D0D0'),
-        top=Side(style='thin', color='D0D0D0'),
-        bottom=Side(style='thin', color='D0D0D0')
-    )
-    
-    # Pre-instanciar estilos para rendimiento (Caching)
-    # Evita crear millones de objetos PatternFill/Font en bucles largos
-    style_cache = {}
-    
-    # Crear cache de objetos para cada grupo de color definido
-    for group_name, props in COLORS.items():
-        fill_obj = PatternFill(start_color=props["fill"], end_color=props["fill"], fill_type="solid")
-        font_obj = Font(color=props["font"], bold=props.get("bold", True), size=9) # Default size 9 for body
-        # Cachear tupla (fill, font)
-        style_cache[group_name] = (fill_obj, font_obj)
-        
-    # Cache especial para headers (size 10)
-    header_style_cache = {}
-    for group_name, props in COLORS.items():
-         fill_obj = PatternFill(start_color=props["fill"], end_color=props["fill"], fill_type="solid")
-         font_obj = Font(color=props["font"], bold=props.get("bold", True), size=10)
-         header_style_cache[group_name] = (fill_obj, font_obj)
-         
-    # Cache para Alertas de Edad
-    # Definir Fills para Semáforo (Pastel standard para legibilidad)
-    age_green_fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
-    age_yellow_fill = PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid")
-    age_red_fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-    
-    age_font_green = Font(color="006100", bold=True, size=9)
-    age_font_yellow = Font(color="9C5700", bold=True, size=9)
-    age_font_red = Font(color="9C0006", bold=True, size=9)
-    
-    # Cache para Futuros (Explicit Black)
-    future_fill = PatternFill(start_color="FFD966", end_color="FFD966", fill_type="solid")
-    future_font = Font(color="000000", size=9)
-    
-    # Default Font (Explicit Black)
-    default_font = Font(color="000000", size=9)
-    # Alineaciones reutilizables (mejor rendimiento)
-    align_header = Alignment(horizontal='center', vertical='center', wrap_text=True)
-    align_center = Alignment(horizontal='center', vertical='center')
-
-    # Map column names to indices
-    header_map = {}
-    for cell in ws[1]:
-        header_map[cell.column] = str(cell.value or "").lower().strip()
-
-    # Estilizar headers (fila 1)
-    for cell in ws[1]:
-        # Determinar grupo
-        if es_carga_masiva:
-            group_key = "grupo_cyan"
-        else:
-             # _get_header_style devuelve el dict de propiedades directamente, no la key.
-             # Necesitamos refactorizar levemente o buscar la key inversa.
-             # Mejor optimización: _get_header_style ahora devuelve solo la KEY del grupo.
-             # Pero para no romper compatibilidad, buscaremos el match o calcularemos al vuelo si no hay cache.
-             
-             # Fallback manual por ahora: Recalcular style dict
-             style_props = _get_header_style(str(cell.value or ""))
-             
-             # Crear objetos al vuelo solo para headers (son pocos, ~50 max)
-             # No vale la pena complicar el cache inverso.
-             cell.fill = PatternFill(start_color=style_props["fill"], end_color=style_props["fill"], fill_type="solid")
-             is_bold = style_props.get("bold", True)
-             cell.font = Font(color=style_props["font"], bold=is_bold, size=10)
-        
-        # Si fuera carga masiva, usamos el cache directo
-        if es_carga_masiva:
-             # Carga masiva usa grupo_cyan directo
-             hf, ht = header_style_cache["grupo_cyan"]
-             cell.fill = hf
-             cell.font = ht
-
-        cell.alignment = align_header
-        cell.border = thin_border
-    
-    # Estilizar celdas de datos - Centrado horizontal y vertical
-    # Aquí es donde importa el rendimiento (10k+ celdas)
-    
-    # Pre-calcular el grupo de estilo para cada COLUMNA (índice)
-    # Lista de tuplas (FillObj, FontObj) por índice de columna (1-based)
-    col_styles_map = {} # {col_idx: (fill, font)}
-    
-    for col_idx, col_name in header_map.items(): # header_map usa cell.column (int)
-         # Determinar el estilo base de esta columna
-         style_props = _get_header_style(col_name) # Devuelve dict
-         
-         # Buscar si este dict coincide con algún grupo cacheado para reutilizar objetos
-         # Heurística: chequear por 'fill' color
-         found_objs = None
-         color_fill = style_props["fill"]
-         
-         # Buscar en style_cache
-         for g_key, (c_fill, c_font) in style_cache.items():
-              if COLORS[g_key]["fill"] == color_fill:
-                  found_objs = (c_fill, c_font)
-                  break
-         
-         if found_objs:
-             col_styles_map[col_idx] = found_objs
-         else:
-             # Si no está en cache standard, crear uno nuevo
-             f = PatternFill(start_color=color_fill, end_color=color_fill, fill_type="solid")
-             t = Font(color=style_props["font"], bold=style_props.get("bold", True), size=9)
-             col_styles_map[col_idx] = (f, t)
-
-
-    for i, row in enumerate(ws.iter_rows(min_row=2), start=0):
-        age_status = None
-        has_age_alert = False
-        status_red = False
-        codxanio_source = None
-        
-        if rows_metadata and i < len(rows_metadata):
-            # Preferir el status nuevo, fallback al booleano antiguo
-            age_status = rows_metadata[i].get("_age_validation_status", None)
-            has_age_alert = rows_metadata[i].get("_age_alert", False)
-            status_red = rows_metadata[i].get("_status_red", False)
-            codxanio_source = rows_metadata[i].get("_codxanio_source", None)
-            
-        for cell in row:
-            val = cell.value
-            col_name = header_map.get(cell.column, "")
-            col_idx = cell.column
-            
-            # Recuperar estilo base (cacheado) de la columna
-            base_fill, base_font = col_styles_map.get(col_idx, (None, default_font))
-            
-            # Aplicar base
-            # FIX: Usuario pidió celdas de datos SIN color (transparente), salvo excepciones.
-            # if base_fill: cell.fill = base_fill  <-- REMOVED
-            # Correcto: Usar font negro por defecto para cuerpo, ignorar el del header
-            # cell.font = base_font  <-- ERROR: base_font tiene color blanco (header)
-            cell.font = default_font # Default is generic black
-            
-            # --- SOBRE-ESCRIBIR CON CONDICIONES DE CELDA ---
-            
-            # 1. Alerta de Edad (Prioridad Alta)
-            if col_name == "edad":
-                if age_status == "green":
-                    cell.fill = age_green_fill
-                    cell.font = age_font_green
-                elif age_status == "yellow":
-                    cell.fill = age_yellow_fill
-                    cell.font = age_font_yellow
-                elif age_status == "red" or has_age_alert: # Fallback a alerta antigua si es red
-                    cell.fill = age_red_fill
-                    cell.font = age_font_red
-                else: 
-                     # Si no es alerta y es la columna edad -> VERDE (Cumple)
-                     # Solo si tiene valor
-                     if val is not None and val != "":
-                         cell.fill = age_green_fill
-                         cell.font = age_font_green
-            
-            # 2. Detección de Prestaciones Futuras (! )
-            elif isinstance(val, str) and val.startswith("! "):
-                # Aplicar color naranja "Advertencia/Futuro"
-                cell.fill = future_fill
-                # Quitar marcador para que quede limpio
-                cell.value = val[2:]
-                cell.font = future_font
-            
-            # 5. Estilizado de CodxAño (Prioridad IPD/APS)
-            elif "codxaño" in col_name.lower() and codxanio_source:
-                if codxanio_source == "ipd":
-                    # Verde (IPD)
-                    cell.fill = age_green_fill
-                    cell.font = age_font_green
-                elif codxanio_source == "aps":
-                    # Naranja (APS)
-                    cell.fill = future_fill
-                    cell.font = future_font
-
-            # 3. Optimización: Si no hubo override, ya tiene el base_font/fill puestos.
-                
-            # 3. Folios VIH Usados (Sombreado Verde)
-            elif "folio oa" in col_name and rows_metadata and i < len(rows_metadata):
-                folios_usados = rows_metadata[i].get("_folios_usados", [])
-                # Limpiar valor para comparaciÃ³n
-                val_clean = str(val).strip().lower().replace("oa", "").strip()
-                if val_clean and val_clean in [str(f).strip().lower().replace("oa", "").strip() for f in folios_usados]:
-                    cell.fill = age_green_fill
-                    cell.font = age_font_green
-            
-            # 4. Celda ROJA crítica (Sin Mini-Tabla)
-            elif status_red and "observ" in col_name:
-                rf, rt = style_cache.get("grupo_rojo", (None, None))
-                if rf:
-                    cell.fill = rf
-                    cell.font = rt
-            
-            cell.alignment = align_center
-            cell.border = thin_border
-    
-    # Filtro en encabezados (rango utilizado)
-    _apply_header_filter(ws)
+        ws.append(columnas)
+        for it in items:
+            ws.append([_valor_excel(it.get(c))[0] for c in columnas])
+        return columnas
 
-def _escribir_y_estilizar(writer, resultados_por_mision, mission_list: List[Dict] = None):
-    """Escribe los dataframes y llama a estilizar. Retorna columnas encontradas (ordenadas)."""
+    celda = _FabricaCeldas(ws)
+    border = estilos["border"]
+    align_header = estilos["align_header"]
+    align_center = estilos["align_center"]
+
+    fila = []
+    for col in columnas:
+        fill, font = _estilo_header(estilos, str(col))
+        fila.append(celda(col, fill, font, align_header, border))
+    ws.append(fila)
+
+    nombres = [str(c).lower().strip() for c in columnas]
+    for it in items:
+        meta = {
+            "_age_alert": it.get("_age_alert", False),
+            "_age_validation_status": it.get("_age_validation_status", None),
+            "_folios_usados_norm": {
+                str(f).strip().lower().replace("oa", "").strip() for f in it.get("_folios_usados", []) or []
+            },
+        }
+        fila = []
+        for col, col_name in zip(columnas, nombres):
+            val, fmt = _valor_excel(it.get(col))
+            val, fill, font = _estilo_dato(estilos, col_name, val, meta)
+            fila.append(celda(val, fill, font, align_center, border, fmt))
+        ws.append(fila)
+    return columnas
+
+
+def _escribir_y_estilizar(wb, resultados_por_mision, mission_list: List[Dict] = None):
+    """Escribe las hojas de misión (streaming). Retorna columnas de la última hoja escrita."""
     columnas_encontradas = []
-    columnas_set = set()
+    estilos = _crear_estilos() if STYLES_AVAILABLE else {}
     for m_name, items in resultados_por_mision.items():
         if not items: continue # Skip empty
         
@@ -366,54 +383,16 @@ def _escribir_y_estilizar(writer, resultados_por_mision, mission_list: List[Dict
         if str(m_name).isdigit() and mission_list and int(m_name) < len(mission_list):
             sheet_label = mission_list[int(m_name)].get("nombre", f"Mision_{m_name}")
         
-        # Extract metadata (age alert + columns order)
-        metadata_list = []
-        clean_items = []
-        cols_order = None
-        for it in items:
-            meta = {
-                "_age_alert": it.get("_age_alert", False),
-                "_age_validation_status": it.get("_age_validation_status", None),
-                "_folios_usados": it.get("_folios_usados", [])
-            }
-            if cols_order is None and "_cols_order" in it:
-                cols_order = it["_cols_order"]
-            # Create clean copy removing internal keys
-            clean_it = {k: v for k, v in it.items() if not k.startswith("_")}
-            clean_items.append(clean_it)
-            metadata_list.append(meta)
-            
-        df_clean = pd.DataFrame(clean_items)
-        if cols_order:
-            # Reindex to expected order, keeping any extra columns at the end (except internal/unwanted)
-            extra_cols = [c for c in df_clean.columns if c not in cols_order and c != "Nombre"]
-            df_clean = df_clean.reindex(columns=cols_order + extra_cols)
-        # Eliminar columnas duplicadas (mantener la primera aparición)
-        if df_clean.columns.duplicated().any():
-            df_clean = df_clean.loc[:, ~df_clean.columns.duplicated()]
-        
         # Sheet name cleaning
         # Limitar a 31 chars y quitar caracteres inválidos
         safe_name = str(sheet_label).replace(":", "").replace("/", "").replace("\\", "")[:30]
         
-        df_clean.to_excel(writer, sheet_name=safe_name, index=False)
+        columnas_encontradas = _escribir_hoja_mision(wb, safe_name, items, estilos)
         
         # Metadata validation
-        if hasattr(writer, 'book') and hasattr(writer.book, 'properties'):
-            writer.book.properties.author = "NZLP-7733-CL"
-            writer.book.properties.comments = "Build (PROD): 2026-NZT-M01"
-        
-        ws = writer.sheets[safe_name]
-        _aplicar_estilos(ws, metadata_list)
-        
-    # Return columns found from the last df processed or accumulate them?
-    # Actually df_clean might not be defined if no items. Adding protection.
-    try: 
-        for col in df_clean.columns:
-            if col not in columnas_set:
-                columnas_set.add(col)
-                columnas_encontradas.append(col)
-    except Exception: pass
+        if hasattr(wb, 'properties'):
+            wb.properties.author = "NZLP-7733-CL"
+            wb.properties.comments = "Build (PROD): 2026-NZT-M01"
     return columnas_encontradas
 
 
@@ -873,7 +852,7 @@ def _expand_column_info(col: str) -> dict:
     }
 
 
-def _escribir_diccionario(writer, columnas: List[str]) -> None:
+def _escribir_diccionario(wb, columnas: List[str]) -> None:
     """
     Genera la hoja 'Diccionario' con formato Premium.
     """
@@ -923,75 +902,59 @@ def _escribir_diccionario(writer, columnas: List[str]) -> None:
     # Eliminar llave temporal corrección
     clean_data = [{k: v for k, v in d.items() if k != "_sort"} for d in data]
 
-    # 2. Crear DataFrame
-    df = pd.DataFrame(clean_data, columns=DICT_FIELDS)
-    
-    # 3. Escribir a Excel
+    # 2. Escribir a Excel (streaming, estilos por celda)
     sheet_name = "Diccionario"
-    df.to_excel(writer, sheet_name=sheet_name, index=False)
-    
-    # 4. Estilizar (Premium)
-    ws = writer.sheets[sheet_name]
-    
-    if STYLES_AVAILABLE:
-        # Definir estilos
-        header_fill = PatternFill(start_color="002060", end_color="002060", fill_type="solid") # Azul oscuro
-        header_font = Font(color="FFFFFF", bold=True, size=11, name="Calibri")
-        
-        cat_font = Font(bold=True, color="000000", size=10)
-        text_font = Font(size=10, name="Calibri")
-        
-        border = Border(
-            left=Side(style='thin', color='BFBFBF'),
-            right=Side(style='thin', color='BFBFBF'),
-            top=Side(style='thin', color='BFBFBF'),
-            bottom=Side(style='thin', color='BFBFBF')
-        )
-        
-        # Estilizar Headers
-        for cell in ws[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-            cell.border = border
-            
-        # Estilizar Cuerpo
-        for row in ws.iter_rows(min_row=2):
-            for i, cell in enumerate(row):
-                cell.border = border
-                cell.alignment = Alignment(vertical="center", wrap_text=True)
-                
-                # Columna A (Categoría) en Negrita
-                if i == 0: 
-                    cell.font = cat_font
-                    cell.alignment = Alignment(horizontal="left", vertical="center", indent=1)
-                else:
-                    cell.font = text_font
-                    cell.alignment = Alignment(horizontal="left", vertical="center", wrap_text=True)
-
-        # Dimensiones (diccionario extendido)
-        widths = {
-            "A": 22,  # Categoría
-            "B": 22,  # Columna Excel
-            "C": 40,  # Descripción
-            "D": 40,  # Función
-            "E": 36,  # Cómo se obtiene
-            "F": 28,  # Cuándo
-            "G": 28,  # Dónde
-            "H": 32,  # Por qué
-            "I": 18,  # Tipo
-            "J": 22,  # Fuente
-            "K": 32,  # Validaciones
-            "L": 20,  # Ejemplo
-            "M": 32,  # Notas
-        }
-        for col, width in widths.items():
-            ws.column_dimensions[col].width = width
-        
-        # Altura de filas automática (aproximada, openpyxl no hace autofit height real bien, pero wrap_text ayuda)
-
+    ws = wb.create_sheet(title=sheet_name)
     # Filtro en encabezados
-    _apply_header_filter(ws)
+    _apply_header_filter(ws, len(clean_data) + 1, len(DICT_FIELDS))
+
+    if not STYLES_AVAILABLE:
+        ws.append(DICT_FIELDS)
+        for d in clean_data:
+            ws.append([d.get(f, "") for f in DICT_FIELDS])
+        return
+
+    # 3. Estilizar (Premium)
+    header_fill = PatternFill(start_color="002060", end_color="002060", fill_type="solid") # Azul oscuro
+    header_font = Font(color="FFFFFF", bold=True, size=11, name="Calibri")
+    
+    cat_font = Font(bold=True, color="000000", size=10)
+    text_font = Font(size=10, name="Calibri")
+    border = _borde('BFBFBF')
+    align_header = Alignment(horizontal="center", vertical="center", wrap_text=True)
+    align_cat = Alignment(horizontal="left", vertical="center", indent=1)
+    align_text = Alignment(horizontal="left", vertical="center", wrap_text=True)
+
+    # Dimensiones (diccionario extendido) - deben fijarse antes de escribir filas
+    widths = {
+        "A": 22,  # Categoría
+        "B": 22,  # Columna Excel
+        "C": 40,  # Descripción
+        "D": 40,  # Función
+        "E": 36,  # Cómo se obtiene
+        "F": 28,  # Cuándo
+        "G": 28,  # Dónde
+        "H": 32,  # Por qué
+        "I": 18,  # Tipo
+        "J": 22,  # Fuente
+        "K": 32,  # Validaciones
+        "L": 20,  # Ejemplo
+        "M": 32,  # Notas
+    }
+    for col, width in widths.items():
+        ws.column_dimensions[col].width = width
+
+    celda = _FabricaCeldas(ws)
+    ws.append([celda(f, header_fill, header_font, align_header, border) for f in DICT_FIELDS])
+    for d in clean_data:
+        fila = []
+        for i, field in enumerate(DICT_FIELDS):
+            # Columna A (Categoría) en Negrita
+            if i == 0:
+                fila.append(celda(d.get(field, ""), None, cat_font, align_cat, border))
+            else:
+                fila.append(celda(d.get(field, ""), None, text_font, align_text, border))
+        ws.append(fila)
 
 
 # =============================================================================
@@ -999,43 +962,43 @@ def _escribir_diccionario(writer, columnas: List[str]) -> None:
 # =============================================================================
 
 
-def _crear_hoja_carga_masiva(writer) -> None:
+def _crear_hoja_carga_masiva(wb) -> None:
     """
     Crea la hoja 'Carga Masiva' solo con los encabezados solicitados.
     """
     headers = ["Fecha", "Rut", "DV", "Prestaciones", "Tipo", "PS-Fam", "Especialidad"]
-    df = pd.DataFrame(columns=headers)
     
     sheet_name = "Carga Masiva"
-    df.to_excel(writer, sheet_name=sheet_name, index=False)
+    ws = wb.create_sheet(title=sheet_name)
+    # Filtro en encabezados
+    _apply_header_filter(ws, 1, len(headers))
     
+    if not STYLES_AVAILABLE:
+        ws.append(headers)
+        return
+
+    # Ajustar anchos
+    for col_idx, _ in enumerate(headers, 1):
+        col_letter = get_column_letter(col_idx)
+        ws.column_dimensions[col_letter].width = 20
+
     # Estilizar headers (Cyan)
-    if STYLES_AVAILABLE:
-        ws = writer.sheets[sheet_name]
-        header_fill = PatternFill(start_color="00FFFF", end_color="00FFFF", fill_type="solid") # Cyan
-        header_font = Font(color="000000", bold=True, size=11, name="Calibri")
-        
-        border = Border(
-            left=Side(style='thin', color='BFBFBF'),
-            right=Side(style='thin', color='BFBFBF'),
-            top=Side(style='thin', color='BFBFBF'),
-            bottom=Side(style='thin', color='BFBFBF')
-        )
-        
-        for cell in ws[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-            cell.border = border
-            
-        # Ajustar anchos
-        for col_idx, _ in enumerate(headers, 1):
-            col_letter = get_column_letter(col_idx)
-            ws.column_dimensions[col_letter].width = 20
+    header_fill = PatternFill(start_color="00FFFF", end_color="00FFFF", fill_type="solid") # Cyan
+    header_font = Font(color="000000", bold=True, size=11, name="Calibri")
+    align = Alignment(horizontal="center", vertical="center", wrap_text=True)
+    border = _borde('BFBFBF')
+    
+    celda = _FabricaCeldas(ws)
+    ws.append([celda(h, header_fill, header_font, align, border) for h in headers])
 
-    # Filtro en encabezados
-    ws = writer.sheets[sheet_name]
-    _apply_header_filter(ws)
+
+def _guardar_libro(ruta: str, resultados_por_mision, MISSIONS) -> None:
+    """Arma el libro en modo write-only (memoria constante) y lo guarda."""
+    wb = Workbook(write_only=True)
+    cols = _escribir_y_estilizar(wb, resultados_por_mision, MISSIONS)
+    _crear_hoja_carga_masiva(wb)
+    _escribir_diccionario(wb, cols)
+    wb.save(ruta)
 
 
 def generar_excel_revision(
@@ -1058,10 +1021,7 @@ def generar_excel_revision(
 
     try:
         # INTENTO 1: Ruta Original
-        with pd.ExcelWriter(ruta_salida, engine="openpyxl") as writer:
-            cols = _escribir_y_estilizar(writer, resultados_por_mision, MISSIONS)
-            _crear_hoja_carga_masiva(writer) 
-            _escribir_diccionario(writer, cols)
+        _guardar_libro(ruta_salida, resultados_por_mision, MISSIONS)
             
         log_ok(f" Excel guardado: {filename}")
         return ruta_salida
@@ -1080,10 +1040,7 @@ def generar_excel_revision(
             
             log_info(f" Intentando guardar en respaldo: {ruta_backup}")
             
-            with pd.ExcelWriter(ruta_backup, engine="openpyxl") as writer:
-                cols = _escribir_y_estilizar(writer, resultados_por_mision, MISSIONS)
-                _crear_hoja_carga_masiva(writer) 
-                _escribir_diccionario(writer, cols)
+            _guardar_libro(ruta_backup, resultados_por_mision, MISSIONS)
                 
             log_ok(f" RESCATADO: Excel guardado en respaldo: {ruta_backup}")
             return ruta_backup
@@ -1091,3 +1048,86 @@ def generar_excel_revision(
         except Exception as e2:
             log_error(f" CRÍTICO: Falló también el respaldo: {e2}")
             return None
+
+
+# =============================================================================
+#                 SNAPSHOT INCREMENTAL ("GUARDAR AHORA")
+# =============================================================================
+
+class SnapshotIncremental:
+    """
+    Snapshot bajo demanda sin copiar ni regenerar el libro completo.
+
+    Cada solicitud encola solo las filas registradas desde la solicitud
+    anterior; un hilo de fondo las agrega a un CSV lateral (UTF-8 con BOM,
+    separador ';' para Excel en español). El loop de pacientes no espera
+    la escritura. El Excel final con estilos se sigue generando al terminar.
+
+    Uso:
+        snap = SnapshotIncremental(nombre_m, ruta_out)
+        snap.solicitar(resultados_por_mision)   # en cada "Guardar Ahora"
+        snap.cerrar()                           # al terminar la misión
+    """
+
+    def __init__(self, nombre: str, carpeta: str):
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        base_nombre = re.sub(r"[^\wáéíóúÁÉÍÓÚñÑ]+", "_", str(nombre).strip())
+        self.ruta = os.path.join(carpeta, f"{base_nombre}_SNAP_{stamp}.csv")
+        self.filas_escritas = 0
+        self._enviadas: Dict[Any, int] = {}
+        self._columnas: Optional[List[str]] = None
+        self._cola: "queue.Queue[Optional[List[Dict[str, Any]]]]" = queue.Queue()
+        self._hilo: Optional[threading.Thread] = None
+
+    def solicitar(self, resultados_por_mision: Dict[Any, List[Dict[str, Any]]]) -> int:
+        """Encola las filas nuevas (solo referencias). Retorna cuántas se encolaron."""
+        nuevas: List[Dict[str, Any]] = []
+        for clave, filas in resultados_por_mision.items():
+            desde = self._enviadas.get(clave, 0)
+            if len(filas) > desde:
+                nuevas.extend(filas[desde:])
+                self._enviadas[clave] = len(filas)
+        if not nuevas:
+            log_info("Snapshot: sin filas nuevas desde el anterior")
+            return 0
+        if self._hilo is None:
+            self._hilo = threading.Thread(target=self._trabajar, name="SnapshotIncremental", daemon=True)
+            self._hilo.start()
+        self._cola.put(nuevas)
+        return len(nuevas)
+
+    def _trabajar(self) -> None:
+        while True:
+            filas = self._cola.get()
+            if filas is None:
+                break
+            try:
+                self._escribir(filas)
+                log_ok(f"Snapshot: +{len(filas)} filas ({self.filas_escritas} total) → {os.path.basename(self.ruta)}")
+            except Exception as e:
+                log_error(f"No se pudo guardar snapshot: {e}")
+
+    def _escribir(self, filas: List[Dict[str, Any]]) -> None:
+        nuevo = self._columnas is None
+        if nuevo:
+            self._columnas = _columnas_mision(filas)
+            os.makedirs(os.path.dirname(self.ruta) or ".", exist_ok=True)
+        with open(self.ruta, "a", encoding="utf-8-sig" if nuevo else "utf-8", newline="") as f:
+            w = csv.writer(f, delimiter=";")
+            if nuevo:
+                w.writerow(self._columnas)
+            for fila in filas:
+                w.writerow(["" if v is None else v for v in
+                            (_valor_excel(fila.get(c))[0] for c in self._columnas)])
+            f.flush()
+        self.filas_escritas += len(filas)
+
+    def cerrar(self, timeout: float = 30.0) -> None:
+        """Espera a que se escriban los snapshots pendientes."""
+        if self._hilo is None:
+            return
+        self._cola.put(None)
+        self._hilo.join(timeout)
+        if self._hilo.is_alive():
+            log_warn("Snapshot: escritura pendiente no terminó a tiempo")
+        self._hilo = None
@@ -18,6 +18,7 @@ class ExecutionControl:
         self._pause_event = threading.Event()
         self._pause_event.set()  # No pausado por defecto
         self._snapshot_event = threading.Event()
+        self._force_refresh = False
         
     def should_stop(self) -> bool:
         """Verifica si se debe detener la ejecución."""
@@ -52,11 +53,20 @@ class ExecutionControl:
         """Limpia la solicitud de snapshot."""
         self._snapshot_event.clear()
     
+    def set_force_refresh(self, activo: bool):
+        """Ignora la caché de pacientes en esta ejecución (vuelve a leer SIGGES)."""
+        self._force_refresh = bool(activo)
+
+    def should_force_refresh(self) -> bool:
+        """Verifica si se pidió refrescar ignorando la caché."""
+        return self._force_refresh
+    
     def reset(self):
         """Resetea el control para una nueva ejecución."""
         self._stop_event.clear()
         self._pause_event.set()
         self._snapshot_event.clear()
+        self._force_refresh = False
     
     def wait_if_paused(self, timeout: float = 0.1):
         """
@@ -0,0 +1,137 @@
+# Pre-vuelo de Nómina - Validación y deduplicación en lote
+# -*- coding: utf-8 -*-
+"""
+Pre-vuelo vectorizado sobre el DataFrame de la nómina, antes del loop del navegador.
+
+- Normaliza todos los RUT (mismas reglas que normalizar_rut) y valida el
+  dígito verificador con módulo 11 en bloque (numpy).
+- Normaliza todas las fechas con solo_fecha (una vez por valor distinto) y
+  descarta las que no son fechas reales (dparse_serie, que además deja cada
+  fecha en el memo de dparse para el análisis).
+- Agrupa RUT duplicados con AdvancedDataProcessor.detect_duplicates. Las filas
+  con mismo RUT y misma fecha se consultan una sola vez y el resultado se
+  replica; con fechas distintas el análisis cambia, así que cada fecha se procesa.
+
+Las filas inválidas van directo al reporte con su motivo.
+"""
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+from src.core.Formatos import dparse_serie, solo_fecha
+from src.features.advanced_functions import AdvancedDataProcessor
+
+# Pesos módulo 11 para el cuerpo del RUT rellenado a 8 dígitos (izquierda → derecha)
+_PESOS_RUT = np.array([3, 2, 7, 6, 5, 4, 3, 2], dtype=np.int64)
+
+
+def normalizar_ruts(col: pd.Series) -> pd.Series:
+    """Versión en bloque de normalizar_rut(str(x).strip())."""
+    s = (col.astype(str).str.strip()
+         .str.replace(".", "", regex=False)
+         .str.replace("-", "", regex=False)
+         .str.strip().str.upper())
+    return s.where(s.str.len() < 2, s.str[:-1] + "-" + s.str[-1:])
+
+
+def ruts_validos(ruts: pd.Series) -> pd.Series:
+    """Formato 1234567-8 / 12345678-K y dígito verificador correcto (vectorizado)."""
+    formato = ruts.str.fullmatch(r"\d{7,8}-[\dK]").fillna(False).astype(bool)
+    ok = pd.Series(False, index=ruts.index)
+    if not formato.any():
+        return ok
+    sub = ruts[formato]
+    cuerpos = sub.str[:-2].str.zfill(8)
+    digitos = np.frombuffer("".join(cuerpos).encode("ascii"), dtype=np.uint8).reshape(-1, 8) - 48
+    resto = 11 - (digitos.astype(np.int64) @ _PESOS_RUT) % 11
+    dv = np.where(resto == 11, "0", np.where(resto == 10, "K", resto.astype(str)))
+    ok[formato] = sub.str[-1:].to_numpy() == dv
+    return ok
+
+
+def normalizar_fechas(col: pd.Series) -> pd.Series:
+    """solo_fecha una vez por valor distinto (las nóminas repiten mucho la fecha)."""
+    unicos = {}
+    for v in col.unique():
+        try:
+            unicos[v] = solo_fecha(v)
+        except Exception:
+            unicos[v] = ""
+    return col.map(unicos).fillna("")
+
+
+class PlanPreVuelo:
+    """
+    Resultado del pre-vuelo, por índice de fila del DataFrame.
+
+    - invalidas: {idx: motivo} → van al reporte sin abrir el navegador
+    - representante: {idx: idx_representante} para duplicados exactos (RUT + fecha)
+    - con_duplicados: representantes cuyo resultado debe guardarse para replicar
+    """
+
+    def __init__(self):
+        self.ruts: Dict[Any, str] = {}
+        self.fechas: Dict[Any, str] = {}
+        self.invalidas: Dict[Any, str] = {}
+        self.representante: Dict[Any, Any] = {}
+        self.con_duplicados: Set[Any] = set()
+        self.ruts_repetidos = 0   # RUT con más de una fila (misma o distinta fecha)
+
+    def debe_procesar(self, idx: Any) -> bool:
+        return idx not in self.invalidas and self.representante.get(idx, idx) == idx
+
+    @property
+    def duplicadas(self) -> int:
+        return sum(1 for i, r in self.representante.items() if i != r)
+
+    def resumen(self, total: int) -> str:
+        a_procesar = total - len(self.invalidas) - self.duplicadas
+        return (f"{a_procesar}/{total} pacientes a consultar · {len(self.invalidas)} inválidos · "
+                f"{self.duplicadas} duplicados replicados · {self.ruts_repetidos} RUT repetidos")
+
+
+def prevuelo_nomina(df: pd.DataFrame, col_rut: int, col_fecha: int,
+                    procesador: Optional[AdvancedDataProcessor] = None) -> PlanPreVuelo:
+    """Valida, normaliza y agrupa toda la nómina en bloque."""
+    plan = PlanPreVuelo()
+    if df is None or df.empty or max(col_rut, col_fecha) >= df.shape[1]:
+        return plan
+
+    ruts = normalizar_ruts(df.iloc[:, col_rut])
+    fechas = normalizar_fechas(df.iloc[:, col_fecha])
+    rut_ok = ruts_validos(ruts)
+    fecha_ok = dparse_serie(fechas).notna()
+
+    plan.ruts = ruts.to_dict()
+    plan.fechas = fechas.to_dict()
+    for idx in ruts.index[~rut_ok]:
+        plan.invalidas[idx] = f"RUT inválido ({ruts[idx] or 'vacío'})"
+    for idx in fechas.index[rut_ok & ~fecha_ok]:
+        plan.invalidas[idx] = f"Fecha inválida ({fechas[idx] or 'vacía'})"
+
+    validas = rut_ok & fecha_ok
+    if validas.sum() < 2:
+        return plan
+    procesador = procesador or AdvancedDataProcessor()
+    _, reporte = procesador.detect_duplicates(pd.DataFrame({"RUT": ruts[validas]}))
+    for grupo in reporte.get("duplicated_groups", []):
+        plan.ruts_repetidos += 1
+        primeros: Dict[str, Any] = {}
+        for idx in sorted(grupo["rows"]):
+            rep = primeros.setdefault(fechas[idx], idx)
+            if rep != idx:
+                plan.representante[idx] = rep
+                plan.con_duplicados.add(rep)
+    return plan
+
+
+def replicar_filas(filas: List[Dict[str, Any]], nombre: str) -> List[Dict[str, Any]]:
+    """Copia las filas del representante para un duplicado (con su propio nombre)."""
+    copias = []
+    for f in filas:
+        c = dict(f)
+        if "Nombre" in c and nombre:
+            c["Nombre"] = nombre
+        copias.append(c)
+    return copias
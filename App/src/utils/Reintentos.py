@@ -19,7 +19,10 @@ Principios de diseño:
 # Standard library
 import functools
 import random
+import threading
 import time
+from collections import deque
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from enum import Enum
 from typing import Any, Callable, Dict, List, Optional, Type
@@ -356,6 +359,134 @@ def retry(
     return decorator
 
 
+# =============================================================================
+# PROGRAMADOR ADAPTATIVO DE REINTENTOS (por paciente)
+# =============================================================================
+
+# Acciones de recuperación, de menor a mayor costo
+ACCION_REENCONTRAR = "reencontrar"   # Solo volver a buscar los elementos
+ACCION_RENAVEGAR = "renavegar"       # Volver a Búsqueda de Paciente
+ACCION_REFRESCAR = "refrescar"       # Refresh completo de la página
+_NIVELES_ACCION = (ACCION_REENCONTRAR, ACCION_RENAVEGAR, ACCION_REFRESCAR)
+
+
+@dataclass
+class PlanReintento:
+    """Decisión para el próximo intento: cuánto esperar y cómo recuperarse."""
+    delay: float
+    accion: str
+    categoria: ErrorCategory
+
+
+class ProgramadorReintentos:
+    """
+    Decide espera y acción de recuperación de cada reintento según el tipo
+    de error y la latencia reciente de SIGGES (ventana móvil de tiempos de
+    respuesta), en vez de una escalera fija de esperas.
+
+    - Elemento obsoleto / no interactuable: re-encontrar, espera de milisegundos.
+    - Timeout / error desconocido: re-navegar, espera proporcional a la latencia p90.
+    - Conexión (HEAL) o circuito abierto (fallos seguidos entre pacientes): refresh.
+    Los reintentos repetidos del mismo paciente escalan la acción.
+
+    Thread-safe: las pestañas paralelas comparten una instancia.
+    """
+
+    LATENCIA_DEFECTO = 1.0   # s, mientras no haya muestras suficientes
+    MIN_MUESTRAS = 5
+
+    def __init__(
+        self,
+        ventana: int = 50,
+        max_delay: float = 30.0,
+        circuit_breaker: Optional[CircuitBreaker] = None
+    ):
+        self.max_delay = max_delay
+        self.circuito = circuit_breaker or CircuitBreaker(
+            failure_threshold=4, recovery_timeout=60.0, success_threshold=1
+        )
+        self._tiempos: deque = deque(maxlen=ventana)
+        self._lock = threading.Lock()
+        self._rapido = ExponentialBackoff(base=0.05, max_delay=1.0, jitter=True)
+
+    def registrar_respuesta(self, segundos: float) -> None:
+        """Agrega un tiempo de respuesta observado de SIGGES (p.ej. espera del spinner)."""
+        if segundos is None or segundos < 0:
+            return
+        with self._lock:
+            self._tiempos.append(float(segundos))
+
+    def latencia(self, percentil: float = 0.9) -> float:
+        """Percentil de la ventana reciente (LATENCIA_DEFECTO si hay pocas muestras)."""
+        with self._lock:
+            muestras = sorted(self._tiempos)
+        if len(muestras) < self.MIN_MUESTRAS:
+            return self.LATENCIA_DEFECTO
+        pos = min(len(muestras) - 1, int(round(percentil * (len(muestras) - 1))))
+        return max(0.1, muestras[pos])
+
+    def registrar_exito(self) -> None:
+        """Paciente resuelto: cierra el circuito."""
+        with self._lock:
+            self.circuito.record_success()
+
+    def registrar_fallo(self) -> None:
+        """Intento fallido: alimenta el circuito compartido."""
+        with self._lock:
+            self.circuito.record_failure()
+
+    def _circuito_abierto(self) -> bool:
+        with self._lock:
+            if self.circuito.state != CircuitState.OPEN:
+                return False
+            try:
+                self.circuito.before_call()   # OPEN → HALF_OPEN si ya expiró
+            except CircuitOpenError:
+                return True
+            return False
+
+    def planificar(self, error: Optional[Exception], reintento: int) -> PlanReintento:
+        """
+        Args:
+            error: Excepción del intento anterior (None si solo falló una verificación)
+            reintento: Número de reintento (1 = primer reintento)
+
+        Returns:
+            PlanReintento con delay (s) y acción de recuperación
+        """
+        reintento = max(1, int(reintento))
+        categoria = ErrorClassifier.classify(error) if error is not None else ErrorCategory.UNKNOWN
+        nombre = type(error).__name__ if error is not None else ""
+        p90 = self.latencia(0.9)
+
+        if error is not None and classify_exception(error) == ErrorAction.HEAL:
+            nivel = 2
+        elif nombre in ErrorClassifier.TIMEOUT_ERRORS:
+            categoria = ErrorCategory.TIMEOUT
+            nivel = 1
+        elif categoria == ErrorCategory.TRANSIENT:
+            nivel = 0
+        else:
+            nivel = 1
+
+        # Reintentos repetidos del mismo paciente escalan la recuperación
+        nivel = max(nivel, min(2, reintento // 2))
+        if self._circuito_abierto():
+            nivel = 2
+
+        if nivel == 0:
+            delay = self._rapido.next_delay(reintento - 1)
+        elif categoria == ErrorCategory.PERMANENT:
+            delay = 0.0
+        else:
+            # Espera proporcional a lo que SIGGES está tardando en responder
+            delay = ExponentialBackoff(
+                base=p90 / 2, max_delay=min(self.max_delay, p90 * 8), jitter=True
+            ).next_delay(reintento - 1)
+
+        return PlanReintento(delay=round(delay, 3), accion=_NIVELES_ACCION[nivel], categoria=categoria)
+
+
 # =============================================================================
 # INSTANCIAS GLOBALES
 # =============================================================================
@@ -369,3 +500,6 @@ selenium_circuit = CircuitBreaker(
 
 # Backoff predeterminado
 default_backoff = ExponentialBackoff(base=0.5, max_delay=30.0, jitter=True)
+
+# Programador de reintentos por paciente (compartido entre pestañas)
+programador_reintentos = ProgramadorReintentos()
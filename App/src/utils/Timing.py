@@ -7,6 +7,7 @@ Context manager para timing automático, seguro y detallado.
 NO modifica el flujo del código principal.
 """
 
+import threading
 import time
 from typing import Optional, Any
 import os
@@ -20,6 +21,9 @@ class Dummy:
 Fore = Dummy()
 Style = Dummy()
 
+# Pila de contextos activos por hilo (las pestañas paralelas no se mezclan)
+_activos = threading.local()
+
 
 class TimingContext:
     """
@@ -39,6 +43,9 @@ class TimingContext:
     # Timing global acumulativo
     _global_start: Optional[float] = None
     _step_count: int = 0
+    # Latencia de spinner acumulada (reportada por las esperas JS)
+    _spinner_total_ms: float = 0.0
+    _spinner_count: int = 0
     
     def __init__(self, step_name: str, rut: str = "", extra_info: str = ""):
         """
@@ -52,6 +59,7 @@ class TimingContext:
         self.extra_info = extra_info
         self.enabled = should_show_timing()
         self.start_time: Optional[float] = None
+        self.spinner_ms: float = 0.0
         
         # Inicializar global timer si es el primer paso
         if TimingContext._global_start is None:
@@ -60,6 +68,10 @@ class TimingContext:
     
     def __enter__(self):
         """Inicia el timing al entrar al bloque"""
+        pila = getattr(_activos, "pila", None)
+        if pila is None:
+            pila = _activos.pila = []
+        pila.append(self)
         if self.enabled:
             self.start_time = time.time()
             TimingContext._step_count += 1
@@ -74,6 +86,9 @@ class TimingContext:
         Finaliza el timing al salir del bloque.
         Se ejecuta SIEMPRE, incluso si hay excepciones.
         """
+        pila = getattr(_activos, "pila", None)
+        if pila and pila[-1] is self:
+            pila.pop()
         if self.enabled and self.start_time is not None:
             elapsed_ms = (time.time() - self.start_time) * 1000
             accumulated_ms = (time.time() - TimingContext._global_start) * 1000
@@ -93,6 +108,8 @@ class TimingContext:
             # Construir mensaje
             prefix = f"[{self.rut}]" if self.rut else ""
             extra = f" | {self.extra_info}" if self.extra_info else ""
+            if self.spinner_ms:
+                extra += f" | Spinner: {self.spinner_ms:.0f}ms"
             
             print(f"[OK] {prefix} {self.step_name} -> {time_str}{extra} | Acum: {accum_str}\n")
         
@@ -104,6 +121,20 @@ class TimingContext:
         """Reinicia el timer global (usar al inicio de cada paciente)"""
         TimingContext._global_start = time.time()
         TimingContext._step_count = 0
+        TimingContext._spinner_total_ms = 0.0
+        TimingContext._spinner_count = 0
+    
+    @staticmethod
+    def registrar_spinner(ms: float) -> None:
+        """
+        Suma latencia de spinner al paso activo (del hilo actual) y al total global.
+        La llaman las esperas de spinner; no hace nada costoso si el timing está apagado.
+        """
+        TimingContext._spinner_total_ms += ms
+        TimingContext._spinner_count += 1
+        pila = getattr(_activos, "pila", None)
+        if pila:
+            pila[-1].spinner_ms += ms
     
     @staticmethod
     def get_elapsed_global() -> float:
@@ -135,6 +166,8 @@ class TimingContext:
             
             print("\n" + "=" * 70)
             print(f"{prefix} TOTAL: {time_str} ({TimingContext._step_count} pasos)")
+            if TimingContext._spinner_count:
+                print(f"{prefix} SPINNER: {TimingContext._spinner_total_ms:.0f}ms en {TimingContext._spinner_count} esperas")
             print("=" * 70 + "\n")
 
 
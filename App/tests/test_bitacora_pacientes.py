@@ -0,0 +1,60 @@
+# tests/test_bitacora_pacientes.py
+# -*- coding: utf-8 -*-
+"""
+Tests de la bitácora de pacientes (reanudación tras caídas).
+"""
+import os
+import tempfile
+import unittest
+
+from src.utils.BitacoraPacientes import BitacoraPacientes
+
+
+class TestBitacoraPacientes(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.entrada = os.path.join(self.tmp, "nomina.xlsx")
+        with open(self.entrada, "wb") as f:
+            f.write(b"contenido-nomina")
+        self.mision = {"nombre": "VIH Examenes", "keywords": ["vih"]}
+
+    def _bitacora(self, mision=None):
+        return BitacoraPacientes(mision or self.mision, self.entrada, directorio=self.tmp)
+
+    def test_reanuda_filas_registradas(self):
+        """Una corrida nueva ve las filas ya registradas, aunque la última línea esté truncada."""
+        bit = self._bitacora()
+        bit.registrar(0, [{"Rut": "1-9", "_cols_order": ["Rut"]}], True)
+        bit.registrar(1, [{"Rut": "2-7"}], False)
+        bit.cerrar()
+        with open(bit.ruta, "a", encoding="utf-8") as f:
+            f.write('{"mision": "VIH Exa')  # Caída a mitad de escritura
+
+        hechos = self._bitacora().cargar()
+        self.assertEqual(sorted(hechos), [0, 1])
+        self.assertEqual(hechos[0], ([{"Rut": "1-9", "_cols_order": ["Rut"]}], True))
+        self.assertFalse(hechos[1][1])
+
+    def test_otra_config_o_archivo_no_reanuda(self):
+        """Cambiar la configuración de la misión o el archivo invalida la bitácora."""
+        bit = self._bitacora()
+        bit.registrar(0, [{"Rut": "1-9"}], True)
+        bit.cerrar()
+
+        self.assertEqual(self._bitacora({"nombre": "VIH Examenes", "keywords": ["otra"]}).cargar(), {})
+        with open(self.entrada, "wb") as f:
+            f.write(b"otra-nomina")
+        self.assertEqual(self._bitacora().cargar(), {})
+
+    def test_completada_se_archiva(self):
+        """Al completar la misión, la próxima corrida empieza de cero."""
+        bit = self._bitacora()
+        bit.registrar(0, [{"Rut": "1-9"}], True)
+        bit.cerrar(completada=True)
+        self.assertFalse(os.path.exists(bit.ruta))
+        self.assertEqual(self._bitacora().cargar(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
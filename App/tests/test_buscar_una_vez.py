@@ -0,0 +1,58 @@
+# tests/test_buscar_una_vez.py
+# -*- coding: utf-8 -*-
+"""
+Tests de la primitiva de búsqueda: un solo envío y señal de resultado.
+"""
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.core.Driver import SiggesDriver
+from src.core.waits import JS_BUSCAR_UNA_VEZ, SENAL_SIN_RESULTADOS, SENAL_TIMEOUT
+
+
+class TestBuscarUnaVez(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_driver = MagicMock()
+        self.mock_driver._nz_script_timeout = 0
+        self.sigges = SiggesDriver(self.mock_driver)
+        self.sigges.esperar_spinner = MagicMock()
+        self.boton = MagicMock(name="btn_buscar")
+        self.input = MagicMock(name="input_rut")
+
+    def _find(self, boton, input_rut):
+        return lambda locators, *a, **k: boton if "button" in locators[0] else input_rut
+
+    def test_un_solo_envio_y_reporta_senal(self):
+        self.mock_driver.execute_async_script.return_value = {"senal": SENAL_SIN_RESULTADOS, "xhr": 1}
+        with patch.object(SiggesDriver, "_find", side_effect=self._find(self.boton, self.input)):
+            self.assertTrue(self.sigges.click_buscar())
+        self.assertEqual(self.sigges.ultima_senal_busqueda, SENAL_SIN_RESULTADOS)
+        self.mock_driver.execute_async_script.assert_called_once()
+        args = self.mock_driver.execute_async_script.call_args[0]
+        self.assertEqual(args[:3], (JS_BUSCAR_UNA_VEZ, self.boton, None))
+        self.input.send_keys.assert_not_called()
+        self.boton.click.assert_not_called()
+
+    def test_sin_boton_envia_enter_en_el_input(self):
+        self.mock_driver.execute_async_script.return_value = {"senal": "tabla"}
+        with patch.object(SiggesDriver, "_find", side_effect=self._find(None, self.input)):
+            self.assertEqual(self.sigges.buscar(), "tabla")
+        self.assertIs(self.mock_driver.execute_async_script.call_args[0][2], self.input)
+
+    def test_sin_boton_ni_input(self):
+        with patch.object(SiggesDriver, "_find", return_value=None):
+            self.assertFalse(self.sigges.click_buscar())
+        self.mock_driver.execute_async_script.assert_not_called()
+
+    def test_falla_primitiva_no_reenvia(self):
+        self.mock_driver.execute_async_script.side_effect = Exception("script timeout")
+        with patch.object(SiggesDriver, "_find", side_effect=self._find(self.boton, self.input)):
+            self.assertEqual(self.sigges.buscar(), SENAL_TIMEOUT)
+        self.assertEqual(self.mock_driver.execute_async_script.call_count, 1)
+        self.boton.click.assert_not_called()
+        self.input.send_keys.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+# tests/test_cache_pacientes.py
+# -*- coding: utf-8 -*-
+"""
+Tests de la caché de pacientes (captura, replay sin navegador, TTL y LRU).
+"""
+import tempfile
+import time
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from src.utils.CachePacientes import (
+    CachePacientes, CapturaIncompleta, CapturaPaciente, SiggesGrabador, SiggesReplay
+)
+
+
+def _captura(rut="12345678-5"):
+    c = CapturaPaciente(rut)
+    c.mini = [{"caso": "Diabetes", "estado": "Activo"}]
+    c.edad = 54
+    c.fallecido = None
+    c.casos = [{"caso": "Diabetes", "indice": 0, "fecha_dt": datetime(2023, 5, 10)}]
+    c.detalle[0] = {
+        "texto": "Caso en seguimiento",
+        "ipd": (["01-01-2024", "01-01-2023"], ["Sí", "No"], ["D1", "D2"]),
+        "oa": ([], [], [], [], []), "aps": ([], []), "sic": ([], []),
+        "prestaciones": [{"fecha": "02-01-2024", "codigo": "0101001"}],
+    }
+    return c
+
+
+class TestCachePacientes(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def test_ida_y_vuelta_con_fechas(self):
+        cache = CachePacientes(self.dir)
+        cache.guardar(_captura())
+        self.assertFalse(_captura().desde_cache)
+        c = CachePacientes(self.dir).obtener("12345678-5")   # índice reconstruido desde disco
+        self.assertTrue(c.desde_cache)
+        self.assertEqual(c.casos[0]["fecha_dt"], datetime(2023, 5, 10))
+        self.assertEqual(c.detalle[0]["ipd"][0], ["01-01-2024", "01-01-2023"])
+        self.assertEqual(c.edad, 54)
+
+    def test_ttl_y_lru(self):
+        cache = CachePacientes(self.dir, ttl_horas=1, max_pacientes=2)
+        vieja = _captura("1-9")
+        vieja.ts = time.time() - 7200
+        cache.guardar(vieja)
+        self.assertIsNone(cache.obtener("1-9"))
+        for rut in ("2-7", "3-5"):
+            cache.guardar(_captura(rut))
+        cache.obtener("2-7")                    # 3-5 pasa a ser el menos usado
+        cache.guardar(_captura("4-3"))
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.obtener("3-5"))
+        self.assertIsNotNone(cache.obtener("2-7"))
+
+    def test_replay_recorta_y_exige_captura(self):
+        sg = SiggesReplay(_captura())
+        root = sg.expandir_caso(0)
+        self.assertEqual(root.text, "Caso en seguimiento")
+        self.assertEqual(sg.leer_ipd_desde_caso(root, 1), (["01-01-2024"], ["Sí"], ["D1"]))
+        self.assertEqual(len(sg.leer_snapshot_caso(root)["prestaciones"]), 1)
+        with self.assertRaises(CapturaIncompleta):
+            sg.expandir_caso(3)
+        with self.assertRaises(CapturaIncompleta):
+            sg.leer_edad()
+
+    def test_grabador_lee_caso_completo_una_vez(self):
+        vivo = MagicMock()
+        root = MagicMock(text="texto caso")
+        vivo.expandir_caso.return_value = root
+        vivo.leer_snapshot_caso.return_value = {
+            "ipd": (["a", "b", "c"], ["x", "y", "z"], ["1", "2", "3"]), "oa": None,
+            "aps": (["f"], ["e"]), "sic": ([], []), "prestaciones": [],
+        }
+        vivo.leer_oa_desde_caso.return_value = (["o"], ["d"], ["g"], ["c"], ["f"])
+        captura = CapturaPaciente("1-9")
+        sg = SiggesGrabador(vivo, captura)
+
+        r = sg.expandir_caso(0)
+        self.assertIs(r, root)
+        vivo.leer_oa_desde_caso.assert_called_once_with(root, 0)   # sección faltante: completa
+        self.assertEqual(sg.leer_ipd_desde_caso(r, 2), (["a", "b"], ["x", "y"], ["1", "2"]))
+        sg.expandir_caso(0)
+        self.assertEqual(vivo.leer_snapshot_caso.call_count, 1)
+        self.assertEqual(captura.detalle[0]["texto"], "texto caso")
+
+
+if __name__ == "__main__":
+    unittest.main()
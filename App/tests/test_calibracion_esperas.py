@@ -0,0 +1,89 @@
+# tests/test_calibracion_esperas.py
+# -*- coding: utf-8 -*-
+"""
+Tests de la calibración del perfil de esperas (percentiles -> wait/sleep).
+"""
+import copy
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from src.utils import Esperas
+
+
+class TestCalibracionEsperas(unittest.TestCase):
+
+    def setUp(self):
+        self.ruta = Path(tempfile.mkdtemp()) / "esperas_calibradas.json"
+        self._esperas = copy.deepcopy(Esperas.ESPERAS)
+
+    def tearDown(self):
+        Esperas.ESPERAS.clear()
+        Esperas.ESPERAS.update(self._esperas)
+
+    @patch.dict(os.environ, {"NOZHGESS_CALIBRAR_ESPERAS": "1"})
+    def test_perfil_desde_p95_sin_asentamiento_conserva_sleep(self):
+        """wait = p95 * factor + margen (acotado al base); sin asentamiento medido el sleep no se toca."""
+        for i in range(40):
+            Esperas.registrar_condicion("search_wait_results", 0.8 + (i % 5) * 0.1)
+        reporte = Esperas.guardar_calibracion(self.ruta)
+
+        self.assertEqual(Esperas.cargar_perfil_calibrado(self.ruta), 1)
+        self.assertAlmostEqual(Esperas.get_wait_timeout("search_wait_results"), 1.2 * 1.5 + 0.5)
+        self.assertEqual(Esperas.ESPERAS["search_wait_results"]["sleep"],
+                         Esperas.ESPERAS_BASE["search_wait_results"]["sleep"])
+        self.assertEqual(reporte["sleep_eliminado_s"], 0.0)
+        self.assertEqual(Esperas.ESPERAS_BASE["search_wait_results"]["wait"], 8.0)
+
+    @patch.dict(os.environ, {"NOZHGESS_CALIBRAR_ESPERAS": "1"})
+    def test_sleep_desde_asentamiento_medido(self):
+        """sleep = p95 del asentamiento * factor + margen; el ahorro se reporta por uso."""
+        for i in range(40):
+            Esperas.registrar_condicion("search_wait_results", 0.8)
+            Esperas.registrar_asentamiento("search_wait_results", 0.1 + (i % 5) * 0.05)
+        reporte = Esperas.guardar_calibracion(self.ruta)
+
+        Esperas.cargar_perfil_calibrado(self.ruta)
+        sleep_cal = round(0.3 * 1.5 + Esperas.MARGEN_SLEEP, 2)
+        self.assertEqual(Esperas.ESPERAS["search_wait_results"]["sleep"], sleep_cal)
+        self.assertAlmostEqual(reporte["sleep_eliminado_s"], 40 * (1.0 - sleep_cal), places=1)
+
+    @patch.dict(os.environ, {"NOZHGESS_CALIBRAR_ESPERAS": "1"})
+    def test_spinner_que_no_aparece_no_se_registra(self):
+        """"none"/"quiet" no son eventos: no entran a los percentiles."""
+        from src.core.waits import registrar_spinner
+        for _ in range(30):
+            registrar_spinner("spinner", {"status": "none", "total_ms": 0.0})
+            registrar_spinner("spinner", {"status": "quiet", "total_ms": 250.0})
+        self.assertIsNone(Esperas.guardar_calibracion(self.ruta))
+
+        registrar_spinner("spinner", {"status": "gone", "total_ms": 400.0, "settle_ms": 120.0})
+        Esperas.guardar_calibracion(self.ruta)
+        clave = Esperas._leer_perfil_guardado(self.ruta)["claves"]["spinner"]
+        self.assertEqual(clave["muestras"], [0.4])
+        self.assertEqual(clave["asentamiento"]["muestras"], [0.12])
+
+    @patch.dict(os.environ, {"NOZHGESS_CALIBRAR_ESPERAS": "1"})
+    def test_timeouts_o_pocas_muestras_no_acortan(self):
+        for _ in range(30):
+            Esperas.registrar_condicion("mini_find_table", 0.2)
+        for _ in range(5):
+            Esperas.registrar_condicion("mini_find_table", 10.0, ok=False)
+        for _ in range(3):
+            Esperas.registrar_condicion("case_wait_expand", 0.1)
+        Esperas.guardar_calibracion(self.ruta)
+
+        self.assertEqual(Esperas.cargar_perfil_calibrado(self.ruta), 0)
+        self.assertEqual(Esperas.get_wait_timeout("mini_find_table"), 10.0)
+
+    def test_sin_calibracion_no_registra(self):
+        with patch.dict(os.environ, {"NOZHGESS_CALIBRAR_ESPERAS": "0"}):
+            Esperas.registrar_condicion("search_wait_results", 0.5)
+            self.assertIsNone(Esperas.guardar_calibracion(self.ruta))
+        self.assertFalse(self.ruta.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
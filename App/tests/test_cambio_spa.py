@@ -0,0 +1,88 @@
+# tests/test_cambio_spa.py
+# -*- coding: utf-8 -*-
+"""
+Tests del cambio de paciente sin recarga (router de la SPA + huella del DOM).
+"""
+import unittest
+from unittest.mock import MagicMock
+
+from src.core.Driver import SiggesDriver
+from src.core.cambio_spa import JS_HUELLA_SPA, JS_IR_RUTA, ruta_hash
+from src.utils.Direcciones import XPATHS
+
+
+def _huella(ruta, input=True, resultados="", app=True):
+    return {"app": app, "ruta": ruta, "input": input, "resultados": resultados}
+
+
+class TestCambioSPA(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_driver = MagicMock()
+        self.sigges = SiggesDriver(self.mock_driver)
+        self.huellas = []
+        self.rutas = []
+
+        def js(script, *args):
+            if script == JS_IR_RUTA:
+                self.rutas.append(args[0])
+                return args[0]
+            if script == JS_HUELLA_SPA:
+                return self.huellas.pop(0) if len(self.huellas) > 1 else self.huellas[0]
+            return None
+        self.mock_driver.execute_script.side_effect = js
+
+    def test_desde_cartola_usa_router_sin_recargar(self):
+        self.sigges._casos_cartola = MagicMock()
+        self.huellas = [_huella("#/cartola-unificada-de-paciente", input=False, resultados="x"),
+                        _huella("#/cartola-unificada-de-paciente", input=False),
+                        _huella("#/busqueda-de-paciente")]
+        h = self.sigges.ir_a_busqueda_spa(timeout=2)
+        self.assertIsNotNone(h)
+        self.assertEqual(self.rutas, ["#/busqueda-de-paciente"])
+        self.mock_driver.get.assert_not_called()
+        self.assertIsNone(self.sigges._casos_cartola)
+
+    def test_ya_en_busqueda_no_navega(self):
+        self.huellas = [_huella("#/34", resultados="Diabetes Mellitus Tipo 2")]
+        h = self.sigges.ir_a_busqueda_spa()
+        self.assertEqual(h.resultados, "Diabetes Mellitus Tipo 2")
+        self.assertEqual(self.rutas, [])
+
+    def test_fuera_de_la_app_o_sin_confirmar_usa_navegacion_completa(self):
+        self.huellas = [_huella("#/login", input=False, app=False)]
+        self.assertIsNone(self.sigges.ir_a_busqueda_spa())
+        self.huellas = [_huella("#/cartola-unificada-de-paciente", input=False)]
+        self.assertIsNone(self.sigges.ir_a_busqueda_spa(timeout=0.3))
+
+    def test_resultados_renovados(self):
+        self.assertTrue(self.sigges.resultados_renovados(""))
+        self.huellas = [_huella("#/34", resultados="Asma")]
+        self.assertFalse(self.sigges.resultados_renovados("Asma", timeout=0.3))
+        self.huellas = [_huella("#/34", resultados="Asma"), _huella("#/34", resultados="")]
+        self.assertTrue(self.sigges.resultados_renovados("Asma", timeout=1))
+
+    def test_mismo_rut_consecutivo_no_espera_cambio(self):
+        """Dos filas seguidas del mismo RUT dejan la misma mini-tabla: no es un fallo."""
+        self.huellas = [_huella("#/34", resultados="Asma")]
+        self.sigges.marcar_resultados("12.345.678-5")
+        self.assertTrue(self.sigges.resultados_renovados("Asma", "12345678-5", timeout=0.3))
+        self.assertFalse(self.sigges.resultados_renovados("Asma", "11111111-1", timeout=0.3))
+
+    def test_huella_usa_locators_de_xpaths(self):
+        """Menú e input RUT salen de XPATHS (solo sus XPath), igual que la mini-tabla."""
+        self.huellas = [_huella("#/34")]
+        self.sigges.huella_spa()
+        args = self.mock_driver.execute_script.call_args[0]
+        self.assertIs(args[0], JS_HUELLA_SPA)
+        self.assertEqual(args[1], XPATHS["MINI_TABLA_TBODY"][:2])
+        self.assertEqual(args[2], XPATHS["MENU_CONTENEDOR"])
+        self.assertEqual(args[3], [xp for xp in XPATHS["INPUT_RUT"] if xp != "#rutInput"])
+
+    def test_ruta_hash(self):
+        self.assertEqual(ruta_hash("https://www.sigges.cl/#/34"), "#/34")
+        self.assertEqual(ruta_hash("https://www.sigges.cl"), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+# tests/test_captura_red.py
+# -*- coding: utf-8 -*-
+"""
+Tests de la captura de red CDP (respuestas JSON -> mismas formas que el DOM).
+"""
+import json
+import unittest
+from unittest.mock import MagicMock
+
+from src.core.captura_red import CapturaRed, extraer_casos, extraer_prestaciones
+from src.core.cartola_casos import JS_MARCAR_CHECKBOXES
+from src.core.Driver import SiggesDriver
+from src.core.Mini_Tabla import leer_mini_tabla
+
+
+def _evento(metodo, **params):
+    return {"message": json.dumps({"message": {"method": metodo, "params": params}})}
+
+
+RESPUESTA = {
+    "data": {
+        "casos": [
+            {"problemaSalud": "Diabetes Mellitus Tipo 2", "estadoCaso": "Caso en Tratamiento",
+             "fechaApertura": "2023-05-10T00:00:00", "motivo": ""},
+            {"problemaSalud": "Hipertensión Arterial", "estadoCaso": "Caso Cerrado",
+             "fechaApertura": "01-02-2020", "fechaCierre": "2021-03-04"},
+        ]
+    }
+}
+
+DETALLE = {
+    "ordenesAtencion": [{"folio": "77", "codigo": "0101001", "fecha": "2024-01-02"}],
+    "prestacionesOtorgadas": [
+        {"folioReferencia": "OA 77", "fechaAtencion": "2024-01-15T10:00:00", "codigoPrestacion": "0101001",
+         "glosaPrestacion": "Consulta médica", "establecimiento": "CESFAM Norte",
+         "especialidadDestino": {"codigo": 7, "descripcion": "Medicina interna"}},
+    ],
+}
+
+
+class TestCapturaRed(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_driver = MagicMock()
+        self.mock_driver.get_log.return_value = [
+            _evento("Network.responseReceived", requestId="7",
+                    response={"url": "https://sigges/api/cartola", "mimeType": "application/json"}),
+            _evento("Network.loadingFinished", requestId="7"),
+        ]
+        self.mock_driver.execute_cdp_cmd.side_effect = lambda cmd, args: (
+            {"body": json.dumps(RESPUESTA), "base64Encoded": False} if cmd == "Network.getResponseBody" else {}
+        )
+
+    def test_extraer_casos_requiere_nombre_y_estado(self):
+        """Listas sin forma de caso no se aceptan (=> fallback DOM)."""
+        self.assertIsNone(extraer_casos({"items": [{"id": 1}, {"id": 2}]}))
+        casos = extraer_casos(RESPUESTA)
+        self.assertEqual(casos[0]["caso"], "Diabetes Mellitus Tipo 2")
+        self.assertEqual(casos[0]["fecha_inicio"], "10/05/2023")
+
+    def test_cartola_desde_red_misma_forma_que_dom(self):
+        sigges = SiggesDriver(self.mock_driver)
+        sigges.captura = CapturaRed(self.mock_driver)
+        self.mock_driver.execute_script.return_value = 2  # filas en el DOM
+
+        casos = sigges.extraer_tabla_provisoria_completa()
+        self.assertEqual([c["indice"] for c in casos], [0, 1])
+        self.assertEqual(casos[0]["apertura"], "10/05/2023")
+        self.assertEqual(casos[1]["cierre"], "SI")
+        for clave in ("caso", "estado", "apertura", "fecha_apertura", "cierre", "fecha_dt", "raw_texto"):
+            self.assertIn(clave, casos[0])
+
+    def test_cartola_conteo_distinto_usa_dom(self):
+        """Si la API y el DOM no coinciden en filas, no se usan los índices de la API."""
+        sigges = SiggesDriver(self.mock_driver)
+        sigges.captura = CapturaRed(self.mock_driver)
+        self.mock_driver.execute_script.return_value = 3
+        self.assertIsNone(sigges._casos_cartola_desde_red())
+
+    def test_mini_tabla_desde_red(self):
+        sigges = SiggesDriver(self.mock_driver)
+        sigges.captura = CapturaRed(self.mock_driver)
+        casos = leer_mini_tabla(sigges)
+        self.assertEqual(casos[1]["problema"], "Hipertensión Arterial")
+        self.assertEqual(casos[1]["fecha_inicio"], "01-02-2020")
+        self.assertEqual(casos[1]["fecha_cierre"], "04-03-2021")
+
+    def test_extraer_prestaciones_por_nombre_de_campo(self):
+        """La lista de OA (código sin 'prestación') no se toma por prestaciones."""
+        self.assertIsNone(extraer_prestaciones({"oa": DETALLE["ordenesAtencion"]}))
+        self.assertEqual(extraer_prestaciones(DETALLE), [{
+            "referencia": "OA 77", "fecha": "15/01/2024", "codigo": "0101001", "glosa": "Consulta médica",
+            "establecimiento": "CESFAM Norte", "especialidad": "Medicina interna",
+        }])
+
+    def _sigges_con_detalle(self, n_casos):
+        self.mock_driver.execute_cdp_cmd.side_effect = lambda cmd, args: (
+            {"body": json.dumps(DETALLE), "base64Encoded": False} if cmd == "Network.getResponseBody" else {}
+        )
+        sigges = SiggesDriver(self.mock_driver)
+        sigges.captura = CapturaRed(self.mock_driver)
+        sigges._wait_smart = MagicMock()
+        filas = [MagicMock(name=f"fila{i}") for i in range(n_casos)]
+        sigges._fila_caso = lambda i, refrescar=False: (filas[i], MagicMock())
+        snap_dom = {"ipd": None, "oa": None, "aps": None, "sic": None,
+                    "prestaciones": {"headers": [], "rows": [["DOM", "01/01/2020"]]}}
+        self.mock_driver.execute_script.side_effect = lambda script, *a: (
+            n_casos if script == JS_MARCAR_CHECKBOXES else snap_dom if "prestaciones()" in script else True
+        )
+        return sigges, filas
+
+    def test_prestaciones_del_caso_desde_red(self):
+        sigges, filas = self._sigges_con_detalle(1)
+        sigges.expandir_casos([0])
+        snap = sigges.leer_snapshot_caso(filas[0])
+        self.assertEqual(snap["prestaciones"][0]["codigo"], "0101001")
+        self.assertEqual(snap["prestaciones"][0]["especialidad"], "Medicina interna")
+
+    def test_lote_de_varios_casos_usa_dom(self):
+        """Con varios casos abiertos a la vez no se sabe de cuál es cada respuesta."""
+        sigges, filas = self._sigges_con_detalle(2)
+        sigges.expandir_casos([0, 1])
+        self.assertEqual(sigges.leer_snapshot_caso(filas[0])["prestaciones"][0]["referencia"], "DOM")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+# tests/test_cartola_casos.py
+# -*- coding: utf-8 -*-
+"""
+Tests de la lectura en bloque de casos de la cartola (una llamada JS + handles).
+"""
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.core.Driver import SiggesDriver
+from src.core.cartola_casos import JS_MARCAR_CHECKBOXES, SesionCasos
+
+
+class TestCasosCartola(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_driver = MagicMock()
+        self.sigges = SiggesDriver(self.mock_driver)
+        self.sigges.esperar_spinner = MagicMock()
+        self.filas = [MagicMock(name="fila0"), MagicMock(name="fila1")]
+        self.checks = [MagicMock(name="chk0"), MagicMock(name="chk1")]
+        for chk in self.checks:
+            chk.is_selected.return_value = False
+        self.mock_driver.execute_script.return_value = {
+            "filas": self.filas,
+            "checks": self.checks,
+            "casos": [
+                {"indice": 0, "texto": "Diabetes Mellitus Tipo 2 {decreto 140}, 10/05/2023 12:00:00, Caso en Tratamiento", "marcado": False},
+                {"indice": 1, "texto": "", "marcado": False},
+            ],
+        }
+
+    def test_una_llamada_para_todos_los_casos(self):
+        casos = self.sigges.extraer_tabla_provisoria_completa()
+        self.assertEqual(self.mock_driver.execute_script.call_count, 1)
+        self.assertEqual(len(casos), 1)
+        self.assertEqual(casos[0]["caso"], "Diabetes Mellitus Tipo 2")
+        self.assertEqual(casos[0]["apertura"], "10/05/2023")
+        self.assertEqual(casos[0]["indice"], 0)
+
+    @patch.object(SiggesDriver, "find")
+    def test_expandir_usa_handles_guardados(self, find):
+        self.sigges.extraer_tabla_provisoria_completa()
+        self.mock_driver.execute_script.reset_mock()
+        self.assertIs(self.sigges.expandir_caso(1), self.filas[1])
+        self.checks[1].click.assert_called_once()
+        find.assert_not_called()
+        self.mock_driver.execute_script.assert_not_called()
+
+    def test_handle_obsoleto_relee_una_vez(self):
+        self.sigges.extraer_tabla_provisoria_completa()
+        self.checks[0].click.side_effect = Exception("stale element reference")
+        nuevo = MagicMock(name="chk0_nuevo")
+        nuevo.is_selected.return_value = False
+        self.mock_driver.execute_script.side_effect = [Exception("stale"), {
+            "filas": self.filas, "checks": [nuevo, self.checks[1]], "casos": []
+        }]
+        self.assertIs(self.sigges.expandir_caso(0), self.filas[0])
+        nuevo.click.assert_called_once()
+
+    def test_cambio_de_paciente_descarta_handles(self):
+        self.sigges.extraer_tabla_provisoria_completa()
+        self.sigges.sesion_cerrada = MagicMock(return_value=False)
+        self.mock_driver.current_url = "https://sigges/busqueda-de-paciente"
+        with patch.object(SiggesDriver, "find", return_value=MagicMock()):
+            self.sigges.asegurar_en_busqueda()
+        self.assertIsNone(self.sigges._casos_cartola)
+
+
+class TestSesionCasos(unittest.TestCase):
+
+    def setUp(self):
+        self.sigges = SiggesDriver(MagicMock())
+        self.sigges._wait_smart = MagicMock()
+        self.filas = [MagicMock(name=f"fila{i}") for i in range(3)]
+        self.checks = [MagicMock(name=f"chk{i}") for i in range(3)]
+        self.sigges._fila_caso = lambda i, refrescar=False: (self.filas[i], self.checks[i])
+        self.js = self.sigges.driver.execute_script
+        self.js.side_effect = lambda script, *a: 2 if script == JS_MARCAR_CHECKBOXES else True
+
+    def test_lote_una_espera_y_colapso_al_salir(self):
+        sesion = SesionCasos(self.sigges)
+        abiertos = sesion.expandir_lote([2, 0, 2])
+        self.assertEqual(abiertos, {2: self.filas[2], 0: self.filas[0]})
+        self.assertEqual(self.sigges._wait_smart.call_count, 1)
+        self.js.assert_any_call(JS_MARCAR_CHECKBOXES, [self.checks[2], self.checks[0]], True)
+
+        # Misiones siguientes: mismo caso abierto, sin clics ni colapso intermedio
+        self.js.reset_mock()
+        self.assertIs(sesion.expandir_caso(2), self.filas[2])
+        sesion.cerrar_caso_por_indice(2)
+        self.js.assert_not_called()
+
+        sesion.cerrar_todo()
+        self.js.assert_called_once_with(JS_MARCAR_CHECKBOXES, [self.checks[2], self.checks[0]], False)
+
+    def test_varios_abiertos_sin_seccion_no_lee_otro_caso(self):
+        # fila1 tiene IPD; fila0 no. La página entera (driver) sí vería el IPD de fila1.
+        td = lambda t: MagicMock(text=t)
+        tr = MagicMock()
+        tr.find_elements.return_value = [td(x) for x in ("1", "", "05/03/2025", "", "", "", "Confirma", "Dg caso 1")]
+        tbody = MagicMock()
+        tbody.find_elements.return_value = [tr]
+        label = MagicMock(text="Informes de proceso de diagnóstico (IPD) (1)")
+        label.find_elements.return_value = [tbody]
+        self.filas[0].find_elements.return_value = []
+        self.filas[1].find_elements.side_effect = lambda by, xp: [label] if "label/p" in xp else []
+        self.sigges.driver.find_elements.return_value = [label]
+
+        sesion = SesionCasos(self.sigges)
+        sesion.expandir_lote([0, 1])
+        self.assertTrue(self.sigges.lectura_acotada)
+        self.assertEqual(sesion.leer_ipd_desde_caso(self.filas[0]), ([], [], []))
+        self.assertIsNone(sesion._prestaciones_tbody(self.filas[0]))
+        self.sigges.driver.find_elements.assert_not_called()
+        self.assertEqual(sesion.leer_ipd_desde_caso(self.filas[1])[2], ["Dg caso 1"])
+
+        # El snapshot JS recibe la marca para no buscar fuera de root
+        self.js.side_effect = None
+        self.js.return_value = {"ipd": None, "oa": None, "aps": None, "sic": None, "prestaciones": None}
+        sesion.leer_snapshot_caso(self.filas[0])
+        self.js.assert_called_with(SiggesDriver._JS_SNAPSHOT_CASO, self.filas[0], True)
+
+        sesion.cerrar_todo()
+        self.assertFalse(self.sigges.lectura_acotada)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+# tests/test_dparse.py
+# -*- coding: utf-8 -*-
+"""
+Tests del servicio de fechas (dparse memorizado, en bloque y por registro).
+"""
+import unittest
+from datetime import date, datetime
+
+import pandas as pd
+
+from src.core import Formatos
+from src.core.Formatos import dparse, dparse_registro, dparse_serie
+
+
+def _dparse_strptime(s):
+    """Referencia: el parseo anterior, solo con strptime."""
+    s = str(s).strip().split(" ")[0].replace("/", "-")
+    for fmt in ("%d-%m-%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(s, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+class TestDparse(unittest.TestCase):
+
+    VALORES = ["01-02-2024", "1/2/2024", "2024-02-01", "2024/2/1 10:30", "31-02-2024",
+               "05-13-2024", "001-02-2024", "abc", "12-2024-05", "07-08-2023 00:00:00"]
+
+    def test_parseo_manual_igual_a_strptime(self):
+        for v in self.VALORES:
+            self.assertEqual(dparse(v), _dparse_strptime(v), v)
+
+    def test_tipos_y_serial_excel(self):
+        self.assertEqual(dparse("45000"), datetime(2023, 3, 15))
+        self.assertIsNone(dparse("123"))
+        self.assertEqual(dparse(date(2024, 1, 5)), datetime(2024, 1, 5))
+        self.assertIsNone(dparse(""))
+        self.assertIsNone(dparse(None))
+
+    def test_serie_coincide_y_siembra_memo(self):
+        Formatos._dparse_memo.clear()
+        col = pd.Series(self.VALORES + ["45000", None, datetime(2024, 1, 1)])
+        out = dparse_serie(col)
+        for v, ts in zip(col, out):
+            esperado = dparse(v) if v is not None else None
+            self.assertEqual(None if pd.isna(ts) else ts.to_pydatetime(), esperado, v)
+        self.assertIn("01-02-2024", Formatos._dparse_memo)
+
+    def test_registro_se_parsea_una_vez(self):
+        p = {"fecha": "02-01-2024", "codigo": "0101001"}
+        self.assertEqual(dparse_registro(p), datetime(2024, 1, 2))
+        p["fecha"] = "basura"
+        self.assertEqual(dparse_registro(p), datetime(2024, 1, 2))   # Ya quedó en p["fecha_dt"]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+# tests/test_drift_tracker.py
+# -*- coding: utf-8 -*-
+"""
+Tests de la persistencia diferida de SelectorDriftTracker (memoria + volcado con merge).
+"""
+import json
+import os
+import tempfile
+import unittest
+
+from src.core.selectors import SelectorDriftTracker
+
+
+class TestDriftTracker(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.ruta = os.path.join(self.tmp.name, "System", "DriftReport.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _disco(self):
+        with open(self.ruta, encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_acumula_en_memoria_hasta_el_volcado(self):
+        t = SelectorDriftTracker(self.ruta, intervalo=0)
+        for _ in range(50):
+            t.record("INPUT_RUT", 0, 0.004)
+        t.record("INPUT_RUT", 2, 0.3)
+        t.record_miss("INPUT_RUT", 6.0)
+        self.assertFalse(os.path.exists(self.ruta))
+        self.assertTrue(t.flush())
+        self.assertFalse(t.flush())   # Nada pendiente
+
+        d = self._disco()["INPUT_RUT"]
+        self.assertEqual(d["hits"][:3], [50, 0, 1])
+        self.assertEqual(d["fallos"], 1)
+        self.assertEqual(d["latencia_ms"], {"0": {"<=5": 50}, "2": {"<=500": 1}, "fallo": {">5000": 1}})
+
+    def test_dos_escritores_se_suman(self):
+        a = SelectorDriftTracker(self.ruta, intervalo=0)
+        b = SelectorDriftTracker(self.ruta, intervalo=0)
+        a.record("BTN_BUSCAR", 0)
+        b.record("BTN_BUSCAR", 0)
+        b.record("BTN_BUSCAR", 1)
+        a.flush()
+        b.flush()
+        a.record("BTN_BUSCAR", 0)
+        a.flush()
+        self.assertEqual(self._disco()["BTN_BUSCAR"]["hits"][:2], [3, 1])
+        self.assertEqual(a.stats["BTN_BUSCAR"]["hits"][:2], [3, 1])   # La vista en memoria incluye al otro
+
+    def test_formato_anterior_se_conserva(self):
+        os.makedirs(os.path.dirname(self.ruta))
+        with open(self.ruta, "w", encoding="utf-8") as f:
+            json.dump({"MENU": {"hits": [7, 0, 0, 0, 0]}}, f)
+        t = SelectorDriftTracker(self.ruta, intervalo=0)
+        t.record("MENU", 1)
+        t.flush()
+        self.assertEqual(self._disco()["MENU"]["hits"], [7, 1, 0, 0, 0])
+        self.assertFalse(os.path.exists(self.ruta + ".lock"))
+
+
+if __name__ == "__main__":
+    unittest.main()
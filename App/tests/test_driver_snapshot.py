@@ -0,0 +1,56 @@
+# tests/test_driver_snapshot.py
+# -*- coding: utf-8 -*-
+"""
+Tests del snapshot JS de caso (SiggesDriver.leer_snapshot_caso).
+"""
+import unittest
+from unittest.mock import MagicMock
+
+from src.core.Driver import SiggesDriver
+
+
+def _fila_oa(folio, fecha, deriv, cod, diag):
+    tds = [""] * 13
+    tds[0], tds[2], tds[8], tds[9], tds[12] = folio, fecha, deriv, cod, diag
+    return tds
+
+
+class TestSnapshotCaso(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_driver = MagicMock()
+        self.sigges = SiggesDriver(self.mock_driver)
+
+    def test_snapshot_misma_forma_que_lectores(self):
+        """El snapshot devuelve tuplas ordenadas por fecha desc, igual que los lectores DOM."""
+        self.mock_driver.execute_script.return_value = {
+            "ipd": [
+                ["", "", "01/01/2024", "", "", "", "Sí", "Diag A"],
+                ["", "", "05/03/2024", "", "", "", "No", "Diag B"],
+            ],
+            "oa": [_fila_oa("111", "02/02/2024 10:00", "Onco", "0101", "DX")],
+            "aps": [["", "10-10-2023", "Confirmado"]],
+            "sic": None,
+            "prestaciones": {
+                "headers": ["Referencia", "Fecha atención", "Código de prestación", "Glosa prestación"],
+                "rows": [["OA 111", "03-02-2024", "0101001", "Consulta"]],
+            },
+        }
+        snap = self.sigges.leer_snapshot_caso(MagicMock())
+
+        self.assertEqual(snap["ipd"], (["05-03-2024", "01-01-2024"], ["No", "Sí"], ["Diag B", "Diag A"]))
+        self.assertEqual(snap["oa"], (["02-02-2024"], ["Onco"], ["DX"], ["0101"], ["111"]))
+        self.assertEqual(snap["aps"], (["10-10-2023"], ["Confirmado"]))
+        self.assertIsNone(snap["sic"], "Sección sin label debe quedar en None para usar fallback DOM")
+        self.assertEqual(snap["prestaciones"][0]["codigo"], "0101001")
+        self.assertEqual(snap["prestaciones"][0]["referencia"], "OA 111")
+        self.assertEqual(self.mock_driver.execute_script.call_count, 1)
+
+    def test_snapshot_js_falla_retorna_none(self):
+        """Si el JS falla, el llamador debe usar los lectores DOM."""
+        self.mock_driver.execute_script.side_effect = Exception("JS error")
+        self.assertIsNone(self.sigges.leer_snapshot_caso(MagicMock()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+# tests/test_estado_pagina.py
+# -*- coding: utf-8 -*-
+"""
+Tests del detector de estado con una sola sonda JS.
+"""
+import unittest
+from unittest.mock import MagicMock
+
+from src.core.estado_pagina import JS_SONDA_ESTADO, clasificar_estado, detectar_estado
+from src.core.modules.navigation import NavigationMixin
+from src.core.state import DriverState
+
+
+def _sonda(hash_, spinner=False, **hitos):
+    return {"hash": hash_, "hitos": hitos, "spinner": spinner, "ms": 0.4}
+
+
+class _Nav(NavigationMixin):
+    def __init__(self, driver):
+        self.driver = driver
+        self.state = DriverState(driver=driver)
+
+
+class TestEstadoPagina(unittest.TestCase):
+
+    def test_clasificacion(self):
+        casos = [
+            (_sonda("#/login", LOGIN_BTN_INGRESAR=True), "LOGIN"),
+            (_sonda("#/login", LOGIN_SEL_UNIDAD_HEADER=True), "SELECT_UNIT"),
+            (_sonda("#/login", MENU_CONTENEDOR=True), "HOME"),
+            (_sonda("#/login"), "LOGIN"),
+            (_sonda("#/actualizaciones"), "HOME"),
+            (_sonda("#/busqueda-de-paciente", INPUT_RUT=True), "BUSQUEDA"),
+            (_sonda("#/34"), "BUSQUEDA"),
+            (_sonda("#/161"), "CARTOLA"),
+            (_sonda("#/340"), "UNKNOWN"),
+            (_sonda("#/otra", MENU_CONTENEDOR=True), "HOME"),
+        ]
+        for sonda, esperado in casos:
+            self.assertEqual(clasificar_estado(sonda), esperado, sonda)
+
+    def test_una_llamada_sin_esperas(self):
+        driver = MagicMock()
+        driver.execute_script.return_value = _sonda("#/cartola-unificada-de-paciente")
+        self.assertEqual(detectar_estado(driver)[:2], ("CARTOLA", True))
+        driver.execute_script.assert_called_once()
+        self.assertIs(driver.execute_script.call_args[0][0], JS_SONDA_ESTADO)
+        driver.find_element.assert_not_called()
+
+    def test_cache_solo_con_estado_confirmado(self):
+        driver = MagicMock()
+        nav = _Nav(driver)
+        driver.execute_script.return_value = _sonda("#/34", spinner=True, INPUT_RUT=True)
+        self.assertEqual(nav.detectar_estado_actual(), "BUSQUEDA")
+        self.assertIsNone(nav.state.cached_state)
+
+        driver.execute_script.return_value = _sonda("#/34", INPUT_RUT=True)
+        self.assertEqual(nav.detectar_estado_actual(), "BUSQUEDA")
+        self.assertEqual(nav.state.cached_state, "BUSQUEDA")
+        nav.detectar_estado_actual()
+        self.assertEqual(driver.execute_script.call_count, 2)   # La tercera sale de la caché
+
+    def test_sonda_fallida(self):
+        driver = MagicMock()
+        driver.execute_script.side_effect = Exception("no such window")
+        self.assertEqual(detectar_estado(driver)[:2], ("UNKNOWN", False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+# tests/test_evaluadores_paralelos.py
+# -*- coding: utf-8 -*-
+"""
+Tests de la evaluación de reglas desacoplada del hilo del navegador.
+"""
+import os
+import sys
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from Utilidades.Mezclador import Conexiones
+from src.utils.CachePacientes import CapturaIncompleta, CapturaPaciente
+
+
+def _procesar(sg, row, idx, total, t, entradas=None, diferir=None):
+    """Navegador falso: difiere la evaluación salvo que no haya evaluadores."""
+    if diferir is not None:
+        diferir(CapturaPaciente(row), entradas)
+        return None, True
+    return [{"RUT": row, "via": "vivo"}], True
+
+
+def _evaluar(captura, entradas):
+    if captura.rut == "incompleto":
+        raise CapturaIncompleta("sin OA")
+    time.sleep(0.005 if captura.rut.endswith("0") else 0)
+    return [{"RUT": captura.rut, "via": "evaluador"}]
+
+
+@patch.object(Conexiones, "_cerrar_paciente", lambda *a, **k: None)
+@patch.object(Conexiones, "_resultados_desde_captura", _evaluar)
+@patch.object(Conexiones, "procesar_paciente", _procesar)
+class TestEvaluadoresParalelos(unittest.TestCase):
+
+    RUTS = [f"{i}-9" for i in range(20)] + ["incompleto", "21-9"]
+
+    def _correr(self, n_evaluadores):
+        tareas = ((i, rut, [({}, rut, "", "")]) for i, rut in enumerate(self.RUTS))
+        return list(Conexiones._iterar_con_evaluadores({"sigges": None}, tareas, len(self.RUTS),
+                                                       time.time(), n_evaluadores))
+
+    def test_resultados_en_orden_de_nomina(self):
+        salida = self._correr(3)
+        self.assertEqual([clave for clave, _, _ in salida], list(range(len(self.RUTS))))
+        self.assertEqual([filas[0]["RUT"] for _, filas, _ in salida], self.RUTS)
+        self.assertEqual(salida[0][1][0]["via"], "evaluador")
+
+    def test_captura_incompleta_vuelve_al_navegador(self):
+        salida = dict((clave, filas) for clave, filas, _ in self._correr(2))
+        self.assertEqual(salida[self.RUTS.index("incompleto")][0]["via"], "vivo")
+
+    def test_sin_evaluadores_es_secuencial(self):
+        self.assertTrue(all(filas[0]["via"] == "vivo" for _, filas, _ in self._correr(0)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+# tests/test_excel_revision.py
+# -*- coding: utf-8 -*-
+"""
+Tests del Excel de revisión escrito en streaming (write-only).
+"""
+import csv
+import tempfile
+import unittest
+
+from openpyxl import load_workbook
+
+from src.utils.Excel_Revision import SnapshotIncremental, generar_excel_revision
+
+
+class TestExcelRevision(unittest.TestCase):
+
+    def _generar(self, items):
+        ruta = generar_excel_revision({"VIH": items}, [{"nombre": "VIH"}], "VIH", tempfile.mkdtemp())
+        self.assertIsNotNone(ruta)
+        return load_workbook(ruta)
+
+    def test_hojas_orden_y_filtro(self):
+        wb = self._generar([
+            {"RUT": "1-9", "Nombre": "A", "Extra": "x", "_cols_order": ["RUT", "Edad"]},
+            {"RUT": "2-7", "Nombre": "B"},
+        ])
+        self.assertEqual(wb.sheetnames, ["VIH", "Carga Masiva", "Diccionario"])
+        ws = wb["VIH"]
+        # _cols_order primero, extras después, sin "Nombre"
+        self.assertEqual([c.value for c in ws[1]], ["RUT", "Edad", "Extra"])
+        self.assertEqual(ws.auto_filter.ref, "A1:C3")
+        self.assertEqual(ws["A1"].fill.start_color.rgb, "00002060")
+        self.assertEqual(wb["Diccionario"].column_dimensions["C"].width, 40)
+
+    def test_estilos_condicionales_por_fila(self):
+        wb = self._generar([
+            {"Edad": 70, "Obj 1": "! 01/01/2030", "Folio OA": "OA 123",
+             "_age_validation_status": "red", "_folios_usados": ["123"]},
+            {"Edad": 30, "Obj 1": "01/01/2020", "Folio OA": "OA 999", "_folios_usados": ["123"]},
+        ])
+        ws = wb["VIH"]
+        self.assertEqual(ws["A2"].fill.start_color.rgb, "00FFC7CE")   # Edad roja
+        self.assertEqual(ws["A3"].fill.start_color.rgb, "00C6EFCE")   # Edad sin alerta -> verde
+        self.assertEqual(ws["B2"].value, "01/01/2030")                # Marcador "! " removido
+        self.assertEqual(ws["B2"].fill.start_color.rgb, "00FFD966")
+        self.assertIsNone(ws["B3"].fill.fill_type)
+        self.assertEqual(ws["C2"].fill.start_color.rgb, "00C6EFCE")   # Folio usado
+        self.assertIsNone(ws["C3"].fill.fill_type)
+        self.assertEqual(ws["C3"].border.left.style, "thin")
+
+
+class TestSnapshotIncremental(unittest.TestCase):
+
+    def test_solo_agrega_filas_nuevas(self):
+        """Cada "Guardar Ahora" agrega solo lo registrado desde el anterior."""
+        resultados = {0: [{"RUT": "1-9", "Edad": 40, "_cols_order": ["RUT", "Edad"]}]}
+        snap = SnapshotIncremental("VIH Exámenes", tempfile.mkdtemp())
+
+        self.assertEqual(snap.solicitar(resultados), 1)
+        resultados[0] += [{"RUT": "2-7", "Edad": None}, {"RUT": "3-5", "Edad": 33}]
+        self.assertEqual(snap.solicitar(resultados), 2)
+        self.assertEqual(snap.solicitar(resultados), 0)
+        snap.cerrar()
+
+        with open(snap.ruta, encoding="utf-8-sig", newline="") as f:
+            filas = list(csv.reader(f, delimiter=";"))
+        self.assertEqual(filas, [["RUT", "Edad"], ["1-9", "40"], ["2-7", ""], ["3-5", "33"]])
+        self.assertEqual(snap.filas_escritas, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
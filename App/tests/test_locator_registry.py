@@ -0,0 +1,66 @@
+# tests/test_locator_registry.py
+# -*- coding: utf-8 -*-
+"""
+Tests del registro de locators (orden por aciertos, ganador de sesión, una pasada JS).
+"""
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from src.core.selectors import JS_LOCALIZAR, LocatorRegistry, SelectorDriftTracker, es_xpath
+
+
+LOCS = ["//*[@id='rutInput']", "/html/body/div/main//input", "#rutInput"]
+
+
+class TestLocatorRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.tracker = SelectorDriftTracker(os.path.join(self.tmp.name, "DriftReport.json"), intervalo=0)
+        self.registry = LocatorRegistry(self.tracker)
+        self.driver = MagicMock()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_orden_por_aciertos_y_ganador(self):
+        self.tracker.stats["k"] = {"hits": [1, 9, 0, 0, 0]}
+        self.assertEqual(self.registry.orden("k", 3), [1, 0, 2])
+        self.registry.registrar("k", 2)
+        self.assertEqual(self.registry.orden("k", 3), [2, 1, 0])
+        self.registry.olvidar("k")
+        self.assertEqual(self.registry.orden("k", 3), [1, 0, 2])
+
+    def test_una_pasada_con_todos_los_candidatos(self):
+        el = MagicMock(name="input")
+        self.tracker.stats["rut"] = {"hits": [0, 4, 0, 0, 0]}
+        self.driver.execute_script.return_value = {"i": 0, "el": el}
+        self.assertIs(self.registry.localizar(self.driver, LOCS, "presence", 1, key="rut"), el)
+        self.driver.execute_script.assert_called_once_with(JS_LOCALIZAR, [LOCS[1], LOCS[0], LOCS[2]], "presence",
+                                                           [True, True, False])
+        self.assertEqual(self.tracker.stats["rut"]["hits"][1], 5)   # Índice original del ganador
+        self.assertEqual(self.registry.orden("rut", 3)[0], 1)
+
+    def test_sin_coincidencia_no_espera_por_candidato(self):
+        self.registry.registrar("rut", 2)
+        self.driver.execute_script.return_value = None
+        self.assertIsNone(self.registry.localizar(self.driver, LOCS, "clickable", 0.3, key="rut"))
+        self.driver.find_element.assert_not_called()
+        self.assertEqual(self.registry.orden("rut", 3), [2, 0, 1])   # Sin ganador: solo aciertos
+        self.assertNotIn("rut", self.registry._ganador)
+
+    def test_xpath_relativo_no_se_trata_como_css(self):
+        """'.//p' y '..' siguen siendo XPath (como con By.XPATH); '.clase' es CSS."""
+        self.assertTrue(es_xpath(".//p"))
+        self.assertTrue(es_xpath("./div[6]/span"))
+        self.assertTrue(es_xpath("../label"))
+        self.assertFalse(es_xpath(".boton-buscar"))
+        self.driver.execute_script.return_value = None
+        self.registry.localizar(self.driver, [".//div/label/p", ".boton"], "presence", 0.2, key="rel")
+        self.assertEqual(self.driver.execute_script.call_args[0][3], [True, False])
+
+
+if __name__ == "__main__":
+    unittest.main()
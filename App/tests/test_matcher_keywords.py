@@ -0,0 +1,44 @@
+# tests/test_matcher_keywords.py
+# -*- coding: utf-8 -*-
+"""
+Tests del matcher de keywords compilado (mini-tabla y cartola).
+"""
+import unittest
+
+from src.core.Formatos import _norm, has_keyword, matcher_keywords, matcher_mision
+from src.core.Mini_Tabla import resolver_casos_duplicados, resolver_casos_keywords
+
+
+CASOS = [
+    {"problema": "Enfermedad Pulmonar Obstructiva Crónica", "estado": "Caso Cerrado"},
+    {"problema": "Diabetes Mellitus Tipo 2", "estado": "Caso Cerrado"},
+    {"problema": "Diabetes Mellitus Tipo 2", "estado": "Caso en Tratamiento"},
+    {"problema": "Hipotiroidismo en personas de 15 años y más", "estado": "Caso en Tratamiento"},
+]
+
+
+class TestMatcherKeywords(unittest.TestCase):
+
+    def test_equivale_a_comparacion_normalizada(self):
+        kws = ["Diabetes  Mellitus", "PULMONAR", "Depresión"]
+        for texto in ["diabetes mellitus tipo 2", "Enfermedad Pulmonar", "Depresion leve", "Asma", ""]:
+            esperado = any(_norm(k) in _norm(texto) for k in kws)
+            self.assertEqual(matcher_keywords(kws).coincide(texto), esperado, texto)
+            self.assertEqual(has_keyword(texto, kws), esperado, texto)
+
+    def test_compilado_una_vez_por_lista(self):
+        m = {"keywords": ["diabetes"], "keywords_contra": ["epoc"]}
+        self.assertIs(matcher_mision(m).keywords, matcher_mision(dict(m)).keywords)
+        self.assertFalse(matcher_mision({"keywords": []}).contra)
+
+    def test_primera_keyword_decide_como_antes(self):
+        """Igual que llamar resolver_casos_duplicados keyword por keyword."""
+        kws = ["asma", "diabetes mellitus", "pulmonar"]
+        esperado = next(r for r in (resolver_casos_duplicados(CASOS, k) for k in kws) if r[0])
+        self.assertEqual(resolver_casos_keywords(CASOS, kws), esperado)
+        self.assertIs(esperado[0], CASOS[2])   # Prioriza el no cerrado
+        self.assertIsNone(resolver_casos_keywords(CASOS, ["asma"])[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
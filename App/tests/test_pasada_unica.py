@@ -0,0 +1,90 @@
+# tests/test_pasada_unica.py
+# -*- coding: utf-8 -*-
+"""
+Tests de la pasada única multi-misión: cada misión conserva sus propios flags.
+"""
+import os
+import sys
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from Utilidades.Mezclador import Conexiones
+from src.utils.CachePacientes import CapturaPaciente
+
+
+def _captura(rut: str) -> CapturaPaciente:
+    c = CapturaPaciente(rut)
+    c.mini = [{"problema": "Diabetes Mellitus Tipo 2", "estado": "Caso en Tratamiento", "fecha_inicio": "10-05-2023"}]
+    c.edad = 61
+    c.casos = [{"caso": "Diabetes Mellitus Tipo 2", "estado": "Caso en Tratamiento", "apertura": "10-05-2023",
+                "fecha_apertura": "10-05-2023", "cierre": "NO", "fecha_dt": datetime(2023, 5, 10),
+                "indice": 0, "raw_texto": ""}]
+    c.detalle[0] = {"texto": "", "ipd": ([], [], []), "oa": ([], [], [], [], []), "aps": ([], []),
+                    "sic": ([], []),
+                    "prestaciones": [{"referencia": "", "fecha": "15-01-2024", "codigo": "0101001",
+                                      "glosa": "Consulta", "establecimiento": "", "especialidad": ""}]}
+    return c
+
+
+class TestPasadaUnicaFlags(unittest.TestCase):
+
+    def setUp(self):
+        base = {"keywords": ["diabetes"], "indices": {"fecha": 0, "rut": 1, "nombre": 2}}
+        self.con_habs = dict(base, nombre="Con Hab", habilitantes=["0101001"], excluyentes=["0202002"])
+        self.sin_habs = dict(base, nombre="Sin Hab")
+
+    def test_columnas_no_dependen_de_la_ultima_mision_cargada(self):
+        Conexiones._set_globals_for_mission(self.sin_habs)
+        cols = Conexiones.cols_mision(self.con_habs)
+        self.assertIn("Hab 0101001", cols)
+        self.assertIn("Excl 0202002", cols)
+        Conexiones._set_globals_for_mission(self.con_habs)
+        self.assertFalse(any(c.startswith(("Hab ", "Excl ")) for c in Conexiones.cols_mision(self.sin_habs)))
+
+    def test_analisis_por_mision_con_flags_distintos(self):
+        Conexiones._set_globals_for_mission(self.sin_habs)   # Última misión cargada sin habilitantes
+        entradas = [(self.con_habs, "12345678-5", "01-02-2024", "Ana"),
+                    (self.sin_habs, "12345678-5", "01-02-2024", "Ana")]
+        con, sin = Conexiones._resultados_desde_captura(_captura("12345678-5"), entradas)
+        self.assertEqual(con.get("Hab 0101001"), "15-01-2024")
+        self.assertNotIn("Hab 0101001", sin)
+
+
+class TestPasadaUnicaKeywords(unittest.TestCase):
+
+    def setUp(self):
+        base = {"indices": {"fecha": 0, "rut": 1, "nombre": 2}}
+        self.diabetes = dict(base, nombre="Diabetes", keywords=["diabetes"])
+        self.asma = dict(base, nombre="Asma", keywords=["asma"])
+
+    def test_mision_sin_match_recibe_su_fila_sn(self):
+        """Cada misión resuelve su propio caso: la que no calza queda igual que corrida sola."""
+        sola = Conexiones._resultados_desde_captura(
+            _captura("12345678-5"), [(self.asma, "12345678-5", "01-02-2024", "Ana")])
+        juntas = Conexiones._resultados_desde_captura(
+            _captura("12345678-5"), [(self.diabetes, "12345678-5", "01-02-2024", "Ana"),
+                                     (self.asma, "12345678-5", "01-02-2024", "Ana")])
+        self.assertEqual(len(juntas), 2)
+        self.assertTrue(juntas[0].get("Caso"))
+        self.assertTrue(juntas[1]["Observación"].startswith("S/N: "))
+        self.assertEqual(juntas[1]["Observación"], sola[0]["Observación"])
+        self.assertEqual(juntas[1].get("Caso"), sola[0].get("Caso"))
+
+
+class TestPasadaUnicaPestanas(unittest.TestCase):
+
+    @patch.object(Conexiones, "PASADA_UNICA_MULTIMISION", True)
+    @patch.object(Conexiones, "MAX_PESTANAS_PARALELAS", 3)
+    def test_mision_con_pestanas_paralelas_no_usa_pasada_unica(self):
+        """La pasada única es secuencial: una cola con pestañas paralelas sigue misión por misión."""
+        a, b = {"nombre": "A"}, {"nombre": "B"}
+        self.assertTrue(Conexiones._usar_pasada_unica([a, b]))
+        self.assertFalse(Conexiones._usar_pasada_unica([a]))
+        self.assertFalse(Conexiones._usar_pasada_unica([a, dict(b, pestanas_paralelas=2)]))
+
+
+if __name__ == "__main__":
+    unittest.main()
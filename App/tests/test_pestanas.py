@@ -0,0 +1,63 @@
+# tests/test_pestanas.py
+# -*- coding: utf-8 -*-
+"""
+Tests del pool de pestañas: filas huérfanas y reconexión de la pestaña principal.
+"""
+import os
+import sys
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from Utilidades.Mezclador import Conexiones
+from Utilidades.Mezclador.Conexiones import FatalConnectionError
+
+
+class TestPestanas(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({"RUT": [f"{i}-9" for i in range(4)]})
+        self.principal = MagicMock(name="principal")
+
+    def _correr(self, sesion, n_tabs):
+        return list(Conexiones._iterar_en_pestanas(sesion, self.df, len(self.df), time.time(), n_tabs))
+
+    def test_fila_de_pestana_retirada_la_toma_la_principal(self):
+        tab = MagicMock(name="tab")
+
+        def procesar(sg, row, idx, total, t, entradas=None, diferir=None):
+            if sg is tab:
+                time.sleep(0.05)   # La principal ya vació la cola y terminó
+                raise FatalConnectionError("tab caída")
+            return [{"RUT": row["RUT"], "sg": sg}], True
+
+        with patch.object(Conexiones, "procesar_paciente", procesar), \
+                patch.object(Conexiones, "_abrir_pestana_worker", return_value=tab), \
+                patch.object(Conexiones, "_cerrar_pestana_worker"):
+            salida = self._correr({"sigges": self.principal}, 2)
+        self.assertEqual([idx for idx, _, _ in salida], [0, 1, 2, 3])
+        self.assertTrue(all(filas[0]["sg"] is self.principal for _, filas, _ in salida))
+
+    def test_principal_reconectada_queda_en_sesion(self):
+        nuevo = MagicMock(name="nuevo")
+
+        def procesar(sg, row, idx, total, t, entradas=None, diferir=None):
+            if sg is self.principal:
+                raise FatalConnectionError("sesión perdida")
+            return [{"RUT": row["RUT"]}], True
+
+        sesion = {"sigges": self.principal}
+        with patch.object(Conexiones, "procesar_paciente", procesar), \
+                patch.object(Conexiones, "_abrir_pestana_worker", side_effect=Exception("sin CDP")), \
+                patch.object(Conexiones, "iniciar_driver", return_value=nuevo):
+            salida = self._correr(sesion, 2)
+        self.assertEqual(len(salida), 4)
+        self.assertIs(sesion["sigges"], nuevo)
+
+
+if __name__ == "__main__":
+    unittest.main()
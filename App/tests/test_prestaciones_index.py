@@ -0,0 +1,77 @@
+# tests/test_prestaciones_index.py
+# -*- coding: utf-8 -*-
+"""
+Tests del índice de prestaciones por paciente (código -> fechas con bisect).
+"""
+import os
+import random
+import sys
+import unittest
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from Utilidades.Mezclador import Conexiones
+from src.core.Analisis_Misiones import FrequencyValidator, PrestacionesIndex
+from src.core.Formatos import dparse, normalizar_codigo
+
+
+def _prestaciones(n=400, semilla=3):
+    rnd = random.Random(semilla)
+    base = datetime(2023, 1, 1)
+    out = []
+    for _ in range(n):
+        f = (base + timedelta(days=rnd.randint(0, 700))).strftime("%d-%m-%Y")
+        out.append({"fecha": rnd.choice([f, f, f, "", "s/f"]),
+                    "codigo": rnd.choice(["0101001", "101001", "3010013", "0801001", "", "AB"])})
+    return out
+
+
+class TestPrestacionesIndex(unittest.TestCase):
+
+    FOBJ = datetime(2024, 3, 15)
+
+    def test_buscar_codigos_igual_que_recorrer_lista(self):
+        prest = _prestaciones()
+        for futuras in (False, True):
+            esperado = []
+            for p in prest:
+                c = normalizar_codigo(p["codigo"])
+                f = dparse(p["fecha"])
+                if c not in {"101001", "3010013"} or not f:
+                    continue
+                if f > self.FOBJ and not futuras:
+                    continue
+                esperado.append((c, f, f > self.FOBJ))
+            esperado.sort(key=lambda x: x[1], reverse=True)
+            indice = PrestacionesIndex(_prestaciones())
+            obtenido = Conexiones.buscar_codigos_en_prestaciones(indice, ["0101001", "3010013"], self.FOBJ, futuras)
+            self.assertEqual(obtenido, esperado)
+
+    def test_fechas_objetivo_antes_de_nomina(self):
+        prest = _prestaciones()
+        esperado = sorted({dparse(p["fecha"]) for p in prest
+                           if normalizar_codigo(p["codigo"]) == "801001" and dparse(p["fecha"])
+                           and dparse(p["fecha"]) <= self.FOBJ}, reverse=True)
+        self.assertEqual(Conexiones.listar_fechas_objetivo(prest, "801001", self.FOBJ), esperado)
+        self.assertEqual(Conexiones.listar_fechas_objetivo(prest, "", self.FOBJ), [])
+
+    def test_frecuencias_por_ventana(self):
+        prest = _prestaciones()
+        indice = PrestacionesIndex(prest)
+        fechas = [dparse(p["fecha"]) for p in prest if normalizar_codigo(p["codigo"]) == "101001" and dparse(p["fecha"])]
+        ref = date(2024, 2, 10)
+        for tipo, esperado in [("Mes", sum(f.year == 2024 and f.month == 2 for f in fechas)),
+                               ("Año", sum(f.year == 2024 for f in fechas)),
+                               ("Vida", len(fechas)), ("Otro", 0)]:
+            res = FrequencyValidator.validar(indice, {"code": "101001", "freq_type": tipo, "freq_qty": 2}, ref)
+            self.assertEqual(res["count"], esperado, tipo)
+            self.assertEqual(res["ok"], esperado >= 2)
+
+    def test_diciembre_cierra_en_enero(self):
+        indice = PrestacionesIndex([{"fecha": "31-12-2024", "codigo": "1"}, {"fecha": "01-01-2025", "codigo": "1"}])
+        self.assertEqual(FrequencyValidator.validar(indice, {"code": "1", "freq_type": "Mes"}, date(2024, 12, 1))["count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
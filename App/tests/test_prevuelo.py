@@ -0,0 +1,49 @@
+# tests/test_prevuelo.py
+# -*- coding: utf-8 -*-
+"""
+Tests del pre-vuelo de la nómina (RUT/fecha en bloque y duplicados).
+"""
+import unittest
+
+import pandas as pd
+
+from src.core.Formatos import normalizar_rut
+from src.utils.PreVuelo import normalizar_ruts, prevuelo_nomina, replicar_filas, ruts_validos
+
+
+class TestPreVuelo(unittest.TestCase):
+
+    def test_normalizacion_igual_a_normalizar_rut(self):
+        crudos = pd.Series([" 12.345.678-5 ", "7654321k", "1-9", 12345678])
+        esperado = [normalizar_rut(str(x).strip()) for x in crudos]
+        self.assertEqual(normalizar_ruts(crudos).tolist(), esperado)
+
+    def test_digito_verificador_vectorizado(self):
+        ruts = pd.Series(["12345678-5", "12345678-4", "11222333-9", "1000005-K", "5000000-0", "ABC-1", ""])
+        self.assertEqual(ruts_validos(ruts).tolist(), [True, False, True, True, False, False, False])
+
+    def test_plan_invalidos_y_duplicados(self):
+        df = pd.DataFrame({
+            "RUT": ["12.345.678-5", "12345678-4", "12345678-5", "11222333-9", "12345678-5", "11222333-9"],
+            "Nombre": ["A", "B", "A2", "C", "A3", "C2"],
+            "Fecha": ["01-02-2024", "01-02-2024", "2024-02-01", "31-02-2024", "05-02-2024", "01-03-2024"],
+        })
+        plan = prevuelo_nomina(df, col_rut=0, col_fecha=2)
+
+        self.assertEqual(set(plan.invalidas), {1, 3})
+        self.assertIn("RUT", plan.invalidas[1])
+        self.assertIn("Fecha", plan.invalidas[3])
+        # Mismo RUT y misma fecha -> se replica; otra fecha -> se consulta
+        self.assertEqual(plan.representante, {2: 0})
+        self.assertEqual(plan.con_duplicados, {0})
+        self.assertEqual([i for i in df.index if plan.debe_procesar(i)], [0, 4, 5])
+
+    def test_replicar_filas_usa_nombre_propio(self):
+        filas = [{"Rut": "1-9", "Nombre": "A", "Estado": "Sin Caso"}]
+        copia = replicar_filas(filas, "A2")
+        self.assertEqual(copia[0]["Nombre"], "A2")
+        self.assertEqual(filas[0]["Nombre"], "A")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+# tests/test_programador_reintentos.py
+# -*- coding: utf-8 -*-
+"""
+Tests del programador adaptativo de reintentos por paciente.
+"""
+import unittest
+
+from selenium.common.exceptions import (
+    NoSuchWindowException, StaleElementReferenceException, TimeoutException
+)
+
+from src.utils.Reintentos import (
+    ACCION_REENCONTRAR, ACCION_REFRESCAR, ACCION_RENAVEGAR,
+    ErrorCategory, ProgramadorReintentos
+)
+
+
+class TestProgramadorReintentos(unittest.TestCase):
+
+    def setUp(self):
+        self.prog = ProgramadorReintentos()
+
+    def test_elemento_obsoleto_cuesta_milisegundos(self):
+        """Un stale element solo re-encuentra, sin navegar ni esperar segundos."""
+        plan = self.prog.planificar(StaleElementReferenceException("stale"), 1)
+        self.assertEqual(plan.accion, ACCION_REENCONTRAR)
+        self.assertLess(plan.delay, 0.1)
+
+    def test_timeout_escala_con_latencia_reciente(self):
+        """La espera de un timeout es proporcional al p90 de respuestas de SIGGES."""
+        for _ in range(10):
+            self.prog.registrar_respuesta(0.4)
+        rapido = self.prog.planificar(TimeoutException("t"), 1)
+        for _ in range(50):
+            self.prog.registrar_respuesta(4.0)
+        lento = self.prog.planificar(TimeoutException("t"), 1)
+
+        self.assertEqual(rapido.accion, ACCION_RENAVEGAR)
+        self.assertEqual(rapido.categoria, ErrorCategory.TIMEOUT)
+        self.assertLess(rapido.delay, 0.3)
+        self.assertGreater(lento.delay, 1.0)
+
+    def test_escalamiento_y_circuito(self):
+        """Reintentos repetidos y fallos seguidos entre pacientes terminan en refresh."""
+        self.assertEqual(self.prog.planificar(StaleElementReferenceException(), 4).accion, ACCION_REFRESCAR)
+        self.assertEqual(self.prog.planificar(NoSuchWindowException(), 1).accion, ACCION_REFRESCAR)
+
+        for _ in range(self.prog.circuito.failure_threshold):
+            self.prog.registrar_fallo()
+        self.assertEqual(self.prog.planificar(StaleElementReferenceException(), 1).accion, ACCION_REFRESCAR)
+        self.prog.registrar_exito()
+        self.assertEqual(self.prog.planificar(StaleElementReferenceException(), 1).accion, ACCION_REENCONTRAR)
+
+
+if __name__ == "__main__":
+    unittest.main()
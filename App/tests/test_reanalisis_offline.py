@@ -0,0 +1,76 @@
+# tests/test_reanalisis_offline.py
+# -*- coding: utf-8 -*-
+"""
+Tests del re-análisis offline (capturas de la caché -> Rev_*.xlsx sin navegador).
+"""
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+
+import pandas as pd
+from openpyxl import load_workbook
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from Utilidades.Mezclador import Conexiones
+from src.utils.CachePacientes import CachePacientes, CapturaIncompleta, CapturaPaciente
+
+
+def _captura(rut: str) -> CapturaPaciente:
+    c = CapturaPaciente(rut)
+    c.mini = [{"problema": "Diabetes Mellitus Tipo 2", "estado": "Caso en Tratamiento", "fecha_inicio": "10-05-2023"}]
+    c.edad = 61
+    c.casos = [{"caso": "Diabetes Mellitus Tipo 2", "estado": "Caso en Tratamiento", "apertura": "10-05-2023",
+                "fecha_apertura": "10-05-2023", "cierre": "NO", "fecha_dt": datetime(2023, 5, 10),
+                "indice": 0, "raw_texto": ""}]
+    c.detalle[0] = {"texto": "", "ipd": (["01-01-2024"], ["Sí"], ["DM2"]), "oa": ([], [], [], [], []),
+                    "aps": ([], []), "sic": ([], []), "prestaciones": []}
+    return c
+
+
+class TestReanalisisOffline(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.dir, "cache")
+        cache = CachePacientes(self.cache_dir)
+        cache.guardar(_captura("12345678-5"))
+        pd.DataFrame({
+            "Fecha": ["01-02-2024", "02-02-2024", "03-02-2024"],
+            "RUT": ["12.345.678-5", "11222333-9", "12345678-4"],
+            "Nombre": ["Ana", "Beto", "Caro"],
+        }).to_excel(os.path.join(self.dir, "nomina.xlsx"), index=False)
+        self.mision = {
+            "nombre": "DM2 Offline", "keywords": ["diabetes"], "require_ipd": True,
+            "ruta_entrada": os.path.join(self.dir, "nomina.xlsx"), "ruta_salida": self.dir,
+            "indices": {"fecha": 0, "rut": 1, "nombre": 2},
+        }
+
+    def test_excel_desde_capturas(self):
+        rutas = Conexiones.reanalizar_offline([self.mision], ruta_cache=self.cache_dir, procesos=1)
+        self.assertEqual(len(rutas), 1)
+        ws = load_workbook(rutas[0])["DM2 Offline"]
+        cols = [c.value for c in ws[1]]
+        filas = [dict(zip(cols, [c.value for c in r])) for r in ws.iter_rows(min_row=2)]
+        self.assertEqual([f["Rut"] for f in filas], ["12345678-5", "11222333-9", "12345678-4"])
+        self.assertEqual(filas[0]["Fecha IPD"], "01-01-2024")
+        self.assertIn("Desde caché", filas[0]["Observación"])
+        self.assertIn("captura incompleta", filas[1]["Observación"])
+        self.assertIn("RUT inválido", filas[2]["Observación"])
+
+
+    def test_caso_en_contra_fuera_de_captura_vuelve_al_navegador(self):
+        """Una sección que la captura no tiene no deja columnas "en Contra" vacías: se relanza."""
+        c = _captura("12345678-5")
+        c.casos.append({"caso": "Asma", "estado": "Caso en Tratamiento", "apertura": "01-01-2022",
+                        "fecha_apertura": "01-01-2022", "cierre": "NO", "fecha_dt": datetime(2022, 1, 1),
+                        "indice": 1, "raw_texto": ""})
+        c.detalle[1] = {"texto": "", "ipd": None, "oa": None, "aps": None, "sic": None, "prestaciones": None}
+        mision = dict(self.mision, keywords_contra=["asma"])
+        with self.assertRaises(CapturaIncompleta):
+            Conexiones._resultados_desde_captura(c, [(mision, "12345678-5", "01-02-2024", "Ana")])
+
+if __name__ == "__main__":
+    unittest.main()
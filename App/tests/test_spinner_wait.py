@@ -0,0 +1,51 @@
+# tests/test_spinner_wait.py
+# -*- coding: utf-8 -*-
+"""
+Tests de la espera de spinner orientada a eventos (MutationObserver).
+"""
+import unittest
+from unittest.mock import MagicMock
+
+from selenium.common.exceptions import TimeoutException
+
+from src.core.Driver import SiggesDriver
+from src.utils.Timing import TimingContext
+
+
+class TestEsperaSpinner(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_driver = MagicMock()
+        self.mock_driver._nz_script_timeout = 0
+        self.sigges = SiggesDriver(self.mock_driver)
+        TimingContext.reset()
+
+    def test_una_sola_llamada_y_latencia_en_timing(self):
+        """La espera es un único execute_async_script y su latencia queda en el paso activo."""
+        self.mock_driver.execute_async_script.return_value = {
+            "status": "gone", "appeared": True, "appear_ms": 40, "total_ms": 420.0
+        }
+        with TimingContext("Paso 4 - Esperar spinner") as ctx:
+            self.sigges.esperar_spinner(appear_timeout=0.5)
+
+        self.assertEqual(self.mock_driver.execute_async_script.call_count, 1)
+        self.mock_driver.execute_script.assert_not_called()
+        self.assertEqual(ctx.spinner_ms, 420.0)
+        self.assertEqual(TimingContext._spinner_count, 1)
+
+    def test_spinner_pegado_lanza_timeout(self):
+        """Si el spinner sigue visible, se lanza TimeoutException para el recovery."""
+        self.mock_driver.execute_async_script.return_value = {"status": "timeout", "total_ms": 1000.0}
+        with self.assertRaises(TimeoutException):
+            self.sigges.esperar_spinner(diff_timeout=1.0)
+
+    def test_fallback_a_sondeo_si_js_falla(self):
+        """Sin soporte de scripts asíncronos se vuelve al sondeo clásico."""
+        self.mock_driver.execute_async_script.side_effect = Exception("unsupported")
+        self.mock_driver.execute_script.return_value = False
+        self.sigges.esperar_spinner(appear_timeout=0.1)
+        self.assertTrue(self.mock_driver.execute_script.called)
+
+
+if __name__ == "__main__":
+    unittest.main()
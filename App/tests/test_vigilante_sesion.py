@@ -0,0 +1,82 @@
+# tests/test_vigilante_sesion.py
+# -*- coding: utf-8 -*-
+"""
+Tests del vigilante de sesión (keep-alive y re-login entre pacientes).
+"""
+import unittest
+from unittest.mock import MagicMock
+
+from src.core.estado_pagina import JS_SONDA_ESTADO
+from src.core.vigilante_sesion import JS_PING_SESION, VigilanteSesion
+
+
+def _sonda(hash_, **hitos):
+    return {"hash": hash_, "hitos": hitos, "spinner": False, "ms": 0.3}
+
+
+class TestVigilanteSesion(unittest.TestCase):
+
+    def setUp(self):
+        self.sigges = MagicMock()
+        self.sigges.driver.execute_script.return_value = _sonda("#/busqueda-de-paciente", INPUT_RUT=True)
+        self.sigges.driver.execute_async_script.return_value = 200
+        self.sigges.sesion_cerrada.return_value = True
+        self.sigges.login_obligatorio.return_value = True
+        self.vig = VigilanteSesion(self.sigges, ttl_s=20 * 60, intervalo_s=120, margen_s=90)
+
+    def _inactivo(self, segundos):
+        self.vig._ultima_actividad -= segundos
+        self.vig._ultimo_chequeo -= segundos
+
+    def test_sin_chequeo_pendiente_no_toca_el_navegador(self):
+        self.assertTrue(self.vig.entre_pacientes())
+        self.sigges.driver.execute_script.assert_not_called()
+        self.sigges.driver.execute_async_script.assert_not_called()
+
+    def test_sesion_viva_cerca_del_vencimiento_hace_ping(self):
+        """El ping va a la API y no cuenta como actividad; a lo más uno por intervalo."""
+        self.vig.url_ping = "https://www.sigges.cl/api/usuario"
+        self._inactivo(19 * 60)
+        self.assertTrue(self.vig.entre_pacientes())
+        self.assertIs(self.sigges.driver.execute_script.call_args[0][0], JS_SONDA_ESTADO)
+        self.sigges.driver.execute_async_script.assert_called_once_with(
+            JS_PING_SESION, "https://www.sigges.cl/api/usuario")
+        self.assertGreaterEqual(self.vig.inactividad(), 19 * 60)
+        self.sigges.login_obligatorio.assert_not_called()
+        self.assertTrue(self.vig.entre_pacientes())
+        self.assertEqual(self.sigges.driver.execute_async_script.call_count, 1)
+
+    def test_ping_sin_autorizacion_es_caida_y_no_aprende_duracion(self):
+        self._inactivo(19 * 60)
+        self.sigges.driver.execute_async_script.return_value = 401
+        self.assertTrue(self.vig.entre_pacientes())
+        self.sigges.login_obligatorio.assert_called_once()
+        self.assertEqual(self.vig.relogins, 1)
+        self.assertEqual(self.vig.ttl_s, 20 * 60)
+
+    def test_chequeo_periodico_sin_ping(self):
+        self._inactivo(150)
+        self.assertTrue(self.vig.entre_pacientes())
+        self.sigges.driver.execute_script.assert_called_once()
+        self.sigges.driver.execute_async_script.assert_not_called()
+
+    def test_sesion_cerrada_relogin_y_aprende_duracion(self):
+        self._inactivo(10 * 60)
+        self.sigges.driver.execute_script.return_value = _sonda("#/login", LOGIN_BTN_INGRESAR=True)
+        self.assertTrue(self.vig.entre_pacientes())
+        self.sigges.login_obligatorio.assert_called_once()
+        self.assertEqual(self.vig.relogins, 1)
+        self.assertAlmostEqual(self.vig.ttl_s, 600, delta=5)
+        self.assertLess(self.vig.inactividad(), 5)
+
+    def test_recuperar_si_caida(self):
+        self.assertFalse(self.vig.recuperar_si_caida())   # Sesión viva: el fallo cuenta
+        self.sigges.driver.execute_script.return_value = _sonda("#/02")
+        self.assertTrue(self.vig.recuperar_si_caida())
+        self.sigges.login_obligatorio.return_value = False
+        self.assertFalse(self.vig.recuperar_si_caida())
+        self.assertEqual(self.sigges.login_obligatorio.call_count, 1 + self.vig.max_relogin)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -28,6 +28,24 @@ EDGE_DRIVER_PATH = CFG.get("EDGE_DRIVER_PATH", "")
 MAX_REINTENTOS_POR_PACIENTE = int(CFG.get("MAX_REINTENTOS_POR_PACIENTE", 3))
 MISION_POR_HOJA = CFG.get("MISION_POR_HOJA", True)
 MISION_POR_ARCHIVO = CFG.get("MISION_POR_ARCHIVO", False)
+# Tope global de pestañas paralelas (cada misión pide las suyas con "pestanas_paralelas")
+MAX_PESTANAS_PARALELAS = int(CFG.get("MAX_PESTANAS_PARALELAS", 3))
+# Varias misiones en cola: visitar cada paciente una sola vez para todas
+PASADA_UNICA_MULTIMISION = bool(CFG.get("PASADA_UNICA_MULTIMISION", True))
+# Hilos que evalúan reglas mientras el navegador ya busca el siguiente paciente (0 = secuencial)
+EVALUADORES_PARALELOS = int(CFG.get("EVALUADORES_PARALELOS", 2))
+# Cambiar de paciente con el router de SIGGES (sin recargar la página); si falla, navegación completa
+CAMBIO_PACIENTE_SPA = bool(CFG.get("CAMBIO_PACIENTE_SPA", True))
+# Chequeo de sesión entre pacientes: keep-alive y re-login sin gastar reintentos del paciente
+VIGILANTE_SESION = bool(CFG.get("VIGILANTE_SESION", True))
+SESION_INACTIVIDAD_MIN = float(CFG.get("SESION_INACTIVIDAD_MIN", 20))
+# Endpoint de la API para el keep-alive ("" = la última llamada a la API que hizo SIGGES)
+SESION_PING_URL = str(CFG.get("SESION_PING_URL", ""))
+# Caché en disco de lo leído por paciente (re-analizar sin volver a SIGGES).
+# Opt-in: reutiliza datos clínicos ya leídos y los deja en disco sin cifrar (Cache/Pacientes)
+CACHE_PACIENTES = bool(CFG.get("CACHE_PACIENTES", False))
+CACHE_PACIENTES_TTL_HORAS = float(CFG.get("CACHE_PACIENTES_TTL_HORAS", 12))
+CACHE_PACIENTES_MAX = int(CFG.get("CACHE_PACIENTES_MAX", 5000))
 
 # --- MISSIONS LIST ---
 # El backend (Conexiones.py) debe iterar sobre esta lista.
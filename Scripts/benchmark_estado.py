@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark del detector de estado (src/core/estado_pagina.py).
+
+Sin navegador mide clasificar_estado sobre sondas sintéticas. Con la dirección
+de depuración de Edge y la ruta de msedgedriver mide además la sonda real
+(una ida y vuelta execute_script) sobre la página abierta, en milisegundos.
+
+Uso: python Scripts/benchmark_estado.py [repeticiones] [debug_address driver_path]
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "App"))
+
+from src.core.estado_pagina import clasificar_estado, detectar_estado
+
+SONDAS = [
+    {"hash": "#/login", "hitos": {"LOGIN_BTN_INGRESAR": True}, "spinner": False},
+    {"hash": "#/login", "hitos": {"LOGIN_SEL_UNIDAD_HEADER": True}, "spinner": False},
+    {"hash": "#/actualizaciones", "hitos": {"MENU_CONTENEDOR": True}, "spinner": False},
+    {"hash": "#/busqueda-de-paciente", "hitos": {"MENU_CONTENEDOR": True, "INPUT_RUT": True}, "spinner": False},
+    {"hash": "#/161", "hitos": {"MENU_CONTENEDOR": True}, "spinner": True},
+    {"hash": "", "hitos": {}, "spinner": False},
+]
+
+
+def _percentiles(ms):
+    ms = sorted(ms)
+    return statistics.median(ms), ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+
+
+def main(repeticiones=10000, debug_address=None, driver_path=None):
+    t0 = time.perf_counter()
+    for _ in range(repeticiones):
+        for s in SONDAS:
+            clasificar_estado(s)
+    dt = time.perf_counter() - t0
+    n = repeticiones * len(SONDAS)
+    print(f"clasificar_estado: {n} sondas en {dt:.3f}s ({dt / n * 1e6:.2f} µs/sonda)")
+
+    if not debug_address:
+        return
+    from src.core.Driver import iniciar_driver
+    sigges = iniciar_driver(debug_address, driver_path or "")
+    ms = []
+    estado = None
+    for _ in range(min(repeticiones, 200)):
+        estado, _, m = detectar_estado(sigges.driver)
+        ms.append(m)
+    p50, p95 = _percentiles(ms)
+    print(f"detectar_estado (en vivo, {len(ms)} sondas): {estado}  p50 {p50:.1f}ms  p95 {p95:.1f}ms")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 10000, *args[1:3])
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark del matcher de keywords compilado vs. la comparación anterior
+(_norm de cada caso y de cada keyword en cada llamada).
+
+Uso: python Scripts/benchmark_keywords.py [casos] [repeticiones]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "App"))
+
+from src.core.Formatos import _norm, matcher_keywords
+from src.core.Mini_Tabla import _priorizar_duplicados, resolver_casos_keywords
+
+PROBLEMAS = [
+    "Diabetes Mellitus Tipo 2", "Hipertensión Arterial Primaria o Esencial",
+    "Depresión en personas de 15 años y más", "VIH/SIDA", "Cáncer de Mama",
+    "Enfermedad Pulmonar Obstructiva Crónica", "Artrosis de Cadera", "Asma Bronquial",
+    "Hipotiroidismo en personas de 15 años y más", "Epilepsia No Refractaria",
+]
+KEYWORDS = ["epoc", "enfermedad pulmonar", "hipotiroidismo", "diabetes mellitus tipo 2"]
+
+
+def _legacy_has_keyword(texto, kws):
+    t = _norm(texto)
+    return any(_norm(k) in t for k in kws if k)
+
+
+def _legacy_resolver(casos, kws):
+    for kw in kws:
+        nombre_norm = _norm(kw)
+        matches = [c for c in casos
+                   if nombre_norm in _norm(c["problema"]) or _norm(c["problema"]) in nombre_norm]
+        if matches:
+            return _priorizar_duplicados(matches)
+    return None
+
+
+def _medir(fn, repeticiones):
+    t0 = time.perf_counter()
+    for _ in range(repeticiones):
+        fn()
+    return time.perf_counter() - t0
+
+
+def main(n_casos=2000, repeticiones=20):
+    rnd = random.Random(7)
+    casos = [{"problema": rnd.choice(PROBLEMAS) + f" Decreto {rnd.randint(1, 9)}",
+              "estado": rnd.choice(["Caso en Tratamiento", "Caso Cerrado"])} for _ in range(n_casos)]
+    matcher = matcher_keywords(KEYWORDS)
+
+    antes_sel = _medir(lambda: [c for c in casos if _legacy_has_keyword(c["problema"], KEYWORDS)], repeticiones)
+    ahora_sel = _medir(lambda: [c for c in casos if matcher.coincide(c["problema"])], repeticiones)
+    antes_res = _medir(lambda: _legacy_resolver(casos, list(reversed(KEYWORDS))), repeticiones)
+    ahora_res = _medir(lambda: resolver_casos_keywords(casos, list(reversed(KEYWORDS))), repeticiones)
+
+    print(f"{n_casos} casos x {len(KEYWORDS)} keywords x {repeticiones} repeticiones")
+    print(f"  seleccionar_caso (filtro):  {antes_sel:.3f}s -> {ahora_sel:.3f}s  (x{antes_sel / max(ahora_sel, 1e-9):.1f})")
+    print(f"  resolver_casos (mini):      {antes_res:.3f}s -> {ahora_res:.3f}s  (x{antes_res / max(ahora_res, 1e-9):.1f})")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
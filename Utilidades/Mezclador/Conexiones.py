@@ -22,14 +22,15 @@ Autor: Sistema Nozhgess
 # Librería Estándar
 from __future__ import annotations
 import ast
-import copy
 import gc
 import json
 import os
+import queue
 import re
+import threading
 import time
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 # --- SYSTEM BUILD CONFIG ---
 _SYS_REL_TAG = "V3_STABLE_NZ"
 _SYS_MOD_KEY = "NZT-2026-CL"
@@ -82,12 +83,43 @@ try:
 except ImportError:
     FOLIO_VIH = False
     FOLIO_VIH_CODIGOS = []
+try:
+    from Mision_Actual import MAX_PESTANAS_PARALELAS
+except ImportError:
+    MAX_PESTANAS_PARALELAS = 3
+try:
+    from Mision_Actual import PASADA_UNICA_MULTIMISION
+except ImportError:
+    PASADA_UNICA_MULTIMISION = True
+try:
+    from Mision_Actual import EVALUADORES_PARALELOS
+except ImportError:
+    EVALUADORES_PARALELOS = 2
+try:
+    from Mision_Actual import CAMBIO_PACIENTE_SPA
+except ImportError:
+    CAMBIO_PACIENTE_SPA = True
+try:
+    from Mision_Actual import VIGILANTE_SESION, SESION_INACTIVIDAD_MIN, SESION_PING_URL
+except ImportError:
+    VIGILANTE_SESION = True
+    SESION_INACTIVIDAD_MIN = 20.0
+    SESION_PING_URL = ""
+try:
+    from Mision_Actual import CACHE_PACIENTES, CACHE_PACIENTES_TTL_HORAS, CACHE_PACIENTES_MAX
+except ImportError:
+    CACHE_PACIENTES = False
+    CACHE_PACIENTES_TTL_HORAS = 12.0
+    CACHE_PACIENTES_MAX = 5000
 # Local - Principales
 from Z_Utilidades.Principales.DEBUG import should_show_timing
 from Z_Utilidades.Principales.Direcciones import XPATHS
 from Z_Utilidades.Principales.Errores import clasificar_error, pretty_error
-from Z_Utilidades.Principales.Esperas import espera
-from Z_Utilidades.Principales.Excel_Revision import generar_excel_revision
+from Z_Utilidades.Principales.Esperas import espera, finalizar_calibracion
+from Z_Utilidades.Principales.Excel_Revision import SnapshotIncremental, generar_excel_revision
+from Z_Utilidades.Principales.Reintentos import (
+    ACCION_REENCONTRAR, ACCION_REFRESCAR, programador_reintentos
+)
 from Z_Utilidades.Principales.Terminal import (
     log_error, log_info, log_ok, log_warn, log_debug,
     mostrar_banner, mostrar_resumen_final, resumen_paciente
@@ -96,10 +128,10 @@ from Z_Utilidades.Principales.Timing import Timer
 # Local - Motor
 from Z_Utilidades.Motor.Driver import iniciar_driver
 from Z_Utilidades.Motor.Formatos import (
-    normalizar_codigo, dparse, join_clean, solo_fecha, normalizar_rut, vac_row, en_vigencia,
-    _norm, has_keyword
+    normalizar_codigo, dparse, dparse_registro, join_clean, solo_fecha, normalizar_rut, vac_row, en_vigencia,
+    _norm, MatcherKeywords, matcher_keywords, matcher_mision
 )
-from Z_Utilidades.Motor.Mini_Tabla import leer_mini_tabla
+from Z_Utilidades.Motor.Mini_Tabla import leer_mini_tabla, resolver_casos_keywords
 # from Z_Utilidades.Motor.Objetivos import listar_fechas_objetivo, get_objetivos_config # Modulo no existe
 # =============================================================================
 #                         FUNCIONES AUXILIARES (RESTAURADAS)
@@ -114,7 +146,15 @@ except ImportError:
         def send_system_notification(self, **kwargs): pass
     def get_notifications(): return DummyNotif()
 from src.utils.ExecutionControl import get_execution_control
-from src.core.Analisis_Misiones import FrequencyValidator
+from src.utils.BitacoraPacientes import BitacoraPacientes
+from src.utils.PreVuelo import prevuelo_nomina, replicar_filas
+from src.utils.CachePacientes import (
+    CachePacientes, CapturaIncompleta, CapturaPaciente, SiggesGrabador, SiggesReplay
+)
+from src.core.Analisis_Misiones import FrequencyValidator, PrestacionesIndex, indice_prestaciones
+from src.core.cartola_casos import SesionCasos
+from src.core.waits import SENAL_TABLA, SENAL_XHR, SENALES_DEFINITIVAS
+from src.core.vigilante_sesion import VigilanteSesion
 # Inicializar colorama
 colorama_init(autoreset=True)
 # Utilidad: recortar listas segÃºn límite configurado
@@ -168,7 +208,8 @@ def _parse_code_list(value: Any) -> List[str]:
 # =============================================================================
 #                    FUNCIONES DE ANÃLISIS DE MISIÃ“N
 # =============================================================================
-def seleccionar_caso_inteligente(casos_data: List[Dict[str, Any]], kws: List[str]) -> Optional[Dict[str, Any]]:
+def seleccionar_caso_inteligente(casos_data: List[Dict[str, Any]],
+                                 kws: Union[List[str], MatcherKeywords]) -> Optional[Dict[str, Any]]:
     """
     Selecciona el mejor caso basándose en reglas de negocio inteligentes.
     
@@ -181,7 +222,8 @@ def seleccionar_caso_inteligente(casos_data: List[Dict[str, Any]], kws: List[str
     Args:
         casos_data: Lista de casos con información completa.
                    Cada caso debe contener: estado, nombre, fecha_apertura
-        kws: Lista de keywords a buscar en el nombre del caso.
+        kws: Lista de keywords a buscar en el nombre del caso, o el MatcherKeywords
+             ya compilado de la misión (matcher_mision(m).keywords).
              Ejemplos: ["depresion", "trastorno depresivo"]
     
     Returns:
@@ -193,18 +235,12 @@ def seleccionar_caso_inteligente(casos_data: List[Dict[str, Any]], kws: List[str
         >>> caso = seleccionar_caso_inteligente(casos, ["depresion"])
         >>> print(caso["estado"])  # "En Tratamiento"
     """
-    candidatos = []
-    
-    # 1. Filtrar por Keywords
-    # Limpiar keywords para comparación
-    for c in casos_data:
-        nombre_caso = c.get("caso", "")
-        if not kws: 
-            candidatos.append(c)
-            continue
-            
-        if has_keyword(nombre_caso, kws):
-            candidatos.append(c)
+    # 1. Filtrar por Keywords (matcher pre-normalizado y compilado una vez por lista)
+    matcher = matcher_keywords(kws)
+    if not matcher:
+        candidatos = list(casos_data)
+    else:
+        candidatos = [c for c in casos_data if matcher.coincide(c.get("caso", ""))]
     if not candidatos:
         # log_debug(f"      [SmartSelect] Sin match para kws {clean_kws} en {len(casos_data)} casos")
         return None
@@ -235,7 +271,8 @@ def seleccionar_caso_inteligente(casos_data: List[Dict[str, Any]], kws: List[str
         log_debug(f"      [SmartSelect] Seleccionado: {mejor_caso.get('caso')} (Estado: {mejor_caso.get('estado')})")
         
     return mejor_caso
-def buscar_inteligencia_historia(sigges, root, estado_caso: str, pre_oa_data: Optional[Tuple] = None) -> Dict[str, str]:
+def buscar_inteligencia_historia(sigges, root, estado_caso: str, pre_oa_data: Optional[Tuple] = None,
+                                 pre_sic_data: Optional[Tuple] = None) -> Dict[str, str]:
     """
     Busca información de inteligencia en el historial del caso para Apto SE.
     """
@@ -261,7 +298,7 @@ def buscar_inteligencia_historia(sigges, root, estado_caso: str, pre_oa_data: Op
     
     # 4. Búsqueda en textos de OA si aún no es apto
     if not es_apto_se:
-        f_sic, d_sic = sigges.leer_sic_desde_caso(root, 0)
+        f_sic, d_sic = pre_sic_data if pre_sic_data is not None else sigges.leer_sic_desde_caso(root, 0)
         todos_textos = (p or []) + (diag or []) + (d_sic or [])
         for txt in todos_textos:
             if kw in (txt or "").lower():
@@ -289,13 +326,15 @@ def buscar_inteligencia_historia(sigges, root, estado_caso: str, pre_oa_data: Op
         "apto_se": "SI" if es_apto_se else "NO",
         "obs_folio": obs_folio_final
     }
-def buscar_folio_vih(sigges, root, folio_vih_codigos: List[str], pre_oa_data: Optional[List[Tuple]] = None) -> Dict[str, Any]:
+def buscar_folio_vih(sigges, root, folio_vih_codigos: List[str], pre_oa_data: Optional[List[Tuple]] = None,
+                     pre_prest_data: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
     """
     Busca códigos VIH específicos en OA y retorna el más reciente de cada uno,
     marcando además si el folio fue usado en Prestaciones Otorgadas (PO).
     
     Args:
         pre_oa_data: (folio, dt, cod, deriv, f_str) ya obtenidos para evitar doble lectura.
+        pre_prest_data: Prestaciones ya leídas (snapshot del caso) para evitar releer PO.
     """
     out = {"results": {}, "folios_usados": set()}
     if not folio_vih_codigos:
@@ -316,6 +355,8 @@ def buscar_folio_vih(sigges, root, folio_vih_codigos: List[str], pre_oa_data: Op
                 dt = dparse(f_oa[i]) if i < len(f_oa) else None
                 if dt:
                     oa_recalc.append((fol, dt, c_oa[i], d_oa[i], f_oa[i]))
+        except CapturaIncompleta:
+            raise
         except Exception as e:
             log_warn(f"❌ No se pudieron leer OAs para Folio VIH: {e}")
             return out
@@ -325,14 +366,19 @@ def buscar_folio_vih(sigges, root, folio_vih_codigos: List[str], pre_oa_data: Op
     
     # 2. Leer Prestaciones para ver qué folios están en uso (Usar método nativo robusto)
     try:
-        tb = sigges._prestaciones_tbody(root)
-        if tb:
-            prestaciones_data = sigges.leer_prestaciones_desde_tbody(tb)
+        if pre_prest_data is not None:
+            prestaciones_data = pre_prest_data
+        else:
+            tb = sigges._prestaciones_tbody(root)
+            prestaciones_data = sigges.leer_prestaciones_desde_tbody(tb) if tb else []
+        if prestaciones_data:
             for prest in prestaciones_data:
                 ref = prest.get("referencia", "") or ""
                 ref_clean = _norm(ref).lower().replace("oa", "").strip()
                 if ref_clean:
                     out["folios_usados"].add(ref_clean)
+    except CapturaIncompleta:
+        raise
     except Exception as e:
         log_warn(f"❌ Error leyendo uso de folios en PO: {e}")
     # 3. Procesar OAs y buscar lo más reciente para CADA código configurado
@@ -359,13 +405,13 @@ def buscar_folio_vih(sigges, root, folio_vih_codigos: List[str], pre_oa_data: Op
         }
     
     return out
-def buscar_codigos_en_prestaciones(prest: List[Dict[str, str]], cods: List[str], 
+def buscar_codigos_en_prestaciones(prest: Union[List[Dict[str, str]], PrestacionesIndex], cods: List[str],
                                   fobj: Optional[datetime], mostrar_futuras: bool = False) -> List[Tuple[str, datetime, bool]]:
     """
     Busca códigos en la lista de prestaciones con filtrado de fecha opcional.
     
     Args:
-        prest: Lista de prestaciones {fecha, codigo, glosa, ref}
+        prest: Lista de prestaciones {fecha, codigo, glosa, ref} o su PrestacionesIndex
         cods: Códigos a buscar
         fobj: Fecha de la nómina (para filtrar)
         mostrar_futuras: Si True, incluye prestaciones con fecha > fobj
@@ -374,28 +420,22 @@ def buscar_codigos_en_prestaciones(prest: List[Dict[str, str]], cods: List[str],
         Lista de tuplas (codigo, fecha, is_future) ordenadas por fecha desc
     """
     cods_norm = {normalizar_codigo(c) for c in (cods or []) if str(c).strip()}
+    indice = indice_prestaciones(prest)
+    corte = fobj if fobj and not mostrar_futuras else None
     out = []
-    for p in prest or []:
-        c_norm = normalizar_codigo(p.get("codigo", ""))
-        if not c_norm or c_norm not in cods_norm:
-            continue
-        f = dparse(p.get("fecha", ""))
-        if not f: continue
-        
-        is_future = False
-        if fobj and f > fobj:
-            if not mostrar_futuras: continue
-            is_future = True
-            
-        out.append((c_norm, f, is_future))
-    return sorted(out, key=lambda x: x[1], reverse=True)
-def listar_fechas_objetivo(prest: List[Dict[str, str]], cod: str, 
+    for c_norm in cods_norm:
+        for f, pos in indice.entradas(c_norm, hasta=corte):
+            out.append((c_norm, f, bool(fobj and f > fobj), pos))
+    # Fecha desc; a igual fecha, el orden original de la lista
+    out.sort(key=lambda x: (x[1], -x[3]), reverse=True)
+    return [x[:3] for x in out]
+def listar_fechas_objetivo(prest: Union[List[Dict[str, str]], PrestacionesIndex], cod: str,
                            fobj: Optional[datetime]) -> List[datetime]:
     """
     Lista todas las fechas de un código de objetivo.
     
     Args:
-        prest: Lista de prestaciones
+        prest: Lista de prestaciones o su PrestacionesIndex
         cod: Código del objetivo
         fobj: Fecha de la nómina
         
@@ -405,23 +445,26 @@ def listar_fechas_objetivo(prest: List[Dict[str, str]], cod: str,
     cod_norm = normalizar_codigo(cod)
     if not cod_norm:
         return []
-    dts = []
-    for p in prest or []:
-        if normalizar_codigo(p.get("codigo", "")) != cod_norm:
-            continue
-        dt = dparse(p.get("fecha", ""))
-        if not dt:
-            continue
-        if fobj and dt > fobj:
-            continue
-        dts.append(dt)
+    dts = indice_prestaciones(prest).fechas(cod_norm, hasta=fobj or None)
     return sorted(set(dts), reverse=True)
+def _desde_snap(snap: Dict[str, Any], clave: str, lector):
+    """Usa la sección del snapshot JS del caso si existe; si no, el lector DOM."""
+    if snap.get(clave) is not None:
+        return snap[clave]
+    return lector()
 def get_objetivos_config(m: Dict[str, Any]) -> List[str]:
     """Obtiene lista de códigos de objetivos de una misión."""
     objs = _parse_code_list(m.get("objetivos", []))
     if not objs and m.get("objetivo"):
         objs = _parse_code_list(m.get("objetivo"))
     return [o for o in objs if o]
+def _revisa_hab_excl(m: Dict[str, Any]) -> Tuple[bool, bool]:
+    """
+    (habilitantes, excluyentes) de la propia misión, con el mismo criterio que
+    _set_globals_for_mission. No se leen los globales: en la pasada única y con
+    evaluadores paralelos conviven varias misiones a la vez.
+    """
+    return bool(m.get("habilitantes", [])), bool(m.get("excluyentes", []))
 def cols_mision(m: Dict[str, Any]) -> List[str]:
     """
     Genera lista de columnas para el Excel de una misión.
@@ -451,8 +494,9 @@ def cols_mision(m: Dict[str, Any]) -> List[str]:
 
     # 3. Habilitantes y Excluyentes (NUEVA UBICACIÓN: Después de Objetivos)
     # Habilitantes
+    revisar_habs, revisar_excl = _revisa_hab_excl(m)
     habs_cfg = _parse_code_list(m.get("habilitantes", []))
-    if REVISAR_HABILITANTES and habs_cfg:
+    if revisar_habs and habs_cfg:
         # Dynamic columns for each Habilitante code
         for hab_code in habs_cfg:
             cols.append(f"Hab {hab_code}")
@@ -461,7 +505,7 @@ def cols_mision(m: Dict[str, Any]) -> List[str]:
         
     # Excluyentes
     excl_cfg = _parse_code_list(m.get("excluyentes", []))
-    if REVISAR_EXCLUYENTES and excl_cfg:
+    if revisar_excl and excl_cfg:
         # Dynamic columns for each Excluyente code
         for excl_code in excl_cfg:
             cols.append(f"Excl {excl_code}")
@@ -605,7 +649,7 @@ def analizar_mision(sigges, m: Dict[str, Any], casos_data: List[Dict[str, Any]],
     oa_derivados_list: List[str] = []
     oa_fechas_list: List[str] = []
     # Buscar caso INTELIGENTE
-    caso_seleccionado = seleccionar_caso_inteligente(casos_data, m.get("keywords", []))
+    caso_seleccionado = seleccionar_caso_inteligente(casos_data, matcher_mision(m).keywords)
     
     if caso_seleccionado is None:
         if casos_data:
@@ -641,25 +685,34 @@ def analizar_mision(sigges, m: Dict[str, Any], casos_data: List[Dict[str, Any]],
     prestaciones = []
     folios_oa_encontrados = []
     
+    # =========================================================================
+    # 📸 SNAPSHOT DEL CASO - UNA SOLA LLAMADA JS PARA IPD/OA/APS/SIC/PO
+    # Las secciones que el snapshot no resuelva se leen con los lectores DOM.
+    # =========================================================================
+    snap = sigges.leer_snapshot_caso(root) or {}
+
     # =========================================================================
     # 🧠 EXTRACCIÓN MAESTRA (OA) - UNA SOLA VEZ PARA TODO EL ANÁLISIS
     # =========================================================================
     oa_data_master = ([], [], [], [], []) # f, p, d, c, fol
     if req_oa or m.get("folio_vih", False):
         log_debug("🔎 Ejecutando Extracción Maestra de OA...")
-        oa_data_master = sigges.leer_oa_desde_caso(root, 0) # 0 = Todas
+        oa_data_master = _desde_snap(snap, "oa", lambda: sigges.leer_oa_desde_caso(root, 0)) # 0 = Todas
 
     # =========================================================================
     # 🧠 INTELIGENCIA DE HISTORIA (APTO SE + FOLIOS GLOBALES)
     # =========================================================================
     try:
-        intel_data = buscar_inteligencia_historia(sigges, root, res["Estado"], pre_oa_data=oa_data_master)
+        intel_data = buscar_inteligencia_historia(sigges, root, res["Estado"], pre_oa_data=oa_data_master,
+                                                  pre_sic_data=snap.get("sic"))
         res["Apto SE"] = intel_data["apto_se"]
         
         # Si hay observación de folios globales encontrada, la usamos prioritariamente
         if intel_data["obs_folio"]:
             res["Observación Folio"] = intel_data["obs_folio"]
             
+    except CapturaIncompleta:
+        raise
     except Exception as e:
         log_warn(f"Fallo inteligencia historia (Apto SE): {e}")
         res["Apto SE"] = "Error"
@@ -675,7 +728,7 @@ def analizar_mision(sigges, m: Dict[str, Any], casos_data: List[Dict[str, Any]],
             t0 = time.time()
             if should_show_timing():
                 print(f"{Fore.LIGHTBLACK_EX}  - Leer IPD...{Style.RESET_ALL}")
-            f_list, e_list, d_list = sigges.leer_ipd_desde_caso(root, filas_ipd)
+            f_list, e_list, d_list = _desde_snap(snap, "ipd", lambda: sigges.leer_ipd_desde_caso(root, filas_ipd))
             if should_show_timing():
                 log_debug(f"IPD filas: f={len(f_list)} e={len(e_list)} d={len(d_list)}")
             f_list = _trim(f_list, filas_ipd)
@@ -743,7 +796,7 @@ def analizar_mision(sigges, m: Dict[str, Any], casos_data: List[Dict[str, Any]],
             t0 = time.time()
             if should_show_timing():
                 print(f"{Fore.LIGHTBLACK_EX}  - Leer APS...{Style.RESET_ALL}")
-            f_aps, e_aps = sigges.leer_aps_desde_caso(root, filas_aps)
+            f_aps, e_aps = _desde_snap(snap, "aps", lambda: sigges.leer_aps_desde_caso(root, filas_aps))
             if should_show_timing():
                 log_debug(f"APS filas: f={len(f_aps)} e={len(e_aps)}")
             f_aps = _trim(f_aps, filas_aps)
@@ -770,7 +823,7 @@ def analizar_mision(sigges, m: Dict[str, Any], casos_data: List[Dict[str, Any]],
             t0 = time.time()
             if should_show_timing():
                 print(f"{Fore.LIGHTBLACK_EX}  - Leer SIC...{Style.RESET_ALL}")
-            f_sic, d_sic = sigges.leer_sic_desde_caso(root, filas_sic)
+            f_sic, d_sic = _desde_snap(snap, "sic", lambda: sigges.leer_sic_desde_caso(root, filas_sic))
             f_sic = _trim(f_sic, filas_sic)
             d_sic = _trim(d_sic, filas_sic)
             try:
@@ -792,7 +845,8 @@ def analizar_mision(sigges, m: Dict[str, Any], casos_data: List[Dict[str, Any]],
                     if should_show_timing():
                         print(f"{Fore.LIGHTBLACK_EX}  - Leer Folio VIH...{Style.RESET_ALL}")
                     # Inyectar folios_oa_encontrados para evitar doble lectura
-                    vih_data = buscar_folio_vih(sigges, root, folio_vih_codigos, pre_oa_data=folios_oa_encontrados)
+                    vih_data = buscar_folio_vih(sigges, root, folio_vih_codigos, pre_oa_data=folios_oa_encontrados,
+                                                pre_prest_data=snap.get("prestaciones"))
                     results = vih_data.get("results", {})
                     
                     # Guardar folios usados para colorear en Excel
@@ -806,6 +860,8 @@ def analizar_mision(sigges, m: Dict[str, Any], casos_data: List[Dict[str, Any]],
                         res[f"Folio OA ({c})"] = info.get("folio", "")
                         if info:
                             log_info(f"🧬 VIH [{c}] -> Folio {info.get('folio')} ({'Usado' if info.get('usado') else 'No Usado'})")
+                except CapturaIncompleta:
+                    raise
                 except Exception as e_vih:
                     log_error(f"❌ Error en Folio VIH: {e_vih}")
 
@@ -813,8 +869,10 @@ def analizar_mision(sigges, m: Dict[str, Any], casos_data: List[Dict[str, Any]],
         t0 = time.time()
         if should_show_timing():
             print(f"{Fore.LIGHTBLACK_EX}  - Leer prestaciones...{Style.RESET_ALL}")
-        tb = sigges._prestaciones_tbody(root)
-        prestaciones = sigges.leer_prestaciones_desde_tbody(tb) if tb else []
+        prestaciones = snap.get("prestaciones")
+        if prestaciones is None:
+            tb = sigges._prestaciones_tbody(root)
+            prestaciones = sigges.leer_prestaciones_desde_tbody(tb) if tb else []
         
         # --- NUEVO: Capturar folios usados para resaltado verde en Excel ---
         if req_oa and prestaciones:
@@ -833,6 +891,8 @@ def analizar_mision(sigges, m: Dict[str, Any], casos_data: List[Dict[str, Any]],
         dt = (t1-t0)*1000
         if should_show_timing():
             print(f"{Fore.LIGHTBLACK_EX}  - Leer prestaciones -> {dt:.0f}ms ({len(prestaciones)} prest.){Style.RESET_ALL}")
+    except CapturaIncompleta:
+        raise
     except Exception as e:
         log_warn(f"Error procesando caso: {e}")
     finally:
@@ -929,7 +989,7 @@ def analizar_mision(sigges, m: Dict[str, Any], casos_data: List[Dict[str, Any]],
         if should_show_timing():
             log_debug(f"  - Buscando Caso en Contra (Kws: {contra_kws})...")
             
-        contra_case = seleccionar_caso_inteligente(casos_data, contra_kws)
+        contra_case = seleccionar_caso_inteligente(casos_data, matcher_mision(m).contra)
         if contra_case:
             res["Caso en Contra"] = contra_case.get("caso", "")
             res["Estado en Contra"] = contra_case.get("estado", "")
@@ -944,10 +1004,11 @@ def analizar_mision(sigges, m: Dict[str, Any], casos_data: List[Dict[str, Any]],
                 root_c = sigges.expandir_caso(contra_case.get("indice", 0))
                 if root_c:
                     log_debug(f"✅ Caso en Contra expandido. Flags originales: req_ipd={req_ipd}, req_aps={req_aps} -> FORZANDO LECTURA para Contra")
+                    snap_c = sigges.leer_snapshot_caso(root_c) or {}
                     
                     # === IPD CONTRA ===
                     try:
-                        f_ipd_c, e_ipd_c, d_ipd_c = sigges.leer_ipd_desde_caso(root_c, filas_ipd)
+                        f_ipd_c, e_ipd_c, d_ipd_c = _desde_snap(snap_c, "ipd", lambda: sigges.leer_ipd_desde_caso(root_c, filas_ipd))
                         f_ipd_c = _trim(f_ipd_c, filas_ipd)
                         e_ipd_c = _trim(e_ipd_c, filas_ipd)
                         d_ipd_c = _trim(d_ipd_c, filas_ipd)
@@ -957,11 +1018,13 @@ def analizar_mision(sigges, m: Dict[str, Any], casos_data: List[Dict[str, Any]],
                         
                         contra_ipd_dt = dparse(f_ipd_c[0]) if f_ipd_c and f_ipd_c[0] else None
                         contra_ipd_pos = any("si" in (s or "").lower() or "sí" in (s or "").lower() for s in e_ipd_c)
+                    except CapturaIncompleta:
+                        raise
                     except Exception as e_ipd_c:
                         log_warn(f"Error IPD Contra: {e_ipd_c}")
                     # === OA CONTRA ===
                     try:
-                        f_oa_c, p_oa_c, d_oa_c, c_oa_c, fol_oa_c = sigges.leer_oa_desde_caso(root_c, filas_oa)
+                        f_oa_c, p_oa_c, d_oa_c, c_oa_c, fol_oa_c = _desde_snap(snap_c, "oa", lambda: sigges.leer_oa_desde_caso(root_c, filas_oa))
                         f_oa_c = _trim(f_oa_c, filas_oa)
                         p_oa_c = _trim(p_oa_c, filas_oa)
                         d_oa_c = _trim(d_oa_c, filas_oa)
@@ -973,11 +1036,13 @@ def analizar_mision(sigges, m: Dict[str, Any], casos_data: List[Dict[str, Any]],
                         res["Folio OA en Contra"] = join_clean(fol_oa_c)
                         res["Derivado OA en Contra"] = join_clean(p_oa_c)
                         res["Diagnóstico OA en Contra"] = join_clean(d_oa_c)
+                    except CapturaIncompleta:
+                        raise
                     except Exception as e_oa_c:
                         log_warn(f"Error OA Contra: {e_oa_c}")
                     # === APS CONTRA ===
                     try:
-                        f_aps_c, e_aps_c = sigges.leer_aps_desde_caso(root_c, filas_aps)
+                        f_aps_c, e_aps_c = _desde_snap(snap_c, "aps", lambda: sigges.leer_aps_desde_caso(root_c, filas_aps))
                         f_aps_c = _trim(f_aps_c, filas_aps)
                         e_aps_c = _trim(e_aps_c, filas_aps)
                         
@@ -986,22 +1051,28 @@ def analizar_mision(sigges, m: Dict[str, Any], casos_data: List[Dict[str, Any]],
                         
                         contra_aps_dt = dparse(f_aps_c[0]) if f_aps_c and f_aps_c[0] else None
                         contra_aps_pos = any(kw in (s or "").lower() for s in (e_aps_c or []) for kw in ["confirm", "sospecha", "tratamiento"])
+                    except CapturaIncompleta:
+                        raise
                     except Exception as e_aps_c:
                         log_warn(f"Error APS Contra: {e_aps_c}")
                     # === SIC CONTRA ===
                     try:
-                        f_sic_c, d_sic_c = sigges.leer_sic_desde_caso(root_c, filas_sic)
+                        f_sic_c, d_sic_c = _desde_snap(snap_c, "sic", lambda: sigges.leer_sic_desde_caso(root_c, filas_sic))
                         f_sic_c = _trim(f_sic_c, filas_sic)
                         d_sic_c = _trim(d_sic_c, filas_sic)
                         
                         res["Fecha SIC en Contra"] = join_clean(f_sic_c)
                         res["Derivado SIC en Contra"] = join_clean(d_sic_c)
+                    except CapturaIncompleta:
+                        raise
                     except Exception as e_sic_c:
                         log_warn(f"Error SIC Contra: {e_sic_c}")
                 else:
                     log_warn("âŒ No se pudo obtener root_c para Caso en Contra")
                 if root_c:
                     sigges.cerrar_caso_por_indice(contra_case.get("indice", 0))
+            except CapturaIncompleta:
+                raise
             except Exception as e_contra:
                 log_error(f"âŒ Error leyendo detalles Caso en Contra: {e_contra}")
                 pass
@@ -1013,12 +1084,14 @@ def analizar_mision(sigges, m: Dict[str, Any], casos_data: List[Dict[str, Any]],
             if contra_apertura_dt and apertura_principal_dt and contra_apertura_dt > apertura_principal_dt:
                 tokens_caso.append("Apertura + Reciente")
             res["Apto Caso"] = " | ".join(tokens_caso) if tokens_caso else "No"
+    # Índice de prestaciones por código: lo comparten objetivos, frecuencias, habilitantes y excluyentes
+    indice_prest = PrestacionesIndex(prestaciones)
     # ===== OBJETIVOS =====
     objetivos_cfg = get_objetivos_config(m)
     # Buscar fechas de cada objetivo
     obj_info = []
     for cod in objetivos_cfg:
-        dts = listar_fechas_objetivo(prestaciones, cod, fobj)
+        dts = listar_fechas_objetivo(indice_prest, cod, fobj)
         obj_info.append((cod, dts))
     # Ordenar por fecha más reciente
     obj_info.sort(key=lambda x: x[1][0] if x[1] else datetime.min, reverse=True)
@@ -1092,7 +1165,7 @@ def analizar_mision(sigges, m: Dict[str, Any], casos_data: List[Dict[str, Any]],
              code = rule.get("code")
              if not code: continue
              # Validar usando el método estático
-             val_res = FrequencyValidator.validar(prestaciones, rule, fobj)
+             val_res = FrequencyValidator.validar(indice_prest, rule, fobj)
              
              freq_res[code] = {
                  "status": val_res.get("result_str", "Error"),
@@ -1128,8 +1201,8 @@ def analizar_mision(sigges, m: Dict[str, Any], casos_data: List[Dict[str, Any]],
         res["Period CodxAño"] = m.get("periodicidad", "") or m.get("frecuencia", "").capitalize()
     # ===== HABILITANTES =====
     habs_cfg = _parse_code_list(m.get("habilitantes", []))
-    if REVISAR_HABILITANTES and habs_cfg:
-        habs_found = buscar_codigos_en_prestaciones(prestaciones, habs_cfg, fobj)
+    if _revisa_hab_excl(m)[0] and habs_cfg:
+        habs_found = buscar_codigos_en_prestaciones(indice_prest, habs_cfg, fobj)
         
         # Group found dates by code
         # habs_found is list of tuples (code_norm, dt, is_future)
@@ -1162,7 +1235,7 @@ def analizar_mision(sigges, m: Dict[str, Any], casos_data: List[Dict[str, Any]],
     # ===== EXCLUYENTES =====
     excl_cfg = _parse_code_list(m.get("excluyentes", []))
     if excl_cfg:
-        excl_found = buscar_codigos_en_prestaciones(prestaciones, excl_cfg, fobj)
+        excl_found = buscar_codigos_en_prestaciones(indice_prest, excl_cfg, fobj)
         
         # Group found dates by code
         excl_map = {}
@@ -1187,7 +1260,7 @@ def analizar_mision(sigges, m: Dict[str, Any], casos_data: List[Dict[str, Any]],
             # Obtener referencias de prestaciones del Ãºltimo año
             refs_prestaciones = []
             for p in prestaciones:
-                p_dt = dparse(p.get("fecha", ""))
+                p_dt = dparse_registro(p)
                 if p_dt and p_dt >= un_ano_atras:
                     refs_prestaciones.append(_norm(p.get("ref", "")))
             # Normalizar códigos a buscar si el filtro está activo
@@ -1221,13 +1294,214 @@ def analizar_mision(sigges, m: Dict[str, Any], casos_data: List[Dict[str, Any]],
     # GUARDIAN DEL ORDEN: Asegurar que Excel use EXACTAMENTE el orden definido en cols_mision
     res["_cols_order"] = all_cols
     return res
+def _esperar_documento_listo(sigges, timeout: float = 30.0) -> bool:
+    """Espera a que el documento termine de cargar (readyState) y el spinner desaparezca."""
+    limite = time.time() + timeout
+    while time.time() < limite:
+        try:
+            if sigges.driver.execute_script("return document.readyState") == "complete":
+                break
+        except Exception:
+            pass
+        time.sleep(0.1)
+    else:
+        return False
+    try:
+        sigges.esperar_spinner(appear_timeout=0.3)
+    except Exception:
+        return False
+    return True
+def _aplicar_recuperacion(sigges, accion: str) -> None:
+    """
+    Ejecuta la acción de recuperación elegida por el programador de reintentos.
+    - reencontrar: no navega; el Paso 1 vuelve a ubicar los elementos.
+    - renavegar: vuelve a Búsqueda de Paciente.
+    - refrescar: refresh + espera de carga real + Búsqueda de Paciente.
+    """
+    if accion == ACCION_REENCONTRAR:
+        return
+    if accion == ACCION_REFRESCAR:
+        try:
+            sigges.driver.refresh()
+            if _esperar_documento_listo(sigges):
+                log_info("✅ Refresh ejecutado")
+            else:
+                log_warn("⚠️ La página no terminó de cargar tras el refresh")
+        except Exception as e:
+            log_error(f"Error en refresh: {e}")
+    sigges.asegurar_submenu_ingreso_consulta_abierto(force=True)
+    sigges.ir(XPATHS["BUSQUEDA_URL"])
 # =============================================================================
 #                       PROCESAR UN PACIENTE
 # =============================================================================
-def procesar_paciente(sigges, row, idx, total, t_script_inicio: float) -> Tuple[List[Dict[str, Any]], bool]:
+def _vigilante_de(sigges) -> Optional[VigilanteSesion]:
+    """Vigilante de sesión de esta pestaña (None si está desactivado)."""
+    if not VIGILANTE_SESION:
+        return None
+    if getattr(sigges, "vigilante", None) is None:
+        sigges.vigilante = VigilanteSesion(sigges, ttl_s=float(SESION_INACTIVIDAD_MIN) * 60,
+                                           url_ping=SESION_PING_URL)
+    return sigges.vigilante
+
+_cache_pacientes: Optional[CachePacientes] = None
+def _obtener_cache_pacientes() -> Optional[CachePacientes]:
+    """Caché de capturas por paciente (None si está desactivada o no se pudo abrir)."""
+    global _cache_pacientes
+    if not CACHE_PACIENTES:
+        return None
+    if _cache_pacientes is None:
+        try:
+            _cache_pacientes = CachePacientes(ttl_horas=CACHE_PACIENTES_TTL_HORAS, max_pacientes=CACHE_PACIENTES_MAX)
+        except OSError as e:
+            log_warn(f"Caché de pacientes no disponible: {pretty_error(e)}")
+            return None
+    return _cache_pacientes
+def _guardar_captura(cache: Optional[CachePacientes], captura: CapturaPaciente) -> None:
+    if cache is None:
+        return
+    try:
+        cache.guardar(captura)
+    except (OSError, TypeError, ValueError) as e:
+        log_warn(f"{captura.rut}: no se pudo guardar en caché ({pretty_error(e)})")
+def _resolver_keywords(mini: List[Dict[str, Any]], misiones: List[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], str]:
+    """Primer caso de la mini-tabla que calce con alguna keyword de las misiones."""
+    for m in misiones:
+        matcher = matcher_mision(m).keywords
+        if not matcher:
+            continue
+        # Primera keyword que coincida, romper inmediatamente
+        caso, raz = resolver_casos_keywords(mini, matcher)
+        if caso:
+            return caso, raz
+    return None, ""
+def _casos_por_entrada(mini: List[Dict[str, Any]],
+                       entradas: List[Tuple[Dict[str, Any], str, str, str]]) -> List[Optional[Dict[str, Any]]]:
+    """Caso de la mini-tabla que calza con las keywords de CADA misión (None = sin match)."""
+    casos = []
+    for m, _, _, _ in entradas:
+        kws = matcher_mision(m).keywords
+        casos.append(resolver_casos_keywords(mini, kws)[0] if kws else None)
+    return casos
+def _entradas_con_match(mini: List[Dict[str, Any]], entradas: List[Tuple[Dict[str, Any], str, str, str]]
+                        ) -> List[Tuple[Dict[str, Any], str, str, str]]:
+    return [e for e, caso in zip(entradas, _casos_por_entrada(mini, entradas)) if caso is not None]
+def _filas_sin_match(entradas: List[Tuple[Dict[str, Any], str, str, str]], rut: str,
+                     mini: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Filas "S/N: Caso1, Caso2..." cuando la mini-tabla no calza con ninguna keyword."""
+    nombres_unicos = []
+    for c in mini:
+        n = str(c.get("caso", "Desc")).strip()
+        if n not in nombres_unicos:
+            nombres_unicos.append(n)
+    sn_report = "S/N: " + ", ".join(nombres_unicos)
+    return [vac_row(m, fecha_m, rut, nombre_m, sn_report) for m, _, fecha_m, nombre_m in entradas]
+def _analizar_entradas(sg, entradas: List[Tuple[Dict[str, Any], str, str, str]], rut: str,
+                       mini: List[Dict[str, Any]], casos_data: List[Dict[str, Any]], fall_dt, edad
+                       ) -> List[Dict[str, Any]]:
+    """
+    analizar_mision por cada entrada, sobre la misma cartola (viva o capturada), con el
+    caso que calza con las keywords de esa misión. Una misión sin match recibe su fila
+    "S/N", igual que si se hubiera corrido sola.
+    """
+    res_paci = []
+    for entrada, caso in zip(entradas, _casos_por_entrada(mini, entradas)):
+        if caso is None:
+            res_paci.extend(_filas_sin_match([entrada], rut, mini))
+            continue
+        m, _, fecha_m, nombre_m = entrada
+        res_paci.append(analizar_mision(
+            sg, m, casos_data, dparse(fecha_m), fecha_m, fall_dt, edad, rut, nombre_m,
+            caso_info=caso
+        ))
+    return res_paci
+def _resultados_desde_captura(captura: CapturaPaciente,
+                              entradas: List[Tuple[Dict[str, Any], str, str, str]]) -> List[Dict[str, Any]]:
+    """
+    Re-evalúa las misiones sobre una captura guardada, sin navegador.
+    Lanza CapturaIncompleta si el análisis necesita algo que no se leyó.
+    """
+    if not captura.mini:
+        raise CapturaIncompleta("Captura sin mini-tabla")
+    caso_encontrado, _ = _resolver_keywords(captura.mini, [e[0] for e in entradas])
+    if caso_encontrado is None:
+        return _marcar_desde_cache(captura, _filas_sin_match(entradas, captura.rut, captura.mini))
+    if captura.casos is None:
+        raise CapturaIncompleta("Captura sin cartola")
+    return _marcar_desde_cache(captura, _analizar_entradas(SiggesReplay(captura), entradas, captura.rut,
+                                                           captura.mini, captura.casos, captura.fallecido,
+                                                           captura.edad))
+def _marcar_desde_cache(captura: CapturaPaciente, filas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Deja constancia en 'Observación' de las filas evaluadas sobre una captura de la caché en disco."""
+    if not captura.desde_cache:
+        return filas
+    nota = f"Desde caché (leído de SIGGES el {datetime.fromtimestamp(captura.ts):%d-%m-%Y %H:%M})"
+    for fila in filas:
+        obs = fila.get("Observación") or ""
+        fila["Observación"] = f"{obs} | {nota}" if obs else nota
+    return filas
+def _cerrar_paciente(idx, total, entradas: List[Tuple[Dict[str, Any], str, str, str]], resuelto: bool,
+                     res_paci: List[Dict[str, Any]]) -> None:
+    """Resumen de consola del paciente + orden de columnas para el exportador."""
+    misiones = [e[0] for e in entradas]
+    _, rut, fecha, nombre = entradas[0] if entradas else (None, "", "", "")
+    # Flags (superconjunto de secciones de las misiones del paciente) para resumen
+    req_ipd = any(bool(m.get("require_ipd", REVISAR_IPD)) for m in misiones) if misiones else REVISAR_IPD
+    req_oa = any(bool(m.get("require_oa", REVISAR_OA)) for m in misiones) if misiones else REVISAR_OA
+    req_aps = any(bool(m.get("require_aps", REVISAR_APS)) for m in misiones) if misiones else REVISAR_APS
+    req_sic = any(bool(m.get("require_sic", REVISAR_SIC)) for m in misiones) if misiones else REVISAR_SIC
+    # 📊 Timing: Resumen del paciente
+    t_resumen_start = time.time()
+    resumen_paciente(
+        idx + 1, total, nombre, rut, fecha,
+        {"ok": resuelto, "saltado": not resuelto},
+        res_paci, req_ipd, req_oa, req_aps, req_sic, MAX_REINTENTOS_POR_PACIENTE
+    )
+    dt_resumen = (time.time() - t_resumen_start)*1000
+    if dt_resumen > 100:
+        print(f"{Fore.LIGHTBLACK_EX}    [Resumen paciente] → {dt_resumen:.0f}ms{Style.RESET_ALL}")
+    # Anotar orden de columnas para el exportador (evita duplicados/desorden)
+    _inject_cols_order(res_paci, misiones)
+def _casos_necesarios(entradas: List[Tuple[Dict[str, Any], str, str, str]],
+                      casos_data: List[Dict[str, Any]]) -> List[int]:
+    """Índices de los casos que analizar_mision va a expandir: keywords y caso en contra de cada misión."""
+    indices: List[int] = []
+    for m, _, _, _ in entradas:
+        matcher = matcher_mision(m)
+        caso = seleccionar_caso_inteligente(casos_data, matcher.keywords)
+        if caso is None:
+            continue
+        candidatos = [caso]
+        if matcher.contra:
+            candidatos.append(seleccionar_caso_inteligente(casos_data, matcher.contra))
+        for c in candidatos:
+            if c is not None and c.get("indice", 0) not in indices:
+                indices.append(c.get("indice", 0))
+    return indices
+def _precapturar_casos(grabador: SiggesGrabador, entradas: List[Tuple[Dict[str, Any], str, str, str]],
+                       casos_data: List[Dict[str, Any]]) -> None:
+    """
+    Expande en lote (SesionCasos) los casos que analizar_mision va a necesitar y
+    los lee una vez cada uno para dejarlos en la captura.
+    """
+    indices = _casos_necesarios(entradas, casos_data)
+    grabador.expandir_lote(indices)
+    for i in indices:
+        grabador.expandir_caso(i)
+def procesar_paciente(sigges, row, idx, total, t_script_inicio: float,
+                      entradas: Optional[List[Tuple[Dict[str, Any], str, str, str]]] = None,
+                      diferir: Optional[Callable[[CapturaPaciente, List[Tuple[Dict[str, Any], str, str, str]]], None]] = None
+                      ) -> Tuple[Optional[List[Dict[str, Any]]], bool]:
     """
     Procesa un paciente completo con validaciones exhaustivas y recovery inteligente.
     
+    Con `entradas` [(misión, rut, fecha, nombre), ...] el paciente se busca una sola vez
+    y se analiza cada misión con su propia fecha/nombre (pasada única multi-misión);
+    sin ellas se usa la fila y ACTIVE_MISSIONS como siempre.
+    
+    Con `diferir`, el navegador solo extrae: deja los casos necesarios en una captura,
+    llama diferir(captura, entradas) y retorna (None, True). La evaluación de reglas
+    y el resumen los hace un evaluador (ver _iterar_con_evaluadores).
+    
     VALIDACIONES PRE-VUELO (Fail Fast):
     - Valida RUT antes de buscar
     - Valida fecha antes de procesar
@@ -1235,7 +1509,7 @@ def procesar_paciente(sigges, row, idx, total, t_script_inicio: float) -> Tuple[
     - Detecta mantenimiento de página
     
     RECOVERY INTELIGENTE:
-    - Reintentos con backoff exponencial
+    - Reintentos adaptativos (espera y recuperación según error y latencia SIGGES)
     - Skip automático tras MAX_REINTENTOS
     - Continuación con siguiente paciente
     
@@ -1243,26 +1517,49 @@ def procesar_paciente(sigges, row, idx, total, t_script_inicio: float) -> Tuple[
         Tupla (lista de resultados por misión, éxito bool)
     """
     # Validar columnas
-    max_idx = max(INDICE_COLUMNA_RUT, INDICE_COLUMNA_FECHA, INDICE_COLUMNA_NOMBRE or 0)
-    if len(row) <= max_idx:
-        log_error(f"Fila {idx+1}: columnas insuficientes")
-        return [], False
+    if entradas is None:
+        max_idx = max(INDICE_COLUMNA_RUT, INDICE_COLUMNA_FECHA, INDICE_COLUMNA_NOMBRE or 0)
+        if len(row) <= max_idx:
+            log_error(f"Fila {idx+1}: columnas insuficientes")
+            return [], False
     try:
-        rut = normalizar_rut(str(row.iloc[INDICE_COLUMNA_RUT]).strip())
-        fecha = solo_fecha(row.iloc[INDICE_COLUMNA_FECHA])
+        if entradas is None:
+            rut = normalizar_rut(str(row.iloc[INDICE_COLUMNA_RUT]).strip())
+            fecha = solo_fecha(row.iloc[INDICE_COLUMNA_FECHA])
+            nombre = str(row.iloc[INDICE_COLUMNA_NOMBRE]).strip() if INDICE_COLUMNA_NOMBRE else ""
+            entradas = [(m, rut, fecha, nombre) for m in ACTIVE_MISSIONS]
+        else:
+            _, rut, fecha, nombre = entradas[0]
         fobj = dparse(fecha)
-        nombre = str(row.iloc[INDICE_COLUMNA_NOMBRE]).strip() if INDICE_COLUMNA_NOMBRE else ""
+        misiones = [e[0] for e in entradas]
         intento = 0
         resuelto = False
         res_paci = []
-        # Flags globales para resumen (evitar NameError si falla dentro)
-        req_ipd = any(bool(m.get("require_ipd", REVISAR_IPD)) for m in MISSIONS) if MISSIONS else REVISAR_IPD
-        req_oa = any(bool(m.get("require_oa", REVISAR_OA)) for m in MISSIONS) if MISSIONS else REVISAR_OA
-        req_aps = any(bool(m.get("require_aps", REVISAR_APS)) for m in MISSIONS) if MISSIONS else REVISAR_APS
-        req_sic = any(bool(m.get("require_sic", REVISAR_SIC)) for m in MISSIONS) if MISSIONS else REVISAR_SIC
         
         # FIX: Inicializar variable para evitar NameError si falla el cálculo
         selected_year_code = None
+        ultimo_error: Optional[Exception] = None
+        
+        # 💾 Caché de pacientes: re-evaluar sin navegador si hay captura vigente
+        cache = _obtener_cache_pacientes()
+        if cache is not None and not get_execution_control().should_force_refresh():
+            captura = cache.obtener(rut)
+            if captura is not None and diferir is not None:
+                log_info(f"{rut}: 💾 Desde caché ({(time.time() - captura.ts) / 3600:.1f} h)")
+                diferir(captura, entradas)
+                return None, True
+            if captura is not None:
+                try:
+                    res_paci = _resultados_desde_captura(captura, entradas)
+                    resuelto = True
+                    log_info(f"{rut}: 💾 Desde caché ({(time.time() - captura.ts) / 3600:.1f} h)")
+                except CapturaIncompleta as e:
+                    log_debug(f"{rut}: caché incompleta ({e}), se lee SIGGES")
+        # 🔐 Sesión: chequeo/keep-alive/re-login ANTES del paciente (fuera de sus reintentos)
+        vigilante = _vigilante_de(sigges) if not resuelto else None
+        if vigilante is not None:
+            vigilante.entre_pacientes()
+        relogins = 0
         while intento < MAX_REINTENTOS_POR_PACIENTE and not resuelto:
             intento += 1
             try:
@@ -1272,58 +1569,24 @@ def procesar_paciente(sigges, row, idx, total, t_script_inicio: float) -> Tuple[
                     if not is_valid:
                         raise FatalConnectionError(error_msg)
                 
-                # 🔄 ESTRATEGIA DE REINTENTOS PROGRESIVA (6 intentos con tiempos incrementales)
+                # 🔄 ESTRATEGIA DE REINTENTOS ADAPTATIVA (espera y acción según error + latencia SIGGES)
+                huella = None
                 if intento == 1:
-                    # Reintento 1: Optimizado (Sin espera artificial)
-                    # log_warn(f"🔄 Intento 1... (Rápido)") 
-                    # time.sleep(0.5) # Pequeña pausa técnica solamente
-                    sigges.asegurar_submenu_ingreso_consulta_abierto(force=True)
-                    sigges.ir(XPATHS["BUSQUEDA_URL"])
-                    
-                elif intento == 2:
-                    # Reintento 2: Normal, espera 10 segundos
-                    log_warn(f"🔄 Reintento 2/{MAX_REINTENTOS_POR_PACIENTE} para {rut} - Espera extendida")
-                    time.sleep(10)  # Espera 10 segundos
-                    sigges.asegurar_submenu_ingreso_consulta_abierto(force=True)
-                    sigges.ir(XPATHS["BUSQUEDA_URL"])
-                    
-                elif intento == 3:
-                    # Reintento 3: REFRESH + espera 10 segundos
-                    log_warn(f"🔄 Reintento 3/{MAX_REINTENTOS_POR_PACIENTE} para {rut} - REFRESH DE PÃGINA")
-                    try:
-                        sigges.driver.refresh()
-                        log_info("✅ Refresh ejecutado en reintento 3")
-                    except Exception as e:
-                        log_error(f"âŒ Error en refresh reintento 3: {e}")
-                    time.sleep(10)  # Espera 10 segundos para que cargue completamente
-                    sigges.asegurar_submenu_ingreso_consulta_abierto(force=True)
-                    sigges.ir(XPATHS["BUSQUEDA_URL"])
-                    
-                elif intento == 4:
-                    # Reintento 4: Normal, espera 10 segundos
-                    log_warn(f"🔄 Reintento 4/{MAX_REINTENTOS_POR_PACIENTE} para {rut}")
-                    time.sleep(10)  # Espera 10 segundos
-                    sigges.asegurar_submenu_ingreso_consulta_abierto(force=True)
-                    sigges.ir(XPATHS["BUSQUEDA_URL"])
-                    
-                elif intento == 5:
-                    # Reintento 5: Normal, espera 10 segundos
-                    log_warn(f"🔄 Reintento 5/{MAX_REINTENTOS_POR_PACIENTE} para {rut}")
-                    time.sleep(10)  # Espera 10 segundos
-                    sigges.asegurar_submenu_ingreso_consulta_abierto(force=True)
-                    sigges.ir(XPATHS["BUSQUEDA_URL"])
-                    
-                elif intento == 6:
-                    # Reintento 6: REFRESH FINAL + espera 30 segundos
-                    log_warn(f"🔄 Reintento 6/{MAX_REINTENTOS_POR_PACIENTE} para {rut} - REFRESH FINAL CON ESPERA EXTENDIDA")
-                    try:
-                        sigges.driver.refresh()
-                        log_info("✅ Refresh final ejecutado en reintento 6")
-                    except Exception as e:
-                        log_error(f"âŒ Error en refresh reintento 6: {e}")
-                    time.sleep(30)  # Espera 30 segundos (máximo) para estabilizar
-                    sigges.asegurar_submenu_ingreso_consulta_abierto(force=True)
-                    sigges.ir(XPATHS["BUSQUEDA_URL"])
+                    # Intento 1: Optimizado (Sin espera artificial)
+                    # ⚡ Dentro de la SPA: cambio de paciente por router, sin recargar
+                    huella = sigges.ir_a_busqueda_spa() if CAMBIO_PACIENTE_SPA else None
+                    if huella is None:
+                        sigges.asegurar_submenu_ingreso_consulta_abierto(force=True)
+                        sigges.ir(XPATHS["BUSQUEDA_URL"])
+                else:
+                    plan = programador_reintentos.planificar(ultimo_error, intento - 1)
+                    log_warn(
+                        f"🔄 Reintento {intento}/{MAX_REINTENTOS_POR_PACIENTE} para {rut} - "
+                        f"{plan.accion} tras {plan.delay:.2f}s ({plan.categoria.value})"
+                    )
+                    if plan.delay > 0:
+                        time.sleep(plan.delay)
+                    _aplicar_recuperacion(sigges, plan.accion)
                 # ðŸ§  NUEVO TIMING SYSTEM: Robusto y automático
                 from Z_Utilidades.Principales.Timing2 import TimingContext
                 
@@ -1346,6 +1609,7 @@ def procesar_paciente(sigges, row, idx, total, t_script_inicio: float) -> Tuple[
                 with TimingContext("Paso 3 - Escribir RUT + Click Buscar", rut):
                     el.clear()
                     el.send_keys(rut)
+                    t_resp = time.time()
                     if not sigges.click_buscar():
                         log_warn("Botón buscar no encontrado, reintentando...")
                         raise Exception("Botón buscar no encontrado")
@@ -1353,15 +1617,30 @@ def procesar_paciente(sigges, row, idx, total, t_script_inicio: float) -> Tuple[
                 # Paso 4: Esperar spinner (OPTIMIZADO: 0.5s en vez de 1s)
                 # RAZÃ“N: Spinner aparece en <300ms normalmente
                 # SEGURO: Si tarda más, WebDriverWait lo detecta igual
+                # Si la búsqueda ya reportó señal de resultado, solo se espera un spinner ya visible
+                senal = sigges.ultima_senal_busqueda
                 with TimingContext("Paso 4 - Esperar spinner", rut):
-                    sigges.esperar_spinner(appear_timeout=0.5, clave_espera="search_wait_results")
+                    sigges.esperar_spinner(appear_timeout=0.0 if senal in SENALES_DEFINITIVAS else 0.5,
+                                           clave_espera="search_wait_results")
+                    programador_reintentos.registrar_respuesta(time.time() - t_resp)
+                    # Sin recarga la mini-tabla anterior sigue en el DOM hasta que llega la nueva
+                    if huella is not None and not sigges.resultados_renovados(huella.resultados, rut):
+                        raise Exception("Mini-tabla sin cambios tras búsqueda sin recarga")
+                    sigges.marcar_resultados(rut)
+                if vigilante is not None:
+                    vigilante.actividad()
                 
+                captura = CapturaPaciente(rut)
                 # Paso 5: Leer mini-tabla
                 with TimingContext("Paso 5 - Leer mini-tabla", rut) as ctx:
                     mini = leer_mini_tabla(sigges)
                     
-                    # 🔄 REINTENTO INTELIGENTE si está vacío (pudo ser fallo de carga)
-                    if not mini:
+                    # SIGGES ya respondió a la búsqueda: releer sin volver a enviarla
+                    if not mini and senal in (SENAL_TABLA, SENAL_XHR):
+                        sigges.esperar_spinner(appear_timeout=0.5)
+                        mini = leer_mini_tabla(sigges)
+                    # 🔄 REINTENTO INTELIGENTE si está vacío y no hubo respuesta (pudo ser fallo de carga)
+                    elif not mini and senal not in SENALES_DEFINITIVAS:
                         log_warn(f"{rut}: Mini-tabla vacía, reintentando búsqueda en 2s...")
                         time.sleep(2)
                         sigges.click_buscar()
@@ -1376,8 +1655,8 @@ def procesar_paciente(sigges, row, idx, total, t_script_inicio: float) -> Tuple[
                     log_error(f"{rut}: ❌ Sin Mini-Tabla detectada tras reintento")
                     # Crear fila con fondo rojo (metadata) y saltar
                     res_paci = []
-                    for m in MISSIONS:
-                        row = vac_row(m, fecha, rut, nombre, "Sin Mini-Tabla")
+                    for m, _, fecha_m, nombre_m in entradas:
+                        row = vac_row(m, fecha_m, rut, nombre_m, "Sin Mini-Tabla")
                         row["_status_red"] = True # Flag para Excel_Revision
                         res_paci.append(row)
                     resuelto = True
@@ -1386,47 +1665,19 @@ def procesar_paciente(sigges, row, idx, total, t_script_inicio: float) -> Tuple[
                 # ✅ Hay casos - procesar rápidamente
                 log_info(f"{rut}: ✅ {len(mini)} caso(s) encontrado(s)")
                 
-                # Optimizar búsqueda de keywords
-                from Z_Utilidades.Motor.Mini_Tabla import resolver_casos_duplicados
+                captura.mini = mini
                 
-                # 5ï¸âƒ£.1 Resolver keywords
+                # 5ï¸âƒ£.1 Resolver keywords (primera keyword que coincida)
                 with TimingContext("Paso 5.1 - Resolver keywords", rut):
-                    caso_encontrado = None
-                    razon = ""
-                    
-                    # OPTIMIZADO: Buscar solo primera keyword que coincida
-                    for m in MISSIONS:
-                        keywords = m.get("keywords", [])
-                        if not keywords:
-                            continue
-                        # Primera keyword que coincida, romper inmediatamente
-                        for kw in keywords:
-                            caso, raz = resolver_casos_duplicados(mini, kw)
-                            if caso:
-                                caso_encontrado = caso
-                                razon = raz
-                                break
-                        if caso_encontrado:
-                            break
+                    caso_encontrado, razon = _resolver_keywords(mini, misiones)
                 
                 # Reportar y Decidir SALTO
                 if caso_encontrado:
                     log_info(f"{rut}: {razon}")
                 else:
                     log_info(f"{rut}: ⚠️ Casos detectados pero sin match de keywords. Saltando a siguiente...")
-                    # Construir string S/N: Caso1, Caso2...
-                    nombres_encontrados = [str(c.get("caso", "Desc")).strip() for c in mini]
-                    # Eliminar duplicados manteniendo orden
-                    nombres_unicos = []
-                    for n in nombres_encontrados:
-                        if n not in nombres_unicos: nombres_unicos.append(n)
-                    
-                    sn_report = "S/N: " + ", ".join(nombres_unicos)
-                    
-                    res_paci = []
-                    for m in MISSIONS:
-                        row = vac_row(m, fecha, rut, nombre, sn_report)
-                        res_paci.append(row)
+                    res_paci = _filas_sin_match(entradas, rut, mini)
+                    _guardar_captura(cache, captura)
                     
                     resuelto = True
                     continue
@@ -1474,15 +1725,28 @@ def procesar_paciente(sigges, row, idx, total, t_script_inicio: float) -> Tuple[
                             log_warn(f"⏳ Esperando carga de cartola... ({intentos_lectura}/{max_intentos_lectura})")
                     else:
                         break # Si mini-tabla dijo NO, confiamos en la primera lectura vacía
-                # Analizar cada misión
-                res_paci = []
-                for m_idx, m in enumerate(ACTIVE_MISSIONS, 1):
-                    # Analizar misión
-                    r = analizar_mision(
-                        sigges, m, casos_data, fobj, fecha, fall_dt, edad, rut, nombre, 
-                        caso_info=caso_encontrado  # Puede ser None o el caso encontrado
-                    )
-                    res_paci.append(r)
+                # Analizar cada misión (misma cartola ya cargada, fecha/nombre de cada nómina).
+                # El grabador guarda cada caso expandido para la caché de pacientes.
+                captura.edad, captura.fallecido, captura.casos = edad, fall_dt, casos_data
+                # Los casos que piden las misiones se abren en lote y quedan abiertos
+                # hasta dejar al paciente (se colapsan todos juntos al final)
+                sesion_casos = SesionCasos(sigges)
+                grabador = SiggesGrabador(sesion_casos, captura)
+                try:
+                    if diferir is not None and casos_data:
+                        _precapturar_casos(grabador, _entradas_con_match(mini, entradas), casos_data)
+                        _guardar_captura(cache, captura)
+                        programador_reintentos.registrar_exito()
+                        diferir(captura, entradas)
+                        return None, True
+                    if casos_data:
+                        grabador.expandir_lote(_casos_necesarios(_entradas_con_match(mini, entradas), casos_data))
+                    res_paci = _analizar_entradas(grabador, entradas, rut,
+                                                  mini, casos_data, fall_dt, edad)
+                finally:
+                    sesion_casos.cerrar_todo()
+                if casos_data:
+                    _guardar_captura(cache, captura)
                 
                 resuelto = True
             except Exception as e:
@@ -1500,26 +1764,33 @@ def procesar_paciente(sigges, row, idx, total, t_script_inicio: float) -> Tuple[
                     # Propagar para abortar ejecución completa
                     raise FatalConnectionError(str(e))
                 
+                # Sesión caída y recuperada: el intento no cuenta contra el paciente
+                if (vigilante is not None and relogins < vigilante.max_relogin
+                        and vigilante.recuperar_si_caida()):
+                    relogins += 1
+                    intento -= 1
+                    log_info(f"{rut}: 🔐 Sesión recuperada, se repite el intento {intento + 1} sin contarlo")
+                    continue
+                
                 # Error transiente - mostrar y continuar con reintentos
+                ultimo_error = e
+                programador_reintentos.registrar_fallo()
                 log_error(f"{rut}: Error en intento {intento}: {pretty_error(e)}")
                 if intento >= MAX_REINTENTOS_POR_PACIENTE:
                     log_warn(f"âŒ {rut}: Saltado tras {intento} intentos")
                 # Diagnosticar tipo de error para debugging
                 clasificar_error(e, silencioso=False)
-        if not resuelto:
+        if resuelto:
+            programador_reintentos.registrar_exito()
+        else:
             # ⚠️ Paciente saltado después de agotar todos los reintentos
             log_warn(f"⚠️ Paciente {rut} SALTADO tras {MAX_REINTENTOS_POR_PACIENTE} reintentos")
             
             # 🔄 CRÃTICO: Refresh completo para limpiar estado corrupto antes de siguiente paciente
             try:
                 log_info("🔄 Ejecutando refresh POST-REINTENTOS para limpiar estado corrupto...")
-                sigges.driver.refresh()
-                time.sleep(10)  # Espera 10 segundos para recarga completa
-                
-                log_info("🧭 Navegando a pantalla de búsqueda limpia...")
-                sigges.asegurar_submenu_ingreso_consulta_abierto(force=True)
-                sigges.ir(XPATHS["BUSQUEDA_URL"])
-                time.sleep(3)  # Espera adicional para estabilizar
+                # Refresh + espera de carga real (sin sleeps fijos) + navegación a búsqueda
+                _aplicar_recuperacion(sigges, ACCION_REFRESCAR)
                 
                 log_ok("✅ Estado limpiado exitosamente - listo para siguiente paciente")
                 
@@ -1530,40 +1801,279 @@ def procesar_paciente(sigges, row, idx, total, t_script_inicio: float) -> Tuple[
             # 🔧 Razón detallada de omisión + datos básicos poblados
             skip_reason = f"Paciente Saltado Automáticamente ({MAX_REINTENTOS_POR_PACIENTE} intentos fallidos)"
             res_paci = []
-            for m in ACTIVE_MISSIONS:
-                row = vac_row(m, fecha, rut, nombre, skip_reason)
+            for m, _, fecha_m, nombre_m in entradas:
+                row = vac_row(m, fecha_m, rut, nombre_m, skip_reason)
                 # Asegurar que datos básicos estén presentes
                 row["RUT"] = rut
-                row["Nombre"] = nombre  
-                row["Fecha Nómina"] = fecha
+                row["Nombre"] = nombre_m
+                row["Fecha Nómina"] = fecha_m
                 row["Observación"] = skip_reason
                 res_paci.append(row)
-        # 📊 Timing: Resumen del paciente
-        t_resumen_start = time.time()
-        resumen_paciente(
-            idx + 1, total, nombre, rut, fecha,
-            {"ok": resuelto, "saltado": not resuelto},
-            res_paci, req_ipd, req_oa, req_aps, req_sic, MAX_REINTENTOS_POR_PACIENTE
-        )
-        t_resumen_end = time.time()
-        dt_resumen = (t_resumen_end - t_resumen_start)*1000
-        if dt_resumen > 100:
-            print(f"{Fore.LIGHTBLACK_EX}    [Resumen paciente] â†’ {dt_resumen:.0f}ms{Style.RESET_ALL}")
-        # Anotar orden de columnas para el exportador (evita duplicados/desorden)
-        _inject_cols_order(res_paci)
+        _cerrar_paciente(idx, total, entradas, resuelto, res_paci)
         return res_paci, resuelto
     except Exception as e:
         clasificar_error(e)
         return [], False
 ACTIVE_MISSIONS: List[Dict[str, Any]] = MISSIONS
 # Helper para inyectar metadatos de orden de columnas
-def _inject_cols_order(rows: List[Dict[str, Any]]) -> None:
+def _inject_cols_order(rows: List[Dict[str, Any]], misiones: Optional[List[Dict[str, Any]]] = None) -> None:
     try:
-        for i, m in enumerate(ACTIVE_MISSIONS):
+        for i, m in enumerate(misiones if misiones is not None else ACTIVE_MISSIONS):
             if i < len(rows) and "_cols_order" not in rows[i]:
                 rows[i]["_cols_order"] = cols_mision(m)
     except Exception:
         pass
+def _nombre_fila(row: pd.Series) -> str:
+    try:
+        return str(row.iloc[INDICE_COLUMNA_NOMBRE]).strip() if INDICE_COLUMNA_NOMBRE is not None else ""
+    except Exception:
+        return ""
+def _filas_prevuelo_invalidas(row: pd.Series, rut: str, fecha: str, motivo: str) -> List[Dict[str, Any]]:
+    """Filas de reporte para un paciente descartado en el pre-vuelo (sin abrir SIGGES)."""
+    nombre = _nombre_fila(row)
+    if not fecha:
+        fecha = str(row.iloc[INDICE_COLUMNA_FECHA]) if len(row) > INDICE_COLUMNA_FECHA else ""
+    filas = [vac_row(m, fecha, rut, nombre, f"Saltado (pre-vuelo): {motivo}") for m in ACTIVE_MISSIONS]
+    _inject_cols_order(filas)
+    return filas
+def _filas_desde_prevuelo(plan, replicables: Dict[Any, Tuple[List[Dict[str, Any]], bool]],
+                          idx: Any, row: pd.Series) -> Tuple[List[Dict[str, Any]], bool]:
+    """Resuelve sin navegador una fila inválida o duplicada (copia del representante)."""
+    if idx in plan.invalidas:
+        return _filas_prevuelo_invalidas(row, plan.ruts.get(idx, ""), plan.fechas.get(idx, ""),
+                                         plan.invalidas[idx]), False
+    filas, ok = replicables[plan.representante[idx]]
+    return replicar_filas(filas, _nombre_fila(row)), ok
+def _contar_resultado(stats: Dict[str, int], filas: List[Dict[str, Any]], ok: bool) -> None:
+    if ok:
+        stats["exitosos"] += 1
+    elif filas and "saltado" in str(filas[0].get("Observación", "")).lower():
+        stats["saltados"] += 1
+    else:
+        stats["fallidos"] += 1
+# =============================================================================
+#                      PESTAÑAS PARALELAS (POOL DE WORKERS)
+# =============================================================================
+def _pestanas_para_mision(m: Dict[str, Any]) -> int:
+    """Pestañas pedidas por la misión ("pestanas_paralelas"), acotadas por el tope global."""
+    try:
+        pedidas = int(m.get("pestanas_paralelas", 1) or 1)
+    except (TypeError, ValueError):
+        pedidas = 1
+    return max(1, min(pedidas, max(1, int(MAX_PESTANAS_PARALELAS))))
+def _abrir_pestana_worker():
+    """Conecta un SiggesDriver nuevo a la MISMA sesión debug de Edge y le abre una pestaña propia."""
+    sg = iniciar_driver(DIRECCION_DEBUG_EDGE, EDGE_DRIVER_PATH)
+    sg.driver.switch_to.new_window("tab")
+    return sg
+def _cerrar_pestana_worker(sg) -> None:
+    """Cierra la pestaña del worker y suelta su sesión de WebDriver (Edge sigue abierto)."""
+    try:
+        sg.driver.close()
+    except Exception:
+        pass
+    try:
+        sg.driver.quit()
+    except Exception:
+        pass
+def _iterar_en_pestanas(sesion: Dict[str, Any], df: pd.DataFrame, total: int, t_script_inicio: float, n_tabs: int,
+                        bitacora: Optional[BitacoraPacientes] = None,
+                        hechos: Optional[Dict[Any, Tuple[List[Dict[str, Any]], bool]]] = None):
+    """
+    Procesa la nómina con N pestañas de la misma sesión CDP de Edge.
+    
+    - La pestaña 1 es la del driver principal (`sesion["sigges"]`); las demás se abren
+      con su propio SiggesDriver.
+    - Todas toman filas de una cola compartida.
+    - Entrega (idx, filas, ok) en el ORDEN de entrada, a medida que se completa el prefijo.
+    - Las filas en `hechos` (bitácora de una corrida anterior) no se encolan; cada
+      resultado nuevo se registra en la bitácora apenas termina su pestaña.
+    
+    Si una pestaña pierde la conexión se reabre una vez (la 1 reconecta Edge como el
+    modo secuencial y deja el driver nuevo en `sesion["sigges"]`); si vuelve a fallar,
+    la fila vuelve a la cola y esa pestaña se retira. Las filas que queden en la cola
+    cuando ya no hay pestañas las procesa este mismo hilo con el driver principal;
+    solo si tampoco se recupera se propaga FatalConnectionError.
+    """
+    hechos = hechos or {}
+    cola_filas: "queue.Queue[Tuple[Any, Any]]" = queue.Queue()
+    orden = []
+    for idx, row in df.iterrows():
+        if idx not in hechos:
+            cola_filas.put((idx, row))
+        orden.append(idx)
+    cola_res: "queue.Queue[Tuple[str, Any, Any]]" = queue.Queue()
+    def _worker(n: int) -> None:
+        principal = n == 1
+        sg = None
+        if not principal:
+            try:
+                sg = _abrir_pestana_worker()
+                log_info(f"🗂️ Pestaña {n} lista")
+            except Exception as e:
+                log_warn(f"⚠️ Pestaña {n}: no se pudo abrir ({pretty_error(e)})")
+                cola_res.put(("fin", n, None))
+                return
+        try:
+            while True:
+                try:
+                    idx, row = cola_filas.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    if principal:
+                        filas, ok = _procesar_reconectando(sesion, row, idx, total, t_script_inicio)
+                    else:
+                        try:
+                            filas, ok = procesar_paciente(sg, row, idx, total, t_script_inicio)
+                        except FatalConnectionError:
+                            log_warn(f"â›” Pestaña {n}: sesión perdida. Reabriendo y reintentando el mismo paciente...")
+                            _cerrar_pestana_worker(sg)
+                            sg = None
+                            sg = _abrir_pestana_worker()
+                            filas, ok = procesar_paciente(sg, row, idx, total, t_script_inicio)
+                except Exception as e2:
+                    log_error(f"âŒ Pestaña {n}: no se pudo recuperar ({pretty_error(e2)}). Se retira del pool.")
+                    cola_filas.put((idx, row))
+                    return
+                if bitacora is not None:
+                    bitacora.registrar(idx, filas, ok)
+                cola_res.put(("ok", idx, (filas, ok)))
+        finally:
+            if sg is not None:
+                _cerrar_pestana_worker(sg)
+            cola_res.put(("fin", n, None))
+    hilos = [
+        threading.Thread(target=_worker, args=(n,), daemon=True, name=f"Pestana-{n}")
+        for n in range(1, n_tabs + 1)
+    ]
+    for h in hilos:
+        h.start()
+    pendientes: Dict[Any, Tuple[List[Dict[str, Any]], bool]] = dict(hechos)
+    pos = 0
+    vivos = len(hilos)
+    while True:
+        # Liberar en orden de entrada todo lo que ya esté listo
+        while pos < len(orden) and orden[pos] in pendientes:
+            filas, ok = pendientes.pop(orden[pos])
+            yield orden[pos], filas, ok
+            pos += 1
+        if vivos > 0:
+            tipo, clave, payload = cola_res.get()
+            if tipo == "fin":
+                vivos -= 1
+            else:
+                pendientes[clave] = payload
+            continue
+        if pos >= len(orden):
+            break
+        # Sin pestañas vivas: filas devueltas a la cola por una pestaña retirada
+        try:
+            idx, row = cola_filas.get_nowait()
+        except queue.Empty:
+            break
+        log_warn(f"🗂️ Fila {idx + 1} quedó sin pestaña: la procesa la pestaña principal")
+        filas, ok = _procesar_reconectando(sesion, row, idx, total, t_script_inicio)
+        if bitacora is not None:
+            bitacora.registrar(idx, filas, ok)
+        pendientes[idx] = (filas, ok)
+    if pos < len(orden):
+        raise FatalConnectionError(f"Todas las pestañas perdieron la sesión ({len(orden) - pos} filas sin procesar)")
+# =============================================================================
+#                 PIPELINE NAVEGADOR → EVALUADORES DE REGLAS
+# =============================================================================
+def _procesar_reconectando(sesion: Dict[str, Any], row, n: int, total: int, t_script_inicio: float,
+                           entradas=None, diferir=None):
+    """procesar_paciente con UNA reconexión de Edge ante sesión perdida (igual que el loop secuencial)."""
+    try:
+        return procesar_paciente(sesion["sigges"], row, n, total, t_script_inicio, entradas=entradas, diferir=diferir)
+    except FatalConnectionError:
+        log_warn("â›” Sesión perdida. Reintentando reiniciar Edge y continuar con el mismo paciente...")
+        try:
+            sesion["sigges"].driver.quit()
+        except Exception:
+            pass
+        try:
+            sesion["sigges"] = iniciar_driver(DIRECCION_DEBUG_EDGE, EDGE_DRIVER_PATH)
+            return procesar_paciente(sesion["sigges"], row, n, total, t_script_inicio,
+                                     entradas=entradas, diferir=diferir)
+        except Exception as e2:
+            raise FatalConnectionError(str(e2))
+def _iterar_con_evaluadores(sesion: Dict[str, Any], tareas, total: int, t_script_inicio: float,
+                            n_evaluadores: int):
+    """
+    Procesa `tareas` (clave, row, entradas) entregando (clave, filas, ok) en el orden de entrada.
+    La clave (índice de fila) es también el número que se muestra en el resumen del paciente.
+    
+    El hilo del navegador solo extrae datos (captura del paciente) y los deja en una
+    cola acotada; `n_evaluadores` hilos corren analizar_mision + resumen_paciente sobre
+    la captura mientras Selenium ya busca el siguiente RUT. La cola llena frena al
+    navegador. Si una evaluación necesita algo que no se capturó, ese paciente se
+    re-procesa en vivo en el hilo del navegador. Con 0 evaluadores es secuencial.
+    
+    `sesion["sigges"]` se actualiza si hubo que reconectar Edge.
+    """
+    cola: "queue.Queue[Optional[Tuple[int, Any, CapturaPaciente, Any]]]" = queue.Queue(maxsize=max(1, 2 * n_evaluadores))
+    listos: Dict[int, Tuple[str, Any, bool]] = {}
+    cond = threading.Condition()
+    def _publicar(n: int, estado: str, filas, ok: bool) -> None:
+        with cond:
+            listos[n] = (estado, filas, ok)
+            cond.notify_all()
+    def _evaluador() -> None:
+        while True:
+            item = cola.get()
+            if item is None:
+                return
+            n, clave, captura, entradas = item
+            try:
+                filas = _resultados_desde_captura(captura, entradas)
+            except CapturaIncompleta as e:
+                log_debug(f"{captura.rut}: evaluación diferida incompleta ({e}); vuelve al navegador")
+                _publicar(n, "vivo", None, False)
+                continue
+            except Exception as e:
+                log_warn(f"{captura.rut}: error evaluando reglas ({pretty_error(e)}); vuelve al navegador")
+                _publicar(n, "vivo", None, False)
+                continue
+            try:
+                _cerrar_paciente(clave, total, entradas, True, filas)
+            except Exception as e:
+                log_warn(f"{captura.rut}: no se pudo imprimir resumen ({pretty_error(e)})")
+            _publicar(n, "ok", filas, True)
+    hilos = [threading.Thread(target=_evaluador, daemon=True, name=f"Evaluador-{i}")
+             for i in range(1, n_evaluadores + 1)]
+    for h in hilos:
+        h.start()
+    pendientes: Dict[int, Tuple[Any, Any, Any]] = {}
+    siguiente = 0
+    def _liberar(esperar: bool):
+        nonlocal siguiente
+        while siguiente in pendientes:
+            with cond:
+                while esperar and siguiente not in listos:
+                    cond.wait()
+                if siguiente not in listos:
+                    return
+                estado, filas, ok = listos.pop(siguiente)
+            clave, row, entradas = pendientes.pop(siguiente)
+            if estado == "vivo":
+                filas, ok = _procesar_reconectando(sesion, row, clave, total, t_script_inicio, entradas=entradas)
+            yield clave, filas, ok
+            siguiente += 1
+    try:
+        for n, (clave, row, entradas) in enumerate(tareas):
+            pendientes[n] = (clave, row, entradas)
+            diferir = (lambda captura, ent, n=n, clave=clave: cola.put((n, clave, captura, ent))) if hilos else None
+            filas, ok = _procesar_reconectando(sesion, row, clave, total, t_script_inicio,
+                                               entradas=entradas, diferir=diferir)
+            if filas is not None:
+                _publicar(n, "ok", filas, ok)
+            yield from _liberar(esperar=False)
+        yield from _liberar(esperar=True)
+    finally:
+        for _ in hilos:
+            cola.put(None)
 # =============================================================================
 #                      EJECUTAR REVISIÃ“N COMPLETA
 # =============================================================================
@@ -1597,6 +2107,159 @@ def _set_globals_for_mission(m: Dict[str, Any]) -> None:
     FOLIO_VIH_CODIGOS = m.get("folio_vih_codigos", [])
     REVISAR_HABILITANTES = bool(m.get("habilitantes", []))
     REVISAR_EXCLUYENTES = bool(m.get("excluyentes", []))
+def _cargar_mision_pasada_unica(m: Dict[str, Any], m_idx: int) -> Optional[Dict[str, Any]]:
+    """Carga nómina, bitácora y pre-vuelo de una misión para la pasada única."""
+    _set_globals_for_mission(m)
+    ruta_in = m.get("ruta_entrada", RUTA_ARCHIVO_ENTRADA)
+    nombre_m = m.get("nombre", f"Mision_{m_idx}")
+    if not os.path.exists(ruta_in):
+        log_error(f"Archivo no existe para la misión {nombre_m}: {ruta_in}")
+        return None
+    try:
+        import warnings
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
+            df = pd.read_excel(ruta_in)
+        log_ok(f"Excel cargado ({nombre_m}): {len(df)} filas")
+    except Exception as e:
+        log_error(f"Error cargando Excel de {nombre_m}: {pretty_error(e)}")
+        return None
+    bitacora = BitacoraPacientes(m, ruta_in)
+    try:
+        hechos = bitacora.cargar()
+    except Exception as e:
+        log_warn(f"No se pudo leer bitácora ({pretty_error(e)}); se procesa desde cero")
+        hechos = {}
+    plan = prevuelo_nomina(df, INDICE_COLUMNA_RUT, INDICE_COLUMNA_FECHA)
+    log_info(f"🧮 Pre-vuelo {nombre_m}: {plan.resumen(len(df))}")
+    ruta_out = m.get("ruta_salida", RUTA_CARPETA_SALIDA)
+    return {
+        "m": m, "nombre": nombre_m, "ruta_in": ruta_in, "ruta_out": ruta_out, "df": df,
+        "plan": plan, "bitacora": bitacora, "hechos": hechos,
+        "nombres": {idx: _nombre_fila(row) for idx, row in df.iterrows()},
+        "filas": {},                                   # idx -> (filas, ok) de esta corrida
+        "llegadas": {0: []},                           # orden de llegada (snapshots)
+        "snapshot": SnapshotIncremental(nombre_m, ruta_out),
+    }
+def _usar_pasada_unica(misiones: List[Dict[str, Any]]) -> bool:
+    """
+    Pasada única solo con varias misiones y ninguna con pestañas paralelas: es
+    secuencial, y una cola paralela no debe volverse más lenta sin avisar.
+    """
+    if not PASADA_UNICA_MULTIMISION or len(misiones) < 2:
+        return False
+    paralelas = [m.get("nombre", "?") for m in misiones if _pestanas_para_mision(m) > 1]
+    if paralelas:
+        log_info(f"🗂️ Pasada única desactivada: {', '.join(map(str, paralelas))} usa pestañas paralelas; "
+                 f"las misiones se procesan una por una")
+        return False
+    return True
+def _ejecutar_pasada_unica(sigges, misiones: List[Dict[str, Any]], tiempo_inicio_global: datetime) -> bool:
+    """
+    Pasada única multi-misión.
+    
+    Toma la unión de RUT de todas las nóminas en cola y busca/abre cada paciente en
+    SIGGES UNA sola vez, leyendo el superconjunto de secciones que piden sus misiones.
+    Sobre esa cartola ya cargada corre analizar_mision por cada fila de nómina que lo
+    incluye (con su propia fecha/nombre). Al final genera un Excel por misión, en el
+    orden de su nómina. Modo secuencial: solo se usa si ninguna misión pide
+    pestañas paralelas (ver _usar_pasada_unica).
+    """
+    global ACTIVE_MISSIONS
+    cargas = [c for c in (_cargar_mision_pasada_unica(m, i) for i, m in enumerate(misiones, 1)) if c]
+    if not cargas:
+        return False
+    # Unión de pacientes en orden de primera aparición (misión, fila)
+    pacientes: Dict[str, List[Tuple[int, Any]]] = {}
+    for c_i, c in enumerate(cargas):
+        plan = c["plan"]
+        for idx in c["df"].index:
+            if idx in c["hechos"] or not plan.debe_procesar(idx):
+                continue
+            pacientes.setdefault(plan.ruts[idx], []).append((c_i, idx))
+    total = len(pacientes)
+    filas_totales = sum(len(refs) for refs in pacientes.values())
+    log_info(f"🧭 Pasada única: {total} pacientes para {filas_totales} filas de {len(cargas)} misiones "
+             f"({filas_totales - total} búsquedas ahorradas)")
+    mostrar_banner(" + ".join(c["nombre"] for c in cargas), cargas[0]["ruta_in"], total)
+    t_script_inicio = time.time()
+    def _cerrar_todo() -> None:
+        for c in cargas:
+            c["snapshot"].cerrar()
+            c["bitacora"].cerrar()
+    lista = list(pacientes.items())
+    tareas = ((n, None, [(cargas[c_i]["m"], rut, cargas[c_i]["plan"].fechas[idx], cargas[c_i]["nombres"][idx])
+                         for c_i, idx in refs])
+              for n, (rut, refs) in enumerate(lista))
+    sesion = {"sigges": sigges}
+    try:
+        for n, res_paci, ok in _iterar_con_evaluadores(sesion, tareas, total, t_script_inicio,
+                                                       max(0, int(EVALUADORES_PARALELOS))):
+            if n > 0 and n % 50 == 0:
+                gc.collect()
+            # Repartir el resultado: una fila por entrada, a la misión que la pidió
+            for k, (c_i, idx) in enumerate(lista[n][1]):
+                c = cargas[c_i]
+                filas = [res_paci[k]] if k < len(res_paci) else []
+                c["bitacora"].registrar(idx, filas, ok)
+                c["filas"][idx] = (filas, ok)
+                c["llegadas"][0].extend(filas)
+            # Snapshot bajo demanda (botón "Guardar Ahora"): una hoja CSV por misión, en orden de llegada
+            control = get_execution_control()
+            if control.should_snapshot():
+                control.clear_snapshot_request()
+                for c in cargas:
+                    try:
+                        c["snapshot"].solicitar(c["llegadas"])
+                    except Exception as e:
+                        log_warn(f"No se pudo guardar snapshot ({c['nombre']}): {pretty_error(e)}")
+    except FatalConnectionError as e:
+        log_error(f"❌ No se pudo recuperar sesión: {pretty_error(e)}")
+        _cerrar_todo()
+        return False
+    # Ensamblar cada misión en el orden de su nómina y generar su Excel
+    for c in cargas:
+        m = c["m"]
+        ACTIVE_MISSIONS = [m]
+        globals()["MISSIONS"] = [m]
+        _set_globals_for_mission(m)
+        c["snapshot"].cerrar()
+        plan = c["plan"]
+        resultados_por_mision = {0: []}
+        stats = {"exitosos": 0, "fallidos": 0, "saltados": 0}
+        replicables: Dict[Any, Tuple[List[Dict[str, Any]], bool]] = {}
+        for idx, row in c["df"].iterrows():
+            if idx in c["hechos"]:
+                filas, ok = c["hechos"][idx]
+            elif idx in c["filas"]:
+                filas, ok = c["filas"][idx]
+            else:
+                filas, ok = _filas_desde_prevuelo(plan, replicables, idx, row)
+            if idx in plan.con_duplicados:
+                replicables[idx] = (filas, ok)
+            _contar_resultado(stats, filas, ok)
+            resultados_por_mision[0].extend(filas[:1])
+        archivo_salida = generar_excel_revision(resultados_por_mision, [m], c["nombre"], c["ruta_out"])
+        c["bitacora"].cerrar(completada=bool(archivo_salida))
+        mostrar_resumen_final(
+            stats["exitosos"], stats["fallidos"], stats["saltados"],
+            tiempo_inicio_global, archivo_salida or "Error"
+        )
+        _notificar_mision(c["nombre"], stats)
+    return True
+def _notificar_mision(nombre_m: str, stats: Dict[str, int]) -> None:
+    """Notificación de sistema al terminar una misión."""
+    # ðŸ”” NOTIFICACIÃ“N DE SISTEMA ðŸ””
+    try:
+        msg_notif = f"✅ Revisión completada con éxito.\n📊 Exitosos: {stats['exitosos']} | Fallidos: {stats['fallidos']}"
+        if stats['fallidos'] > 0:
+             msg_notif = f"⚠️ Revisión finalizada con observaciones.\nâŒ Fallidos: {stats['fallidos']} | Exitosos: {stats['exitosos']}"
+        get_notifications().send_system_notification(
+            title=f"Nozhgess: {nombre_m}",
+            message=msg_notif
+        )
+    except Exception as e:
+        log_warn(f"No se pudo enviar notificación: {e}")
 def ejecutar_revision() -> bool:
     """
     Ejecuta todas las misiones configuradas, una tras otra (cola).
@@ -1618,6 +2281,9 @@ def ejecutar_revision() -> bool:
         log_error(traceback.format_exc())
         return False
     try:
+        # Varias misiones en cola: cada paciente se visita una sola vez para todas
+        if _usar_pasada_unica(list(MISSIONS)):
+            return _ejecutar_pasada_unica(sigges, list(MISSIONS), tiempo_inicio_global)
         for m_idx, m in enumerate(MISSIONS, 1):
             # Preparar entorno para la misión actual
             ACTIVE_MISSIONS = [m]
@@ -1643,78 +2309,107 @@ def ejecutar_revision() -> bool:
                 log_error(f"Error cargando Excel de {nombre_m}: {pretty_error(e)}")
                 continue
             total = len(df)
+            # Bitácora durable: reanudar filas ya procesadas en una corrida anterior
+            bitacora = BitacoraPacientes(m, ruta_in)
+            try:
+                hechos = bitacora.cargar()
+            except Exception as e:
+                log_warn(f"No se pudo leer bitácora ({pretty_error(e)}); se procesa desde cero")
+                hechos = {}
+            if hechos:
+                log_info(f"♻️ Reanudando {nombre_m}: {len(hechos)}/{total} filas ya procesadas (bitácora)")
+            # Pre-vuelo: RUT/fechas inválidos y duplicados exactos se resuelven sin navegador
+            plan = prevuelo_nomina(df, INDICE_COLUMNA_RUT, INDICE_COLUMNA_FECHA)
+            log_info(f"🧮 Pre-vuelo: {plan.resumen(total)}")
+            replicables: Dict[Any, Tuple[List[Dict[str, Any]], bool]] = {}
             resultados_por_mision = {0: []}
+            snapshot = SnapshotIncremental(nombre_m, ruta_out)
             stats = {"exitosos": 0, "fallidos": 0, "saltados": 0}
             archivo_salida = ""
             mostrar_banner(nombre_m, ruta_in, total)
             t_script_inicio = time.time()
             if should_show_timing():
                 print(f"{Fore.YELLOW}â±ï¸ Timer global iniciado - timing acumulativo continuo{Style.RESET_ALL}\n")
-            for idx, row in df.iterrows():
-                if idx > 0 and idx % 50 == 0:
-                    gc.collect()
-                try:
-                    filas, ok = procesar_paciente(sigges, row, idx, total, t_script_inicio)
-                except FatalConnectionError:
-                    log_warn("â›” Sesión perdida. Reintentando reiniciar Edge y continuar con el mismo paciente...")
-                    # Intentar reiniciar driver una sola vez
-                    try:
-                        sigges.driver.quit()
-                    except Exception:
-                        pass
-                    try:
-                        sigges = iniciar_driver(DIRECCION_DEBUG_EDGE, EDGE_DRIVER_PATH)
-                        filas, ok = procesar_paciente(sigges, row, idx, total, t_script_inicio)
-                    except Exception as e2:
-                        log_error(f"âŒ No se pudo recuperar sesión: {pretty_error(e2)}")
-                        return False
-                if ok:
-                    stats["exitosos"] += 1
-                elif filas and "saltado" in str(filas[0].get("Observación", "")).lower():
-                    stats["saltados"] += 1
-                else:
-                    stats["fallidos"] += 1
+            def _registrar(filas: List[Dict[str, Any]], ok: bool) -> None:
+                _contar_resultado(stats, filas, ok)
                 for i, fila in enumerate(filas):
                     if i in resultados_por_mision:
                         resultados_por_mision[i].append(fila)
-                # Snapshot bajo demanda (botón "Guardar Ahora")
+                # Snapshot bajo demanda (botón "Guardar Ahora"): solo filas nuevas, en segundo plano
                 control = get_execution_control()
                 if control.should_snapshot():
                     control.clear_snapshot_request()
                     try:
-                        snap_name = f"{nombre_m}_SNAP_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                        res_path = generar_excel_revision(
-                            copy.deepcopy(resultados_por_mision), [m],
-                            snap_name, ruta_out
-                        )
-                        if res_path:
-                            log_ok(f"Snapshot guardado: {snap_name}")
-                        else:
-                            log_warn(f"No se pudo guardar snapshot: {snap_name}")
+                        snapshot.solicitar(resultados_por_mision)
                     except Exception as e:
                         log_warn(f"No se pudo guardar snapshot: {pretty_error(e)}")
+            def _registrar_fila(idx: Any, filas: List[Dict[str, Any]], ok: bool) -> None:
+                if idx in plan.con_duplicados:
+                    replicables[idx] = (filas, ok)
+                _registrar(filas, ok)
+            n_tabs = _pestanas_para_mision(m)
+            if n_tabs > 1:
+                log_info(f"🗂️ Modo paralelo: {n_tabs} pestañas (tope global {MAX_PESTANAS_PARALELAS})")
+                sesion = {"sigges": sigges}
+                try:
+                    a_consultar = df.loc[[i for i in df.index if plan.debe_procesar(i)]]
+                    resultados = _iterar_en_pestanas(sesion, a_consultar, total, t_script_inicio, n_tabs,
+                                                     bitacora=bitacora, hechos=hechos)
+                    # Las pestañas entregan en orden de entrada; se intercalan las filas del pre-vuelo
+                    for idx, row in df.iterrows():
+                        if not plan.debe_procesar(idx):
+                            _registrar(*_filas_desde_prevuelo(plan, replicables, idx, row))
+                            continue
+                        _, filas, ok = next(resultados)
+                        if idx > 0 and idx % 50 == 0:
+                            gc.collect()
+                        _registrar_fila(idx, filas, ok)
+                except FatalConnectionError as e:
+                    log_error(f"âŒ No se pudo recuperar sesión: {pretty_error(e)}")
+                    bitacora.cerrar()
+                    snapshot.cerrar()
+                    return False
+                finally:
+                    sigges = sesion["sigges"]
+            else:
+                sesion = {"sigges": sigges}
+                tareas = ((idx, row, None) for idx, row in df.iterrows()
+                          if idx not in hechos and plan.debe_procesar(idx))
+                resultados = _iterar_con_evaluadores(sesion, tareas, total, t_script_inicio,
+                                                     max(0, int(EVALUADORES_PARALELOS)))
+                try:
+                    for idx, row in df.iterrows():
+                        if idx in hechos:
+                            _registrar_fila(idx, *hechos[idx])
+                            continue
+                        if not plan.debe_procesar(idx):
+                            _registrar(*_filas_desde_prevuelo(plan, replicables, idx, row))
+                            continue
+                        _, filas, ok = next(resultados)
+                        if idx > 0 and idx % 50 == 0:
+                            gc.collect()
+                        bitacora.registrar(idx, filas, ok)
+                        _registrar_fila(idx, filas, ok)
+                except FatalConnectionError as e:
+                    log_error(f"âŒ No se pudo recuperar sesión: {pretty_error(e)}")
+                    bitacora.cerrar()
+                    snapshot.cerrar()
+                    return False
+                finally:
+                    sigges = sesion["sigges"]
+            # Terminar snapshots pendientes antes del Excel final
+            snapshot.cerrar()
             # Generar Excel para esta misión
             archivo_salida = generar_excel_revision(
                 resultados_por_mision, [m],
                 nombre_m, ruta_out
             )
+            bitacora.cerrar(completada=bool(archivo_salida))
             mostrar_resumen_final(
                 stats["exitosos"], stats["fallidos"], stats["saltados"],
                 tiempo_inicio_global, archivo_salida or "Error"
             )
-            
-            # ðŸ”” NOTIFICACIÃ“N DE SISTEMA ðŸ””
-            try:
-                msg_notif = f"✅ Revisión completada con éxito.\n📊 Exitosos: {stats['exitosos']} | Fallidos: {stats['fallidos']}"
-                if stats['fallidos'] > 0:
-                     msg_notif = f"⚠️ Revisión finalizada con observaciones.\nâŒ Fallidos: {stats['fallidos']} | Exitosos: {stats['exitosos']}"
-                
-                get_notifications().send_system_notification(
-                    title=f"Nozhgess: {nombre_m}",
-                    message=msg_notif
-                )
-            except Exception as e:
-                log_warn(f"No se pudo enviar notificación: {e}")
+            _notificar_mision(nombre_m, stats)
         return True
     except KeyboardInterrupt:
         log_warn("Interrumpido por usuario")
@@ -1722,8 +2417,119 @@ def ejecutar_revision() -> bool:
     except Exception as e:
         log_error(f"Error fatal: {pretty_error(e)}")
         return False
+    finally:
+        # ⏱️ Calibración de esperas (solo con NOZHGESS_CALIBRAR_ESPERAS=1)
+        # (el resumen y el detalle por clave los registra finalizar_calibracion)
+        finalizar_calibracion()
+# =============================================================================
+#                      RE-ANÁLISIS OFFLINE (SIN NAVEGADOR)
+# =============================================================================
+def _reanalizar_lote(m: Dict[str, Any], lote: List[Tuple[Any, Optional[Dict[str, Any]], str, str, str]]
+                     ) -> List[Tuple[Any, List[Dict[str, Any]], bool]]:
+    """
+    Worker del pool: analiza un lote de filas de una misión desde sus capturas.
+    Cada ítem es (idx, captura_dict o None, rut, fecha, nombre).
+    """
+    global ACTIVE_MISSIONS
+    ACTIVE_MISSIONS = [m]
+    _set_globals_for_mission(m)
+    salida = []
+    for idx, cap_dict, rut, fecha, nombre in lote:
+        entradas = [(m, rut, fecha, nombre)]
+        try:
+            if cap_dict is None:
+                raise CapturaIncompleta("sin captura")
+            captura = CapturaPaciente.from_dict(cap_dict)
+            captura.desde_cache = True   # Viene de CachePacientes.obtener (serializada para el pool)
+            filas, ok = _resultados_desde_captura(captura, entradas), True
+        except CapturaIncompleta as e:
+            filas, ok = [vac_row(m, fecha, rut, nombre, f"Saltado (offline): captura incompleta ({e})")], False
+        except Exception as e:
+            filas, ok = [vac_row(m, fecha, rut, nombre, f"Error offline: {pretty_error(e)}")], False
+        _inject_cols_order(filas, [m])
+        salida.append((idx, filas, ok))
+    return salida
+def reanalizar_offline(misiones: Optional[List[Dict[str, Any]]] = None, ruta_cache: Optional[str] = None,
+                       procesos: Optional[int] = None, tam_lote: int = 50) -> List[str]:
+    """
+    Recalcula los Rev_*.xlsx desde las capturas de la caché de pacientes, sin driver.
+    
+    Usa la nómina y la configuración ACTUAL de cada misión (keywords, códigos,
+    max_*, frecuencias...), así que sirve para iterar reglas sobre miles de
+    pacientes en segundos. Las capturas se usan sin importar su antigüedad (sin TTL).
+    Las filas se reparten en lotes sobre un pool de procesos.
+    
+    Returns:
+        Rutas de los Excel generados (una por misión con nómina legible).
+    """
+    global ACTIVE_MISSIONS
+    misiones = list(misiones if misiones is not None else MISSIONS)
+    cache = CachePacientes(directorio=ruta_cache, ttl_horas=0, max_pacientes=CACHE_PACIENTES_MAX)
+    procesos = max(1, int(procesos or os.cpu_count() or 1))
+    generados: List[str] = []
+    for m_idx, m in enumerate(misiones, 1):
+        ACTIVE_MISSIONS = [m]
+        _set_globals_for_mission(m)
+        nombre_m = m.get("nombre", f"Mision_{m_idx}")
+        ruta_in = m.get("ruta_entrada", RUTA_ARCHIVO_ENTRADA)
+        try:
+            import warnings
+            with warnings.catch_warnings():
+                warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
+                df = pd.read_excel(ruta_in)
+        except Exception as e:
+            log_error(f"Error cargando Excel de {nombre_m}: {pretty_error(e)}")
+            continue
+        t0 = time.time()
+        plan = prevuelo_nomina(df, INDICE_COLUMNA_RUT, INDICE_COLUMNA_FECHA)
+        items = []
+        capturas = 0
+        for idx, row in df.iterrows():
+            if not plan.debe_procesar(idx):
+                continue
+            captura = cache.obtener(plan.ruts[idx])
+            capturas += captura is not None
+            items.append((idx, captura.to_dict() if captura else None,
+                          plan.ruts[idx], plan.fechas[idx], _nombre_fila(row)))
+        lotes = [items[i:i + tam_lote] for i in range(0, len(items), max(1, tam_lote))]
+        log_info(f"🧪 Offline {nombre_m}: {len(items)} pacientes ({capturas} con captura), "
+                 f"{len(lotes)} lotes en {min(procesos, len(lotes) or 1)} procesos")
+        hechos: Dict[Any, Tuple[List[Dict[str, Any]], bool]] = {}
+        if procesos > 1 and len(lotes) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            try:
+                with ProcessPoolExecutor(max_workers=min(procesos, len(lotes))) as pool:
+                    for salida in pool.map(_reanalizar_lote, [m] * len(lotes), lotes):
+                        hechos.update((idx, (filas, ok)) for idx, filas, ok in salida)
+            except Exception as e:
+                log_warn(f"Pool de procesos no disponible ({pretty_error(e)}); se analiza en este proceso")
+                hechos.clear()
+        if not hechos:
+            for lote in lotes:
+                hechos.update((idx, (filas, ok)) for idx, filas, ok in _reanalizar_lote(m, lote))
+            ACTIVE_MISSIONS = [m]
+        # Ensamblar en el orden de la nómina (pre-vuelo incluido)
+        resultados_por_mision = {0: []}
+        stats = {"exitosos": 0, "fallidos": 0, "saltados": 0}
+        replicables: Dict[Any, Tuple[List[Dict[str, Any]], bool]] = {}
+        for idx, row in df.iterrows():
+            filas, ok = hechos[idx] if idx in hechos else _filas_desde_prevuelo(plan, replicables, idx, row)
+            if idx in plan.con_duplicados:
+                replicables[idx] = (filas, ok)
+            _contar_resultado(stats, filas, ok)
+            resultados_por_mision[0].extend(filas[:1])
+        archivo = generar_excel_revision(resultados_por_mision, [m], nombre_m,
+                                         m.get("ruta_salida", RUTA_CARPETA_SALIDA))
+        log_ok(f"🧪 Offline {nombre_m}: {stats['exitosos']} ok · {stats['saltados']} saltados · "
+               f"{stats['fallidos']} fallidos en {time.time() - t0:.1f}s → {archivo or 'Error'}")
+        if archivo:
+            generados.append(archivo)
+    return generados
 # =============================================================================
 #                         EJECUCIÃ“N DIRECTA
 # =============================================================================
 if __name__ == "__main__":
-    ejecutar_revision()
+    if "--offline" in sys.argv:
+        reanalizar_offline()
+    else:
+        ejecutar_revision()